@@ -0,0 +1,167 @@
+"""
+Negotiated response compression (brotli/gzip) with a compressed-body cache
+Bodies under the size threshold are sent as-is. Compressed output is cached by
+body digest, so repeated identical payloads (cached or unchanged data) skip the
+compressor entirely
+"""
+
+import gzip
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS, RESPONSE_BYTES
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always available
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html', 'text/css', 'application/javascript'}
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """
+    Parse an Accept-Encoding header into {coding: q}
+
+    Example:
+        "gzip;q=0.8, br" -> {'gzip': 0.8, 'br': 1.0}
+    """
+    codings = {}
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip().lower()] = q
+    return codings
+
+
+class CompressedBodyCache:
+    """Thread-safe LRU of compressed bodies bounded by total bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key, body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = body
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+class ResponseCompressor:
+    """
+    after_request hook compressing large responses with the best accepted coding
+    """
+
+    def __init__(self, min_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5,
+                 cache_bytes: int = 32 * 1024 * 1024):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache = CompressedBodyCache(cache_bytes)
+        self.encodings = ('br', 'gzip') if brotli else ('gzip',)
+
+    def choose_encoding(self, accept_encoding: str):
+        """Pick the preferred supported coding the client accepts (None for identity)"""
+        accepted = parse_accept_encoding(accept_encoding)
+        wildcard = accepted.get('*', 0.0)
+        best, best_q = None, 0.0
+        for coding in self.encodings:
+            q = accepted.get(coding, wildcard)
+            if q > best_q:
+                best, best_q = coding, q
+        return best
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """Compress a body, reusing a cached result for identical input"""
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        cached = self.cache.get(key)
+        if cached is not None:
+            CACHE_REQUESTS.inc('compression', 'hit')
+            return cached
+        CACHE_REQUESTS.inc('compression', 'miss')
+
+        if encoding == 'br':
+            compressed = brotli.compress(body, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+        self.cache.put(key, compressed)
+        return compressed
+
+    def process(self, request, response):
+        """Compress a response in place when it is worth it"""
+        if (response.direct_passthrough or response.status_code != 200
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        body = response.get_data()
+        encoding = None
+        if len(body) >= self.min_size:
+            encoding = self.choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            RESPONSE_BYTES.inc('identity', amount=len(body))
+            return response
+
+        compressed = self.compress(body, encoding)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        response.headers['Content-Length'] = str(len(compressed))
+        RESPONSE_BYTES.inc(encoding, amount=len(compressed))
+        return response
+
+
+def install_compression(app, **options) -> ResponseCompressor:
+    """
+    Compress responses of a Flask app
+
+    Args:
+        app: Flask application
+        options: ResponseCompressor settings (min_size, gzip_level, ...)
+
+    Returns:
+        The installed ResponseCompressor
+    """
+    from flask import request
+
+    compressor = ResponseCompressor(**options)
+
+    @app.after_request
+    def _compress_response(response):
+        return compressor.process(request, response)
+
+    logger.info(f"Response compression enabled ({', '.join(compressor.encodings)}, >= {compressor.min_size} bytes)")
+    return compressor
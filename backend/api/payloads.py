@@ -0,0 +1,63 @@
+"""
+Response bodies shared by the Flask routes and the static export
+Plain dicts built from the database, so a pre-rendered file and a live response
+for the same request carry the same data
+"""
+
+
+def players_payload(snapshot, refreshing: bool = False) -> dict:
+    """Body of /api/players for a player universe snapshot"""
+    return {
+        'players': list(snapshot.players),
+        'as_of': snapshot.loaded_at.isoformat() if snapshot.loaded_at else None,
+        'refreshing': refreshing
+    }
+
+
+def player_stats_payload(db, player_id: str, season: int) -> dict:
+    """Body of /api/players/<player_id>/stats: weekly points plus volatility bands"""
+    weekly_stats = []
+    for stat in db.get_player_stats(player_id, season):
+        diff = stat['actual_points'] - (stat['projected_points'] or 0)
+        weekly_stats.append({
+            'week': stat['week'],
+            'actual': stat['actual_points'],
+            'projected': stat['projected_points'],
+            'diff': round(diff, 2)
+        })
+
+    bands = [
+        {
+            'week': band['week'],
+            'projection': band['projection'],
+            'p10': band['p10'],
+            'p50': band['p50'],
+            'p90': band['p90'],
+            'volatility': band['volatility']
+        }
+        for band in db.get_volatility_bands(player_id, season)
+    ]
+
+    return {
+        'player_id': player_id,
+        'season': season,
+        'weekly_stats': weekly_stats,
+        'volatility_bands': bands
+    }
+
+
+def week_projections_payload(db, season: int, week: int) -> dict:
+    """Body of /api/week-projections/<week>: every player's projection, highest first"""
+    rows = sorted(db.get_week_projections(season, week), key=lambda row: -row['projected_points'])
+    return {
+        'week': week,
+        'season': season,
+        'projections': [
+            {
+                'player_id': row['player_id'],
+                'position': row['position'],
+                'projected_points': row['projected_points']
+            }
+            for row in rows
+        ]
+    }
@@ -0,0 +1,63 @@
+"""
+Pluggable JSON serialization for API responses
+Uses orjson when it is installed (several times faster than the stdlib encoder on
+large player lists) and falls back to a compact stdlib provider otherwise
+"""
+
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+class CompactJSONProvider(DefaultJSONProvider):
+    """Stdlib encoder without key sorting or whitespace"""
+
+    sort_keys = False
+    compact = True
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson-backed provider; responses are built straight from the encoded bytes"""
+
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson else 0
+
+    def dumps(self, obj, **kwargs) -> str:
+        return orjson.dumps(obj, default=self.default, option=self.options).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=self.default, option=self.options)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def install_json_provider(app, serializer: str = 'auto'):
+    """
+    Select the JSON provider used by jsonify and request.get_json
+
+    Args:
+        app: Flask application
+        serializer: 'orjson', 'stdlib' or 'auto' (orjson when installed)
+
+    Returns:
+        Name of the serializer installed
+    """
+    if serializer == 'orjson' and orjson is None:
+        raise ImportError("JSON_SERIALIZER=orjson but orjson is not installed")
+    if serializer in ('auto', 'orjson') and orjson is not None:
+        app.json = OrjsonProvider(app)
+        name = 'orjson'
+    else:
+        app.json = CompactJSONProvider(app)
+        name = 'stdlib'
+    logger.info(f"Using {name} JSON serializer")
+    return name
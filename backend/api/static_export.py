@@ -0,0 +1,219 @@
+"""
+Static JSON export - pre-render read-mostly API responses for a CDN or nginx
+Player stats (one file per player-season), the player list and each week's
+projections are written as content-hashed files (players/4046/stats-2024.<hash>.json)
+with optional .gz/.br siblings for gzip_static/brotli_static. manifest.json maps each
+API URL to its current file and records a fingerprint per player-season, so the next
+export only re-renders players whose weekly_stats or volatility_bands rows changed.
+Rendering is spread over a process pool
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import quote
+
+from api.payloads import player_stats_payload, players_payload, week_projections_payload
+from data.player_universe import PlayerSnapshot
+from database import DatabaseConnection
+
+try:
+    import orjson
+except ImportError:  # Optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip is always written
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def render(obj) -> bytes:
+    """Encode a payload compactly (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def _atomic_write(path: str, data: bytes):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_static(out_dir: str, stem: str, body: bytes, compress: bool = True) -> str:
+    """
+    Write a body as <stem>.<hash>.json, plus .gz and .br copies when compressing
+    Files that already exist are left alone: same name means same content
+
+    Returns:
+        Path of the JSON file relative to out_dir
+    """
+    relpath = f"{stem}.{hashlib.sha256(body).hexdigest()[:16]}.json"
+    path = os.path.join(out_dir, relpath)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    variants = []
+    if compress:
+        variants.append(('.gz', lambda: gzip.compress(body, compresslevel=9, mtime=0)))
+        if brotli is not None:
+            variants.append(('.br', lambda: brotli.compress(body, quality=11)))
+    for suffix, encode in variants:
+        if not os.path.exists(path + suffix):
+            _atomic_write(path + suffix, encode())
+    # The plain file goes last, so its presence means every copy is complete
+    if not os.path.exists(path):
+        _atomic_write(path, body)
+    return relpath
+
+
+def stats_url(player_id: str, season: int) -> str:
+    return f"/api/players/{player_id}/stats?season={season}"
+
+
+def week_projections_url(week: int, season: int) -> str:
+    return f"/api/week-projections/{week}?season={season}"
+
+
+def _url_season(url: str):
+    _, found, season = url.rpartition('?season=')
+    return int(season) if found else None
+
+
+def load_manifest(out_dir: str) -> dict:
+    """Read the current manifest (an empty one if there is none)"""
+    try:
+        with open(os.path.join(out_dir, MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'generated_at': None, 'files': {}, 'fingerprints': {}}
+
+
+def _render_player_stats(db, out_dir: str, season: int, player_ids: list, compress: bool) -> list:
+    return [
+        (season, player_id, write_static(out_dir, f"players/{quote(player_id, safe='')}/stats-{season}",
+                                 render(player_stats_payload(db, player_id, season)), compress))
+        for player_id in player_ids
+    ]
+
+
+# Per-process connection for pool workers
+_worker_db = None
+
+
+def _init_worker(db_path: str, partition_dir: str):
+    global _worker_db
+    _worker_db = DatabaseConnection(db_path, partition_dir)
+
+
+def _render_batch(args: tuple) -> list:
+    return _render_player_stats(_worker_db, *args)
+
+
+def _prune(out_dir: str, keep: set) -> int:
+    """Delete exported files the manifest no longer references"""
+    removed = 0
+    for root, _, names in os.walk(out_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            relpath = os.path.relpath(path, out_dir)
+            base = relpath[:-3] if relpath.endswith(('.gz', '.br')) else relpath
+            if base.startswith(MANIFEST_NAME) or base in keep:
+                continue
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def export_static(db, out_dir: str, seasons: list, workers: int = None, compress: bool = True,
+                  full: bool = False, prune: bool = False, batch_size: int = 250) -> dict:
+    """
+    Export static payloads, re-rendering only players that changed since the last export
+
+    Args:
+        db: DatabaseConnection instance
+        out_dir: Export root (served as-is by nginx or synced to a CDN)
+        seasons: Seasons to export; other seasons already in the manifest are kept
+        workers: Render processes (default: CPU count; 1 renders in this process)
+        compress: Also write .gz (and .br when brotli is installed) copies
+        full: Re-render every player regardless of fingerprints
+        prune: Delete files that are no longer referenced
+        batch_size: Players per worker task
+
+    Returns:
+        Dict with rendered, unchanged, removed and seconds
+    """
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    previous = load_manifest(out_dir)
+    seasons = sorted({int(season) for season in seasons})
+    workers = workers or os.cpu_count() or 1
+
+    # Files for seasons outside this export carry over untouched
+    files = {url: relpath for url, relpath in previous['files'].items()
+             if _url_season(url) is not None and _url_season(url) not in seasons}
+    fingerprints = {season: markers for season, markers in previous['fingerprints'].items()
+                    if int(season) not in seasons}
+
+    # The player list is always rebuilt; as_of is left null so unchanged lists hash the same
+    snapshot = PlayerSnapshot(tuple(
+        {key: record[key] for key in ('player_id', 'name', 'position', 'team', 'injury_status')}
+        for record in db.get_player_records().values()
+    ))
+    files['/api/players'] = write_static(out_dir, 'players', render(players_payload(snapshot)), compress)
+
+    tasks, unchanged = [], 0
+    for season in seasons:
+        current = db.get_player_fingerprints(season)
+        known = previous['fingerprints'].get(str(season), {})
+        stale = []
+        for player_id, marker in current.items():
+            url = stats_url(player_id, season)
+            relpath = previous['files'].get(url)
+            if (full or known.get(player_id) != marker or relpath is None
+                    or not os.path.exists(os.path.join(out_dir, relpath))):
+                stale.append(player_id)
+            else:
+                files[url] = relpath
+                unchanged += 1
+        tasks += [(out_dir, season, stale[i:i + batch_size], compress) for i in range(0, len(stale), batch_size)]
+        fingerprints[str(season)] = current
+
+        for week in db.get_projection_weeks(season):
+            body = render(week_projections_payload(db, season, week))
+            files[week_projections_url(week, season)] = write_static(
+                out_dir, f"week-projections/{season}/{week}", body, compress)
+
+    if workers == 1 or len(tasks) <= 1:
+        batches = [_render_player_stats(db, *task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(min(workers, len(tasks)), initializer=_init_worker,
+                                 initargs=(db.db_path, db.partition_dir)) as pool:
+            batches = list(pool.map(_render_batch, tasks))
+    rendered = 0
+    for batch in batches:
+        for season, player_id, relpath in batch:
+            files[stats_url(player_id, season)] = relpath
+            rendered += 1
+
+    manifest = {'generated_at': datetime.now().isoformat(), 'files': files, 'fingerprints': fingerprints}
+    body = json.dumps(manifest, separators=(',', ':'), sort_keys=True).encode('utf-8')
+    if compress:
+        _atomic_write(os.path.join(out_dir, MANIFEST_NAME + '.gz'), gzip.compress(body, compresslevel=9, mtime=0))
+    _atomic_write(os.path.join(out_dir, MANIFEST_NAME), body)
+
+    removed = _prune(out_dir, set(files.values())) if prune else 0
+    seconds = time.perf_counter() - start
+    logger.info(f"Static export: {rendered} players rendered, {unchanged} unchanged, "
+                f"{removed} files pruned in {seconds:.2f}s")
+    return {'rendered': rendered, 'unchanged': unchanged, 'removed': removed, 'seconds': seconds}
@@ -1,33 +1,258 @@
 """
 Flask application entry point for Fantasy Football Player Stock Visualization API
 """
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 import logging
+import requests
 from datetime import datetime
+from functools import partial, wraps
 
-from data.sleeper_client import SleeperClient
+from data.sleeper_client import SleeperClient, host_rate_budget
 from data.ppr_calculator import calculate_ppr_points
-from data.market_manager import get_market_status, get_current_nfl_week
-from database import DatabaseConnection
+from data.market_manager import GameSchedule, InjuryLockIndex, get_market_status, get_current_nfl_week
+from data.player_diff import field_changed_kind
+from data.host_lock import claim_run
+from data.projection_history import compact_projection_history, projection_as_of, projection_path
+from data.projection_service import record_projection_history
+from data.downsample import METHODS as SERIES_METHODS, SERIES_METRICS, SeriesCache, build_player_series
+from data.leaderboard import Leaderboard
+from data.movers import (DIRECTIONS as MOVER_DIRECTIONS, GROUPS as HEATMAP_GROUPS, METRICS as MOVER_METRICS,
+                         MoversIndex)
+from data.order_book import BUY, SELL, FillWriter, MatchingEngine, OrderFailed, OrderRejected
+from data.player_registry import PlayerRegistry
+from data.price_alerts import AlertDispatcher, AlertRejected, PriceAlertEngine
+from data.player_universe import PlayerUniverse
+from data.realtime_service import RealtimeService
+from data.similarity import METHODS as SIMILARITY_METHODS, SimilarityIndex
+from data.scheduler import PRIORITY_BACKGROUND, Scheduler
+from database import DatabaseConnection, InvalidationBus
+from database.invalidation import PLAYER, PLAYERS, PROJECTIONS, RESET, STATS
+from models.player import MAX_WEEKS
 from config import Config
+from metrics import REGISTRY, SLEEPER_RATE_LIMIT_REMAINING, instrument_app
+from api.compression import install_compression
+from api.payloads import player_stats_payload, players_payload, week_projections_payload
+from api.serialization import install_json_provider
+from profiling import install_profiling
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+# Order books, price alerts and the leaderboard live in one process's memory. The
+# production server runs them in a dedicated trading process and sets its URL in the
+# workers, which forward those routes to it; None serves them from this process
+app.config['TRADING_URL'] = None
 CORS(app)  # Enable CORS for all routes
+instrument_app(app)  # Per-route latency histograms
+install_profiling(
+    app,
+    Config.PROFILE_DIR,
+    token=Config.PROFILE_TOKEN,
+    sample_rate=Config.PROFILE_SAMPLE_RATE,
+    interval=Config.PROFILE_INTERVAL,
+    max_files=Config.PROFILE_MAX_FILES,
+    max_bytes=Config.PROFILE_MAX_BYTES
+)
+install_json_provider(app, Config.JSON_SERIALIZER)
+compressor = install_compression(
+    app,
+    min_size=Config.COMPRESSION_MIN_SIZE,
+    gzip_level=Config.COMPRESSION_GZIP_LEVEL,
+    cache_bytes=Config.COMPRESSION_CACHE_BYTES
+)
 
 # Initialize services
-sleeper_client = SleeperClient()
-db = DatabaseConnection()
+rate_budget = host_rate_budget()
+sleeper_client = SleeperClient(rate_budget=rate_budget)
+SLEEPER_RATE_LIMIT_REMAINING.set_function(sleeper_client.remaining_calls)
+db = DatabaseConnection(Config.DATABASE_PATH, Config.DATABASE_PARTITION_DIR)
+realtime_service = RealtimeService(sleeper_client)
+leaderboard = Leaderboard()
+leaderboard.load_from_db(db)
+realtime_service.add_price_listener(leaderboard.update_price)
+player_registry = PlayerRegistry(Config.PLAYER_REGISTRY_PATH) if Config.PLAYER_REGISTRY_PATH else None
+player_universe = PlayerUniverse(db, sleeper_client, registry=player_registry)
+player_universe.load_from_db()
+similarity_index = SimilarityIndex(db, season=2024)
+similarity_index.refresh()
+movers_index = MoversIndex(db, season=2024)
+movers_index.refresh()
+series_cache = SeriesCache(Config.SERIES_CACHE_ENTRIES, Config.SERIES_CACHE_TTL)
+lock_index = InjuryLockIndex()
+lock_index.load(player_universe.snapshot().players)
+player_universe.change_feed.subscribe(lock_index.on_changes, kinds=[field_changed_kind('injury_status')])
+player_universe.change_feed.subscribe(movers_index.on_changes,
+                                      kinds=[field_changed_kind('team'), field_changed_kind('position')])
+
+def add_fills_to_leaderboard(fills):
+    """Fill listener: each side of a fill closes that user's opposite holding first, then opens the rest"""
+    for fill in fills:
+        leaderboard.add_trade(fill.buyer, fill.player_id, BUY, fill.price, fill.quantity)
+        leaderboard.add_trade(fill.seller, fill.player_id, SELL, fill.price, fill.quantity)
+
+def publish_fill_prices(fills):
+    """Fill listener: a player's last traded price in each committed batch is its new live price"""
+    prices = {fill.player_id: fill.price for fill in fills}
+    for player_id, price in prices.items():
+        realtime_service.publish_price(player_id, price)
+
+fill_writer = FillWriter(db)
+fill_writer.add_listener(add_fills_to_leaderboard)
+fill_writer.add_listener(publish_fill_prices)
+game_schedule = GameSchedule()
+matching_engine = MatchingEngine(fill_writer, lock_index=lock_index, max_quantity=Config.ORDER_MAX_QUANTITY,
+                                 players=lambda player_id: player_universe.snapshot().get(player_id),
+                                 schedule=game_schedule)
+alert_dispatcher = AlertDispatcher(db)
+price_alerts = PriceAlertEngine(db, alert_dispatcher, max_per_user=Config.PRICE_ALERTS_PER_USER)
+realtime_service.add_price_listener(price_alerts.on_price)
+
+# Recurring jobs share the Sleeper rate budget with request handlers
+scheduler = Scheduler(rate_budget, workers=Config.SCHEDULER_WORKERS)
+scheduler.add_job(
+    'player_refresh',
+    player_universe.refresh,
+    interval=player_universe.refresh_interval,
+    priority=PRIORITY_BACKGROUND,
+    jitter=30,
+    retry_interval=player_universe.retry_interval
+)
+scheduler.add_job(
+    'schedule_refresh',
+    partial(game_schedule.refresh, sleeper_client, 2024),
+    interval=Config.SCHEDULE_REFRESH_INTERVAL,
+    priority=PRIORITY_BACKGROUND,
+    run_immediately=True
+)
+scheduler.add_job(
+    'similarity_refresh',
+    similarity_index.refresh,
+    interval=Config.SIMILARITY_REFRESH_INTERVAL,
+    priority=PRIORITY_BACKGROUND
+)
+scheduler.add_job(
+    'movers_refresh',
+    movers_index.refresh,
+    interval=Config.MOVERS_REFRESH_INTERVAL,
+    priority=PRIORITY_BACKGROUND
+)
+
+def pull_projection_history(season: int = 2024) -> int:
+    """Record the current week's projections in projection_history, from one worker per interval"""
+    week = get_current_nfl_week(season)
+    if not week or not claim_run(f"{db.db_path}.projection-pull.lock", Config.PROJECTION_PULL_INTERVAL):
+        return 0
+    return record_projection_history(db, sleeper_client, week, season)
+
+scheduler.add_job(
+    'projection_pull',
+    pull_projection_history,
+    interval=Config.PROJECTION_PULL_INTERVAL,
+    priority=PRIORITY_BACKGROUND,
+    jitter=60
+)
+scheduler.add_job(
+    'metrics_flush',
+    REGISTRY.flush,  # no-op unless the production server shares metrics between processes
+    interval=Config.METRICS_FLUSH_INTERVAL,
+    priority=PRIORITY_BACKGROUND
+)
+scheduler.add_job(
+    'projection_compaction',
+    partial(compact_projection_history, db, 2024, Config.PROJECTION_COMPACT_AFTER),
+    interval=Config.PROJECTION_COMPACTION_INTERVAL,
+    priority=PRIORITY_BACKGROUND,
+    jitter=60
+)
+
+# Drop cached data when any process (another worker, an ingest script) writes it
+invalidation_bus = InvalidationBus(Config.DATABASE_PATH, interval=Config.INVALIDATION_POLL_INTERVAL,
+                                   retention=Config.INVALIDATION_RETENTION)
+
+def on_stats_invalidated(weeks):
+    """Refresh the season indexes now when their season's weekly_stats were written"""
+    seasons = {value.split(':')[0] for value in weeks}
+    for name, index in (('movers_refresh', movers_index), ('similarity_refresh', similarity_index)):
+        if str(index.season) in seasons:
+            scheduler.run_now(name)
+
+def on_projections_invalidated(weeks):
+    """Reload the season indexes' weeks whose projections were written; their weekly_stats ids don't move"""
+    for value in weeks:
+        season, week = value.split(':')
+        for index in (movers_index, similarity_index):
+            if str(index.season) == season:
+                index.reload_week(int(week))
+
+invalidation_bus.subscribe(PLAYER, series_cache.invalidate_players)
+invalidation_bus.subscribe(STATS, on_stats_invalidated)
+invalidation_bus.subscribe(PROJECTIONS, on_projections_invalidated)
+invalidation_bus.subscribe(PLAYERS, lambda values: player_universe.follow())
+invalidation_bus.subscribe(RESET, series_cache.clear)
+
+# Large responses every client loads on startup, filled in with the warmed season and current week
+WARM_PATHS = ('/api/players', '/api/week-projections/{week}?season={season}')
+
+def warm_caches(season: int = 2024) -> list:
+    """
+    Load players, then render the startup routes once before serving
+    Called once in the preloading process so forked workers inherit the player
+    snapshot, the NFL calendar and the compressed bodies of those responses.
+    Upstream failures are logged and left to the background refresher
+    
+    Returns:
+        Paths rendered with a 200
+    """
+    if not len(player_universe.snapshot()):
+        logger.info("Warming player universe from Sleeper API")
+        player_universe.refresh()
+    
+    week = get_current_nfl_week(season) or 1
+    warmed = []
+    with app.test_client() as client:
+        for path in WARM_PATHS:
+            path = path.format(week=week, season=season)
+            # One request per coding, so either kind of client hits the compressed-body cache
+            for encoding in compressor.encodings:
+                response = client.get(path, headers={'Accept-Encoding': encoding})
+            if response.status_code == 200:
+                warmed.append(path)
+            else:
+                logger.warning(f"Could not warm {path}: HTTP {response.status_code}")
+    logger.info(f"Warmed {len(warmed)} routes for {season} week {week}")
+    return warmed
+
+def start_background_services():
+    """Start per-process background threads (call after forking)"""
+    if app.config['TRADING_URL'] is None:
+        # Only the process serving the trading routes holds the alert index
+        price_alerts.load_from_db()
+    if not len(player_universe.snapshot()):
+        scheduler.run_now('player_refresh')
+    scheduler.start()
+    invalidation_bus.start()
+
+def stop_background_services():
+    """Stop background threads for a graceful shutdown"""
+    invalidation_bus.stop()
+    scheduler.stop()
+    fill_writer.stop()
+    alert_dispatcher.stop()
+    REGISTRY.flush()
 
 @app.route('/')
 def health_check():
     """Health check endpoint"""
     return {'status': 'healthy', 'timestamp': datetime.now().isoformat()}
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics endpoint"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/current-week', methods=['GET'])
 def get_current_week():
     """Get current NFL week number"""
@@ -41,32 +266,9 @@ def get_current_week():
 
 @app.route('/api/players', methods=['GET'])
 def get_players():
-    """Get all available players"""
+    """Get all available players from the current player universe snapshot"""
     try:
-        # Fetch from database first
-        query = "SELECT player_id, name, position, team FROM players"
-        db_players = db.execute_query(query)
-        
-        if not db_players:
-            # If no players in DB, fetch from Sleeper API
-            logger.info("No players in database, fetching from Sleeper API")
-            players = sleeper_client.get_all_players()
-            
-            # Store in database
-            for player_id, player_data in players.items():
-                db.insert_player(
-                    player_id=player_id,
-                    name=player_data.get('full_name', 'Unknown'),
-                    position=player_data.get('position'),
-                    team=player_data.get('team'),
-                    sleeper_id=player_id
-                )
-            
-            return jsonify({'players': [{'player_id': k, 'name': v.get('full_name'), 
-                                        'position': v.get('position'), 'team': v.get('team')} 
-                                       for k, v in list(players.items())[:100]]})
-        
-        return jsonify({'players': db_players})
+        return jsonify(players_payload(player_universe.snapshot(), player_universe.refreshing))
     except Exception as e:
         logger.error(f"Error getting players: {e}")
         return jsonify({'error': str(e)}), 500
@@ -76,28 +278,130 @@ def get_player_stats(player_id):
     """Get a specific player's weekly stats and projections"""
     try:
         season = request.args.get('season', 2024, type=int)
+        return jsonify(player_stats_payload(db, player_id, season))
+    except Exception as e:
+        logger.error(f"Error getting player stats: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/players/<player_id>/series', methods=['GET'])
+def get_player_series(player_id):
+    """Get a player's points series downsampled to a chart width"""
+    try:
+        metric = request.args.get('metric', 'actual')
+        method = request.args.get('method', 'lttb')
+        end = request.args.get('end', 2024, type=int)
+        start = request.args.get('start', end, type=int)
+        width = min(max(request.args.get('width', 300, type=int), 3), Config.SERIES_MAX_WIDTH)
+        if metric not in SERIES_METRICS:
+            return jsonify({'error': f"metric must be one of {', '.join(SERIES_METRICS)}"}), 400
+        if method not in SERIES_METHODS:
+            return jsonify({'error': f"method must be one of {', '.join(SERIES_METHODS)}"}), 400
         
-        # Get stats from database
-        stats = db.get_player_stats(player_id, season)
+        series = series_cache.get_or_compute(
+            (player_id, metric, start, end, width, method),
+            lambda: build_player_series(db.get_player_series(player_id, start, end), metric, width, method)
+        )
+        return jsonify({
+            'player_id': player_id,
+            'metric': metric,
+            'method': method,
+            'start': start,
+            'end': end,
+            'width': width,
+            **series
+        })
+    except Exception as e:
+        logger.error(f"Error getting player series: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/players/<player_id>/similar', methods=['GET'])
+def get_similar_players(player_id):
+    """Get the players whose weekly scoring most resembles this player's"""
+    try:
+        k = min(max(request.args.get('k', 10, type=int), 1), 50)
+        method = request.args.get('method', 'cosine')
+        position = request.args.get('position')
+        if method not in SIMILARITY_METHODS:
+            return jsonify({'error': f"method must be one of {', '.join(SIMILARITY_METHODS)}"}), 400
+        if player_id not in similarity_index:
+            return jsonify({'error': 'Player has no stats this season'}), 404
         
-        # Format response
-        formatted_stats = []
-        for stat in stats:
-            diff = stat['actual_points'] - (stat['projected_points'] or 0)
-            formatted_stats.append({
-                'week': stat['week'],
-                'actual': stat['actual_points'],
-                'projected': stat['projected_points'],
-                'diff': round(diff, 2)
+        snapshot = player_universe.snapshot()
+        similar = []
+        for other_id, score in similarity_index.neighbors(player_id, k, method, position):
+            player = snapshot.get(other_id) or {}
+            similar.append({
+                'player_id': other_id,
+                'name': player.get('name'),
+                'position': player.get('position'),
+                'team': player.get('team'),
+                'score': score
             })
-        
         return jsonify({
             'player_id': player_id,
-            'season': season,
-            'weekly_stats': formatted_stats
+            'season': similarity_index.season,
+            'method': method,
+            'similar': similar
         })
     except Exception as e:
-        logger.error(f"Error getting player stats: {e}")
+        logger.error(f"Error getting similar players: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/movers', methods=['GET'])
+def get_movers():
+    """Get the players who beat/missed projections, moved or swung the most in a week"""
+    try:
+        week = request.args.get('week', movers_index.latest_week or 1, type=int)
+        metric = request.args.get('metric', 'diff')
+        direction = request.args.get('direction', 'top')
+        n = min(max(request.args.get('n', 10, type=int), 1), 100)
+        if metric not in MOVER_METRICS:
+            return jsonify({'error': f"metric must be one of {', '.join(MOVER_METRICS)}"}), 400
+        if direction not in MOVER_DIRECTIONS:
+            return jsonify({'error': f"direction must be one of {', '.join(MOVER_DIRECTIONS)}"}), 400
+        if not 1 <= week <= MAX_WEEKS:
+            return jsonify({'error': f"week must be between 1 and {MAX_WEEKS}"}), 400
+        
+        snapshot = player_universe.snapshot()
+        movers = movers_index.movers(week, metric, n, direction, request.args.get('team'),
+                                     request.args.get('position'))
+        for mover in movers:
+            player = snapshot.get(mover['player_id']) or {}
+            mover.update(name=player.get('name'), position=player.get('position'), team=player.get('team'))
+        return jsonify({
+            'season': movers_index.season,
+            'week': week,
+            'metric': metric,
+            'direction': direction,
+            'movers': movers
+        })
+    except Exception as e:
+        logger.error(f"Error getting movers: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/movers/heatmap', methods=['GET'])
+def get_movers_heatmap():
+    """Get a metric's mean per team or position for a week"""
+    try:
+        week = request.args.get('week', movers_index.latest_week or 1, type=int)
+        metric = request.args.get('metric', 'diff')
+        group_by = request.args.get('group_by', 'team')
+        if metric not in MOVER_METRICS:
+            return jsonify({'error': f"metric must be one of {', '.join(MOVER_METRICS)}"}), 400
+        if group_by not in HEATMAP_GROUPS:
+            return jsonify({'error': f"group_by must be one of {', '.join(HEATMAP_GROUPS)}"}), 400
+        if not 1 <= week <= MAX_WEEKS:
+            return jsonify({'error': f"week must be between 1 and {MAX_WEEKS}"}), 400
+        
+        return jsonify({
+            'season': movers_index.season,
+            'week': week,
+            'metric': metric,
+            'group_by': group_by,
+            'cells': movers_index.heatmap(week, metric, group_by, request.args.get('position'))
+        })
+    except Exception as e:
+        logger.error(f"Error getting movers heatmap: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/players/<player_id>/projection', methods=['GET'])
@@ -126,11 +430,45 @@ def get_player_projection(player_id):
         logger.error(f"Error getting projection: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/players/<player_id>/projection-history', methods=['GET'])
+def get_player_projection_history(player_id):
+    """Get every projection change for a player-week, or the projection as of a time"""
+    try:
+        season = request.args.get('season', 2024, type=int)
+        week = request.args.get('week', get_current_nfl_week(), type=int)
+        try:
+            start, end, as_of = (datetime.fromisoformat(request.args[name]) if request.args.get(name) else None
+                                 for name in ('start', 'end', 'as_of'))
+        except ValueError:
+            return jsonify({'error': 'start, end and as_of must be ISO 8601 timestamps'}), 400
+        
+        if as_of is not None:
+            return jsonify({
+                'player_id': player_id,
+                'season': season,
+                'week': week,
+                'as_of': as_of.isoformat(),
+                'projected_points': projection_as_of(db, player_id, season, week, as_of)
+            })
+        path = projection_path(db, player_id, season, week, start, end)
+        return jsonify({
+            'player_id': player_id,
+            'season': season,
+            'week': week,
+            'points': [
+                {'at': datetime.fromtimestamp(at / 1000).isoformat(), 'projected_points': points}
+                for at, points in path
+            ]
+        })
+    except Exception as e:
+        logger.error(f"Error getting projection history: {e}")
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/market-status', methods=['GET'])
 def get_market_status_endpoint():
     """Get current market status"""
     try:
-        market = get_market_status()
+        market = get_market_status(lock_index=lock_index)
         return jsonify(market.to_dict())
     except Exception as e:
         logger.error(f"Error getting market status: {e}")
@@ -142,15 +480,157 @@ def get_week_projections(week):
     try:
         season = request.args.get('season', 2024, type=int)
         
-        # This would fetch projections for the week
-        # Implementation depends on how projections are stored
+        return jsonify(week_projections_payload(db, season, week))
+    except Exception as e:
+        logger.error(f"Error getting week projections: {e}")
+        return jsonify({'error': str(e)}), 500
+
+trading_session = requests.Session()
+
+def trading_route(view):
+    """
+    Serve a route from the process that owns the order books, price alerts and leaderboard
+    In the production server's workers the request is forwarded to the trading
+    process; elsewhere (one process serving everything) the view runs here
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        url = app.config['TRADING_URL']
+        if url is None:
+            return view(*args, **kwargs)
+        try:
+            upstream = trading_session.request(
+                request.method, url + request.full_path, data=request.get_data(),
+                headers={'Content-Type': request.content_type} if request.content_type else None,
+                timeout=Config.TRADING_TIMEOUT
+            )
+        except requests.RequestException as e:
+            logger.error(f"Trading process unavailable for {request.path}: {e}")
+            return jsonify({'error': 'Trading service unavailable'}), 503
+        return Response(upstream.content, status=upstream.status_code,
+                        content_type=upstream.headers.get('Content-Type'))
+    return wrapper
+
+@app.route('/api/leaderboard', methods=['GET'])
+@trading_route
+def get_leaderboard():
+    """Get the top portfolios ranked by P&L"""
+    try:
+        limit = min(request.args.get('limit', 10, type=int), 100)
+        offset = max(request.args.get('offset', 0, type=int), 0)
         return jsonify({
-            'week': week,
-            'season': season,
-            'projections': []
+            'leaderboard': leaderboard.top(limit, offset),
+            'total_users': len(leaderboard)
         })
     except Exception as e:
-        logger.error(f"Error getting week projections: {e}")
+        logger.error(f"Error getting leaderboard: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/leaderboard/<user_id>', methods=['GET'])
+@trading_route
+def get_leaderboard_rank(user_id):
+    """Get a single user's leaderboard rank"""
+    try:
+        entry = leaderboard.rank_of(user_id)
+        if entry is None:
+            return jsonify({'error': 'User has no positions'}), 404
+        return jsonify(entry)
+    except Exception as e:
+        logger.error(f"Error getting leaderboard rank: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/orders', methods=['POST'])
+@trading_route
+def submit_order():
+    """Place a limit or market order and match it against the player's book"""
+    try:
+        body = request.get_json(silent=True) or {}
+        if not body.get('user_id') or not body.get('player_id'):
+            return jsonify({'error': 'user_id and player_id are required'}), 400
+        result = matching_engine.submit(
+            body['user_id'], body['player_id'], body.get('side'), body.get('quantity'),
+            price=body.get('price'), kind=body.get('type')
+        )
+        return jsonify(result)
+    except OrderRejected as e:
+        return jsonify({'error': str(e)}), 400
+    except OrderFailed as e:
+        logger.error(f"Error submitting order: {e}")
+        return jsonify({'error': str(e), 'status': 'failed'}), 503
+    except Exception as e:
+        logger.error(f"Error submitting order: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/orders/<int:order_id>', methods=['DELETE'])
+@trading_route
+def cancel_order(order_id):
+    """Cancel a user's resting order"""
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        order = matching_engine.cancel(user_id, order_id)
+        if order is None:
+            return jsonify({'error': 'Order not found'}), 404
+        return jsonify({'order': order, 'status': 'cancelled'})
+    except Exception as e:
+        logger.error(f"Error cancelling order: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/orders/book/<player_id>', methods=['GET'])
+@trading_route
+def get_order_book(player_id):
+    """Get the best bid and ask levels for a player"""
+    try:
+        levels = min(max(request.args.get('levels', 10, type=int), 1), 100)
+        return jsonify(matching_engine.snapshot(player_id, levels))
+    except Exception as e:
+        logger.error(f"Error getting order book: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/alerts', methods=['POST'])
+@trading_route
+def create_price_alert():
+    """Create a one-shot alert for when a player's price crosses a threshold"""
+    try:
+        body = request.get_json(silent=True) or {}
+        if not body.get('user_id') or not body.get('player_id'):
+            return jsonify({'error': 'user_id and player_id are required'}), 400
+        alert = price_alerts.add(body['user_id'], body['player_id'], body.get('threshold'), body.get('direction'))
+        return jsonify({'alert': alert._asdict(), 'current_price': price_alerts.price(alert.player_id)})
+    except AlertRejected as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error creating price alert: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/alerts', methods=['GET'])
+def get_price_alerts():
+    """Get a user's alerts, including when and at what price triggered ones fired"""
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        limit = min(max(request.args.get('limit', 100, type=int), 1), 500)
+        return jsonify({'user_id': user_id, 'alerts': db.get_price_alerts(user_id, limit)})
+    except Exception as e:
+        logger.error(f"Error getting price alerts: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/alerts/<int:alert_id>', methods=['DELETE'])
+@trading_route
+def cancel_price_alert(alert_id):
+    """Cancel one of a user's active alerts"""
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        alert = price_alerts.cancel(user_id, alert_id)
+        if alert is None:
+            return jsonify({'error': 'Alert not found'}), 404
+        return jsonify({'alert': alert._asdict(), 'status': 'cancelled'})
+    except Exception as e:
+        logger.error(f"Error cancelling price alert: {e}")
         return jsonify({'error': str(e)}), 500
 
 @app.errorhandler(404)
@@ -164,6 +644,7 @@ def internal_error(e):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5000)
+    start_background_services()
+    app.run(debug=Config.DEBUG, port=5000)
 
 
@@ -0,0 +1,182 @@
+"""
+Timing helpers and baseline comparison for the benchmark suite
+A stored baseline is only meaningful on the machine that recorded it, so every
+run also times a fixed CPU workload (CALIBRATION) and a fixed SQLite workload
+(DB_CALIBRATION), and comparisons scale the baseline by how much faster or
+slower this machine ran them: benchmarks that open database connections
+(DB_BOUND) by the SQLite ratio, everything else by the CPU ratio
+"""
+
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+CALIBRATION = 'calibration.cpu'
+DB_CALIBRATION = 'calibration.db'
+DB_BOUND = ('micro.db.', 'route.', 'load.')
+_CALIBRATION_ROWS = [{'player_id': str(i), 'name': f"Player {i}", 'points': i * 0.37 % 31} for i in range(200)]
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(latencies: list, elapsed: float) -> dict:
+    """
+    Summarize per-operation latencies (seconds)
+
+    Returns:
+        Dict with ops, ops_per_sec, p50_ms, p99_ms and mean_ms
+    """
+    latencies = sorted(latencies)
+    return {
+        'ops': len(latencies),
+        'ops_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 4),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 4),
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 4) if latencies else 0.0,
+    }
+
+
+def measure(func, iterations: int = 1000, warmup: int = 50, slices: int = 5) -> dict:
+    """
+    Time func() repeatedly on the calling thread
+
+    Throughput is that of the fastest of `slices` equal runs of consecutive calls,
+    as timeit takes the best of its repeats: on a shared machine a burst of CPU
+    taken by other guests would otherwise read as a slower build
+
+    Args:
+        func: Zero-argument callable to benchmark
+        iterations: Timed calls
+        warmup: Untimed calls first (fills caches, JIT-free but warms SQLite pages)
+        slices: Runs the timed calls are split into for the throughput
+
+    Returns:
+        summarize() output
+    """
+    for _ in range(warmup):
+        func()
+    latencies = []
+    ends = []
+    start = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t0)
+        ends.append(time.perf_counter())
+    result = summarize(latencies, ends[-1] - start if ends else 0.0)
+
+    size = iterations // slices
+    if slices > 1 and size:
+        starts = [start] + ends
+        best = min(starts[i + size] - starts[i] for i in range(0, size * slices, size))
+        result['ops_per_sec'] = round(size / best, 1) if best else result['ops_per_sec']
+    return result
+
+
+def calibrate(iterations: int = 500) -> dict:
+    """Time the fixed CPU workload (JSON round trip and sort of 200 rows) stored as CALIBRATION"""
+    return measure(lambda: sorted(json.loads(json.dumps(_CALIBRATION_ROWS)), key=lambda row: -row['points']),
+                   iterations)
+
+
+def calibrate_db(iterations: int = 500) -> dict:
+    """
+    Time the fixed SQLite workload stored as DB_CALIBRATION: open a connection to a
+    file database, read 20 rows through an index and close, as each DatabaseConnection
+    call does
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'calibration.db')
+        with sqlite3.connect(path) as conn:
+            conn.execute("CREATE TABLE rows (id INTEGER PRIMARY KEY, player_id TEXT, points REAL)")
+            conn.execute("CREATE INDEX idx_rows_player ON rows(player_id, points)")
+            conn.executemany("INSERT INTO rows (player_id, points) VALUES (?, ?)",
+                             [(str(i % 50), i * 0.37 % 31) for i in range(1000)])
+        conn.close()
+
+        def query():
+            conn = sqlite3.connect(path)
+            conn.row_factory = sqlite3.Row
+            try:
+                [dict(row) for row in conn.execute("SELECT * FROM rows WHERE player_id = ?", ('7',))]
+            finally:
+                conn.close()
+
+        return measure(query, iterations)
+
+
+def machine_speed(results: dict, baseline: dict, calibration: str = CALIBRATION) -> float:
+    """
+    How fast this run's machine is relative to the baseline's: the ratio of their
+    throughputs on a calibration workload (1.0 if either side lacks it)
+    """
+    current, reference = results.get(calibration), baseline.get(calibration)
+    if not current or not reference or not reference.get('ops_per_sec'):
+        return 1.0
+    return current['ops_per_sec'] / reference['ops_per_sec']
+
+
+def compare_to_baseline(results: dict, baseline: dict, tolerance: float = 0.25,
+                        p99_tolerance: float = None, speed: float = 1.0, db_speed: float = None) -> list:
+    """
+    Find regressions against a stored baseline
+
+    A benchmark regresses when throughput falls below (1 - tolerance) x baseline,
+    p99 latency rises above (1 + p99_tolerance) x baseline, or its response grows
+    by more than tolerance. Benchmarks missing from either side are ignored
+
+    Args:
+        results: {name: summarize() output}
+        baseline: Same shape, from a previous run
+        tolerance: Allowed relative throughput loss / size growth
+        p99_tolerance: Allowed relative p99 increase (defaults to tolerance);
+            tail latency is noisier than throughput, so callers usually loosen it
+        speed: machine_speed() of this run; baseline throughput is scaled by it and
+            baseline latency divided by it (byte sizes are compared as stored)
+        db_speed: machine_speed() on DB_CALIBRATION, used instead of speed for
+            DB_BOUND benchmarks (defaults to speed)
+
+    Returns:
+        List of human-readable regression messages (empty if none)
+    """
+    if p99_tolerance is None:
+        p99_tolerance = tolerance
+    if db_speed is None:
+        db_speed = speed
+    regressions = []
+    for name, current in results.items():
+        reference = baseline.get(name)
+        if not reference or name in (CALIBRATION, DB_CALIBRATION):
+            continue
+        scale = db_speed if name.startswith(DB_BOUND) else speed
+        if 'ops_per_sec' in reference:
+            expected = round(reference['ops_per_sec'] * scale, 1)
+            if current.get('ops_per_sec', 0) < expected * (1 - tolerance):
+                regressions.append(f"{name}: throughput {current['ops_per_sec']}/s < baseline {expected}/s")
+        if 'p99_ms' in reference:
+            expected = round(reference['p99_ms'] / scale, 4)
+            if current.get('p99_ms', 0) > expected * (1 + p99_tolerance):
+                regressions.append(f"{name}: p99 {current['p99_ms']}ms > baseline {expected}ms")
+        if 'bytes' in reference and current.get('bytes', 0) > reference['bytes'] * (1 + tolerance):
+            regressions.append(f"{name}: {current['bytes']} bytes > baseline {reference['bytes']} bytes")
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, results: dict):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,92 @@
+"""
+Multi-threaded HTTP load generator
+Runs the Flask app on a real threaded WSGI server and hammers it from client
+threads over keep-alive connections, so socket, WSGI and serialization costs
+are all in the measurement (the test client skips them)
+"""
+
+import http.client
+import itertools
+import logging
+import threading
+import time
+
+from werkzeug.serving import make_server
+
+from benchmarks.harness import summarize
+
+
+class LiveServer:
+    """Serve a WSGI app on an ephemeral localhost port in a background thread"""
+
+    def __init__(self, app):
+        self.server = make_server('127.0.0.1', 0, app, threaded=True)
+        self.port = self.server.server_port
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # no per-request access log
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_load(port: int, paths: list, threads: int = 8, duration: float = 5.0,
+             headers: dict = None) -> dict:
+    """
+    Issue GETs round-robin over paths from several threads for a fixed time
+
+    Args:
+        port: Local server port
+        paths: Request paths (each thread starts at a different offset)
+        threads: Concurrent client threads
+        duration: Seconds to run
+        headers: Extra request headers (e.g. Accept-Encoding)
+
+    Returns:
+        summarize() output plus an 'errors' count (non-200 or connection failures)
+    """
+    headers = headers or {}
+    deadline = time.perf_counter() + duration
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(offset):
+        local, failed = [], 0
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        for path in itertools.islice(itertools.cycle(paths), offset, None):
+            if time.perf_counter() >= deadline:
+                break
+            t0 = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed += 1
+                if response.will_close:
+                    conn.close()
+                    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+                continue
+            local.append(time.perf_counter() - t0)
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    result = summarize(latencies, time.perf_counter() - start)
+    result['errors'] = errors[0]
+    return result
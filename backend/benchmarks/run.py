@@ -0,0 +1,152 @@
+"""
+Run the benchmark suite against a synthetic database and compare with a baseline
+
+Usage (from backend/):
+    python -m benchmarks.run                          # all suites, compare with baseline.json
+    python -m benchmarks.run --suite micro --suite routes
+    python -m benchmarks.run --players 5000 --seasons 3 --update-baseline
+
+Exits non-zero when any benchmark regresses beyond --tolerance.
+The committed baseline.json is a reference recorded on one development machine.
+Other machines are compared after scaling it by the calibration.cpu ratio, or
+the calibration.db ratio for suites that open database connections
+(--absolute turns that off); for a strict comparison, re-record it with
+--update-baseline on the machine that runs the check
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+# Add backend directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import (CALIBRATION, DB_CALIBRATION, calibrate, calibrate_db, compare_to_baseline,
+                                load_baseline, machine_speed, save_baseline)
+from benchmarks.synthetic_db import generate_database
+
+SUITES = ('micro', 'routes', 'load', 'compression', 'orders', 'alerts')
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+
+def load_app(db_path: str, sleeper_url: str):
+    """
+    Import the Flask app bound to the synthetic database
+    The Sleeper base URL points at a local replay server so startup never hits the network
+    """
+    from config import Config
+    Config.DATABASE_PATH = db_path
+    Config.SLEEPER_API_BASE_URL = sleeper_url
+    import app as app_module
+    return app_module
+
+
+def best_of(runs: list) -> dict:
+    """Merge repeated runs keeping each benchmark's best throughput and latencies"""
+    merged = {}
+    for results in runs:
+        for name, result in results.items():
+            best = merged.setdefault(name, dict(result))
+            for key, value in result.items():
+                if key in ('ops_per_sec', 'errors'):
+                    best[key] = max(best[key], value)  # errors: any failing run counts
+                elif key in ('p50_ms', 'p99_ms', 'mean_ms', 'bytes'):
+                    best[key] = min(best[key], value)
+    return merged
+
+
+def run(args) -> dict:
+    from benchmarks import suites
+    from data.sleeper_replay import Cassette, ReplayServer
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.db')
+        summary = generate_database(db_path, args.players, args.seasons, users=args.users, seed=args.seed)
+        print(f"Synthetic database: {summary['players']} players, {summary['weekly_stats']} weekly stats, "
+              f"{summary['portfolio_rows']} positions", file=sys.stderr)
+
+        replay = ReplayServer(Cassette(os.path.join(tmp, 'cassette'))).start()
+        try:
+            app_module = load_app(db_path, replay.url)
+            run_suite = {
+                'micro': lambda: suites.micro_suite(app_module.db, summary, args.iterations),
+                'routes': lambda: suites.route_suite(app_module.app, summary, max(args.iterations // 5, 20)),
+                'load': lambda: suites.load_suite(app_module.app, summary, args.threads, args.duration),
+                'compression': lambda: suites.compression_suite(app_module.app),
+                'orders': lambda: suites.orders_suite(summary, args.iterations, args.threads, args.duration),
+                'alerts': lambda: suites.alerts_suite(summary, args.iterations, args.threads, args.duration,
+                                                      args.alerts),
+            }
+            runs = []
+            for _ in range(args.repeat):
+                for name in SUITES:
+                    if name in args.suite:
+                        # Calibrated next to every suite: on a shared machine speed drifts within a run,
+                        # and the best sample is compared like the best suite result
+                        runs.append({CALIBRATION: calibrate(), DB_CALIBRATION: calibrate_db()})
+                        runs.append(run_suite[name]())
+        finally:
+            replay.close()
+    return best_of(runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark routes, storage and clients on synthetic data")
+    parser.add_argument('--suite', action='append', choices=SUITES, help="Suite to run (repeatable, default all)")
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--seasons', type=int, default=2)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', type=int, default=1000, help="Timed calls per micro benchmark")
+    parser.add_argument('--threads', type=int, default=8, help="Load generator client threads")
+    parser.add_argument('--duration', type=float, default=3.0, help="Seconds per load test")
+    parser.add_argument('--alerts', type=int, default=1000000, help="Active price alerts for the alerts suite")
+    parser.add_argument('--repeat', type=int, default=3, help="Run each suite N times and keep the best result")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed relative throughput loss")
+    parser.add_argument('--p99-tolerance', type=float, default=1.0, help="Allowed relative p99 increase")
+    parser.add_argument('--update-baseline', action='store_true', help="Write results as the new baseline")
+    parser.add_argument('--absolute', action='store_true',
+                        help="Compare raw numbers instead of scaling the baseline by the calibration ratio")
+    parser.add_argument('--output', help="Also write results to this JSON file")
+    args = parser.parse_args()
+    args.suite = args.suite or list(SUITES)
+
+    results = run(args)
+    for name in sorted(results):
+        result = results[name]
+        if 'ops_per_sec' in result:
+            print(f"{name:45s} {result['ops_per_sec']:>12.1f}/s  p50 {result['p50_ms']:>9.3f}ms  "
+                  f"p99 {result['p99_ms']:>9.3f}ms" + (f"  errors {result['errors']}" if result.get('errors') else ''))
+        else:
+            print(f"{name:45s} {result['bytes']:>12d} bytes")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        save_baseline(args.baseline, results)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    speed = 1.0 if args.absolute else machine_speed(results, baseline)
+    db_speed = 1.0 if args.absolute else machine_speed(results, baseline, DB_CALIBRATION)
+    print(f"Machine speed vs baseline: {speed:.2f}x CPU, {db_speed:.2f}x SQLite"
+          + (" (not applied)" if args.absolute else ''))
+    failures = compare_to_baseline(results, baseline, args.tolerance, args.p99_tolerance, speed, db_speed)
+    failures += [f"{name}: {r['errors']} failed requests" for name, r in results.items() if r.get('errors')]
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
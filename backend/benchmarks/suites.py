@@ -0,0 +1,296 @@
+"""
+Benchmark suites
+Each suite returns {benchmark name: result dict}; names are stable so results
+can be compared against baseline.json
+"""
+
+import itertools
+import random
+import tempfile
+import threading
+import time
+
+from benchmarks.harness import measure, summarize
+from benchmarks.load import LiveServer, run_load
+from data.sleeper_replay import Cassette, ReplayServer
+
+SAMPLE_STATS = {
+    'passing_yards': 287, 'passing_tds': 2, 'interceptions': 1, 'rushing_yards': 34,
+    'rushing_tds': 0, 'receptions': 0, 'receiving_yards': 0, 'receiving_tds': 0, 'fumbles_lost': 0,
+}
+
+
+def _sample_ids(summary: dict, count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    return [rng.choice(summary['player_ids']) for _ in range(count)]
+
+
+def micro_suite(db, summary: dict, iterations: int = 2000) -> dict:
+    """PPR scoring, DatabaseConnection methods and SleeperClient against a replay server"""
+    from data.ppr_calculator import calculate_ppr_points
+    from data.sleeper_client import SleeperClient
+
+    season = summary['last_season']
+    ids = itertools.cycle(_sample_ids(summary, 512))
+    users = itertools.cycle([f"user{u}" for u in range(50)])
+
+    results = {
+        'micro.ppr.calculate_ppr_points': measure(lambda: calculate_ppr_points(SAMPLE_STATS), iterations * 10),
+        'micro.db.get_player_by_id': measure(lambda: db.get_player_by_id(next(ids)), iterations),
+        'micro.db.get_player_stats': measure(lambda: db.get_player_stats(next(ids), season), iterations),
+        'micro.db.get_projection': measure(lambda: db.get_projection(next(ids), season, 5), iterations),
+        'micro.db.get_portfolio_positions': measure(lambda: db.get_portfolio_positions(next(users)), iterations),
+        'micro.db.get_player_records': measure(db.get_player_records, max(iterations // 100, 5), warmup=1),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette = Cassette(tmp)
+        cassette.record('projections/nfl/2024/5', {pid: {'pts_ppr': 10.0} for pid in summary['player_ids'][:500]})
+        with ReplayServer(cassette) as server:
+            client = SleeperClient(base_url=server.url, timeout=5)
+            results['micro.sleeper.request_uncached'] = measure(
+                lambda: client._make_request('projections/nfl/2024/5', use_cache=False), max(iterations // 10, 20))
+            results['micro.sleeper.request_cached'] = measure(
+                lambda: client._make_request('projections/nfl/2024/5'), iterations)
+    return results
+
+
+def route_paths(summary: dict, count: int = 256) -> dict:
+    """Representative request paths per route"""
+    season = summary['last_season']
+    ids = _sample_ids(summary, count)
+    return {
+        'players': ['/api/players'],
+        'player_stats': [f"/api/players/{pid}/stats?season={season}" for pid in ids],
+        'player_series': [f"/api/players/{pid}/series?start={season - summary['seasons'] + 1}&end={season}&width=20"
+                          for pid in ids],
+        'player_projection': [f"/api/players/{pid}/projection?season={season}&week=5" for pid in ids],
+        'market_status': ['/api/market-status'],
+        'leaderboard': ['/api/leaderboard?limit=50'],
+        'movers': [f"/api/movers?week={week}&metric={metric}&n=25" for week in range(1, 19)
+                   for metric in ('diff', 'pct_change', 'volatility')],
+        'movers_filtered': [f"/api/movers?week={week}&position=WR&direction=bottom" for week in range(1, 19)],
+        'movers_heatmap': [f"/api/movers/heatmap?week={week}" for week in range(1, 19)],
+        'leaderboard_rank': [f"/api/leaderboard/user{i % 100}" for i in range(count)],
+        'current_week': ['/api/current-week'],
+    }
+
+
+def route_suite(app, summary: dict, iterations: int = 300) -> dict:
+    """Every route through Flask's test client (no sockets)"""
+    client = app.test_client()
+    results = {}
+    for name, paths in route_paths(summary).items():
+        cycle = itertools.cycle(paths)
+        results[f"route.{name}"] = measure(lambda: client.get(next(cycle)), iterations, warmup=10)
+    return results
+
+
+def load_suite(app, summary: dict, threads: int = 8, duration: float = 3.0) -> dict:
+    """Mixed and per-route traffic against a real threaded HTTP server"""
+    paths = route_paths(summary)
+    mixed = [p for group in paths.values() for p in group[:32]]
+    results = {}
+    with LiveServer(app) as server:
+        results['load.mixed'] = run_load(server.port, mixed, threads, duration)
+        results['load.player_stats'] = run_load(server.port, paths['player_stats'], threads, duration)
+        results['load.players_gzip'] = run_load(server.port, paths['players'], threads, duration,
+                                                headers={'Accept-Encoding': 'gzip'})
+    return results
+
+
+def compression_suite(app, iterations: int = 20) -> dict:
+    """Bytes on the wire and CPU cost of each coding for the largest response"""
+    from api.compression import ResponseCompressor
+
+    body = app.test_client().get('/api/players').data
+    compressor = ResponseCompressor(cache_bytes=0)  # measure real compression, not cache hits
+    results = {'compression.players.identity': {'bytes': len(body)}}
+    for encoding in compressor.encodings:
+        result = measure(lambda: compressor.compress(body, encoding), iterations, warmup=2)
+        result['bytes'] = len(compressor.compress(body, encoding))
+        results[f"compression.players.{encoding}"] = result
+    return results
+
+
+def order_flow(summary: dict, count: int, seed: int = 11) -> list:
+    """
+    Sunday-morning order mix: most orders chase a few dozen popular players,
+    a fifth are market orders and limit prices cluster around each player's price
+
+    Returns:
+        (user_id, player_id, side, quantity, price) tuples (price None for market orders)
+    """
+    rng = random.Random(seed)
+    hot = summary['player_ids'][:50]
+    prices = {pid: 8 + rng.random() * 20 for pid in summary['player_ids']}
+    orders = []
+    for _ in range(count):
+        player_id = rng.choice(hot) if rng.random() < 0.8 else rng.choice(summary['player_ids'])
+        side = rng.choice(('buy', 'sell'))
+        price = None
+        if rng.random() >= 0.2:
+            # Buyers bid a little under the mid and sellers ask a little over, so books build depth
+            skew = -0.3 if side == 'buy' else 0.3
+            price = round(prices[player_id] + skew + rng.gauss(0, 0.5), 1)
+        orders.append((f"user{rng.randrange(2000)}", player_id, side, rng.randint(1, 10), price))
+    return orders
+
+
+def orders_suite(summary: dict, iterations: int = 2000, threads: int = 8, duration: float = 3.0) -> dict:
+    """
+    Matching alone, then sustained orders/second from many traders with fills
+    group-committed (to a scratch database, so other suites' portfolios don't grow)
+    """
+    from data.leaderboard import Leaderboard
+    from data.order_book import FillWriter, MatchingEngine, OrderRejected
+    from database import DatabaseConnection
+
+    def make_engine(writer=None):
+        return MatchingEngine(writer, market_open=lambda: True, current_week=lambda: 9)
+
+    def submit(engine, order):
+        try:
+            engine.submit(*order)
+        except OrderRejected:  # a trader crossing their own resting order
+            pass
+
+    engine = make_engine()
+    flow = itertools.cycle(order_flow(summary, 20000))
+    results = {'orders.match': measure(lambda: submit(engine, next(flow)), iterations * 10, warmup=2000)}
+
+    tmp = tempfile.TemporaryDirectory()
+    writer = FillWriter(DatabaseConnection(f"{tmp.name}/orders.db"))
+    leaderboard = Leaderboard()
+    writer.add_listener(lambda fills: [
+        leaderboard.add_position(user, fill.player_id, action, fill.price, quantity=fill.quantity)
+        for fill in fills for user, action in ((fill.buyer, 'buy'), (fill.seller, 'sell'))
+    ])
+    engine = make_engine(writer)
+    flows = [order_flow(summary, 20000, seed=100 + i) for i in range(threads)]
+    deadline = time.perf_counter() + duration
+    latencies = []
+    lock = threading.Lock()
+
+    def trader(orders):
+        local = []
+        for order in itertools.cycle(orders):
+            if time.perf_counter() >= deadline:
+                break
+            t0 = time.perf_counter()
+            submit(engine, order)  # waits for its fills to commit
+            local.append(time.perf_counter() - t0)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=trader, args=(orders,)) for orders in flows]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    result = summarize(latencies, time.perf_counter() - start)
+    writer.stop()
+    tmp.cleanup()
+    result['commits'] = writer.batches
+    results['orders.rush'] = result
+    return results
+
+
+def alerts_suite(summary: dict, iterations: int = 2000, threads: int = 8, duration: float = 3.0,
+                 alerts: int = 1000000, tick_rate: int = 5000, add_rate: int = 100) -> dict:
+    """
+    A million price alerts (spread over the synthetic players, thresholds up to
+    ten points either side of each price) loaded from a scratch database, then
+    back-to-back ticks, then a live feed of tick_rate ticks/second while other
+    threads create add_rate alerts/second and triggered alerts are committed in
+    the background. Ticks move a price by a few hundredths of a point, so an
+    alert set near the price fires within minutes and a far one may never fire
+    """
+    from data.price_alerts import ABOVE, BELOW, AlertDispatcher, PriceAlertEngine
+    from data.realtime_service import RealtimeService
+    from database import DatabaseConnection
+
+    rng = random.Random(13)
+    player_ids = summary['player_ids']
+    prices = {pid: 8 + rng.random() * 20 for pid in player_ids}
+    users = [f"user{i}" for i in range(max(alerts // 50, 1))]
+
+    def random_alert(player_id, rng=rng):
+        threshold = round(max(prices[player_id] + rng.uniform(-10, 10), 0.1), 1)
+        return (rng.choice(users), player_id, threshold, ABOVE if threshold > prices[player_id] else BELOW)
+
+    def move(player_id):
+        prices[player_id] = max(prices[player_id] + rng.gauss(0, 0.05), 0.0)
+        return prices[player_id]
+
+    tmp = tempfile.TemporaryDirectory()
+    db = DatabaseConnection(f"{tmp.name}/alerts.db")
+    with db.get_connection() as conn:
+        conn.executemany("INSERT INTO price_alerts (user_id, player_id, threshold, direction) VALUES (?, ?, ?, ?)",
+                         (random_alert(rng.choice(player_ids)) for _ in range(alerts)))
+    dispatcher = AlertDispatcher(db)
+    engine = PriceAlertEngine(db, dispatcher, max_per_user=10 ** 6)
+    start = time.perf_counter()
+    engine.load_from_db()
+    elapsed = time.perf_counter() - start
+    results = {'alerts.load': dict(summarize([elapsed], elapsed), ops=alerts, ops_per_sec=round(alerts / elapsed, 1))}
+    for player_id, price in prices.items():
+        engine.on_price(player_id, price)
+
+    def tick():
+        player_id = rng.choice(player_ids)
+        return engine.on_price(player_id, move(player_id))
+
+    triggered = dispatcher.dispatched
+    results['alerts.tick'] = measure(tick, iterations * 10, warmup=1000)
+    dispatcher.flush()
+    results['alerts.tick']['triggered'] = dispatcher.dispatched - triggered
+
+    service = RealtimeService()
+    service.add_price_listener(engine.on_price)
+    deadline = time.perf_counter() + duration
+    tick_latencies, add_latencies = [], []
+    lock = threading.Lock()
+
+    def creator(seed):
+        local = random.Random(seed)
+        latencies = []
+        while time.perf_counter() < deadline:
+            user_id, player_id, threshold, direction = random_alert(local.choice(player_ids), local)
+            t0 = time.perf_counter()
+            engine.add(user_id, player_id, threshold, direction)
+            latencies.append(time.perf_counter() - t0)
+            time.sleep(len(creators) / add_rate)
+        with lock:
+            add_latencies.extend(latencies)
+
+    creators = [threading.Thread(target=creator, args=(200 + i,)) for i in range(max(threads - 1, 1))]
+    for thread in creators:
+        thread.start()
+    triggered = dispatcher.dispatched
+    batches = dispatcher.batches
+    start = time.perf_counter()
+    for count in itertools.count():
+        due = start + count / tick_rate
+        now = time.perf_counter()
+        if now >= deadline:
+            break
+        if due > now:
+            time.sleep(due - now)
+        player_id = rng.choice(player_ids)
+        t0 = time.perf_counter()
+        service.publish_price(player_id, move(player_id))
+        tick_latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    for thread in creators:
+        thread.join()
+    dispatcher.stop()
+    tmp.cleanup()
+
+    result = summarize(tick_latencies, elapsed)
+    result['triggered'] = dispatcher.dispatched - triggered
+    result['commits'] = dispatcher.batches - batches
+    results['alerts.live_tick'] = result
+    results['alerts.live_add'] = summarize(add_latencies, elapsed)
+    return results
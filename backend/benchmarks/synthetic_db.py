@@ -0,0 +1,124 @@
+"""
+Synthetic SQLite database generator for benchmarks
+Builds N players x M seasons x 18 weeks of stats and projections with a fixed seed,
+so every run measures the same data shape
+
+Usage:
+    python -m benchmarks.synthetic_db bench.db --players 2000 --seasons 3
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+
+# Add backend directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseConnection
+from data.player_diff import content_hash
+
+POSITIONS = ('QB', 'RB', 'WR', 'TE', 'K')
+TEAMS = ('ARI', 'ATL', 'BAL', 'BUF', 'CAR', 'CHI', 'CIN', 'CLE', 'DAL', 'DEN', 'DET', 'GB',
+         'HOU', 'IND', 'JAX', 'KC', 'LAC', 'LAR', 'LV', 'MIA', 'MIN', 'NE', 'NO', 'NYG',
+         'NYJ', 'PHI', 'PIT', 'SEA', 'SF', 'TB', 'TEN', 'WAS')
+INJURY_STATUSES = (None,) * 17 + ('Questionable', 'Out', 'IR')
+WEEKS = 18
+
+
+def generate_database(path: str, players: int = 1000, seasons: int = 2, last_season: int = 2024,
+                      users: int = 200, seed: int = 42, partition_dir: str = None) -> dict:
+    """
+    Create (or overwrite) a synthetic database
+
+    Args:
+        path: SQLite file to write
+        players: Number of players
+        seasons: Number of seasons ending at last_season
+        last_season: Most recent season
+        users: Number of portfolio users
+        seed: RNG seed
+        partition_dir: Store stats and projections in per-season partitions here
+
+    Returns:
+        Summary dict with row counts and the generated player IDs
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    if partition_dir and os.path.isdir(partition_dir):
+        shutil.rmtree(partition_dir)
+    rng = random.Random(seed)
+    db = DatabaseConnection(path, partition_dir=partition_dir)
+
+    player_rows, stat_rows, projection_rows = [], [], []
+    player_ids = []
+    for i in range(players):
+        player_id = str(1000 + i)
+        player_ids.append(player_id)
+        record = {
+            'player_id': player_id,
+            'name': f"Player {i}",
+            'position': POSITIONS[i % len(POSITIONS)],
+            'team': TEAMS[rng.randrange(len(TEAMS))],
+            'injury_status': rng.choice(INJURY_STATUSES),
+            'status': 'Active',
+        }
+        record['content_hash'] = content_hash(record)
+        player_rows.append(record)
+
+        skill = rng.uniform(3, 22)
+        for season in range(last_season - seasons + 1, last_season + 1):
+            for week in range(1, WEEKS + 1):
+                projected = round(max(skill + rng.gauss(0, 2), 0), 2)
+                actual = round(max(projected + rng.gauss(0, 6), -2), 2)
+                stats_json = json.dumps({'receptions': rng.randint(0, 10), 'receiving_yds': rng.randint(0, 150)})
+                stat_rows.append((player_id, season, week, actual, projected, stats_json))
+                projection_rows.append((player_id, season, week, projected, 'sleeper'))
+
+    portfolio_rows = []
+    for u in range(users):
+        for _ in range(rng.randint(1, 8)):
+            entry = round(rng.uniform(5, 25), 1)
+            closed = rng.random() < 0.3
+            portfolio_rows.append((f"user{u}", rng.choice(player_ids), rng.choice(('buy', 'sell')), entry,
+                                   round(entry + rng.gauss(0, 4), 1) if closed else None, rng.randint(1, WEEKS)))
+
+    db.upsert_players(player_rows)
+    db.insert_weekly_stats(stat_rows)
+    with db.get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO user_portfolio (user_id, player_id, action, entry_price, exit_price, entry_timestamp, week) "
+            "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, ?)", portfolio_rows)
+    db.insert_projections(projection_rows)
+
+    return {
+        'path': path,
+        'players': players,
+        'seasons': seasons,
+        'weekly_stats': len(stat_rows),
+        'projections': len(projection_rows),
+        'portfolio_rows': len(portfolio_rows),
+        'player_ids': player_ids,
+        'last_season': last_season,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic benchmark database")
+    parser.add_argument('path')
+    parser.add_argument('--players', type=int, default=1000)
+    parser.add_argument('--seasons', type=int, default=2)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--partition-dir', default=None, help="Write per-season partitions here")
+    args = parser.parse_args()
+    summary = generate_database(args.path, args.players, args.seasons, users=args.users, seed=args.seed,
+                                partition_dir=args.partition_dir)
+    summary.pop('player_ids')
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
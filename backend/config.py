@@ -10,7 +10,16 @@ class Config:
     """Application configuration"""
     
     # Sleeper API Configuration
-    SLEEPER_API_BASE_URL = "https://api.sleeper.app/v1"
+    # Point at a local ReplayServer (scripts/sleeper_replay.py serve) to run offline
+    SLEEPER_API_BASE_URL = os.getenv('SLEEPER_API_BASE_URL', 'https://api.sleeper.app/v1')
+    
+    # ESPN fantasy API (fallback projection source, no key required)
+    ESPN_API_BASE_URL = os.getenv('ESPN_API_BASE_URL', 'https://lm-api-reads.fantasy.espn.com/apis/v3/games/ffl')
+    
+    # Hedged projection fetching (seconds): query ESPN if Sleeper hasn't answered
+    # within PROJECTION_HEDGE_AFTER, give up on both after PROJECTION_DEADLINE
+    PROJECTION_HEDGE_AFTER = float(os.getenv('PROJECTION_HEDGE_AFTER', '1.5'))
+    PROJECTION_DEADLINE = float(os.getenv('PROJECTION_DEADLINE', '10'))
     
     # Optional: Add API keys if needed for future features
     # SLEEPER_API_KEY = os.getenv('SLEEPER_API_KEY')
@@ -21,5 +30,93 @@ class Config:
     
     # CORS Configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000').split(',')
+    
+    # Response serialization and compression
+    JSON_SERIALIZER = os.getenv('JSON_SERIALIZER', 'auto')  # auto | orjson | stdlib
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))  # bytes
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_CACHE_BYTES = int(os.getenv('COMPRESSION_CACHE_BYTES', str(32 * 1024 * 1024)))
+    
+    # Request profiling (profiling.py): off unless a token or sample rate is set.
+    # Requests sending the token in X-Profile are profiled, plus a random sample
+    PROFILE_TOKEN = os.getenv('PROFILE_TOKEN') or None
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))  # seconds between stack samples
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+    PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '200'))  # profiles kept
+    PROFILE_MAX_BYTES = int(os.getenv('PROFILE_MAX_BYTES', str(50 * 1024 * 1024)))
+    
+    # Downsampled chart series cache; entries are dropped on writes through the
+    # invalidation bus, so the TTL only bounds how long an unused entry lingers
+    SERIES_CACHE_TTL = int(os.getenv('SERIES_CACHE_TTL', '3600'))
+    SERIES_CACHE_ENTRIES = int(os.getenv('SERIES_CACHE_ENTRIES', '4096'))
+    SERIES_MAX_WIDTH = int(os.getenv('SERIES_MAX_WIDTH', '2000'))
+    
+    # Similarity index: seconds between incremental refreshes from weekly_stats
+    SIMILARITY_REFRESH_INTERVAL = int(os.getenv('SIMILARITY_REFRESH_INTERVAL', '300'))
+    
+    # Movers index: seconds between incremental refreshes from weekly_stats
+    MOVERS_REFRESH_INTERVAL = int(os.getenv('MOVERS_REFRESH_INTERVAL', '60'))
+    
+    # Projection history: seconds between compactions, and how long a snapshot stays
+    # uncompacted before being folded into its player-week's delta-encoded block
+    PROJECTION_COMPACTION_INTERVAL = int(os.getenv('PROJECTION_COMPACTION_INTERVAL', '3600'))
+    PROJECTION_COMPACT_AFTER = int(os.getenv('PROJECTION_COMPACT_AFTER', '3600'))
+    # Seconds between intraweek projection pulls recorded in projection_history
+    PROJECTION_PULL_INTERVAL = int(os.getenv('PROJECTION_PULL_INTERVAL', '900'))
+    
+    # Cache invalidation bus: seconds between polls of cache_invalidations (the
+    # longest a cache lags another process's write) and seconds keys are kept
+    INVALIDATION_POLL_INTERVAL = float(os.getenv('INVALIDATION_POLL_INTERVAL', '0.5'))
+    INVALIDATION_RETENTION = int(os.getenv('INVALIDATION_RETENTION', '3600'))
+    
+    # Order book: largest accepted order, in shares
+    ORDER_MAX_QUANTITY = int(os.getenv('ORDER_MAX_QUANTITY', '1000'))
+    
+    # Seconds between reloads of the current week's NFL schedule (bye-week and kickoff locks)
+    SCHEDULE_REFRESH_INTERVAL = int(os.getenv('SCHEDULE_REFRESH_INTERVAL', '3600'))
+    
+    # Price alerts: most active alerts one user may hold
+    PRICE_ALERTS_PER_USER = int(os.getenv('PRICE_ALERTS_PER_USER', '100'))
+    
+    # Database Configuration
+    DATABASE_PATH = os.getenv('DATABASE_PATH', 'fantasy_stock.db')
+    # Directory for per-season weekly_stats/projections files (unset keeps one file)
+    DATABASE_PARTITION_DIR = os.getenv('DATABASE_PARTITION_DIR') or None
+    
+    # Sleeper response cache (seconds): entries are fresh for SLEEPER_CACHE_TTL, then
+    # served stale for up to SLEEPER_STALE_TTL more while one background refresh runs
+    SLEEPER_CACHE_TTL = int(os.getenv('SLEEPER_CACHE_TTL', '300'))
+    SLEEPER_STALE_TTL = int(os.getenv('SLEEPER_STALE_TTL', '600'))
+    
+    # Upstream rate budget shared by every Sleeper caller on the host (calls/minute);
+    # SLEEPER_RATE_RESERVE is the fraction only live scoring may spend. Server workers
+    # and scripts spend one bucket kept in SLEEPER_RATE_BUDGET_PATH
+    # (default: <DATABASE_PATH>.sleeper-budget), see sleeper_client.host_rate_budget()
+    SLEEPER_RATE_LIMIT = int(os.getenv('SLEEPER_RATE_LIMIT', '1000'))
+    SLEEPER_RATE_RESERVE = float(os.getenv('SLEEPER_RATE_RESERVE', '0.2'))
+    SLEEPER_RATE_BUDGET_PATH = os.getenv('SLEEPER_RATE_BUDGET_PATH') or None
+    SCHEDULER_WORKERS = int(os.getenv('SCHEDULER_WORKERS', '2'))
+    
+    # Player universe refresh (seconds)
+    PLAYER_REFRESH_INTERVAL = int(os.getenv('PLAYER_REFRESH_INTERVAL', str(6 * 60 * 60)))
+    PLAYER_REFRESH_RETRY_INTERVAL = int(os.getenv('PLAYER_REFRESH_RETRY_INTERVAL', '60'))
+    # Memory-mapped player universe shared by every worker process (unset: one copy per worker)
+    PLAYER_REGISTRY_PATH = os.getenv('PLAYER_REGISTRY_PATH') or None
+    
+    # Production Server Configuration (python run.py --production)
+    SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
+    SERVER_PORT = int(os.getenv('SERVER_PORT', '5000'))
+    SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str((os.cpu_count() or 1) * 2 + 1)))
+    SERVER_THREADS = int(os.getenv('SERVER_THREADS', '4'))
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+    # Trading process (order books, leaderboard): local port the workers forward to,
+    # and seconds a forwarded request may take
+    TRADING_PORT = int(os.getenv('TRADING_PORT', '5001'))
+    TRADING_TIMEOUT = float(os.getenv('TRADING_TIMEOUT', '30'))
+    # Directory where each server process writes its metrics for /metrics to sum
+    # (default: <DATABASE_PATH>.metrics), and seconds between writes
+    METRICS_DIR = os.getenv('METRICS_DIR') or None
+    METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
 
 
@@ -0,0 +1,205 @@
+"""
+Chart downsampling - Reduce a long points series to roughly one point per pixel
+LTTB (largest-triangle-three-buckets) keeps the visual shape of a line; min/max
+bucketing keeps every spike. Both are vectorized with NumPy and return indices
+into the original series, so callers can keep the matching labels
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from metrics import CACHE_REQUESTS
+from models.player import MAX_WEEKS
+
+METHODS = ('lttb', 'minmax')
+SERIES_METRICS = ('actual', 'projected', 'diff')
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-triangle-three-buckets downsampling
+
+    Args:
+        x: Increasing x values
+        y: Values
+        threshold: Number of points to keep (first and last are always kept)
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    buckets = threshold - 2
+    every = (n - 2) / buckets
+    starts = (np.arange(buckets) * every).astype(np.int64) + 1
+    ends = np.append(starts[1:], n - 1)
+
+    # Average of the *next* bucket for every bucket, from prefix sums
+    next_starts = ends
+    next_ends = np.append(ends[1:], n)
+    cx = np.concatenate(([0.0], np.cumsum(x, dtype=float)))
+    cy = np.concatenate(([0.0], np.cumsum(y, dtype=float)))
+    counts = next_ends - next_starts
+    avg_x = (cx[next_ends] - cx[next_starts]) / counts
+    avg_y = (cy[next_ends] - cy[next_starts]) / counts
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(buckets):
+        lo, hi = starts[i], ends[i]
+        # Twice the triangle area between the last pick, each candidate and the next bucket's mean
+        area = np.abs((x[a] - avg_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Min/max bucketing: split into threshold // 2 equal-count buckets and keep each
+    bucket's lowest and highest point
+
+    Returns:
+        Sorted indices of the kept points (at most threshold, plus the endpoints)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    buckets = threshold // 2
+    bucket = np.arange(n) * buckets // n
+    order = np.lexsort((y, bucket))  # by bucket, then value
+    sorted_bucket = bucket[order]
+    firsts = np.searchsorted(sorted_bucket, np.arange(buckets), side='left')
+    lasts = np.searchsorted(sorted_bucket, np.arange(buckets), side='right') - 1
+    return np.unique(np.concatenate((order[firsts], order[lasts], [0, n - 1])))
+
+
+def downsample(x, y, width: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Downsample a series to about width points
+
+    Args:
+        x: Increasing x values
+        y: Values (NaN points are dropped first)
+        width: Target number of points (chart width in pixels)
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        Sorted indices into the original arrays
+
+    Raises:
+        ValueError: For an unknown method
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    reducer = lttb if method == 'lttb' else minmax
+    return valid[reducer(x[valid], y[valid], width)]
+
+
+def build_player_series(rows: list, metric: str, width: int, method: str = 'lttb') -> dict:
+    """
+    Turn weekly_stats rows into a downsampled chart series
+
+    Args:
+        rows: Rows with season, week, actual_points, projected_points ordered by season, week
+        metric: 'actual', 'projected' or 'diff' (actual - projected)
+        width: Target number of points
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        Dict with total_points (before downsampling) and points [{season, week, value}]
+    """
+    if not rows:
+        return {'total_points': 0, 'points': []}
+    seasons = np.fromiter((row['season'] for row in rows), dtype=np.int64, count=len(rows))
+    weeks = np.fromiter((row['week'] for row in rows), dtype=np.int64, count=len(rows))
+    actual = np.array([row['actual_points'] for row in rows], dtype=float)
+    projected = np.array([row['projected_points'] for row in rows], dtype=float)  # None -> NaN
+    values = {'actual': actual, 'projected': projected, 'diff': actual - projected}[metric]
+
+    # Week slots on one axis, so gaps (byes, missing weeks) keep their spacing
+    x = (seasons - seasons[0]) * MAX_WEEKS + weeks - 1
+    keep = downsample(x, values, width, method)
+    return {
+        'total_points': int(np.count_nonzero(~np.isnan(values))),
+        'points': [
+            {'season': int(seasons[i]), 'week': int(weeks[i]), 'value': round(float(values[i]), 2)}
+            for i in keep
+        ]
+    }
+
+
+class SeriesCache:
+    """
+    Thread-safe LRU of downsampled series with a time-to-live
+    Keys start with the player_id so one player's entries can be dropped on ingest.
+    Values are computed outside the lock, so every invalidation bumps a generation
+    and a value computed across one is returned but not stored
+    """
+
+    def __init__(self, max_entries: int = 4096, ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, stored_at)
+        self._generation = 0  # bumped by every invalidation
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: tuple, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                CACHE_REQUESTS.inc('series', 'hit')
+                return entry[0]
+            generation = self._generation
+        CACHE_REQUESTS.inc('series', 'miss')
+
+        value = compute()
+        with self._lock:
+            if generation != self._generation:
+                return value  # may have read rows an invalidation has since replaced
+            self._entries[key] = (value, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def invalidate_player(self, player_id: str) -> int:
+        """Drop every cached series for a player; returns the number removed"""
+        with self._lock:
+            self._generation += 1
+            stale = [key for key in self._entries if key[0] == player_id]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def invalidate_players(self, player_ids) -> int:
+        """Drop every cached series for several players in one pass; returns the number removed"""
+        player_ids = set(player_ids)
+        with self._lock:
+            self._generation += 1
+            stale = [key for key in self._entries if key[0] in player_ids]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,66 +1,156 @@
 """
 ESPN API Client - Fallback projection source
-Used when Sleeper API projections are unavailable
+Used when Sleeper API projections are unavailable or slow
+Reads ESPN's public fantasy API (PPR league defaults, no credentials needed)
 """
 
+import json
+import logging
 import requests
 from config import Config
 
+logger = logging.getLogger(__name__)
+
+# ESPN proTeamId -> team abbreviation (Sleeper spelling)
+ESPN_TEAMS = {
+    1: 'ATL', 2: 'BUF', 3: 'CHI', 4: 'CIN', 5: 'CLE', 6: 'DAL', 7: 'DEN', 8: 'DET',
+    9: 'GB', 10: 'TEN', 11: 'IND', 12: 'KC', 13: 'LV', 14: 'LAR', 15: 'MIA', 16: 'MIN',
+    17: 'NE', 18: 'NO', 19: 'NYG', 20: 'NYJ', 21: 'PHI', 22: 'ARI', 23: 'PIT', 24: 'LAC',
+    25: 'SF', 26: 'SEA', 27: 'TB', 28: 'WAS', 29: 'CAR', 30: 'JAX', 33: 'BAL', 34: 'HOU',
+}
+
+# ESPN defaultPositionId -> position
+ESPN_POSITIONS = {1: 'QB', 2: 'RB', 3: 'WR', 4: 'TE', 5: 'K', 16: 'DEF'}
+
+# Stat source used by ESPN for projections (0 is actuals)
+PROJECTED_STAT_SOURCE = 1
+
+# League-defaults id 3 is ESPN's standard PPR scoring
+PPR_LEAGUE_DEFAULTS = 3
+
+
 class ESPNClient:
     """
     Client for fetching projections from ESPN API
-    TODO: Research ESPN API endpoints and implement
+    Projections are fetched for a whole week in one call, keyed by ESPN player ID;
+    PlayerCrosswalk maps them to Sleeper IDs
     """
-    
-    def __init__(self):
-        # TODO: Set up ESPN API credentials
-        self.base_url = "https://api.espn.com/v1"  # Placeholder
-        self.api_key = None  # TODO: Get from config
-        
-    def get_projections(self, player_id, week, season=2024):
+
+    def __init__(self, base_url: str = None, timeout: float = 10):
+        self.base_url = base_url or Config.ESPN_API_BASE_URL
+        self.timeout = timeout
+        self.player_limit = 2000
+
+    def _make_request(self, path: str, params: dict = None, fantasy_filter: dict = None):
         """
-        Fetch ESPN projections for a player
-        TODO: Implement ESPN API call
-        Fallback when Sleeper projections unavailable
-        
+        Make an ESPN API request
+
+        Args:
+            path: Path below the base URL
+            params: Query string parameters
+            fantasy_filter: Value for the X-Fantasy-Filter header
+
+        Returns:
+            Decoded JSON response
+        """
+        headers = {}
+        if fantasy_filter is not None:
+            headers['X-Fantasy-Filter'] = json.dumps(fantasy_filter)
+        url = f"{self.base_url}/{path}"
+        try:
+            response = requests.get(url, params=params, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching ESPN {path}: {e}")
+            raise
+
+    def get_players(self, season: int = 2024) -> list:
+        """
+        Fetch the ESPN player list used to build the ID crosswalk
+
+        Args:
+            season: NFL season year
+
+        Returns:
+            List of dicts with espn_id, name, team and position
+        """
+        data = self._make_request(
+            f"seasons/{season}/players",
+            params={'view': 'players_wl'},
+            fantasy_filter={'filterActive': {'value': True}}
+        )
+        return [
+            {
+                'espn_id': str(player['id']),
+                'name': player.get('fullName'),
+                'team': ESPN_TEAMS.get(player.get('proTeamId')),
+                'position': ESPN_POSITIONS.get(player.get('defaultPositionId')),
+            }
+            for player in data
+            if player.get('fullName')
+        ]
+
+    def get_projections(self, week: int, season: int = 2024) -> dict:
+        """
+        Fetch ESPN PPR projections for every player in a week
+
         Args:
-            player_id: ESPN player ID
             week: NFL week number
             season: NFL season year
-            
+
         Returns:
-            Dict with projected points (PPR format)
+            Dict of projected PPR points keyed by ESPN player ID
         """
-        # TODO: Implement ESPN API call
-        # TODO: Parse response
-        # TODO: Convert to Sleeper format for consistency
-        pass
-        
-    def convert_to_sleeper_format(self, espn_data):
+        data = self._make_request(
+            f"seasons/{season}/segments/0/leaguedefaults/{PPR_LEAGUE_DEFAULTS}",
+            params={'view': 'kona_player_info', 'scoringPeriodId': week},
+            fantasy_filter={'players': {'limit': self.player_limit}}
+        )
+        projections = {}
+        for entry in data.get('players', []):
+            player = entry.get('player', {})
+            for stat in player.get('stats', []):
+                if stat.get('statSourceId') == PROJECTED_STAT_SOURCE and stat.get('scoringPeriodId') == week:
+                    projections[str(player.get('id', entry.get('id')))] = float(stat.get('appliedTotal', 0.0))
+                    break
+        return projections
+
+    def convert_to_sleeper_format(self, espn_data: dict, crosswalk) -> dict:
         """
         Convert ESPN projection data to match Sleeper format
         Ensures consistent data structure across sources
-        
+
         Args:
-            espn_data: Raw ESPN API response
-            
+            espn_data: Projections keyed by ESPN player ID (from get_projections)
+            crosswalk: PlayerCrosswalk mapping ESPN IDs to Sleeper IDs
+
         Returns:
-            Formatted dict matching Sleeper projection format
+            Dict keyed by Sleeper player ID with Sleeper-style 'pts_ppr' values;
+            players missing from the crosswalk are dropped
         """
-        # TODO: Map ESPN fields to Sleeper format
-        pass
-        
-    def search_player(self, player_name):
+        converted = {}
+        for espn_id, points in espn_data.items():
+            sleeper_id = crosswalk.to_sleeper(espn_id)
+            if sleeper_id is not None:
+                converted[sleeper_id] = {'pts_ppr': round(points, 2)}
+        return converted
+
+    def search_player(self, player_name: str, season: int = 2024):
         """
-        Search for player in ESPN database
-        TODO: Implement player search
-        
+        Search for player in ESPN database by name
+        For bulk lookups build a PlayerCrosswalk instead of calling this per player
+
         Args:
             player_name: Player's full name
-            
+            season: NFL season year
+
         Returns:
-            ESPN player ID
+            ESPN player ID, or None if no player matches
         """
-        # TODO: Implement search functionality
-        pass
-
+        from data.player_crosswalk import normalize_name
+        target = normalize_name(player_name)
+        for player in self.get_players(season):
+            if normalize_name(player['name']) == target:
+                return player['espn_id']
+        return None
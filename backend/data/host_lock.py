@@ -0,0 +1,62 @@
+"""
+Host-wide locks shared by the worker processes of one server
+An exclusive flock on a lock file next to the shared resource. The kernel drops
+it when the holder exits, so a crashed worker never leaves a stale lock behind
+"""
+
+import fcntl
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def host_lock(path: str, blocking: bool = True):
+    """
+    Hold an exclusive lock on path for the duration of the block
+    Separate opens of the file exclude each other, so threads of one process
+    queue the same way other processes do
+
+    Args:
+        path: Lock file (created if missing)
+        blocking: Wait for the lock; when False, yield False at once if it is taken
+
+    Yields:
+        True while the lock is held, False if it was taken and blocking is False
+    """
+    with open(path, 'a+') as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def claim_run(path: str, interval: float) -> bool:
+    """
+    Claim this interval's run of a periodic job for the whole host
+    Every worker schedules the job; the first to claim it within half an
+    interval of the last claim runs it and the rest skip
+
+    Args:
+        path: Lock file holding the time of the last claim
+        interval: Seconds between runs
+
+    Returns:
+        True if this process should run the job now
+    """
+    with host_lock(path), open(path, 'r+') as stamp_file:
+        try:
+            claimed_at = float(stamp_file.read() or 0)
+        except ValueError:
+            claimed_at = 0.0
+        now = time.time()
+        if now - claimed_at < interval / 2:
+            return False
+        stamp_file.seek(0)
+        stamp_file.truncate()
+        stamp_file.write(repr(now))
+        return True
@@ -0,0 +1,367 @@
+"""
+Leaderboard - Global portfolio ranking by P&L
+Keeps each user's P&L as a linear function of player prices:
+
+    pnl(user) = base(user) + sum(quantity(user, player) * price(player))
+
+base holds realized P&L minus the cost basis of open positions, and quantity is
+the user's net open exposure (+1 per open buy, -1 per open sell). A price tick
+only touches users holding that player, and scores live in an indexable skip
+list so rank updates, top-N and "my rank" are all O(log n)
+"""
+
+import logging
+import random
+import threading
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+
+class _Max:
+    """Sentinel key that compares greater than every other key"""
+
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return self is other
+
+    def __gt__(self, other):
+        return self is not other
+
+    def __ge__(self, other):
+        return True
+
+
+_MAX = _Max()
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class RankedSet:
+    """
+    Indexable skip list of unique, ordered keys
+    Supports O(log n) insert, remove, rank lookup and positional access
+    """
+
+    def __init__(self, expected_size: int = 1 << 20, seed: int = None):
+        self.max_levels = max(1, int(expected_size).bit_length())
+        self._random = random.Random(seed)
+        self._nil = _Node(_MAX, 0)
+        self._head = _Node(None, self.max_levels)
+        self._head.next = [self._nil] * self.max_levels
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.max_levels and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def insert(self, key):
+        """Insert a key (keys must be unique)"""
+        chain = [None] * self.max_levels
+        steps_at_level = [0] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = self._random_level()
+        new_node = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.max_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, key):
+        """Remove a key, raising KeyError if it is missing"""
+        chain = [None] * self.max_levels
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is self._nil or target.key != key:
+            raise KeyError(key)
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), self.max_levels):
+            chain[level].width[level] -= 1
+        self.size -= 1
+
+    def rank(self, key) -> int:
+        """Return the 0-based position of a key, raising KeyError if it is missing"""
+        position = 0
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        target = node.next[0]
+        if target is self._nil or target.key != key:
+            raise KeyError(key)
+        return position
+
+    def slice(self, start: int, stop: int) -> list:
+        """Return keys at positions [start, stop)"""
+        start = max(start, 0)
+        stop = min(stop, self.size)
+        if start >= stop:
+            return []
+
+        # Walk to the node at position `start` (1-based offset from head)
+        remaining = start + 1
+        node = self._head
+        for level in reversed(range(self.max_levels)):
+            while node.width[level] <= remaining and node.next[level] is not self._nil:
+                remaining -= node.width[level]
+                node = node.next[level]
+
+        keys = []
+        while len(keys) < stop - start and node is not self._nil:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """
+    Incrementally maintained P&L leaderboard built on user_portfolio rows
+    Thread-safe; intended to be fed by live price ticks
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._prices = {}                    # player_id -> last known price
+        self._exposure = defaultdict(dict)   # player_id -> {user_id: net open quantity}
+        self._base = defaultdict(float)      # user_id -> realized P&L minus open cost basis
+        self._scores = {}                    # user_id -> current P&L
+        self._ranking = RankedSet()
+
+    @staticmethod
+    def _sign(action: str) -> int:
+        if action == 'buy':
+            return 1
+        if action == 'sell':
+            return -1
+        raise ValueError(f"Unknown portfolio action: {action}")
+
+    def _set_score(self, user_id: str, score: float):
+        old = self._scores.get(user_id)
+        if old is not None:
+            self._ranking.remove((-old, user_id))
+        self._scores[user_id] = score
+        self._ranking.insert((-score, user_id))
+
+    def load_from_db(self, db, prices: dict = None, season: int = 2024) -> int:
+        """
+        Rebuild the leaderboard from every user_portfolio row
+
+        Args:
+            db: DatabaseConnection instance
+            prices: Current price per player_id (default: each player's latest
+                point total in the season, so open P&L is right before the first tick)
+            season: Season to take default prices from
+
+        Returns:
+            Number of users ranked
+        """
+        positions = db.get_portfolio_positions()
+        if prices is None:
+            prices = db.get_latest_prices(season)
+        with self._lock:
+            self._prices = dict(prices or {})
+            self._exposure = defaultdict(dict)
+            self._base = defaultdict(float)
+            self._scores = {}
+            self._ranking = RankedSet()
+            for row in positions:
+                if row['exit_price'] is None:
+                    # Open rows are fills; replayed like live ones so later sells close earlier buys
+                    self.add_trade(row['user_id'], row['player_id'], row['action'], row['entry_price'],
+                                   row['quantity'])
+                else:
+                    self.add_position(row['user_id'], row['player_id'], row['action'],
+                                      row['entry_price'], row['exit_price'], row['quantity'])
+            count = len(self._scores)
+        logger.info(f"Leaderboard loaded {len(positions)} positions for {count} users")
+        return count
+
+    def add_position(self, user_id: str, player_id: str, action: str, entry_price: float, exit_price: float = None,
+                     quantity: int = 1):
+        """
+        Account for a new portfolio row
+
+        Args:
+            user_id: Owner of the position
+            player_id: Player traded
+            action: 'buy' or 'sell'
+            entry_price: Price the position was opened at
+            exit_price: Price it was closed at (None while open)
+            quantity: Shares the row holds
+        """
+        sign = self._sign(action) * quantity
+        with self._lock:
+            score = self._scores.get(user_id, 0.0)
+            if exit_price is not None:
+                realized = sign * (exit_price - entry_price)
+                self._base[user_id] += realized
+                self._set_score(user_id, score + realized)
+                return
+
+            # Unpriced players are marked at the entry price until the first tick
+            price = self._prices.setdefault(player_id, entry_price)
+            holders = self._exposure[player_id]
+            holders[user_id] = holders.get(user_id, 0) + sign
+            self._base[user_id] -= sign * entry_price
+            self._set_score(user_id, score + sign * (price - entry_price))
+
+    def close_position(self, user_id: str, player_id: str, action: str, entry_price: float, exit_price: float,
+                       quantity: int = 1):
+        """
+        Move an open position to realized P&L
+
+        Args:
+            user_id: Owner of the position
+            player_id: Player traded
+            action: 'buy' or 'sell' (the side the position was opened with)
+            entry_price: Price the position was opened at (its cost is already in
+                the user's base, so None is accepted when the lot isn't known)
+            exit_price: Price it was closed at
+            quantity: Shares closed
+
+        Raises:
+            KeyError: If the user doesn't hold that many open shares on that side
+        """
+        sign = self._sign(action) * quantity
+        with self._lock:
+            holders = self._exposure.get(player_id, {})
+            held = holders.get(user_id, 0)
+            # Exposure must be on the position's side and at least as large as what is closed
+            if held * sign <= 0 or abs(held) < quantity:
+                raise KeyError(f"No open {action} position of {quantity} for {user_id} in {player_id}")
+            holders[user_id] = held - sign
+            if holders[user_id] == 0:
+                del holders[user_id]
+
+            price = self._prices[player_id]
+            self._base[user_id] += sign * exit_price
+            self._set_score(user_id, self._scores[user_id] + sign * (exit_price - price))
+
+    def add_trade(self, user_id: str, player_id: str, action: str, price: float, quantity: int = 1) -> int:
+        """
+        Account for a fill: shares that offset the user's open exposure in the player
+        close it (close_position), the rest open a new position
+
+        Args:
+            user_id: User on this side of the fill
+            player_id: Player traded
+            action: 'buy' or 'sell'
+            price: Fill price
+            quantity: Shares traded
+
+        Returns:
+            Number of shares closed
+        """
+        sign = self._sign(action)
+        with self._lock:
+            held = self.holding(user_id, player_id)
+            closed = min(quantity, abs(held)) if held * sign < 0 else 0
+            if closed:
+                self.close_position(user_id, player_id, 'sell' if action == 'buy' else 'buy', None, price, closed)
+            if quantity > closed:
+                self.add_position(user_id, player_id, action, price, quantity=quantity - closed)
+        return closed
+
+    def holding(self, user_id: str, player_id: str) -> int:
+        """Net open quantity a user holds in a player (negative when short)"""
+        with self._lock:
+            return self._exposure.get(player_id, {}).get(user_id, 0)
+
+    def update_price(self, player_id: str, price: float) -> int:
+        """
+        Apply a price tick for one player
+
+        Args:
+            player_id: Player whose price moved
+            price: New price
+
+        Returns:
+            Number of users whose score changed
+        """
+        with self._lock:
+            old = self._prices.get(player_id)
+            self._prices[player_id] = price
+            if old is None or old == price:
+                return 0
+            delta = price - old
+            holders = self._exposure.get(player_id, {})
+            for user_id, quantity in holders.items():
+                self._set_score(user_id, self._scores[user_id] + quantity * delta)
+            return len(holders)
+
+    def update_prices(self, prices: dict) -> int:
+        """Apply a batch of price ticks, returning the number of score updates"""
+        with self._lock:
+            return sum(self.update_price(player_id, price) for player_id, price in prices.items())
+
+    def top(self, n: int = 10, offset: int = 0) -> list:
+        """
+        Get the best-ranked users
+
+        Args:
+            n: Number of entries to return
+            offset: Number of leading entries to skip
+
+        Returns:
+            List of {'rank', 'user_id', 'pnl'} dicts
+        """
+        with self._lock:
+            keys = self._ranking.slice(offset, offset + n)
+        return [
+            {'rank': offset + i + 1, 'user_id': user_id, 'pnl': round(-neg_score, 2)}
+            for i, (neg_score, user_id) in enumerate(keys)
+        ]
+
+    def rank_of(self, user_id: str) -> dict:
+        """
+        Get a single user's rank
+
+        Returns:
+            {'rank', 'user_id', 'pnl', 'total_users'} or None if the user has no positions
+        """
+        with self._lock:
+            score = self._scores.get(user_id)
+            if score is None:
+                return None
+            rank = self._ranking.rank((-score, user_id)) + 1
+            total = len(self._ranking)
+        return {'rank': rank, 'user_id': user_id, 'pnl': round(score, 2), 'total_users': total}
+
+    def __len__(self):
+        return len(self._scores)
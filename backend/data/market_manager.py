@@ -9,6 +9,111 @@ from models.player import MarketStatus
 
 logger = logging.getLogger(__name__)
 
+# Calendar cache: (season, date) -> NFL week
+_week_cache = {}
+
+# Injury designations that lock a player from trading
+LOCKED_INJURY_STATUSES = ('O', 'IR', 'Out', 'IR-R')
+
+
+class InjuryLockIndex:
+    """
+    Set of players locked by injury status
+    Seeded from the player universe and kept current by subscribing to
+    injury_status_changed events on its change feed
+    """
+    
+    def __init__(self):
+        self._locked = frozenset()
+    
+    def load(self, players) -> int:
+        """
+        Rebuild from player dicts carrying injury_status
+        
+        Returns:
+            Number of locked players
+        """
+        self._locked = frozenset(
+            p['player_id'] for p in players if p.get('injury_status') in LOCKED_INJURY_STATUSES
+        )
+        return len(self._locked)
+    
+    def on_changes(self, changes):
+        """Change feed subscriber: apply injury_status_changed events"""
+        locked = set(self._locked)
+        for change in changes:
+            if change.new in LOCKED_INJURY_STATUSES:
+                locked.add(change.player_id)
+            else:
+                locked.discard(change.player_id)
+        self._locked = frozenset(locked)
+    
+    def is_locked(self, player_id: str) -> bool:
+        return player_id in self._locked
+    
+    def locked_players(self) -> list:
+        return sorted(self._locked)
+
+class GameSchedule:
+    """
+    Each team's kickoff in one NFL week, for bye-week and game-started locks
+    Loaded from Sleeper's weekly schedule; a team without a game that week is on bye
+    """
+    
+    def __init__(self):
+        self._week = (None, {})  # (week, team -> kickoff), swapped as one reference
+    
+    def load(self, week: int, games) -> int:
+        """
+        Replace the schedule with one week's games
+        
+        Args:
+            week: NFL week the games belong to
+            games: Game dicts with home, away and start_time (epoch ms) or date
+            
+        Returns:
+            Number of teams playing
+        """
+        kickoffs = {}
+        for game in games or ():
+            kickoff = _kickoff(game)
+            for team in (game.get('home'), game.get('away')):
+                if team:
+                    kickoffs[team] = kickoff
+        self._week = (week, kickoffs)
+        return len(kickoffs)
+    
+    def refresh(self, sleeper_client, season: int = 2024) -> int:
+        """Load the current week's schedule from Sleeper"""
+        week = get_current_nfl_week(season)
+        return self.load(week, sleeper_client.get_schedule(week, season) if week else [])
+    
+    def lock_args(self, team: str, week: int) -> dict:
+        """
+        bye_week / game_time arguments for is_player_locked
+        
+        Returns:
+            {'bye_week': week} for a team without a game, {'game_time': kickoff} for
+            one with a game, {} when the team or the week's schedule is unknown
+        """
+        loaded, kickoffs = self._week
+        if not team or loaded != week or not kickoffs:
+            return {}
+        if team not in kickoffs:
+            return {'bye_week': week}
+        return {'game_time': kickoffs[team]}
+
+def _kickoff(game: dict) -> datetime:
+    """Kickoff of a schedule entry: its start time, else the start of its game day"""
+    try:
+        if game.get('start_time'):
+            return datetime.fromtimestamp(game['start_time'] / 1000)
+        if game.get('date'):
+            return datetime.fromisoformat(game['date'])
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Unreadable kickoff in schedule entry {game}: {e}")
+    return None
+
 def get_current_nfl_week(season: int = 2024) -> int:
     """
     Determine current NFL week
@@ -21,14 +126,21 @@ def get_current_nfl_week(season: int = 2024) -> int:
         Current week number (1-18)
     """
     today = datetime.now()
+    cache_key = (season, today.date())
+    if cache_key in _week_cache:
+        return _week_cache[cache_key]
+    
     season_start = datetime(season, 9, 5)  # Approximate NFL season start
     
     if today < season_start:
-        return 0
+        week = 0
+    else:
+        # Calculate weeks elapsed since season start
+        weeks_elapsed = (today - season_start).days // 7 + 1
+        week = min(weeks_elapsed, 18)
     
-    # Calculate weeks elapsed since season start
-    weeks_elapsed = (today - season_start).days // 7 + 1
-    return min(weeks_elapsed, 18)
+    _week_cache[cache_key] = week
+    return week
 
 def is_market_open() -> bool:
     """
@@ -88,7 +200,7 @@ def is_player_locked(player_id: str, current_week: int, bye_week: int = None, in
         return True
     
     # Check injury status (OUT or IR)
-    if injury_status and injury_status in ['O', 'IR', 'Out', 'IR-R']:
+    if injury_status and injury_status in LOCKED_INJURY_STATUSES:
         logger.debug(f"Player {player_id} is injured: {injury_status}")
         return True
     
@@ -109,12 +221,13 @@ def is_player_locked(player_id: str, current_week: int, bye_week: int = None, in
     
     return False
 
-def get_market_status(current_week: int = None) -> MarketStatus:
+def get_market_status(current_week: int = None, lock_index: InjuryLockIndex = None) -> MarketStatus:
     """
     Get current market status including open/closed, locked players
     
     Args:
         current_week: Current NFL week (if None, will be calculated)
+        lock_index: Injury lock index used to list locked players (optional)
         
     Returns:
         MarketStatus object with current state
@@ -140,7 +253,7 @@ def get_market_status(current_week: int = None) -> MarketStatus:
             market_close_time = market_close.replace(hour=13, minute=0, second=0, microsecond=0)
             time_until_close = str(market_close_time - now)
     
-    locked_players = []  # Would be populated from database
+    locked_players = lock_index.locked_players() if lock_index else []
     
     return MarketStatus(
         current_week=current_week,
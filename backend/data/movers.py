@@ -0,0 +1,278 @@
+"""
+Top movers and market heatmap - which players beat or missed their projections,
+moved most or swung most in a week
+One season is held as dense players x weeks NumPy matrices of precomputed
+metrics (points over projection, percent change from the previous game, and
+volatility so far), so a movers query is one column slice, a mask and a partial
+selection with argpartition. Rows are recomputed only for players whose
+weekly_stats changed, picked up incrementally like the similarity index by
+tracking the highest weekly_stats.id already loaded; a projection snapshot
+leaves those ids alone, so its week is reloaded on the PROJECTIONS invalidation
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from models.player import MAX_WEEKS
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('diff', 'pct_change', 'volatility')
+DIRECTIONS = ('top', 'bottom')
+GROUPS = ('team', 'position')
+
+
+def _metric_rows(points: np.ndarray, projected: np.ndarray, played: np.ndarray) -> dict:
+    """
+    Metric matrices for a block of players (NaN where a metric is undefined)
+
+    diff: points minus projection in a played week with a projection
+    pct_change: percent change from the player's previous played week (skipping byes)
+    volatility: standard deviation of played weeks through this one (two or more games)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        diff = np.where(played, points - projected, np.nan)
+
+        pct = np.full(points.shape, np.nan, dtype=np.float32)
+        previous = np.full(len(points), np.nan, dtype=np.float32)
+        for week in range(points.shape[1]):
+            current = points[:, week]
+            ok = played[:, week] & np.isfinite(previous) & (previous != 0)
+            pct[:, week] = np.where(ok, (current - previous) / np.abs(previous) * 100, np.nan)
+            previous = np.where(played[:, week], current, previous)
+
+        games = np.cumsum(played, axis=1)
+        kept = np.where(played, points, 0).astype(np.float64)
+        mean = np.cumsum(kept, axis=1) / games
+        variance = np.cumsum(kept * kept, axis=1) / games - mean * mean
+        volatility = np.where(games >= 2, np.sqrt(np.maximum(variance, 0)), np.nan)
+
+    return {
+        'diff': diff.astype(np.float32),
+        'pct_change': pct,
+        'volatility': volatility.astype(np.float32),
+    }
+
+
+class MoversIndex:
+    """
+    Per-week rankings over one season's weekly_stats
+    Reads use an immutable state dict swapped in by refresh(), so queries never
+    block on a refresh
+    """
+
+    def __init__(self, db, season: int = 2024):
+        self.db = db
+        self.season = season
+        self.watermark = 0  # highest weekly_stats.id loaded
+        self._refresh_lock = threading.Lock()
+        empty = np.zeros((0, MAX_WEEKS), dtype=np.float32)
+        self._state = {
+            'player_ids': (), 'row_of': {},
+            'codes': {'team': np.zeros(0, dtype=np.int16), 'position': np.zeros(0, dtype=np.int16)},
+            'labels': {'team': [], 'position': []},
+            'points': empty, 'projected': empty, 'played': empty.astype(bool),
+            'metrics': {metric: empty for metric in METRICS},
+        }
+
+    def __len__(self):
+        return len(self._state['player_ids'])
+
+    @property
+    def latest_week(self) -> int:
+        """Last week with any games played (0 before the season)"""
+        weeks = np.flatnonzero(self._state['played'].any(axis=0))
+        return int(weeks[-1]) + 1 if len(weeks) else 0
+
+    @staticmethod
+    def _code(labels: list, value) -> int:
+        """Small-int code for a team/position label (0 is unknown)"""
+        if value is None:
+            return 0
+        try:
+            return labels.index(value) + 1
+        except ValueError:
+            labels.append(value)
+            return len(labels)
+
+    def refresh(self) -> int:
+        """
+        Load weekly_stats rows added or replaced since the last refresh
+        Only the affected players' metric rows are recomputed
+
+        Returns:
+            Number of stat rows applied
+        """
+        with self._refresh_lock:
+            rows = self.db.get_weekly_points_since(self.season, self.watermark)
+            if not rows:
+                return 0
+            self._apply(rows)
+            self.watermark = max(row['id'] for row in rows)
+            return len(rows)
+
+    def reload_week(self, week: int) -> int:
+        """
+        Re-read one week's rows, for a projection snapshot written after its stats
+        Those leave weekly_stats ids alone, so refresh() would never see them
+
+        Returns:
+            Number of stat rows applied
+        """
+        with self._refresh_lock:
+            rows = self.db.get_week_points(self.season, week)
+            if rows:
+                self._apply(rows)
+            return len(rows)
+
+    def _apply(self, rows: list):
+        """Write weekly points rows into a new state, recomputing the affected players' metrics"""
+        state = self._state
+        player_ids = list(state['player_ids'])
+        row_of = dict(state['row_of'])
+        labels = {group: list(state['labels'][group]) for group in GROUPS}
+        codes = {group: list(state['codes'][group]) for group in GROUPS}
+        for row in rows:
+            index = row_of.get(row['player_id'])
+            if index is None:
+                index = row_of[row['player_id']] = len(player_ids)
+                player_ids.append(row['player_id'])
+                for group in GROUPS:
+                    codes[group].append(0)
+            for group in GROUPS:
+                codes[group][index] = self._code(labels[group], row[group])
+
+        grow = len(player_ids) - len(state['points'])
+        points = np.vstack((state['points'], np.zeros((grow, MAX_WEEKS), dtype=np.float32)))
+        projected = np.vstack((state['projected'], np.full((grow, MAX_WEEKS), np.nan, dtype=np.float32)))
+        played = np.vstack((state['played'], np.zeros((grow, MAX_WEEKS), dtype=bool)))
+        metrics = {
+            metric: np.vstack((matrix, np.full((grow, MAX_WEEKS), np.nan, dtype=np.float32)))
+            for metric, matrix in state['metrics'].items()
+        }
+
+        touched = set()
+        for row in rows:
+            if not 1 <= row['week'] <= MAX_WEEKS:
+                continue
+            index = row_of[row['player_id']]
+            week = row['week'] - 1
+            points[index, week] = row['actual_points']
+            projected[index, week] = np.nan if row['projected_points'] is None else row['projected_points']
+            played[index, week] = True
+            touched.add(index)
+
+        touched = np.fromiter(touched, dtype=np.int64)
+        for metric, block in _metric_rows(points[touched], projected[touched], played[touched]).items():
+            metrics[metric][touched] = block
+
+        self._state = {
+            'player_ids': tuple(player_ids), 'row_of': row_of,
+            'codes': {group: np.array(codes[group], dtype=np.int16) for group in GROUPS},
+            'labels': labels,
+            'points': points, 'projected': projected, 'played': played, 'metrics': metrics,
+        }
+        logger.info(f"Movers index {self.season}: applied {len(rows)} stat rows "
+                    f"({len(touched)} players updated, {len(player_ids)} total)")
+
+    def on_changes(self, changes):
+        """Change feed subscriber: apply team_changed/position_changed events"""
+        with self._refresh_lock:
+            state = self._state
+            labels = {group: list(state['labels'][group]) for group in GROUPS}
+            codes = {group: state['codes'][group].copy() for group in GROUPS}
+            for change in changes:
+                index = state['row_of'].get(change.player_id)
+                if index is not None and change.field in GROUPS:
+                    codes[change.field][index] = self._code(labels[change.field], change.new)
+            self._state = dict(state, codes=codes, labels=labels)
+
+    def _select(self, state: dict, metric: str, week: int, team: str = None, position: str = None) -> tuple:
+        """Metric column for a week and the row indices passing the filters"""
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}")
+        if not 1 <= week <= MAX_WEEKS:
+            raise ValueError(f"week must be between 1 and {MAX_WEEKS}")
+        column = state['metrics'][metric][:, week - 1]
+        mask = np.isfinite(column)
+        for group, value in (('team', team), ('position', position)):
+            if value:
+                labels = state['labels'][group]
+                code = labels.index(value) + 1 if value in labels else -1
+                mask &= state['codes'][group] == code
+        return column, np.flatnonzero(mask)
+
+    def movers(self, week: int, metric: str = 'diff', n: int = 10, direction: str = 'top',
+               team: str = None, position: str = None) -> list:
+        """
+        Players with the highest or lowest value of a metric in a week
+
+        Args:
+            week: NFL week (1-18)
+            metric: 'diff', 'pct_change' or 'volatility'
+            n: Number of players
+            direction: 'top' (largest first) or 'bottom' (smallest first)
+            team: Only players on this team
+            position: Only players at this position
+
+        Returns:
+            List of {'player_id', 'value', 'actual_points', 'projected_points'} dicts
+
+        Raises:
+            ValueError: For an unknown metric or direction, or a week out of range
+        """
+        if direction not in DIRECTIONS:
+            raise ValueError(f"direction must be one of {', '.join(DIRECTIONS)}")
+        state = self._state
+        column, candidates = self._select(state, metric, week, team, position)
+        n = min(n, len(candidates))
+        if n <= 0:
+            return []
+
+        keys = -column[candidates] if direction == 'top' else column[candidates]
+        best = np.argpartition(keys, n - 1)[:n] if n < len(candidates) else np.arange(len(candidates))
+        best = best[np.argsort(keys[best], kind='stable')]
+
+        player_ids = state['player_ids']
+        results = []
+        for index in candidates[best]:
+            projected = state['projected'][index, week - 1]
+            results.append({
+                'player_id': player_ids[index],
+                'value': round(float(column[index]), 2),
+                'actual_points': round(float(state['points'][index, week - 1]), 2),
+                'projected_points': round(float(projected), 2) if np.isfinite(projected) else None,
+            })
+        return results
+
+    def heatmap(self, week: int, metric: str = 'diff', group_by: str = 'team', position: str = None) -> list:
+        """
+        Mean of a metric per team or position in a week
+
+        Args:
+            week: NFL week (1-18)
+            metric: 'diff', 'pct_change' or 'volatility'
+            group_by: 'team' or 'position'
+            position: Only players at this position
+
+        Returns:
+            List of {'group', 'mean', 'players'} dicts, highest mean first
+        """
+        if group_by not in GROUPS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUPS)}")
+        state = self._state
+        column, candidates = self._select(state, metric, week, position=position)
+        labels = state['labels'][group_by]
+        codes = state['codes'][group_by][candidates]
+        counts = np.bincount(codes, minlength=len(labels) + 1)
+        sums = np.bincount(codes, weights=column[candidates].astype(np.float64), minlength=len(labels) + 1)
+
+        cells = [
+            {'group': labels[code - 1] if code else None, 'mean': round(float(sums[code] / counts[code]), 2),
+             'players': int(counts[code])}
+            for code in np.flatnonzero(counts)
+        ]
+        cells.sort(key=lambda cell: -cell['mean'])
+        return cells
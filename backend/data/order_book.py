@@ -0,0 +1,533 @@
+"""
+Order book and matching engine for player stock trades
+Each player has its own book of resting limit orders. A side's price levels are
+a sorted list of integer ticks (bisect) with one FIFO deque of orders per level,
+so the best price is an end of the list and the oldest order at that price is
+the head of its deque: matching follows price-time priority and a new order at
+an existing level is an O(1) append. Cancels only zero an order in place; the
+matcher drops dead orders when it reaches them. Incoming limit and market
+orders match against the opposite side at the resting order's price; a limit
+order's remainder rests, a market order's is cancelled. An order that would
+trade with one of its own user's resting orders is rejected.
+
+Fills become user_portfolio rows (a buy for the buyer, a sell for the seller)
+through FillWriter, whose single thread commits everything queued while the
+previous transaction ran in one transaction (group commit), then notifies
+listeners such as the leaderboard. A match is planned, committed and only then
+applied to the book, so an order whose fills can't be saved leaves the book as
+it found it
+"""
+
+import bisect
+import itertools
+import logging
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import datetime, timezone
+
+from data.market_manager import get_current_nfl_week, is_market_open, is_player_locked
+
+logger = logging.getLogger(__name__)
+
+BUY, SELL = 'buy', 'sell'
+LIMIT, MARKET = 'limit', 'market'
+
+# Prices are points with two decimals, matched as integer ticks
+TICKS_PER_POINT = 100
+
+Fill = namedtuple('Fill', 'player_id price quantity buyer seller buy_order_id sell_order_id timestamp')
+
+
+class OrderRejected(ValueError):
+    """An order that can't be accepted (closed market, locked player, self-trade, bad input)"""
+
+
+class OrderFailed(RuntimeError):
+    """An accepted order whose fills couldn't be committed; the book is unchanged"""
+
+
+def to_ticks(price: float) -> int:
+    return round(price * TICKS_PER_POINT)
+
+
+def to_price(ticks: int) -> float:
+    return ticks / TICKS_PER_POINT
+
+
+class Order:
+    """One order; resting orders live in their price level's deque"""
+
+    __slots__ = ('order_id', 'user_id', 'player_id', 'side', 'kind', 'ticks', 'quantity', 'remaining',
+                 'created_at')
+
+    def __init__(self, order_id: int, user_id: str, player_id: str, side: str, kind: str, ticks: int,
+                 quantity: int, created_at: float):
+        self.order_id = order_id
+        self.user_id = user_id
+        self.player_id = player_id
+        self.side = side
+        self.kind = kind
+        self.ticks = ticks  # None for market orders
+        self.quantity = quantity
+        self.remaining = quantity
+        self.created_at = created_at
+
+    def to_dict(self) -> dict:
+        return {
+            'order_id': self.order_id,
+            'user_id': self.user_id,
+            'player_id': self.player_id,
+            'side': self.side,
+            'type': self.kind,
+            'price': to_price(self.ticks) if self.ticks is not None else None,
+            'quantity': self.quantity,
+            'remaining': self.remaining,
+            'created_at': datetime.fromtimestamp(self.created_at).isoformat(),
+        }
+
+
+class OrderBook:
+    """
+    Resting orders for one player
+    Not thread-safe on its own: callers hold book.lock around match/rest/cancel
+    """
+
+    def __init__(self, player_id: str):
+        self.player_id = player_id
+        self.lock = threading.Lock()
+        self.last_price = None
+        self._prices = {BUY: [], SELL: []}  # ascending ticks with resting quantity
+        self._levels = {BUY: {}, SELL: {}}  # ticks -> deque of orders, oldest first
+        self._depth = {BUY: {}, SELL: {}}   # ticks -> live quantity at the level
+        self._orders = {}                   # order_id -> resting order
+
+    def __len__(self):
+        return len(self._orders)
+
+    def best(self, side: str) -> float:
+        """Best resting price on a side (None if empty)"""
+        prices = self._prices[side]
+        if not prices:
+            return None
+        return to_price(prices[-1] if side == BUY else prices[0])
+
+    def _drop_level(self, side: str, ticks: int):
+        prices = self._prices[side]
+        del prices[bisect.bisect_left(prices, ticks)]
+        del self._levels[side][ticks]
+        del self._depth[side][ticks]
+
+    def match(self, order: Order, now: float) -> list:
+        """
+        Plan the fills of an incoming order against the opposite side as far as its
+        price allows, without changing the book (apply them with fill)
+
+        Returns:
+            List of Fill tuples in execution order
+
+        Raises:
+            OrderRejected: The order would trade with its own user's resting order
+        """
+        side = SELL if order.side == BUY else BUY
+        prices, levels = self._prices[side], self._levels[side]
+        remaining = order.remaining
+        fills = []
+        for ticks in (prices if side == SELL else reversed(prices)):
+            if not remaining:
+                break
+            if order.ticks is not None and (ticks > order.ticks if side == SELL else ticks < order.ticks):
+                break
+            for resting in levels[ticks]:
+                if not remaining:
+                    break
+                if not resting.remaining:  # cancelled
+                    continue
+                if resting.user_id == order.user_id:
+                    raise OrderRejected("Order would trade with your own resting order")
+                quantity = min(remaining, resting.remaining)
+                remaining -= quantity
+                buy, sell = (order, resting) if order.side == BUY else (resting, order)
+                fills.append(Fill(self.player_id, to_price(ticks), quantity, buy.user_id, sell.user_id,
+                                  buy.order_id, sell.order_id, now))
+        return fills
+
+    def fill(self, order: Order, fills: list):
+        """Apply fills planned by match: take them off the resting orders and the incoming one"""
+        side = SELL if order.side == BUY else BUY
+        levels, depth = self._levels[side], self._depth[side]
+        for fill in fills:
+            resting = self._orders[fill.sell_order_id if side == SELL else fill.buy_order_id]
+            resting.remaining -= fill.quantity
+            order.remaining -= fill.quantity
+            depth[resting.ticks] -= fill.quantity
+            if not resting.remaining:
+                del self._orders[resting.order_id]
+            if not depth[resting.ticks]:
+                self._drop_level(side, resting.ticks)
+                continue
+            queue = levels[resting.ticks]
+            while not queue[0].remaining:
+                queue.popleft()
+        if fills:
+            self.last_price = fills[-1].price
+
+    def rest(self, order: Order):
+        """Queue a limit order's remainder at the back of its price level"""
+        levels = self._levels[order.side]
+        queue = levels.get(order.ticks)
+        if queue is None:
+            bisect.insort(self._prices[order.side], order.ticks)
+            queue = levels[order.ticks] = deque()
+            self._depth[order.side][order.ticks] = 0
+        queue.append(order)
+        self._depth[order.side][order.ticks] += order.remaining
+        self._orders[order.order_id] = order
+
+    def get(self, order_id: int) -> Order:
+        return self._orders.get(order_id)
+
+    def cancel(self, order_id: int) -> Order:
+        """
+        Take a resting order off the book
+
+        Returns:
+            The cancelled order (remaining zeroed), or None if it isn't resting
+        """
+        order = self._orders.pop(order_id, None)
+        if order is None:
+            return None
+        depth = self._depth[order.side]
+        depth[order.ticks] -= order.remaining
+        order.remaining = 0
+        if not depth[order.ticks]:
+            self._drop_level(order.side, order.ticks)
+            return order
+        # Dead orders inside the level are skipped by match; trim the ends now
+        queue = self._levels[order.side][order.ticks]
+        while not queue[-1].remaining:
+            queue.pop()
+        while not queue[0].remaining:
+            queue.popleft()
+        return order
+
+    def snapshot(self, levels: int = 10) -> dict:
+        """Aggregated quantity at the best price levels of each side"""
+        bids = self._prices[BUY][:-levels - 1:-1]
+        asks = self._prices[SELL][:levels]
+        return {
+            'player_id': self.player_id,
+            'bids': [{'price': to_price(t), 'quantity': self._depth[BUY][t]} for t in bids],
+            'asks': [{'price': to_price(t), 'quantity': self._depth[SELL][t]} for t in asks],
+            'last_price': self.last_price,
+        }
+
+
+class _Batch:
+    """Fills committed together; submitters wait on it"""
+
+    __slots__ = ('entries', 'done', 'error')
+
+    def __init__(self):
+        self.entries = []  # (fills, rows) per append, so one can be withdrawn before the commit
+        self.done = threading.Event()
+        self.error = None
+
+    @property
+    def fills(self) -> list:
+        return [fill for fills, _ in self.entries for fill in fills]
+
+    @property
+    def rows(self) -> list:
+        return [row for _, rows in self.entries for row in rows]
+
+    def wait(self, timeout: float = None):
+        if not self.done.wait(timeout):
+            raise TimeoutError("Fills were not committed in time")
+        if self.error is not None:
+            raise self.error
+
+
+class FillWriter:
+    """
+    Persists fills to user_portfolio from one background thread
+    Fills appended while a commit is running join the next batch, so under load
+    one transaction (and one fsync) covers many orders
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.listeners = []
+        self.batches = 0
+        self.rows_written = 0
+        self._batch = None
+        self._in_flight = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def add_listener(self, callback):
+        """
+        Register a callback for committed fills
+
+        Args:
+            callback: Called as callback(fills) with each committed batch of Fill tuples
+        """
+        self.listeners.append(callback)
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='fill-writer', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Commit what is queued, then stop the writer thread"""
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def append(self, fills: list, week: int) -> _Batch:
+        """
+        Queue fills for the next commit
+
+        Returns:
+            The batch they will be committed in (batch.wait() blocks until then)
+        """
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        rows = []
+        for fill in fills:
+            rows.append((fill.buyer, fill.player_id, BUY, fill.price, fill.quantity, timestamp, week))
+            rows.append((fill.seller, fill.player_id, SELL, fill.price, fill.quantity, timestamp, week))
+        with self._cond:
+            # Starts the thread if it isn't running, also in a forked child that copied the flag
+            self.start()
+            if self._batch is None:
+                self._batch = _Batch()
+            batch = self._batch
+            batch.entries.append((fills, rows))
+            self._cond.notify()
+        return batch
+
+    def commit(self, fills: list, week: int, timeout: float = None):
+        """
+        Queue fills and wait until they are committed
+        If the wait times out before their batch has started committing, the fills
+        are taken back out of it, so either they are saved or this raises
+
+        Raises:
+            TimeoutError: The fills were withdrawn unsaved
+            Exception: The commit failed (the database error)
+        """
+        batch = self.append(fills, week)
+        if not batch.done.wait(timeout):
+            with self._cond:
+                if batch is self._batch:
+                    batch.entries = [entry for entry in batch.entries if entry[0] is not fills]
+                    if not batch.entries:
+                        self._batch = None
+                        batch.done.set()
+                    raise TimeoutError("Fills were not committed in time")
+            # Already being committed: its outcome is this order's outcome
+            batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+    def flush(self, timeout: float = None):
+        """Wait until everything queued so far is committed"""
+        with self._cond:
+            batches = [b for b in (self._in_flight, self._batch) if b is not None]
+        for batch in batches:
+            batch.done.wait(timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._batch is None and self._running:
+                    self._cond.wait()
+                if self._batch is None:
+                    return
+                batch = self._in_flight = self._batch
+                self._batch = None
+            rows = batch.rows
+            try:
+                self.db.insert_portfolio_rows(rows)
+                self.batches += 1
+                self.rows_written += len(rows)
+            except Exception as e:
+                logger.error(f"Could not commit {len(rows) // 2} fills: {e}")
+                batch.error = e
+            with self._cond:
+                self._in_flight = None
+            batch.done.set()
+            if batch.error is None:
+                for callback in self.listeners:
+                    try:
+                        callback(batch.fills)
+                    except Exception as e:
+                        logger.error(f"Fill listener failed: {e}")
+
+
+class MatchingEngine:
+    """
+    Accepts orders for every player and routes them to per-player books
+    Books lock independently, so orders for different players don't contend
+    """
+
+    def __init__(self, writer: FillWriter = None, lock_index=None, market_open=is_market_open,
+                 current_week=get_current_nfl_week, max_quantity: int = 1000, players=None, schedule=None):
+        """
+        Args:
+            writer: FillWriter persisting fills (None keeps them in memory only)
+            lock_index: InjuryLockIndex of players locked by injury (optional)
+            market_open: Callable() -> bool for market hours
+            current_week: Callable() -> NFL week, for locks and portfolio rows
+            max_quantity: Largest accepted order
+            players: Callable(player_id) -> player dict with team and injury_status
+                (optional), for the bye-week, game-started and injury locks
+            schedule: GameSchedule of the current week's kickoffs (optional)
+        """
+        self.writer = writer
+        self.lock_index = lock_index
+        self.players = players
+        self.schedule = schedule
+        self.current_week = current_week
+        self.market_open = market_open
+        self.max_quantity = max_quantity
+        self._books = {}
+        self._books_lock = threading.Lock()
+        self._order_ids = itertools.count(1)
+        self._order_players = {}  # resting order_id -> player_id
+
+    def book(self, player_id: str) -> OrderBook:
+        book = self._books.get(player_id)
+        if book is None:
+            with self._books_lock:
+                book = self._books.setdefault(player_id, OrderBook(player_id))
+        return book
+
+    def _validate(self, player_id: str, side: str, kind: str, quantity, price):
+        if side not in (BUY, SELL):
+            raise OrderRejected("side must be 'buy' or 'sell'")
+        if kind not in (LIMIT, MARKET):
+            raise OrderRejected("type must be 'limit' or 'market'")
+        if not isinstance(quantity, int) or isinstance(quantity, bool) or not 0 < quantity <= self.max_quantity:
+            raise OrderRejected(f"quantity must be a whole number from 1 to {self.max_quantity}")
+        if kind == LIMIT:
+            if not isinstance(price, (int, float)) or isinstance(price, bool) or to_ticks(price) <= 0:
+                raise OrderRejected("limit orders need a positive price")
+        elif price is not None:
+            raise OrderRejected("market orders don't take a price")
+        if not self.market_open():
+            raise OrderRejected("Market is closed")
+        if self.is_locked(player_id):
+            raise OrderRejected(f"Player {player_id} is locked")
+
+    def is_locked(self, player_id: str) -> bool:
+        if self.lock_index is not None and self.lock_index.is_locked(player_id):
+            return True
+        week = self.current_week()
+        player = (self.players(player_id) if self.players is not None else None) or {}
+        lock = self.schedule.lock_args(player.get('team'), week) if self.schedule is not None else {}
+        return is_player_locked(player_id, week, injury_status=player.get('injury_status'), **lock)
+
+    def submit(self, user_id: str, player_id: str, side: str, quantity: int, price: float = None,
+               kind: str = None, wait: bool = True, timeout: float = 10.0) -> dict:
+        """
+        Match an order and rest any limit remainder
+
+        Args:
+            user_id: Trader
+            player_id: Player traded
+            side: 'buy' or 'sell'
+            quantity: Shares
+            price: Limit price in points (None for a market order)
+            kind: 'limit' or 'market' (default: limit when a price is given)
+            wait: Apply the fills to the book only once they are committed; when
+                False they are applied at once and committed in the background
+            timeout: Seconds to wait for the commit
+
+        Returns:
+            {'order', 'status', 'filled', 'fills'}; status is 'filled', 'open'
+            (resting, possibly partly filled) or 'cancelled' (market remainder)
+
+        Raises:
+            OrderRejected: Invalid order, closed market, locked player or self-trade
+            OrderFailed: The fills couldn't be committed; nothing was traded or rested
+        """
+        kind = kind or (LIMIT if price is not None else MARKET)
+        self._validate(player_id, side, kind, quantity, price)
+
+        now = time.time()
+        order = Order(next(self._order_ids), user_id, player_id, side, kind,
+                      to_ticks(price) if kind == LIMIT else None, quantity, now)
+        book = self.book(player_id)
+        with book.lock:
+            fills = book.match(order, now)
+            # Committed under the book lock, so each player's fills commit in match
+            # order and the resting orders they take are still there to apply them to
+            if fills and self.writer is not None:
+                if wait:
+                    try:
+                        self.writer.commit(fills, self.current_week(), timeout)
+                    except Exception as e:
+                        raise OrderFailed(f"Order not executed: {e}") from e
+                else:
+                    self.writer.append(fills, self.current_week())
+            book.fill(order, fills)
+            for fill in fills:
+                resting_id = fill.sell_order_id if side == BUY else fill.buy_order_id
+                if book.get(resting_id) is None:
+                    self._order_players.pop(resting_id, None)
+            if order.remaining and kind == LIMIT:
+                book.rest(order)
+                self._order_players[order.order_id] = player_id
+
+        filled = quantity - order.remaining
+        if not order.remaining:
+            status = 'filled'
+        elif kind == LIMIT:
+            status = 'open'
+        else:
+            status = 'cancelled'
+        return {
+            'order': order.to_dict(),
+            'status': status,
+            'filled': filled,
+            'fills': [{'price': fill.price, 'quantity': fill.quantity} for fill in fills],
+        }
+
+    def cancel(self, user_id: str, order_id: int) -> dict:
+        """
+        Cancel one of a user's resting orders
+
+        Returns:
+            The order as it rested (remaining is the quantity cancelled), or None
+            if it isn't resting or belongs to someone else
+        """
+        player_id = self._order_players.get(order_id)
+        if player_id is None:
+            return None
+        book = self.book(player_id)
+        with book.lock:
+            order = book.get(order_id)
+            if order is None or order.user_id != user_id:
+                return None
+            cancelled = order.to_dict()
+            book.cancel(order_id)
+            self._order_players.pop(order_id, None)
+        return cancelled
+
+    def snapshot(self, player_id: str, levels: int = 10) -> dict:
+        """Best bid/ask levels and last trade price for a player"""
+        book = self._books.get(player_id)
+        if book is None:
+            # Don't create books for players nobody has traded
+            return OrderBook(player_id).snapshot(levels)
+        with book.lock:
+            return book.snapshot(levels)
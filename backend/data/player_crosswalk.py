@@ -0,0 +1,123 @@
+"""
+Player ID crosswalk between Sleeper and ESPN
+Built once from both player lists, persisted to the player_id_map table and loaded
+into two dicts, so cross-source lookups are O(1) instead of per-player searches
+"""
+
+import logging
+import re
+import unicodedata
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_SUFFIXES = {'jr', 'sr', 'ii', 'iii', 'iv', 'v'}
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a player name for matching across sources
+    Lowercases, strips accents, punctuation and generational suffixes
+
+    Examples:
+        "Amon-Ra St. Brown" -> "amonra st brown"
+        "Kenneth Walker III" -> "kenneth walker"
+    """
+    if not name:
+        return ''
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode('ascii')
+    tokens = _NON_ALNUM.sub('', ascii_name.lower().replace('-', '')).split()
+    while len(tokens) > 1 and tokens[-1] in _SUFFIXES:
+        tokens.pop()
+    return ' '.join(tokens)
+
+
+class PlayerCrosswalk:
+    """
+    Bidirectional Sleeper <-> ESPN player ID map
+    """
+
+    def __init__(self, mapping: dict = None):
+        self._to_espn = {}
+        self._to_sleeper = {}
+        for sleeper_id, espn_id in (mapping or {}).items():
+            self._add(sleeper_id, espn_id)
+
+    def _add(self, sleeper_id: str, espn_id: str):
+        self._to_espn[sleeper_id] = espn_id
+        self._to_sleeper[espn_id] = sleeper_id
+
+    def __len__(self):
+        return len(self._to_espn)
+
+    def to_sleeper(self, espn_id) -> str:
+        """Sleeper ID for an ESPN ID (None if unmapped)"""
+        return self._to_sleeper.get(str(espn_id))
+
+    def to_espn(self, sleeper_id: str) -> str:
+        """ESPN ID for a Sleeper ID (None if unmapped)"""
+        return self._to_espn.get(sleeper_id)
+
+    @classmethod
+    def build(cls, sleeper_players: list, espn_players: list) -> tuple:
+        """
+        Match Sleeper players to ESPN players
+
+        Matching order per Sleeper player:
+            1. espn_id supplied by Sleeper's payload
+            2. normalized name + team + position
+            3. normalized name + position, if unique on the ESPN side
+            4. normalized name, if unique on the ESPN side
+
+        Args:
+            sleeper_players: Dicts with player_id, name, team, position (and optional espn_id)
+            espn_players: Dicts with espn_id, name, team, position (ESPNClient.get_players)
+
+        Returns:
+            (PlayerCrosswalk, {sleeper_id: match_method})
+        """
+        by_name_team_pos = {}
+        by_name_pos = defaultdict(list)
+        by_name = defaultdict(list)
+        known_espn_ids = set()
+        for player in espn_players:
+            name = normalize_name(player['name'])
+            by_name_team_pos[(name, player.get('team'), player.get('position'))] = player['espn_id']
+            by_name_pos[(name, player.get('position'))].append(player['espn_id'])
+            by_name[name].append(player['espn_id'])
+            known_espn_ids.add(player['espn_id'])
+
+        crosswalk = cls()
+        methods = {}
+        for player in sleeper_players:
+            sleeper_id = player['player_id']
+            hinted = player.get('espn_id')
+            if hinted is not None and str(hinted) in known_espn_ids:
+                espn_id, method = str(hinted), 'sleeper_espn_id'
+            else:
+                name = normalize_name(player.get('name'))
+                espn_id, method = by_name_team_pos.get((name, player.get('team'), player.get('position'))), 'name_team_position'
+                if espn_id is None:
+                    candidates, method = by_name_pos.get((name, player.get('position')), []), 'name_position'
+                    if len(candidates) != 1:
+                        candidates, method = by_name.get(name, []), 'name'
+                    espn_id = candidates[0] if len(candidates) == 1 else None
+            if espn_id is None or espn_id in crosswalk._to_sleeper:
+                continue
+            crosswalk._add(sleeper_id, espn_id)
+            methods[sleeper_id] = method
+
+        logger.info(f"Crosswalk matched {len(crosswalk)} of {len(sleeper_players)} Sleeper players")
+        return crosswalk, methods
+
+    def save(self, db, methods: dict = None) -> int:
+        """Replace the persisted player_id_map with this crosswalk"""
+        methods = methods or {}
+        rows = [(sleeper_id, espn_id, methods.get(sleeper_id)) for sleeper_id, espn_id in self._to_espn.items()]
+        return db.replace_player_id_map(rows)
+
+    @classmethod
+    def load(cls, db) -> 'PlayerCrosswalk':
+        """Load the persisted crosswalk"""
+        return cls(db.get_player_id_map())
@@ -0,0 +1,162 @@
+"""
+Player change-data-capture - Diff consecutive players/nfl pulls
+Each player's tracked fields are hashed; only players whose hash differs from the
+stored one are written back and turned into change events, so a daily refresh
+costs work proportional to what actually changed
+"""
+
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fields that are persisted and diffed; anything else in the payload is ignored
+TRACKED_FIELDS = ('name', 'position', 'team', 'injury_status', 'status')
+
+PLAYER_ADDED = 'player_added'
+PLAYER_REMOVED = 'player_removed'
+
+
+def field_changed_kind(field: str) -> str:
+    """Event kind for a tracked field, e.g. 'team' -> 'team_changed'"""
+    return f"{field}_changed"
+
+
+def content_hash(record: dict) -> str:
+    """
+    Hash a player's tracked fields
+
+    Args:
+        record: Player dict containing TRACKED_FIELDS
+
+    Returns:
+        16-character hex digest
+    """
+    payload = '\x1f'.join(str(record.get(field) or '') for field in TRACKED_FIELDS)
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def sleeper_players_to_records(players: dict) -> list:
+    """
+    Convert a players/nfl payload to player records with content hashes
+
+    Args:
+        players: Sleeper players dict keyed by player_id
+
+    Returns:
+        List of player dicts
+    """
+    records = []
+    for player_id, data in players.items():
+        # position is NOT NULL in the schema, so position-less entries are skipped
+        if not data.get('position'):
+            continue
+        record = {
+            'player_id': player_id,
+            'name': data.get('full_name', 'Unknown'),
+            'position': data['position'],
+            'team': data.get('team'),
+            'injury_status': data.get('injury_status'),
+            'status': data.get('status'),
+        }
+        record['content_hash'] = content_hash(record)
+        records.append(record)
+    return records
+
+
+class PlayerChange:
+    """One change event in the player change feed"""
+
+    __slots__ = ('player_id', 'kind', 'field', 'old', 'new')
+
+    def __init__(self, player_id: str, kind: str, field: str = None, old=None, new=None):
+        self.player_id = player_id
+        self.kind = kind
+        self.field = field
+        self.old = old
+        self.new = new
+
+    def to_dict(self):
+        """Convert to dictionary"""
+        return {
+            'player_id': self.player_id,
+            'kind': self.kind,
+            'field': self.field,
+            'old': self.old,
+            'new': self.new
+        }
+
+    def __repr__(self):
+        return f"PlayerChange({self.player_id!r}, {self.kind!r}, {self.old!r} -> {self.new!r})"
+
+
+def diff_players(stored: dict, incoming: list) -> tuple:
+    """
+    Compare a new pull against the stored snapshot
+
+    Args:
+        stored: Stored player records keyed by player_id (must include content_hash)
+        incoming: Player records from sleeper_players_to_records
+
+    Returns:
+        (records to write, list of PlayerChange events)
+    """
+    changed_records = []
+    changes = []
+    seen = set()
+
+    for record in incoming:
+        player_id = record['player_id']
+        seen.add(player_id)
+        previous = stored.get(player_id)
+        if previous is None:
+            changed_records.append(record)
+            changes.append(PlayerChange(player_id, PLAYER_ADDED, new=record['name']))
+            continue
+        if previous.get('content_hash') == record['content_hash']:
+            continue
+
+        changed_records.append(record)
+        for field in TRACKED_FIELDS:
+            if previous.get(field) != record.get(field):
+                changes.append(PlayerChange(player_id, field_changed_kind(field), field,
+                                            previous.get(field), record.get(field)))
+
+    # Players that vanished upstream are reported but kept, since stats reference them
+    for player_id in stored.keys() - seen:
+        changes.append(PlayerChange(player_id, PLAYER_REMOVED, old=stored[player_id].get('name')))
+
+    return changed_records, changes
+
+
+class ChangeFeed:
+    """
+    Synchronous publish/subscribe feed of PlayerChange events
+    Subscribers may filter by event kind; a failing subscriber is logged and skipped
+    """
+
+    def __init__(self):
+        self._subscribers = []
+
+    def subscribe(self, callback, kinds=None):
+        """
+        Register a subscriber
+
+        Args:
+            callback: Called as callback(changes) with a list of PlayerChange
+            kinds: Optional iterable of event kinds to receive (all if None)
+        """
+        self._subscribers.append((callback, frozenset(kinds) if kinds else None))
+
+    def publish(self, changes: list):
+        """Deliver a batch of changes to every matching subscriber"""
+        if not changes:
+            return
+        for callback, kinds in self._subscribers:
+            batch = changes if kinds is None else [c for c in changes if c.kind in kinds]
+            if not batch:
+                continue
+            try:
+                callback(batch)
+            except Exception as e:
+                logger.error(f"Player change subscriber failed: {e}")
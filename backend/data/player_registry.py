@@ -0,0 +1,280 @@
+"""
+Shared-memory player registry - one read-only copy of the player universe per host
+A refresher writes every player into a memory-mapped file: a fixed-width record
+per player holding offsets into an interned string table, plus an open-addressing
+hash index on player_id. Worker processes map the same file, so the page cache
+holds a single copy however many workers there are, and look players up in O(1)
+without building Python dicts. New versions are published with an atomic rename
+and readers remap on their next check
+
+File layout (little-endian):
+    header   64 bytes: magic, format version, generation, player count, index
+             slots, records/index/strings offsets, created_at, source
+    records  count x 7 uint32 string offsets (FIELDS order, 0xFFFFFFFF = None)
+    index    slots x uint32 record numbers (0xFFFFFFFF = empty), crc32 + linear probing
+    strings  uint16 length + UTF-8 bytes, each distinct value stored once
+"""
+
+import logging
+import mmap
+import operator
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'PREG'
+FORMAT_VERSION = 1
+FIELDS = ('player_id', 'name', 'position', 'team', 'injury_status', 'status', 'content_hash')
+SNAPSHOT_FIELDS = ('player_id', 'name', 'position', 'team', 'injury_status')
+
+_HEADER = struct.Struct('<4sIQIIQQQd8s')
+_RECORD = struct.Struct('<' + 'I' * len(FIELDS))
+_SLOT = struct.Struct('<I')
+_LENGTH = struct.Struct('<H')
+_NONE = 0xFFFFFFFF
+_EMPTY = 0xFFFFFFFF
+_HEADER_SIZE = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _slot_count(count: int) -> int:
+    """Power of two at least twice the player count (load factor <= 0.5)"""
+    slots = 8
+    while slots < count * 2:
+        slots *= 2
+    return slots
+
+
+def read_header(path: str) -> dict:
+    """Header fields of a registry file (None if missing or not a registry)"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, generation, count, slots, records, index, strings, created_at, source = _HEADER.unpack(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    return {'generation': generation, 'count': count, 'slots': slots, 'records_offset': records,
+            'index_offset': index, 'strings_offset': strings, 'created_at': created_at,
+            'source': source.rstrip(b'\0').decode('ascii')}
+
+
+def write_registry(path: str, records: list, source: str = 'sleeper') -> int:
+    """
+    Build a registry file from player records and publish it atomically
+
+    Args:
+        path: Registry file
+        records: Player dicts with FIELDS (missing fields are stored as None)
+        source: Where the records came from ('sleeper' or 'database')
+
+    Returns:
+        Generation of the published file (one more than the previous file's)
+    """
+    previous = read_header(path)
+    generation = previous['generation'] + 1 if previous else 1
+
+    strings = bytearray()
+    interned = {}
+
+    def intern(value) -> int:
+        if value is None:
+            return _NONE
+        offset = interned.get(value)
+        if offset is None:
+            data = str(value).encode('utf-8')[:0xFFFF]
+            offset = len(strings)
+            interned[value] = offset
+            strings.extend(_LENGTH.pack(len(data)))
+            strings.extend(data)
+        return offset
+
+    count = len(records)
+    slots = _slot_count(count)
+    mask = slots - 1
+    record_table = bytearray(_RECORD.size * count)
+    index = array('I', [_EMPTY]) * slots
+    for i, record in enumerate(records):
+        _RECORD.pack_into(record_table, i * _RECORD.size, *(intern(record.get(field)) for field in FIELDS))
+        slot = zlib.crc32(record['player_id'].encode('utf-8')) & mask
+        while index[slot] != _EMPTY:
+            slot = (slot + 1) & mask
+        index[slot] = i
+    if sys.byteorder == 'big':
+        index.byteswap()
+
+    records_offset = _HEADER_SIZE
+    index_offset = _align(records_offset + len(record_table))
+    strings_offset = _align(index_offset + slots * _SLOT.size)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, generation, count, slots, records_offset, index_offset,
+                          strings_offset, time.time(), source.encode('ascii')[:8])
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(header.ljust(_HEADER_SIZE, b'\0'))
+        f.write(bytes(record_table).ljust(index_offset - records_offset, b'\0'))
+        f.write(index.tobytes().ljust(strings_offset - index_offset, b'\0'))
+        f.write(strings)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return generation
+
+
+class RegistryView:
+    """
+    One mapped version of the registry
+    Reads like a PlayerSnapshot (len, get, players, loaded_at) but decodes players
+    on demand instead of holding them as Python objects. A version never changes,
+    so the full player list is decoded once per view and then reused
+    """
+
+    source = 'registry'
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.identity = (stat.st_ino, stat.st_mtime_ns)
+        (magic, version, self.generation, self.count, self.slots, self._records, self._index,
+         self._strings, self.created_at, source) = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} player registry")
+        self.origin = source.rstrip(b'\0').decode('ascii')
+        self.loaded_at = datetime.fromtimestamp(self.created_at)
+        self._mask = self.slots - 1
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, player_id: str) -> bool:
+        return self.find(player_id) >= 0
+
+    def _string(self, offset: int):
+        if offset == _NONE:
+            return None
+        start = self._strings + offset
+        (length,) = _LENGTH.unpack_from(self._mm, start)
+        return self._mm[start + 2:start + 2 + length].decode('utf-8')
+
+    def find(self, player_id: str) -> int:
+        """Record number of a player (-1 if absent)"""
+        key = player_id.encode('utf-8')
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            (i,) = _SLOT.unpack_from(self._mm, self._index + slot * _SLOT.size)
+            if i == _EMPTY:
+                return -1
+            (offset,) = _SLOT.unpack_from(self._mm, self._records + i * _RECORD.size)
+            start = self._strings + offset
+            (length,) = _LENGTH.unpack_from(self._mm, start)
+            if length == len(key) and self._mm[start + 2:start + 2 + length] == key:
+                return i
+            slot = (slot + 1) & self._mask
+
+    def record(self, i: int, fields: tuple = FIELDS) -> dict:
+        """Decode record number i"""
+        offsets = _RECORD.unpack_from(self._mm, self._records + i * _RECORD.size)
+        return {field: self._string(offsets[FIELDS.index(field)]) for field in fields}
+
+    def get(self, player_id: str) -> dict:
+        """Look up one player by id (the same fields as a PlayerSnapshot entry)"""
+        i = self.find(player_id)
+        return self.record(i, SNAPSHOT_FIELDS) if i >= 0 else None
+
+    def _string_table(self) -> dict:
+        """Decode the whole string table: offset -> str (plus the None marker)"""
+        data = self._mm[self._strings:]  # one copy, then plain bytes slicing
+        unpack_length = _LENGTH.unpack_from
+        table = {_NONE: None}
+        offset, end = 0, len(data)
+        while offset < end:
+            (length,) = unpack_length(data, offset)
+            table[offset] = data[offset + 2:offset + 2 + length].decode('utf-8')
+            offset += 2 + length
+        return table
+
+    def records(self, fields: tuple = FIELDS) -> list:
+        """Decode every player (each distinct string is decoded once per call)"""
+        strings = self._string_table()
+        pick = operator.itemgetter(*(FIELDS.index(field) for field in fields))
+        table = memoryview(self._mm)[self._records:self._records + self.count * _RECORD.size]
+        try:
+            return [dict(zip(fields, map(strings.__getitem__, pick(offsets))))
+                    for offsets in _RECORD.iter_unpack(table)]
+        finally:
+            table.release()
+
+    @property
+    def players(self) -> list:
+        """
+        Every player as a PlayerSnapshot-style dict, decoded on each use
+        Nothing is kept on the view, so workers hold no per-process copy of the universe
+        """
+        return self.records(SNAPSHOT_FIELDS)
+
+
+class PlayerRegistry:
+    """
+    Maps the newest published registry file and remaps when it is replaced
+    Replacement is detected with a stat() at most every check_interval seconds;
+    readers holding an older view keep a valid mapping until they drop it
+    """
+
+    def __init__(self, path: str, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._view = None
+        self._checked = float('-inf')
+        self._lock = threading.Lock()
+
+    def view(self) -> RegistryView:
+        """Current view (None until a registry has been published)"""
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval:
+            self._checked = now
+            self._remap()
+        return self._view
+
+    def remap(self) -> RegistryView:
+        """Check for a new version right away"""
+        self._checked = time.monotonic()
+        self._remap()
+        return self._view
+
+    def _remap(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return
+        with self._lock:
+            current = self._view
+            if current is not None and current.identity == (stat.st_ino, stat.st_mtime_ns):
+                return
+            try:
+                view = RegistryView(self.path)
+            except (OSError, ValueError, struct.error) as e:
+                logger.error(f"Ignoring unreadable player registry {self.path}: {e}")
+                return
+            # Single reference assignment: readers see either the old or the new view
+            self._view = view
+        logger.info(f"Mapped player registry generation {view.generation} ({len(view)} players)")
+
+    def publish(self, records: list, source: str = 'sleeper') -> RegistryView:
+        """Write a new version and map it"""
+        generation = write_registry(self.path, records, source)
+        logger.info(f"Published player registry generation {generation} ({len(records)} players)")
+        return self.remap()
@@ -0,0 +1,234 @@
+"""
+Player Universe - In-memory snapshot of every NFL player, refreshed in the background
+Requests read the last good snapshot; the app's scheduler runs refresh() on an
+interval, which downloads players/nfl, writes the changed rows to SQLite and swaps
+in a new snapshot with a single assignment, so no request ever waits on the
+upstream download. Changes are published on a ChangeFeed for downstream indexes
+and caches
+
+Worker processes of one server take turns on a host-wide lock file at each refresh:
+the first downloads and stamps the file, the rest find the fresh stamp when their
+turn comes and follow what it wrote instead of downloading again. With a
+PlayerRegistry the snapshot lives in a memory-mapped file shared by every worker
+process; followers remap the published file and diff it for their change feeds
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from data.host_lock import host_lock
+from data.player_diff import ChangeFeed, diff_players, sleeper_players_to_records
+
+logger = logging.getLogger(__name__)
+
+
+class PlayerSnapshot:
+    """Immutable view of the player universe at one point in time"""
+
+    def __init__(self, players: tuple, loaded_at: datetime = None, source: str = 'empty'):
+        self.players = players
+        self.by_id = {player['player_id']: player for player in players}
+        self.loaded_at = loaded_at
+        self.source = source
+
+    def __len__(self):
+        return len(self.players)
+
+    def get(self, player_id: str) -> dict:
+        """Look up one player by id"""
+        return self.by_id.get(player_id)
+
+
+class PlayerUniverse:
+    """
+    Serves player reads from a snapshot; refresh() is run by the app's scheduler
+    """
+
+    def __init__(self, db, sleeper_client, refresh_interval: int = None, retry_interval: int = None,
+                 registry=None, lock_path: str = None):
+        self.db = db
+        self.sleeper_client = sleeper_client
+        self.registry = registry
+        # Lock file electing the downloading worker, also holding the time of the last download
+        self.lock_path = lock_path or (f"{registry.path}.lock" if registry is not None
+                                       else f"{db.db_path}.players.lock")
+        self._downloaded_at = None  # stamp of this process's last download
+        self._feed_view = None  # registry version the change feed has caught up with
+        self._records = {}  # without a registry: full records behind the snapshot, by player_id
+        self._dropped = set()  # players this process saw vanish upstream (the table keeps them)
+        self.refresh_interval = refresh_interval or Config.PLAYER_REFRESH_INTERVAL
+        self.retry_interval = retry_interval or Config.PLAYER_REFRESH_RETRY_INTERVAL
+        self._snapshot = PlayerSnapshot(())
+        self._refresh_lock = threading.Lock()
+        self._sync_lock = threading.Lock()  # guards what the change feed last published
+        self.last_refresh_error = None
+        self.change_feed = ChangeFeed()
+
+    def snapshot(self) -> PlayerSnapshot:
+        """Current snapshot (never blocks); a RegistryView when a registry is in use"""
+        if self.registry is not None:
+            view = self.registry.view()
+            if view is not None:
+                return view
+        return self._snapshot
+
+    @property
+    def refreshing(self) -> bool:
+        """True while a refresh is in progress"""
+        return self._refresh_lock.locked()
+
+    def _swap(self, records, source: str):
+        if self.registry is not None:
+            self._feed_view = self.registry.publish(records, source)
+            return
+        self._records = {record['player_id']: record for record in records}
+        players = tuple(
+            {
+                'player_id': record['player_id'],
+                'name': record['name'],
+                'position': record['position'],
+                'team': record['team'],
+                'injury_status': record['injury_status'],
+            }
+            for record in records
+        )
+        # Single reference assignment: readers see either the old or the new snapshot
+        self._snapshot = PlayerSnapshot(players, datetime.now(), source)
+
+    def load_from_db(self) -> int:
+        """
+        Build the snapshot from the players table (fast, no network)
+        Once loaded, later calls catch up through follow, so the change feed misses nothing
+
+        Returns:
+            Number of players loaded
+        """
+        if self._feed_view is not None or self._records:
+            self.follow()
+            return len(self.snapshot())
+        if self.registry is not None:
+            view = self.registry.remap()
+            if view is not None and len(view):
+                self._feed_view = view
+                logger.info(f"Using {len(view)} players from registry generation {view.generation}")
+                return len(view)
+        records = list(self.db.get_player_records().values())
+        if records:
+            self._swap(records, 'database')
+        logger.info(f"Loaded {len(records)} players from database")
+        return len(records)
+
+    def refresh(self) -> bool:
+        """
+        Download players/nfl, write the players that changed and publish a new snapshot
+        Concurrent calls are collapsed: if a refresh is already running this returns False.
+        If another worker downloaded within half an interval, follow what it wrote instead
+
+        Returns:
+            True if a new snapshot was published
+        """
+        if not self._refresh_lock.acquire(blocking=False):
+            return False
+        try:
+            # Workers queue here, so followers get their turn after the download is published
+            with host_lock(self.lock_path):
+                if self._downloaded_elsewhere():
+                    changes = self._follow()
+                else:
+                    changes = self._download()
+                    self._stamp_download()
+            self.last_refresh_error = None
+        except Exception as e:
+            self.last_refresh_error = str(e)
+            logger.error(f"Player refresh failed, keeping previous snapshot: {e}")
+            return False
+        finally:
+            self._refresh_lock.release()
+
+        self.change_feed.publish(changes)
+        return True
+
+    def follow(self) -> int:
+        """
+        Take up players another process wrote and publish the changes on this change feed
+        Subscribe to PLAYERS invalidations; this process's own writes diff to nothing
+
+        Returns:
+            Number of change events published
+        """
+        try:
+            changes = self._follow()
+        except Exception as e:
+            logger.error(f"Could not follow player changes: {e}")
+            return 0
+        self.change_feed.publish(changes)
+        return len(changes)
+
+    def _published(self) -> dict:
+        """Records this process last published on its change feed, by player_id"""
+        if self.registry is None:
+            return self._records
+        if self._feed_view is None:
+            return {}
+        return {record['player_id']: record for record in self._feed_view.records()}
+
+    def _download(self) -> list:
+        """Fetch players/nfl, persist changed rows and publish; returns the change events"""
+        start = time.perf_counter()
+        records = sleeper_players_to_records(self.sleeper_client.get_all_players(use_cache=False))
+        # The table decides what to write; the change feed describes this process's
+        # snapshot, which another worker's write may already have brought the table past
+        changed, _ = diff_players(self.db.get_player_records(), records)
+        with self._sync_lock:
+            published = self._published()
+            _, changes = diff_players(published, records)
+            self._dropped = (self._dropped | published.keys()) - {record['player_id'] for record in records}
+            # Published before the table write, so workers told of the write by PLAYERS find it
+            self._swap(records, 'sleeper')
+        if changed:
+            self.db.upsert_players(changed)
+        logger.info(f"Refreshed {len(records)} players ({len(changed)} rows written, "
+                    f"{len(changes)} changes) in {time.perf_counter() - start:.1f}s")
+        return changes
+
+    def _downloaded_elsewhere(self) -> bool:
+        """True if another worker's download is stamped within half an interval (call holding the lock)"""
+        try:
+            with open(self.lock_path) as f:
+                stamp = float(f.read() or 0)
+        except (OSError, ValueError):
+            return False
+        return stamp != self._downloaded_at and time.time() - stamp < self.refresh_interval / 2
+
+    def _stamp_download(self):
+        self._downloaded_at = time.time()
+        with open(self.lock_path, 'w') as f:
+            f.write(repr(self._downloaded_at))
+
+    def _follow(self) -> list:
+        """Take up the players another worker downloaded; returns the change events"""
+        with self._sync_lock:
+            if self.registry is not None:
+                return self._follow_registry()
+            # The table keeps players that vanished upstream; ones this process already
+            # reported removed stay out, others are only noticed at its next download
+            records = [record for player_id, record in self.db.get_player_records().items()
+                       if player_id not in self._dropped]
+            _, changes = diff_players(self._records, records)
+            if changes:
+                self._swap(records, 'database')
+            return changes
+
+    def _follow_registry(self) -> list:
+        """Map the newest registry and diff it against the last version this worker saw"""
+        view = self.registry.remap()
+        previous, self._feed_view = self._feed_view, view
+        if view is None or previous is None or view.generation == previous.generation:
+            return []
+        stored = {record['player_id']: record for record in previous.records()}
+        _, changes = diff_players(stored, view.records())
+        logger.info(f"Followed player registry to generation {view.generation} ({len(changes)} changes)")
+        return changes
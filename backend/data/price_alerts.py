@@ -0,0 +1,361 @@
+"""
+Price alerts - "notify me when a player's price crosses 25"
+Each player's active alerts are split by direction into two threshold-sorted
+lists: alerts waiting for the price to rise to their threshold and alerts
+waiting for it to fall to it. A tick from the old price to the new one can only
+trigger thresholds between the two, and those are one contiguous run of one
+list, so two bisects find them and one slice deletion removes them: a tick
+costs O(log n + triggered) however many alerts are set, instead of checking
+every alert on every tick.
+
+Triggered alerts are one-shot. They are queued to AlertDispatcher, whose single
+thread records everything queued during the previous commit in one transaction
+and then hands the batch to listeners, so the tick path never waits on the
+database
+"""
+
+import bisect
+import itertools
+import logging
+import math
+import threading
+from collections import Counter, namedtuple
+from operator import itemgetter
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+ABOVE, BELOW = 'above', 'below'
+
+Alert = namedtuple('Alert', 'alert_id user_id player_id threshold direction')
+Triggered = namedtuple('Triggered', 'alert price triggered_at')
+_USER, _PLAYER_SIDE, _THRESHOLD = itemgetter(1), itemgetter(2, 4), itemgetter(3)
+
+
+class AlertRejected(ValueError):
+    """An alert that can't be created (bad input, too many alerts)"""
+
+
+class _PlayerAlerts:
+    """One player's last price and active alerts, thresholds kept sorted alongside the alerts"""
+
+    __slots__ = ('price', 'above', 'above_alerts', 'below', 'below_alerts')
+
+    def __init__(self):
+        self.price = None
+        self.above = []  # thresholds, ascending
+        self.above_alerts = []
+        self.below = []
+        self.below_alerts = []
+
+    def sides(self, direction: str) -> tuple:
+        return (self.above, self.above_alerts) if direction == ABOVE else (self.below, self.below_alerts)
+
+    def add(self, alert: Alert):
+        thresholds, alerts = self.sides(alert.direction)
+        index = bisect.bisect_right(thresholds, alert.threshold)
+        thresholds.insert(index, alert.threshold)
+        alerts.insert(index, alert)
+
+    def remove(self, alert: Alert) -> bool:
+        thresholds, alerts = self.sides(alert.direction)
+        index = bisect.bisect_left(thresholds, alert.threshold)
+        while index < len(thresholds) and thresholds[index] == alert.threshold:
+            if alerts[index].alert_id == alert.alert_id:
+                del thresholds[index], alerts[index]
+                return True
+            index += 1
+        return False
+
+    def cross(self, price: float) -> list:
+        """Move to a new price and remove and return the alerts it crossed"""
+        old, self.price = self.price, price
+        if old is None or old == price:
+            return []
+        if price > old:
+            # Rising alerts with old < threshold <= price
+            thresholds, alerts = self.above, self.above_alerts
+            lo, hi = bisect.bisect_right(thresholds, old), bisect.bisect_right(thresholds, price)
+        else:
+            # Falling alerts with price <= threshold < old
+            thresholds, alerts = self.below, self.below_alerts
+            lo, hi = bisect.bisect_left(thresholds, price), bisect.bisect_left(thresholds, old)
+        if lo == hi:
+            return []
+        crossed = alerts[lo:hi]
+        del thresholds[lo:hi], alerts[lo:hi]
+        return crossed
+
+    def __len__(self):
+        return len(self.above) + len(self.below)
+
+
+class AlertDispatcher:
+    """
+    Persists and announces triggered alerts from one background thread
+    Alerts triggered while a commit is running join the next batch, up to
+    max_batch per transaction so a burst doesn't hold the write lock for long
+    """
+
+    def __init__(self, db=None, max_batch: int = 2000):
+        """
+        Args:
+            db: DatabaseConnection to mark alerts triggered in (None only notifies)
+            max_batch: Most alerts marked in one transaction
+        """
+        self.db = db
+        self.max_batch = max_batch
+        self.listeners = []
+        self.batches = 0
+        self.dispatched = 0
+        self._pending = []
+        self._in_flight = False
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+
+    def add_listener(self, callback):
+        """
+        Register a callback for triggered alerts
+
+        Args:
+            callback: Called as callback(triggered) with each committed batch of Triggered tuples
+        """
+        self.listeners.append(callback)
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='alert-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Dispatch what is queued, then stop the thread"""
+        self.flush(timeout)
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def append(self, triggered: list):
+        """Queue triggered alerts for the next batch"""
+        with self._cond:
+            # Starts the thread if it isn't running, also in a forked child that copied the flag
+            self.start()
+            self._pending.extend(triggered)
+            self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Wait until everything queued so far is dispatched; False on timeout"""
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and self._running:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                self._in_flight = True
+            try:
+                self._dispatch(batch)
+            finally:
+                with self._cond:
+                    self._in_flight = False
+                    self._cond.notify_all()
+
+    def _dispatch(self, batch: list):
+        if self.db is not None:
+            try:
+                # In id order, so consecutive rows land on the same pages
+                self.db.mark_price_alerts_triggered(sorted(
+                    (item.alert.alert_id, item.price, item.triggered_at) for item in batch))
+            except Exception as e:
+                # The alerts are already out of the index; notify anyway and let a
+                # restart re-arm them from the database
+                logger.error(f"Could not mark {len(batch)} price alerts triggered: {e}")
+        self.batches += 1
+        self.dispatched += len(batch)
+        for callback in self.listeners:
+            try:
+                callback(batch)
+            except Exception as e:
+                logger.error(f"Price alert listener failed: {e}")
+
+
+class PriceAlertEngine:
+    """
+    Active alerts for every player, checked against each price tick
+    Register on_price as a RealtimeService price listener
+    """
+
+    def __init__(self, db=None, dispatcher: AlertDispatcher = None, max_per_user: int = 100):
+        """
+        Args:
+            db: DatabaseConnection storing alerts (None keeps them in memory only)
+            dispatcher: AlertDispatcher for triggered alerts (None drops them after on_price)
+            max_per_user: Most active alerts one user may hold
+        """
+        self.db = db
+        self.dispatcher = dispatcher
+        self.max_per_user = max_per_user
+        self._players = {}
+        self._alerts = {}  # alert_id -> Alert
+        self._per_user = Counter()  # user_id -> active alerts
+        self._lock = threading.Lock()
+        self._alert_ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def _player(self, player_id: str) -> _PlayerAlerts:
+        alerts = self._players.get(player_id)
+        if alerts is None:
+            alerts = self._players[player_id] = _PlayerAlerts()
+        return alerts
+
+    def load(self, alerts) -> int:
+        """
+        Replace the active alerts, sorting each player's lists once
+        The new index is built before taking the lock, so ticks keep flowing
+
+        Args:
+            alerts: Alert tuples (or rows with the same fields)
+
+        Returns:
+            Number of alerts loaded
+        """
+        alerts = list(map(Alert._make, alerts))
+        by_id = {alert.alert_id: alert for alert in alerts}
+        per_user = Counter(map(_USER, alerts))
+        by_side = {}
+        for alert in alerts:
+            by_side.setdefault(_PLAYER_SIDE(alert), []).append(alert)
+        players = {}
+        for (player_id, direction), side in by_side.items():
+            side.sort(key=_THRESHOLD)
+            player = players.get(player_id)
+            if player is None:
+                player = players[player_id] = _PlayerAlerts()
+            thresholds, side_alerts = player.sides(direction)
+            thresholds.extend(map(_THRESHOLD, side))
+            side_alerts.extend(side)
+
+        with self._lock:
+            for player_id, current in self._players.items():
+                if current.price is not None:
+                    players.setdefault(player_id, _PlayerAlerts()).price = current.price
+            self._players, self._alerts, self._per_user = players, by_id, per_user
+            if by_id:
+                self._alert_ids = itertools.count(max(by_id) + 1)
+        logger.info(f"Loaded {len(alerts)} price alerts")
+        return len(alerts)
+
+    def load_from_db(self) -> int:
+        """Load untriggered alerts from the database"""
+        return self.load(self.db.get_active_price_alerts())
+
+    def add(self, user_id: str, player_id: str, threshold, direction: str = None) -> Alert:
+        """
+        Create an alert
+
+        Args:
+            user_id: Owner
+            player_id: Player to watch
+            threshold: Price to watch for
+            direction: 'above' (price rises to the threshold) or 'below' (falls to it);
+                inferred from the player's last price when omitted
+
+        Returns:
+            The new Alert
+
+        Raises:
+            AlertRejected: For a bad threshold or direction, or too many alerts
+        """
+        if (not isinstance(threshold, (int, float)) or isinstance(threshold, bool)
+                or not math.isfinite(threshold) or threshold < 0):
+            raise AlertRejected("threshold must be a non-negative number")
+        threshold = float(threshold)
+        if direction is None:
+            player = self._players.get(player_id)
+            if player is None or player.price is None or player.price == threshold:
+                raise AlertRejected("direction ('above' or 'below') is required without a different current price")
+            direction = ABOVE if threshold > player.price else BELOW
+        elif direction not in (ABOVE, BELOW):
+            raise AlertRejected("direction must be 'above' or 'below'")
+        with self._lock:
+            if self._per_user[user_id] >= self.max_per_user:
+                raise AlertRejected(f"At most {self.max_per_user} active alerts per user")
+            # Reserve the slot now, so concurrent adds can't all pass the check
+            self._per_user[user_id] += 1
+
+        try:
+            if self.db is not None:
+                alert_id = self.db.insert_price_alert(user_id, player_id, threshold, direction)
+            else:
+                alert_id = next(self._alert_ids)
+        except Exception:
+            with self._lock:
+                self._release(user_id)
+            raise
+        alert = Alert(alert_id, user_id, player_id, threshold, direction)
+        with self._lock:
+            self._player(player_id).add(alert)
+            self._alerts[alert.alert_id] = alert
+        return alert
+
+    def cancel(self, user_id: str, alert_id: int) -> Alert:
+        """
+        Remove an active alert
+
+        Returns:
+            The cancelled Alert, or None if there is no such active alert for this user
+        """
+        with self._lock:
+            alert = self._alerts.get(alert_id)
+            if alert is None or alert.user_id != user_id:
+                return None
+            self._players[alert.player_id].remove(alert)
+            self._forget([alert])
+        if self.db is not None:
+            self.db.delete_price_alert(alert_id, user_id)
+        return alert
+
+    def _release(self, user_id: str):
+        self._per_user[user_id] -= 1
+        if not self._per_user[user_id]:
+            del self._per_user[user_id]
+
+    def _forget(self, alerts: list):
+        for alert in alerts:
+            del self._alerts[alert.alert_id]
+            self._release(alert.user_id)
+
+    def on_price(self, player_id: str, price: float) -> list:
+        """
+        Price listener: trigger the alerts crossed between the last price and this one
+        The first tick for a player only records its price
+
+        Returns:
+            Triggered tuples (also queued to the dispatcher)
+        """
+        with self._lock:
+            crossed = self._player(player_id).cross(price)
+            if not crossed:
+                return []
+            self._forget(crossed)
+        triggered_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        triggered = [Triggered(alert, price, triggered_at) for alert in crossed]
+        if self.dispatcher is not None:
+            self.dispatcher.append(triggered)
+        return triggered
+
+    def price(self, player_id: str) -> float:
+        """Last price seen for a player (None before its first tick)"""
+        player = self._players.get(player_id)
+        return player.price if player is not None else None
@@ -0,0 +1,180 @@
+"""
+Intraweek projection history - every projection a player-week had, not just the latest
+insert_projections (the market-open snapshot) and append_projection_history (the
+scheduled intraweek pulls) append a snapshot to projection_history only when the
+value changes, so repeated identical pulls cost nothing. A background compaction folds
+snapshots older than a cutoff into one block per player-week: times and values
+(in thousandths of a point) are delta-encoded and stored as zigzag varints, so a
+typical change costs a few bytes instead of a row. Reads merge the block with the
+newer uncompacted rows to answer "projection as of time T" and intraweek paths
+"""
+
+import bisect
+import logging
+import time
+from itertools import groupby
+
+logger = logging.getLogger(__name__)
+
+# Values are stored as integer thousandths of a point
+SCALE = 1000
+
+
+def _append_varint(out: bytearray, value: int):
+    """Append a signed int as a zigzag LEB128 varint"""
+    value = (value << 1) ^ (value >> 63)
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def encode_snapshots(times: list, values: list) -> bytes:
+    """
+    Delta-encode a time-ordered series of snapshots
+
+    Args:
+        times: Epoch milliseconds, ascending
+        values: Projected points at each time
+
+    Returns:
+        Alternating (time delta, value delta) varints, starting from (0, 0)
+    """
+    out = bytearray()
+    previous_time, previous_value = 0, 0
+    for at, value in zip(times, values):
+        scaled = round(value * SCALE)
+        _append_varint(out, at - previous_time)
+        _append_varint(out, scaled - previous_value)
+        previous_time, previous_value = at, scaled
+    return bytes(out)
+
+
+def decode_snapshots(data: bytes) -> tuple:
+    """
+    Decode a block written by encode_snapshots
+
+    Returns:
+        (times, values) lists
+    """
+    numbers = []
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        numbers.append((value >> 1) ^ -(value & 1))
+        value = shift = 0
+
+    times, values = [], []
+    at = scaled = 0
+    for i in range(0, len(numbers), 2):
+        at += numbers[i]
+        scaled += numbers[i + 1]
+        times.append(at)
+        values.append(scaled / SCALE)
+    return times, values
+
+
+def _to_ms(at) -> int:
+    """Epoch milliseconds from a datetime or epoch seconds"""
+    if hasattr(at, 'timestamp'):
+        at = at.timestamp()
+    return int(at * 1000)
+
+
+def compact_projection_history(db, season: int, older_than: float = 3600, now: float = None) -> int:
+    """
+    Fold uncompacted snapshots older than a cutoff into per-player-week blocks
+
+    Args:
+        db: DatabaseConnection instance
+        season: Season to compact
+        older_than: Seconds a snapshot stays uncompacted
+        now: Current epoch seconds (default time.time())
+
+    Returns:
+        Number of player-weeks whose block was rewritten
+    """
+    start = time.perf_counter()
+    cutoff = int(((time.time() if now is None else now) - older_than) * 1000)
+    folded = []
+
+    def fold(rows):
+        blocks = []
+        for (player_id, week), group in groupby(rows, key=lambda row: (row['player_id'], row['week'])):
+            group = list(group)
+            data = group[0]['data']
+            times, values = decode_snapshots(data) if data is not None else ([], [])
+            for row in group:
+                # Snapshots recorded out of order are dropped rather than rewriting history
+                if times and row['recorded_at'] <= times[-1]:
+                    logger.warning(f"Dropping out-of-order projection snapshot for {player_id} "
+                                   f"{season} week {week} at {row['recorded_at']}")
+                elif not values or row['projected_points'] != values[-1]:
+                    times.append(row['recorded_at'])
+                    values.append(row['projected_points'])
+                folded.append((player_id, week, row['recorded_at']))
+            blocks.append((player_id, week, times[0], times[-1], len(times), encode_snapshots(times, values)))
+        return blocks, folded
+
+    count = db.fold_projection_history(season, cutoff, fold)
+    if count:
+        logger.info(f"Compacted {len(folded)} projection snapshots into {count} blocks "
+                    f"({season}) in {time.perf_counter() - start:.2f}s")
+    return count
+
+
+def projection_path(db, player_id: str, season: int, week: int, start=None, end=None) -> list:
+    """
+    Every projection change for a player-week, for intraweek price charts
+
+    Args:
+        start: Only changes after this time (datetime or epoch seconds); the value
+            in effect at start is returned as the first point
+        end: Only changes at or before this time
+
+    Returns:
+        List of (epoch_ms, projected_points) pairs in time order
+    """
+    end_ms = _to_ms(end) if end is not None else None
+    block = db.get_projection_block(player_id, season, week)
+    rows = db.get_projection_snapshots(player_id, season, week, end_ms)
+    times, values = decode_snapshots(block['data']) if block else ([], [])
+    for row in rows:
+        if not times or row['recorded_at'] > times[-1]:
+            times.append(row['recorded_at'])
+            values.append(row['projected_points'])
+    if end_ms is not None:
+        keep = bisect.bisect_right(times, end_ms)
+        times, values = times[:keep], values[:keep]
+    if start is None:
+        return list(zip(times, values))
+
+    start_ms = _to_ms(start)
+    first = bisect.bisect_right(times, start_ms)
+    path = [(start_ms, values[first - 1])] if first else []
+    return path + list(zip(times[first:], values[first:]))
+
+
+def projection_as_of(db, player_id: str, season: int, week: int, at) -> float:
+    """
+    The projection a player-week had at a point in time
+
+    Args:
+        at: datetime or epoch seconds
+
+    Returns:
+        Projected points, or None if nothing was recorded by then
+    """
+    at_ms = _to_ms(at)
+    # Recent times are answered by one index seek into the uncompacted rows
+    row = db.get_projection_as_of(player_id, season, week, at_ms)
+    if row is not None:
+        return row['projected_points']
+    block = db.get_projection_block(player_id, season, week)
+    if block is None or at_ms < block['first_at']:
+        return None
+    times, values = decode_snapshots(block['data'])
+    return values[bisect.bisect_right(times, at_ms) - 1]
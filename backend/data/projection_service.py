@@ -3,6 +3,62 @@ Service for calculating player projections
 TODO: Implement projection algorithms
 """
 
+import logging
+
+logger = logging.getLogger(__name__)
+
+def snapshot_projections(db, projection_source, week: int, season: int = 2024) -> int:
+    """
+    Capture the "market opening" projections for a week
+    Fetched through the hedged projection source, so a slow or failing Sleeper
+    API falls back to ESPN
+    
+    Args:
+        db: DatabaseConnection instance
+        projection_source: HedgedProjectionSource
+        week: NFL week number
+        season: NFL season year
+        
+    Returns:
+        Number of projections stored
+    """
+    projections, source = projection_source.get_projections(week, season)
+    rows = [
+        (player_id, season, week, float(stats['pts_ppr']), source)
+        for player_id, stats in projections.items()
+        if stats.get('pts_ppr') is not None
+    ]
+    if rows:
+        db.insert_projections(rows)
+    logger.info(f"Stored {len(rows)} {source or 'no'} projections for {season} week {week}")
+    return len(rows)
+
+def record_projection_history(db, sleeper_client, week: int, season: int = 2024) -> int:
+    """
+    Record an intraweek projection pull in projection_history
+    projections keeps the market-open snapshot prices are measured against, so
+    this only appends to the history (and only the values that moved)
+    
+    Args:
+        db: DatabaseConnection instance
+        sleeper_client: SleeperClient instance
+        week: NFL week number
+        season: NFL season year
+        
+    Returns:
+        Number of projections pulled
+    """
+    projections = sleeper_client.get_historical_projections(week, season)
+    rows = [
+        (player_id, season, week, float(stats['pts_ppr']))
+        for player_id, stats in projections.items()
+        if stats.get('pts_ppr') is not None
+    ]
+    if rows:
+        db.append_projection_history(rows)
+    logger.info(f"Recorded {len(rows)} intraweek projections for {season} week {week}")
+    return len(rows)
+
 def calculate_season_average_projection(player_stats):
     """
     Calculate a simple projection based on season average
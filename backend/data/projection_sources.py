@@ -0,0 +1,95 @@
+"""
+Projection source layer - Hedged fetching across Sleeper and ESPN
+Sleeper is asked first. If it hasn't produced a usable answer within the hedge
+latency budget (or fails outright), ESPN is queried in parallel and whichever
+good answer arrives first wins. Results are always in Sleeper format, keyed by
+Sleeper player ID
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from config import Config
+from metrics import PROJECTION_FETCHES
+
+logger = logging.getLogger(__name__)
+
+
+class HedgedProjectionSource:
+    """
+    Fetch a week of projections from the fastest healthy source
+    """
+
+    def __init__(self, sleeper_client, espn_client, crosswalk, hedge_after: float = None, deadline: float = None):
+        self.sleeper_client = sleeper_client
+        self.espn_client = espn_client
+        self.crosswalk = crosswalk
+        self.hedge_after = Config.PROJECTION_HEDGE_AFTER if hedge_after is None else hedge_after
+        self.deadline = Config.PROJECTION_DEADLINE if deadline is None else deadline
+        self._executor = None
+        self._executor_pid = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Worker threads don't survive fork, so each process gets its own pool
+        if self._executor is None or self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='projection-fetch')
+            self._executor_pid = os.getpid()
+        return self._executor
+
+    def _fetch_sleeper(self, week: int, season: int) -> dict:
+        return self.sleeper_client.get_historical_projections(week, season)
+
+    def _fetch_espn(self, week: int, season: int) -> dict:
+        espn_data = self.espn_client.get_projections(week, season)
+        return self.espn_client.convert_to_sleeper_format(espn_data, self.crosswalk)
+
+    def get_projections(self, week: int, season: int = 2024) -> tuple:
+        """
+        Fetch projections for a week, hedging slow Sleeper calls with ESPN
+
+        Args:
+            week: NFL week number
+            season: NFL season year
+
+        Returns:
+            (projections dict keyed by Sleeper player ID, source name), or ({}, None)
+            if no source produced a non-empty answer before the deadline
+        """
+        executor = self._get_executor()
+        start = time.monotonic()
+        sources = {executor.submit(self._fetch_sleeper, week, season): 'sleeper'}
+        pending = set(sources)
+        hedged = False
+
+        while True:
+            elapsed = time.monotonic() - start
+            if not hedged and (not pending or elapsed >= self.hedge_after):
+                logger.info(f"Hedging projections for {season} week {week} with ESPN after {elapsed:.2f}s")
+                future = executor.submit(self._fetch_espn, week, season)
+                sources[future] = 'espn'
+                pending.add(future)
+                hedged = True
+            if not pending or elapsed >= self.deadline:
+                break
+
+            budget = self.hedge_after if not hedged else self.deadline
+            done, pending = wait(pending, timeout=max(budget - elapsed, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                source = sources[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"Projection source {source} failed: {e}")
+                    PROJECTION_FETCHES.inc(source, 'error')
+                    continue
+                if result:
+                    PROJECTION_FETCHES.inc(source, 'ok')
+                    return result, source
+                PROJECTION_FETCHES.inc(source, 'empty')
+
+        for future in pending:
+            PROJECTION_FETCHES.inc(sources[future], 'timeout')
+        logger.error(f"No projection source answered for {season} week {week}")
+        return {}, None
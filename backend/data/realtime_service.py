@@ -3,9 +3,12 @@ Real-Time Update Service - Handle live scoring during games
 Polls Sleeper API for live stats and serves via WebSocket
 """
 
+import logging
 from datetime import datetime, timedelta
-from sleeper_client import SleeperClient
-from ppr_calculator import calculate_ppr_points
+from data.sleeper_client import SleeperClient
+from data.ppr_calculator import calculate_ppr_points
+
+logger = logging.getLogger(__name__)
 
 class RealtimeService:
     """
@@ -13,11 +16,12 @@ class RealtimeService:
     TODO: Implement live scoring functionality
     """
     
-    def __init__(self):
-        self.sleeper_client = SleeperClient()
+    def __init__(self, sleeper_client: SleeperClient = None):
+        self.sleeper_client = sleeper_client or SleeperClient()
         self.last_poll_time = {}
         self.live_stats_cache = {}
         self.poll_interval = 30  # Poll every 30 seconds
+        self.price_listeners = []
         
     def get_live_stats(self, player_id):
         """
@@ -83,6 +87,30 @@ class RealtimeService:
         
         return elapsed.total_seconds() >= self.poll_interval
         
+    def add_price_listener(self, callback):
+        """
+        Register a callback for live price changes
+
+        Args:
+            callback: Called as callback(player_id, price) on every tick
+        """
+        self.price_listeners.append(callback)
+
+    def publish_price(self, player_id, price):
+        """
+        Fan a player's new live price out to every listener
+        A failing listener is logged and doesn't block the others
+
+        Args:
+            player_id: Player whose price changed
+            price: New price (live PPR points)
+        """
+        for callback in self.price_listeners:
+            try:
+                callback(player_id, price)
+            except Exception as e:
+                logger.error(f"Price listener failed for {player_id}: {e}")
+
     def setup_websocket(self, player_ids):
         """
         Set up WebSocket connection for live updates
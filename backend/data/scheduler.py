@@ -0,0 +1,405 @@
+"""
+In-process job scheduler sharing one upstream rate budget
+Every Sleeper caller in a process draws from a single RateBudget, so recurring
+jobs, request handlers and backfills can't jointly exceed the API limit.
+Lower priority numbers win: when tokens are short, waiting live callers are
+served first and everything else leaves a reserve untouched for them.
+Given a state file, the bucket itself is shared by every process on the host
+(server workers and cron scripts alike)
+"""
+
+import fcntl
+import heapq
+import itertools
+import logging
+import os
+import queue
+import random
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from metrics import JOB_RUN_SECONDS, JOB_RUNS, RATE_BUDGET_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Priorities (lower runs first)
+PRIORITY_LIVE = 0          # in-game scoring
+PRIORITY_INTERACTIVE = 10  # API requests (default for threads with no priority set)
+PRIORITY_BACKGROUND = 20   # periodic refreshes
+PRIORITY_BACKFILL = 30     # bulk historical loads
+
+PRIORITY_NAMES = {
+    PRIORITY_LIVE: 'live',
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BACKGROUND: 'background',
+    PRIORITY_BACKFILL: 'backfill',
+}
+
+
+# Shared bucket state: tokens left and when they were counted (time.monotonic, host-wide on Linux)
+_BUCKET_STATE = struct.Struct('<dd')
+
+
+class RateBudget:
+    """
+    Token bucket of upstream calls shared across threads
+    Refills continuously at per_minute / 60 tokens per second up to per_minute.
+    A reserve fraction of the bucket can only be spent by PRIORITY_LIVE callers,
+    and waiters are granted tokens strictly in priority order.
+    With a path the token count lives in that file, read and updated under an
+    exclusive flock, so every process using the same path spends one bucket;
+    priority order then holds within each process, the reserve across all of them
+    """
+
+    def __init__(self, per_minute: int = 1000, reserve: float = 0.2, time_func=time.monotonic,
+                 path: str = None):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.reserved = per_minute * reserve
+        self.path = path
+        self._time = time_func
+        self._tokens = float(per_minute)
+        self._updated = time_func()
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+        self._local = threading.local()
+
+    def _refill(self):
+        now = self._time()
+        self._tokens = min(self._tokens + (now - self._updated) * self.rate, float(self.per_minute))
+        self._updated = now
+
+    def _spend(self, floor: float = None) -> float:
+        """
+        Refill, then take one token if more than floor + 1 remain (floor None only looks)
+        Call holding _cond. Returns the tokens left, or None if one was taken
+        """
+        if self.path is None:
+            self._refill()
+            tokens = self._tokens
+            if floor is not None and tokens >= floor + 1:
+                self._tokens -= 1
+                return None
+            return tokens
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)  # released by close
+            data = os.pread(fd, _BUCKET_STATE.size, 0)
+            now = self._time()
+            tokens, updated = _BUCKET_STATE.unpack(data) if len(data) == _BUCKET_STATE.size else (self.per_minute, now)
+            tokens = min(tokens + max(now - updated, 0.0) * self.rate, float(self.per_minute))
+            taken = floor is not None and tokens >= floor + 1
+            os.pwrite(fd, _BUCKET_STATE.pack(tokens - 1 if taken else tokens, now), 0)
+        finally:
+            os.close(fd)
+        return None if taken else tokens
+
+    def available(self) -> int:
+        """Whole tokens currently in the bucket"""
+        with self._cond:
+            return int(self._spend())
+
+    def current_priority(self) -> int:
+        """Priority of the calling thread (PRIORITY_INTERACTIVE unless set)"""
+        return getattr(self._local, 'priority', PRIORITY_INTERACTIVE)
+
+    @contextmanager
+    def priority(self, priority: int):
+        """Run a block with the calling thread's upstream calls at the given priority"""
+        previous = self.current_priority()
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def acquire(self, priority: int = None, timeout: float = None) -> bool:
+        """
+        Take one token, blocking until it is this caller's turn
+
+        Args:
+            priority: Caller priority (defaults to the thread's current priority)
+            timeout: Give up after this many seconds (None waits forever)
+
+        Returns:
+            True if a token was taken, False on timeout
+        """
+        if priority is None:
+            priority = self.current_priority()
+        floor = 0.0 if priority <= PRIORITY_LIVE else self.reserved
+        start = self._time()
+        entry = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    head = self._waiters[0] is entry
+                    tokens = self._spend(floor) if head else None
+                    if head and tokens is None:
+                        waited = self._time() - start
+                        RATE_BUDGET_WAIT_SECONDS.observe(waited, PRIORITY_NAMES.get(priority, str(priority)))
+                        return True
+
+                    wait = (floor + 1 - tokens) / self.rate if head else 1.0
+                    if timeout is not None:
+                        remaining = timeout - (self._time() - start)
+                        if remaining <= 0:
+                            return False
+                        wait = min(wait, remaining)
+                    self._cond.wait(max(wait, 0.001))
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._cond.notify_all()
+
+
+class Job:
+    """A recurring job and its run statistics"""
+
+    __slots__ = ('name', 'func', 'interval', 'priority', 'jitter', 'retry_interval', 'max_catch_up',
+                 'next_run', 'slot', 'active', 'runs', 'failures', 'skipped', 'missed', 'pending',
+                 'last_run_at', 'last_duration', 'total_duration', 'max_duration', 'last_error')
+
+    def __init__(self, name, func, interval, priority, jitter, retry_interval, max_catch_up, first_run):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.priority = priority
+        self.jitter = jitter
+        self.retry_interval = retry_interval
+        self.max_catch_up = max_catch_up
+        self.slot = first_run  # un-jittered time of the next run
+        self.next_run = first_run
+        self.active = False  # queued or running
+        self.pending = 0
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.missed = 0
+        self.last_run_at = None
+        self.last_duration = None
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.last_error = None
+
+
+class Scheduler:
+    """
+    Runs recurring jobs on a small worker pool
+
+    - Priorities: due jobs are queued by priority, and each job's upstream calls
+      draw from the shared RateBudget at that priority
+    - Jitter: each run is delayed by a random 0..jitter seconds off its slot
+    - Overlap prevention: a job still queued or running when its next slot comes
+      is skipped for that slot
+    - Catch-up: if slots were missed (process suspended, workers busy), up to
+      max_catch_up runs execute back to back and the rest are dropped
+    - Retry: a failed run (exception or False return) is retried after
+      retry_interval instead of waiting a full interval
+    """
+
+    def __init__(self, rate_budget: RateBudget = None, workers: int = 2, seed: int = None,
+                 time_func=time.monotonic):
+        self.rate_budget = rate_budget
+        self.workers = workers
+        self._time = time_func
+        self._rng = random.Random(seed)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def add_job(self, name: str, func, interval: float, priority: int = PRIORITY_BACKGROUND,
+                jitter: float = 0.0, retry_interval: float = None, run_immediately: bool = False,
+                max_catch_up: int = 1) -> Job:
+        """
+        Register a recurring job
+
+        Args:
+            name: Unique job name (metrics label)
+            func: Zero-argument callable; raising or returning False counts as a failure
+            interval: Seconds between runs
+            priority: PRIORITY_* constant
+            jitter: Maximum random delay added to each run
+            retry_interval: Seconds until the retry after a failure (None: wait a full interval)
+            run_immediately: First run now instead of after one interval
+            max_catch_up: Runs executed when slots were missed (1 coalesces them)
+
+        Raises:
+            ValueError: If a job with this name already exists
+        """
+        with self._lock:
+            if name in self._jobs:
+                raise ValueError(f"Job {name} already scheduled")
+            first_run = self._time() + (0 if run_immediately else interval)
+            job = Job(name, func, interval, priority, jitter, retry_interval, max_catch_up, first_run)
+            self._jitter(job)
+            self._jobs[name] = job
+        self._wakeup.set()
+        return job
+
+    def remove_job(self, name: str):
+        with self._lock:
+            self._jobs.pop(name, None)
+
+    def run_now(self, name: str):
+        """Make a job due immediately (its schedule continues from now)"""
+        with self._lock:
+            job = self._jobs[name]
+            job.slot = job.next_run = self._time()
+        self._wakeup.set()
+
+    def _jitter(self, job: Job):
+        job.next_run = job.slot + (self._rng.uniform(0, job.jitter) if job.jitter else 0.0)
+
+    def run_pending(self) -> float:
+        """
+        Queue every due job
+
+        Returns:
+            Seconds until the next job is due (None with no jobs)
+        """
+        now = self._time()
+        with self._lock:
+            for job in self._jobs.values():
+                if now < job.next_run:
+                    continue
+                slots = int((now - job.slot) // job.interval) + 1  # due slot plus any missed ones
+                job.slot += slots * job.interval
+                self._jitter(job)
+                if job.active:
+                    job.skipped += slots
+                    JOB_RUNS.inc(job.name, 'skipped', amount=slots)
+                    continue
+                job.pending = min(slots, job.max_catch_up)
+                if slots > job.pending:
+                    job.missed += slots - job.pending
+                    JOB_RUNS.inc(job.name, 'missed', amount=slots - job.pending)
+                job.active = True
+                self._queue.put((job.priority, next(self._seq), job))
+            if not self._jobs:
+                return None
+            return max(min(job.next_run for job in self._jobs.values()) - now, 0.0)
+
+    def _execute(self, job: Job):
+        while job.pending:
+            job.pending -= 1
+            start = time.perf_counter()
+            job.last_run_at = datetime.now()
+            try:
+                if self.rate_budget is not None:
+                    with self.rate_budget.priority(job.priority):
+                        ok = job.func() is not False
+                else:
+                    ok = job.func() is not False
+                error = None if ok else 'returned False'
+            except Exception as e:
+                ok, error = False, str(e)
+                logger.error(f"Job {job.name} failed: {e}")
+            duration = time.perf_counter() - start
+
+            with self._lock:
+                job.runs += 1
+                job.last_duration = duration
+                job.total_duration += duration
+                job.max_duration = max(job.max_duration, duration)
+                job.last_error = error
+                if not ok:
+                    job.failures += 1
+                    job.pending = 0
+                    if job.retry_interval is not None:
+                        job.slot = min(job.slot, self._time() + job.retry_interval)
+                        self._jitter(job)
+            JOB_RUNS.inc(job.name, 'ok' if ok else 'error')
+            JOB_RUN_SECONDS.observe(duration, job.name)
+
+        with self._lock:
+            job.active = False
+        self._wakeup.set()
+
+    def run_queued(self) -> int:
+        """
+        Execute queued jobs on the calling thread (for use without start())
+
+        Returns:
+            Number of jobs executed
+        """
+        executed = 0
+        while True:
+            try:
+                _, _, job = self._queue.get_nowait()
+            except queue.Empty:
+                return executed
+            if job is not None:
+                self._execute(job)
+                executed += 1
+
+    def _worker(self):
+        while True:
+            _, _, job = self._queue.get()
+            if job is None:
+                return
+            self._execute(job)
+
+    def _dispatch(self):
+        while not self._stop.is_set():
+            delay = self.run_pending()
+            self._wakeup.wait(1.0 if delay is None else min(delay, 1.0))
+            self._wakeup.clear()
+
+    def start(self):
+        """Start the dispatcher and worker threads (idempotent; call after forking)"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._dispatch, name='scheduler', daemon=True)]
+        self._threads += [threading.Thread(target=self._worker, name=f'scheduler-worker-{i}', daemon=True)
+                          for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Scheduler started with {len(self._jobs)} jobs and {self.workers} workers")
+
+    def stop(self, timeout: float = 5.0):
+        """Stop dispatching and wait up to timeout seconds for running jobs"""
+        if not self._threads:
+            return
+        self._stop.set()
+        self._wakeup.set()
+        for _ in range(self.workers):
+            self._queue.put((float('inf'), next(self._seq), None))
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+        self._threads = []
+
+    def stats(self) -> dict:
+        """Per-job run counts and timings, keyed by job name"""
+        now = self._time()
+        with self._lock:
+            return {
+                job.name: {
+                    'interval': job.interval,
+                    'priority': PRIORITY_NAMES.get(job.priority, job.priority),
+                    'running': job.active,
+                    'runs': job.runs,
+                    'failures': job.failures,
+                    'skipped': job.skipped,
+                    'missed': job.missed,
+                    'last_run_at': job.last_run_at.isoformat() if job.last_run_at else None,
+                    'last_duration': job.last_duration,
+                    'mean_duration': job.total_duration / job.runs if job.runs else None,
+                    'max_duration': job.max_duration if job.runs else None,
+                    'last_error': job.last_error,
+                    'next_run_in': round(max(job.next_run - now, 0.0), 3),
+                }
+                for job in self._jobs.values()
+            }
@@ -0,0 +1,163 @@
+"""
+Player similarity - "which players score most like this one"
+Each player's season is an 18-week PPR vector in one dense NumPy matrix. Rows
+are stored pre-normalized (unit length for cosine, mean-centered then unit
+length for correlation), so a query is one matrix-vector product plus a
+partial sort. New and corrected weekly_stats rows are picked up incrementally
+by tracking the highest weekly_stats.id already loaded
+"""
+
+import logging
+import threading
+
+import numpy as np
+
+from models.player import MAX_WEEKS
+
+logger = logging.getLogger(__name__)
+
+METHODS = ('cosine', 'correlation')
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length (all-zero rows stay zero)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+def _normalize(points: np.ndarray, played: np.ndarray) -> tuple:
+    """
+    Cosine and correlation rows for raw weekly points
+
+    Unplayed weeks count as 0 for cosine. For correlation each row is centered
+    on the mean of its played weeks and unplayed weeks are left at 0, so byes
+    don't register as bad games
+    """
+    cosine = _unit_rows(points)
+    counts = played.sum(axis=1, keepdims=True)
+    means = np.divide(points.sum(axis=1, keepdims=True), counts, out=np.zeros((len(points), 1), dtype=points.dtype),
+                      where=counts > 0)
+    centered = np.where(played, points - means, 0).astype(points.dtype)
+    return cosine, _unit_rows(centered)
+
+
+class SimilarityIndex:
+    """
+    Top-k cosine/correlation neighbours over one season's weekly PPR vectors
+    Reads use an immutable state tuple swapped in by refresh(), so queries never
+    block on a refresh
+    """
+
+    def __init__(self, db, season: int = 2024):
+        self.db = db
+        self.season = season
+        self.watermark = 0  # highest weekly_stats.id loaded
+        self._refresh_lock = threading.Lock()
+        empty = np.zeros((0, MAX_WEEKS), dtype=np.float32)
+        # (player_ids, row_of, positions, points, played, cosine, correlation)
+        self._state = ((), {}, np.array([], dtype=object), empty, empty.astype(bool), empty, empty)
+
+    def __len__(self):
+        return len(self._state[0])
+
+    def __contains__(self, player_id: str) -> bool:
+        return player_id in self._state[1]
+
+    def refresh(self) -> int:
+        """
+        Load weekly_stats rows added or replaced since the last refresh
+        Only the affected players' rows are re-normalized
+
+        Returns:
+            Number of stat rows applied
+        """
+        with self._refresh_lock:
+            rows = self.db.get_weekly_points_since(self.season, self.watermark)
+            if not rows:
+                return 0
+            self._apply(rows)
+            self.watermark = max(row['id'] for row in rows)
+            return len(rows)
+
+    def reload_week(self, week: int) -> int:
+        """
+        Re-read one week's rows, for writes that leave weekly_stats ids alone
+
+        Returns:
+            Number of stat rows applied
+        """
+        with self._refresh_lock:
+            rows = self.db.get_week_points(self.season, week)
+            if rows:
+                self._apply(rows)
+            return len(rows)
+
+    def _apply(self, rows: list):
+        """Write weekly points rows into a new state, re-normalizing the affected players' rows"""
+        player_ids, row_of, positions, points, played, cosine, correlation = self._state
+        player_ids = list(player_ids)
+        row_of = dict(row_of)
+        positions = list(positions)
+        for row in rows:
+            if row['player_id'] not in row_of:
+                row_of[row['player_id']] = len(player_ids)
+                player_ids.append(row['player_id'])
+                positions.append(row['position'])
+
+        grow = len(player_ids) - len(points)
+        points = np.vstack((points, np.zeros((grow, MAX_WEEKS), dtype=np.float32)))
+        played = np.vstack((played, np.zeros((grow, MAX_WEEKS), dtype=bool)))
+        cosine = np.vstack((cosine, np.zeros((grow, MAX_WEEKS), dtype=np.float32)))
+        correlation = np.vstack((correlation, np.zeros((grow, MAX_WEEKS), dtype=np.float32)))
+
+        touched = set()
+        for row in rows:
+            if not 1 <= row['week'] <= MAX_WEEKS:
+                continue
+            index = row_of[row['player_id']]
+            points[index, row['week'] - 1] = row['actual_points']
+            played[index, row['week'] - 1] = True
+            touched.add(index)
+
+        touched = np.fromiter(touched, dtype=np.int64)
+        cosine[touched], correlation[touched] = _normalize(points[touched], played[touched])
+
+        self._state = (tuple(player_ids), row_of, np.array(positions, dtype=object),
+                       points, played, cosine, correlation)
+        logger.info(f"Similarity index {self.season}: applied {len(rows)} stat rows "
+                    f"({len(touched)} players updated, {len(player_ids)} total)")
+
+    def neighbors(self, player_id: str, k: int = 10, method: str = 'cosine', position: str = None) -> list:
+        """
+        Most similar players to player_id
+
+        Args:
+            player_id: Query player
+            k: Number of neighbours
+            method: 'cosine' or 'correlation'
+            position: Only return players at this position
+
+        Returns:
+            List of (player_id, score) pairs, best first
+
+        Raises:
+            KeyError: If the player has no stats this season
+            ValueError: For an unknown method
+        """
+        if method not in METHODS:
+            raise ValueError(f"method must be one of {', '.join(METHODS)}")
+        player_ids, row_of, positions, _, _, cosine, correlation = self._state
+        matrix = cosine if method == 'cosine' else correlation
+        index = row_of[player_id]
+
+        scores = matrix @ matrix[index]
+        scores[index] = -np.inf
+        if position:
+            scores[positions != position] = -np.inf
+
+        k = min(k, np.count_nonzero(np.isfinite(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(player_ids[i], round(float(scores[i]), 4)) for i in top]
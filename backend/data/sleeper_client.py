@@ -1,41 +1,53 @@
 """
 Client for interacting with the Sleeper Fantasy Football API
 Rate limit: 1000 calls/minute
-Implements throttling and caching to stay within limits
+Implements throttling and caching to stay within limits; concurrent misses for
+the same endpoint share one upstream request, and expired entries are served
+stale while a single background refresh runs
 """
 import requests
+import threading
 import time
 import logging
+from concurrent.futures import Future
 from datetime import datetime, timedelta
 from config import Config
+from data.scheduler import PRIORITY_BACKGROUND, RateBudget
+from metrics import CACHE_REQUESTS, SLEEPER_REQUEST_SECONDS, SLEEPER_REQUESTS, endpoint_group
+from profiling import record_call
 
 logger = logging.getLogger(__name__)
 
+def host_rate_budget() -> RateBudget:
+    """
+    The configured Sleeper rate budget, kept in a file shared by every process on the host
+    Server workers and scripts that take their budget from here spend one bucket
+    """
+    path = Config.SLEEPER_RATE_BUDGET_PATH or f"{Config.DATABASE_PATH}.sleeper-budget"
+    return RateBudget(Config.SLEEPER_RATE_LIMIT, Config.SLEEPER_RATE_RESERVE, path=path)
+
 class SleeperClient:
     """
     Client for fetching data from Sleeper API
     Includes rate limiting (1000 calls/minute) and caching
     """
     
-    def __init__(self):
-        self.base_url = Config.SLEEPER_API_BASE_URL
+    def __init__(self, base_url: str = None, timeout: float = 10, recorder=None, rate_budget=None):
+        self.base_url = base_url or Config.SLEEPER_API_BASE_URL
+        self.timeout = timeout
+        self.recorder = recorder  # Optional sleeper_replay.Cassette capturing every response
+        self.rate_budget = rate_budget  # Optional scheduler.RateBudget shared with other callers
         self.rate_limit = 1000  # 1000 calls per minute
         self.calls_this_minute = 0
         self.minute_start = time.time()
         self.cache = {}
-        self.cache_ttl = 300  # 5 minutes cache TTL
+        self.cache_ttl = Config.SLEEPER_CACHE_TTL  # 5 minutes by default
+        self.stale_ttl = Config.SLEEPER_STALE_TTL  # how long past cache_ttl an entry may be served stale
+        self._inflight = {}  # endpoint -> Future of the one request currently fetching it
+        self._inflight_lock = threading.Lock()
         
-    def _make_request(self, endpoint: str) -> dict:
-        """
-        Make API request with rate limiting
-        
-        Args:
-            endpoint: API endpoint (without base URL)
-            
-        Returns:
-            JSON response as dict
-        """
-        # Check rate limit
+    def _wait_for_rate_limit(self):
+        """Block until this client's own per-minute counter allows another call"""
         current_time = time.time()
         if current_time - self.minute_start >= 60:
             # New minute, reset counter
@@ -49,25 +61,125 @@ class SleeperClient:
             time.sleep(wait_time)
             self.calls_this_minute = 0
             self.minute_start = time.time()
+    
+    def _make_request(self, endpoint: str, use_cache: bool = True) -> dict:
+        """
+        Make API request with rate limiting
         
+        Args:
+            endpoint: API endpoint (without base URL)
+            use_cache: Read and store the response cache (False for large
+                one-off downloads that shouldn't be kept in memory)
+            
+        Returns:
+            JSON response as dict
+        """
         # Check cache
         cache_key = endpoint
-        if cache_key in self.cache:
+        if use_cache and cache_key in self.cache:
             cached_data, cached_time = self.cache[cache_key]
-            if (datetime.now() - cached_time).total_seconds() < self.cache_ttl:
+            age = (datetime.now() - cached_time).total_seconds()
+            if age < self.cache_ttl:
                 logger.debug(f"Cache hit for {endpoint}")
+                CACHE_REQUESTS.inc('sleeper', 'hit')
+                record_call('sleeper', endpoint, cache='hit')
+                return cached_data
+            if age < self.cache_ttl + self.stale_ttl:
+                CACHE_REQUESTS.inc('sleeper', 'stale')
+                record_call('sleeper', endpoint, cache='stale')
+                self._revalidate(endpoint)
                 return cached_data
+        # Downloads that skip the cache aren't lookups, so they don't count as misses
+        result = 'miss' if use_cache else 'bypass'
+        CACHE_REQUESTS.inc('sleeper', result)
+        
+        start = time.perf_counter()
+        try:
+            return self._fetch_shared(endpoint, use_cache)
+        finally:
+            record_call('sleeper', endpoint, start, time.perf_counter() - start, cache=result)
+    
+    def _fetch_shared(self, endpoint: str, use_cache: bool) -> dict:
+        """
+        Fetch an endpoint, joining a request already in flight for it
+        The first caller does the HTTP request; concurrent callers wait on its
+        future and get the same result or exception. A caller that missed the
+        cache just before a leader stored its response takes that response
+        """
+        with self._inflight_lock:
+            future = self._inflight.get(endpoint)
+            leader = future is None
+            if leader:
+                # The leader caches before leaving _inflight, so this sees any fetch that finished
+                entry = self.cache.get(endpoint) if use_cache else None
+                if entry is not None and (datetime.now() - entry[1]).total_seconds() < self.cache_ttl:
+                    CACHE_REQUESTS.inc('sleeper', 'coalesced')
+                    return entry[0]
+                future = self._inflight[endpoint] = Future()
+        
+        if not leader:
+            CACHE_REQUESTS.inc('sleeper', 'coalesced')
+            return future.result()
+        return self._lead(endpoint, future, use_cache)
+    
+    def _lead(self, endpoint: str, future: Future, use_cache: bool) -> dict:
+        """Do the request registered as future in _inflight and hand its outcome to every waiter"""
+        try:
+            data = self._fetch(endpoint, use_cache)
+            future.set_result(data)
+            return data
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                del self._inflight[endpoint]
+    
+    def _revalidate(self, endpoint: str):
+        """Refresh a stale entry on a background thread unless a fetch is already running"""
+        # Registered before the thread starts, so a burst of stale hits starts one refresh
+        with self._inflight_lock:
+            if endpoint in self._inflight:
+                return
+            future = self._inflight[endpoint] = Future()
+        
+        def refresh():
+            try:
+                if self.rate_budget is not None:
+                    with self.rate_budget.priority(PRIORITY_BACKGROUND):
+                        self._lead(endpoint, future, use_cache=True)
+                else:
+                    self._lead(endpoint, future, use_cache=True)
+            except Exception as e:
+                logger.warning(f"Background refresh of {endpoint} failed, serving stale data: {e}")
+        
+        threading.Thread(target=refresh, name='sleeper-revalidate', daemon=True).start()
+    
+    def _fetch(self, endpoint: str, use_cache: bool) -> dict:
+        """Perform the rate-limited HTTP request and store the response"""
+        if self.rate_budget is not None:
+            # Shared budget: waits for a token at the calling thread's priority
+            self.rate_budget.acquire()
+        else:
+            self._wait_for_rate_limit()
         
         # Make API request
         url = f"{self.base_url}/{endpoint}"
+        group = endpoint_group(endpoint)
+        start = time.perf_counter()
         try:
-            response = requests.get(url, timeout=10)
+            response = requests.get(url, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
+            SLEEPER_REQUESTS.inc(group, 'ok')
+            
+            if self.recorder is not None:
+                self.recorder.record(endpoint, data)
             
             # Cache the response
-            self.cache[cache_key] = (data, datetime.now())
+            if use_cache:
+                self.cache[endpoint] = (data, datetime.now())
             
             # Increment call counter
             self.calls_this_minute += 1
@@ -77,16 +189,27 @@ class SleeperClient:
             return data
             
         except requests.exceptions.RequestException as e:
+            SLEEPER_REQUESTS.inc(group, 'error')
             logger.error(f"Error fetching {endpoint}: {e}")
             raise
+        finally:
+            SLEEPER_REQUEST_SECONDS.observe(time.perf_counter() - start, group)
+        
+    def remaining_calls(self) -> int:
+        """Calls left in the current rate-limit minute (tokens left with a shared budget)"""
+        if self.rate_budget is not None:
+            return self.rate_budget.available()
+        if time.time() - self.minute_start >= 60:
+            return self.rate_limit
+        return max(self.rate_limit - self.calls_this_minute, 0)
         
-    def get_all_players(self):
+    def get_all_players(self, use_cache: bool = True):
         """
         Fetch all NFL players from Sleeper API
         Returns: dict of player data keyed by player_id
         """
         endpoint = "players/nfl"
-        return self._make_request(endpoint)
+        return self._make_request(endpoint, use_cache=use_cache)
         
     def get_player_stats(self, week: int, season: int = 2024) -> dict:
         """
@@ -144,6 +267,24 @@ class SleeperClient:
         weeks_elapsed = (today - season_start).days // 7 + 1
         return min(weeks_elapsed, 18)
     
+    def get_schedule(self, week: int, season: int = 2024) -> list:
+        """
+        Get one week's NFL games
+        
+        Args:
+            week: NFL week number
+            season: NFL season year
+            
+        Returns:
+            List of game dicts (home, away, kickoff), empty on failure
+        """
+        endpoint = f"schedule/nfl/{season}/{week}"
+        try:
+            return self._make_request(endpoint) or []
+        except Exception as e:
+            logger.warning(f"Could not fetch schedule: {e}")
+            return []
+    
     def get_historical_projections(self, week: int, season: int = 2024) -> dict:
         """
         Get historical projections from Sleeper API
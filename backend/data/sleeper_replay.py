@@ -0,0 +1,264 @@
+"""
+Offline stand-in for the Sleeper API - record real responses, replay them locally
+A Cassette is a directory of captured responses (one JSON file per endpoint),
+filled by passing it to SleeperClient(recorder=...). ReplayServer serves a
+cassette over HTTP with configurable latency, jitter, 5xx errors and 429s, and
+can simulate a live week advancing so pollers and pipelines can be exercised
+and benchmarked with no network
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlparse
+
+logger = logging.getLogger(__name__)
+
+# Weekly endpoints the live clock gates, e.g. stats/nfl/2024/5
+_WEEKLY_ENDPOINT = re.compile(r'^(stats|projections|schedule)/nfl/(?:regular/)?(\d{4})/(\d{1,2})$')
+
+
+class Cassette:
+    """
+    Directory of recorded Sleeper responses keyed by endpoint
+    Endpoints are stored URL-quoted, e.g. stats/nfl/2024/5 -> stats%2Fnfl%2F2024%2F5.json
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, endpoint: str) -> str:
+        return os.path.join(self.directory, quote(endpoint.strip('/'), safe='') + '.json')
+
+    def record(self, endpoint: str, body):
+        """Store (or overwrite) the response body for an endpoint"""
+        path = self._path(endpoint)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(body, f)
+        os.replace(tmp_path, path)
+
+    def load(self, endpoint: str):
+        """
+        Read a recorded body
+
+        Raises:
+            KeyError: If the endpoint was never recorded
+        """
+        try:
+            with open(self._path(endpoint), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(endpoint) from None
+
+    def endpoints(self) -> list:
+        """All recorded endpoints, sorted"""
+        return sorted(unquote(name[:-len('.json')]) for name in os.listdir(self.directory)
+                      if name.endswith('.json'))
+
+    def __contains__(self, endpoint: str) -> bool:
+        return os.path.exists(self._path(endpoint))
+
+
+class LiveWeekClock:
+    """
+    Simulated NFL calendar: starts at start_week and advances one week every
+    seconds_per_week, stopping at final_week
+    """
+
+    def __init__(self, season: int, start_week: int = 1, seconds_per_week: float = 60.0,
+                 final_week: int = 18, time_func=time.monotonic):
+        self.season = season
+        self.start_week = start_week
+        self.seconds_per_week = seconds_per_week
+        self.final_week = final_week
+        self._time = time_func
+        self._started = time_func()
+
+    def position(self) -> tuple:
+        """
+        Current (week, progress) where progress is the fraction of the week played (0..1)
+        """
+        elapsed_weeks = (self._time() - self._started) / self.seconds_per_week
+        week = self.start_week + int(elapsed_weeks)
+        if week > self.final_week:
+            return self.final_week, 1.0
+        return week, elapsed_weeks % 1
+
+    def state(self) -> dict:
+        """Body for Sleeper's state/nfl endpoint"""
+        week, _ = self.position()
+        return {'week': week, 'display_week': week, 'season': str(self.season),
+                'season_type': 'regular', 'leg': week}
+
+
+def _scale_stats(stats: dict, progress: float) -> dict:
+    """Scale every numeric stat by progress to imitate a week in progress"""
+    scaled = {}
+    for player_id, values in stats.items():
+        if not isinstance(values, dict):
+            scaled[player_id] = values
+            continue
+        scaled[player_id] = {
+            key: (int(value * progress) if isinstance(value, int) else round(value * progress, 2))
+            if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+            for key, value in values.items()
+        }
+    return scaled
+
+
+class ReplayServer:
+    """
+    Threaded HTTP server replaying a cassette
+
+    Requests are served in this order: injected 429 (random throttle_rate or over
+    requests_per_minute), injected 500 (error_rate), live-week gating, then the
+    recorded body; unrecorded endpoints get 404. Every response is delayed by
+    latency +/- jitter seconds. The RNG is seeded so a run is reproducible
+    """
+
+    def __init__(self, cassette: Cassette, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, throttle_rate: float = 0.0, requests_per_minute: int = None,
+                 clock: LiveWeekClock = None, seed: int = None, host: str = '127.0.0.1', port: int = 0):
+        self.cassette = cassette
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.requests_per_minute = requests_per_minute
+        self.clock = clock
+        self.counts = {'served': 0, 'errors': 0, 'throttled': 0, 'missing': 0}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()  # request times inside the last minute
+        self._bodies = {}  # endpoint -> encoded body (cassettes are read-only while serving)
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, payload, headers = server.handle(urlparse(self.path).path)
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    def start(self) -> 'ReplayServer':
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logger.info(f"Replaying {len(self.cassette.endpoints())} Sleeper endpoints at {self.url}")
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(self.latency + self._rng.uniform(-self.jitter, self.jitter), 0.0)
+
+    def _fault(self) -> int:
+        """Pick an injected status (429/500) for this request, or None"""
+        with self._lock:
+            now = time.monotonic()
+            if self.requests_per_minute is not None:
+                while self._recent and now - self._recent[0] >= 60:
+                    self._recent.popleft()
+                if len(self._recent) >= self.requests_per_minute:
+                    return 429
+                self._recent.append(now)
+            roll = self._rng.random()
+            if roll < self.throttle_rate:
+                return 429
+            if roll < self.throttle_rate + self.error_rate:
+                return 500
+        return None
+
+    def _encoded(self, endpoint: str) -> bytes:
+        body = self._bodies.get(endpoint)
+        if body is None:
+            body = json.dumps(self.cassette.load(endpoint)).encode('utf-8')
+            self._bodies[endpoint] = body
+        return body
+
+    def _live_body(self, endpoint: str):
+        """
+        Body for an endpoint under the live clock, or None to serve the recording
+        Weeks after the current one have no stats or schedule yet, and the current
+        week's stats are scaled by how much of the week has been played
+        """
+        if endpoint == 'state/nfl':
+            return json.dumps(self.clock.state()).encode('utf-8')
+        match = _WEEKLY_ENDPOINT.match(endpoint)
+        if not match:
+            return None
+        kind, season, week = match.group(1), int(match.group(2)), int(match.group(3))
+        current_week, progress = self.clock.position()
+        if season != self.clock.season or kind == 'projections':
+            return None
+        if week > current_week:
+            return b'{}' if kind == 'stats' else b'[]'
+        if kind == 'stats' and week == current_week and progress < 1.0:
+            return json.dumps(_scale_stats(self.cassette.load(endpoint), progress)).encode('utf-8')
+        return None
+
+    def handle(self, path: str) -> tuple:
+        """
+        Produce (status, payload, headers) for a request path (sleeping first)
+        Exposed separately from the HTTP handler so it can be driven directly
+        """
+        endpoint = path.strip('/')
+        delay = self._delay()
+        if delay:
+            time.sleep(delay)
+
+        status = self._fault()
+        if status == 429:
+            self._count('throttled')
+            return 429, b'{"error": "rate limited"}', {'Retry-After': '1'}
+        if status == 500:
+            self._count('errors')
+            return 500, b'{"error": "injected failure"}', {}
+
+        try:
+            body = self._live_body(endpoint) if self.clock else None
+            if body is None:
+                body = self._encoded(endpoint)
+        except KeyError:
+            self._count('missing')
+            return 404, b'{"error": "not recorded"}', {}
+        self._count('served')
+        return 200, body, {}
+
+    def _count(self, key: str):
+        with self._lock:
+            self.counts[key] += 1
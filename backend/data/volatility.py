@@ -0,0 +1,140 @@
+"""
+Monte Carlo volatility bands - Next-week PPR distributions per player
+Each player's outcome is simulated as projection + a residual resampled from
+their history of (actual - projected). Players with too little history borrow
+their position's residual pool. All players are simulated together in batched
+NumPy draws with a seeded RNG, and the p10/p50/p90 bands plus an implied
+volatility (simulated std / projection) are stored per player-week
+"""
+
+import logging
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (10, 50, 90)
+
+
+def build_residual_pools(player_ids: list, positions: dict, residual_rows: list, min_history: int = 4) -> tuple:
+    """
+    Group residuals into resampling pools
+
+    Args:
+        player_ids: Players to simulate (row order of the result)
+        positions: player_id -> position
+        residual_rows: Rows with player_id, position and residual
+        min_history: Residuals a player needs to use their own pool
+
+    Returns:
+        (groups, residuals, offsets, counts): groups[i] is the pool index of
+        player_ids[i]; pool g is residuals[offsets[g]:offsets[g] + counts[g]].
+        groups is -1 for players with no usable pool
+    """
+    by_player, by_position, everyone = {}, {}, []
+    for row in residual_rows:
+        residual = row['residual']
+        by_player.setdefault(row['player_id'], []).append(residual)
+        by_position.setdefault(row['position'], []).append(residual)
+        everyone.append(residual)
+
+    pools, pool_of = [], {}
+
+    def pool_index(key, values):
+        if key not in pool_of:
+            pool_of[key] = len(pools)
+            pools.append(values)
+        return pool_of[key]
+
+    groups = np.full(len(player_ids), -1, dtype=np.int64)
+    for i, player_id in enumerate(player_ids):
+        own = by_player.get(player_id, ())
+        position = positions.get(player_id)
+        if len(own) >= min_history:
+            groups[i] = pool_index(('player', player_id), own)
+        elif len(by_position.get(position, ())) >= min_history:
+            groups[i] = pool_index(('position', position), by_position[position])
+        elif len(everyone) >= min_history:
+            groups[i] = pool_index(('all',), everyone)
+
+    counts = np.array([len(pool) for pool in pools], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64) if pools else counts
+    residuals = np.concatenate([np.asarray(pool, dtype=np.float64) for pool in pools]) if pools else np.empty(0)
+    return groups, residuals, offsets, counts
+
+
+def simulate_bands(projections: np.ndarray, groups: np.ndarray, residuals: np.ndarray, offsets: np.ndarray,
+                   counts: np.ndarray, simulations: int = 2000, seed: int = 0, chunk: int = 1024) -> np.ndarray:
+    """
+    Bootstrap outcomes for every player at once
+
+    Args:
+        projections: Projected points per player
+        groups, residuals, offsets, counts: From build_residual_pools (groups must be >= 0)
+        simulations: Draws per player
+        seed: RNG seed (int or numpy SeedSequence)
+        chunk: Players per batch (bounds memory at chunk x simulations floats)
+
+    Returns:
+        Array of shape (players, 4): p10, p50, p90, simulated standard deviation
+    """
+    rng = np.random.default_rng(seed)
+    out = np.empty((len(projections), 4))
+    for start in range(0, len(projections), chunk):
+        end = start + chunk
+        pool = groups[start:end]
+        draws = (rng.random((len(pool), simulations)) * counts[pool][:, None]).astype(np.int64)
+        outcomes = projections[start:end, None] + residuals[offsets[pool][:, None] + draws]
+        out[start:end, :3] = np.percentile(outcomes, PERCENTILES, axis=1).T
+        out[start:end, 3] = outcomes.std(axis=1)
+    return out
+
+
+def compute_volatility_bands(db, season: int, week: int, simulations: int = 2000, seed: int = 0,
+                             min_history: int = 4) -> int:
+    """
+    Simulate and store bands for every player with a projection for a week
+    Residual history is everything before the target week (earlier seasons included)
+
+    Args:
+        db: DatabaseConnection instance
+        season: NFL season year
+        week: Target week
+        simulations: Draws per player
+        seed: Base RNG seed (combined with season and week, so reruns match)
+        min_history: Residuals a player needs before their own history is used
+
+    Returns:
+        Number of players stored
+    """
+    start = time.perf_counter()
+    projection_rows = db.get_week_projections(season, week)
+    if not projection_rows:
+        logger.info(f"No projections for {season} week {week}, skipping volatility bands")
+        return 0
+
+    residual_rows = db.get_projection_residuals(season, week)
+    projections = {row['player_id']: row['projected_points'] for row in projection_rows}
+    positions = {row['player_id']: row['position'] for row in projection_rows}
+    player_ids = list(projections)
+    groups, residuals, offsets, counts = build_residual_pools(player_ids, positions, residual_rows, min_history)
+
+    usable = np.flatnonzero(groups >= 0)
+    if not len(usable):
+        logger.info(f"No residual history before {season} week {week}, skipping volatility bands")
+        return 0
+    projected = np.array([projections[player_ids[i]] for i in usable], dtype=np.float64)
+    bands = simulate_bands(projected, groups[usable], residuals, offsets, counts, simulations,
+                           seed=np.random.SeedSequence([seed, season, week]))
+
+    volatility = bands[:, 3] / np.maximum(np.abs(projected), 1.0)
+    rows = [
+        (player_ids[i], season, week, round(float(projected[n]), 2), round(float(bands[n, 0]), 2),
+         round(float(bands[n, 1]), 2), round(float(bands[n, 2]), 2), round(float(volatility[n]), 4), simulations)
+        for n, i in enumerate(usable)
+    ]
+    db.upsert_volatility_bands(rows)
+    logger.info(f"Stored volatility bands for {len(rows)} players ({season} week {week}, "
+                f"{simulations} simulations) in {time.perf_counter() - start:.2f}s")
+    return len(rows)
@@ -2,6 +2,7 @@
 Database package for Fantasy Football Player Stock Visualization
 """
 from .db_connection import DatabaseConnection
+from .invalidation import InvalidationBus
 
-__all__ = ['DatabaseConnection']
+__all__ = ['DatabaseConnection', 'InvalidationBus']
 
@@ -6,24 +6,86 @@ Uses SQLite for development, can be upgraded to PostgreSQL for production
 import sqlite3
 import logging
 import os
+import threading
+import time
 from contextlib import contextmanager
+from urllib.parse import quote
+
+from metrics import timed_db_method
+from profiling import current_session
+from . import invalidation
+from .invalidation import PLAYER, PLAYERS, PROJECTIONS, STATS, cache_key
+from .migrations import apply_migrations
 
 logger = logging.getLogger(__name__)
 
+# Tables split into one file per season when partitioning is enabled. Queries over
+# them are written with {weekly_stats} / {projections} / ... placeholders
+PARTITIONED_TABLES = ('weekly_stats', 'projections', 'projection_history', 'projection_blocks')
+_UNPARTITIONED = {table: table for table in PARTITIONED_TABLES}
+
+# SQLite's default SQLITE_MAX_ATTACHED; wider cross-season reads run in batches
+_MAX_ATTACHED = 10
+
+def _changed_week_keys(kind: str, table: str, columns: tuple):
+    """
+    keys callable for _season_write over (player_id, season, week, *values) rows
+    Returns player and week keys for the rows whose values differ from the stored
+    ones, so re-ingesting identical data invalidates nothing
+    """
+    def keys(conn, tables, rows):
+        width = len(columns)
+        stored = {}
+        for season, week in {(row[1], row[2]) for row in rows}:
+            for row in conn.execute(f"SELECT player_id, {', '.join(columns)} FROM {tables[table]} "
+                                    f"WHERE season = ? AND week = ?", (season, week)):
+                stored[(row[0], season, week)] = tuple(row[1:])
+        changed = [row for row in rows if stored.get(tuple(row[:3])) != tuple(row[3:3 + width])]
+        weeks = sorted({(row[1], row[2]) for row in changed})
+        return ([cache_key(PLAYER, row[0]) for row in changed]
+                + [cache_key(kind, season, week) for season, week in weeks])
+    return keys
+
+
 class DatabaseConnection:
     """
     Manages database connections and operations
+    
+    With a partition_dir, weekly_stats and projections (and projection history) live in one file per
+    season (season_2024.db) that is ATTACHed only by the queries that need it:
+    single-season reads and writes go straight to that season's tables, and
+    cross-season reads get a temporary UNION ALL view over the seasons in range.
+    The main file keeps everything else, so current-season queries cost the same
+    however many seasons of history are kept
     """
     
-    def __init__(self, db_path="fantasy_stock.db"):
+    # Database files whose schema has already been set up in this process.
+    # Inherited by forked workers, so a preloaded server migrates only once
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+    
+    def __init__(self, db_path="fantasy_stock.db", partition_dir=None):
         self.db_path = db_path
+        self.partition_dir = partition_dir
         self._initialize_database()
+        if partition_dir:
+            os.makedirs(partition_dir, exist_ok=True)
     
     def _initialize_database(self):
-        """Initialize database tables if they don't exist"""
+        """Initialize database tables if they don't exist (once per file per process)"""
+        key = os.path.abspath(self.db_path)
+        with self._init_lock:
+            if key in self._initialized_paths and os.path.exists(key):
+                return
+            self._create_schema()
+            self._initialized_paths.add(key)
+    
+    def _create_schema(self):
+        """Apply migrations, then create any missing tables and indexes"""
         schema_file = os.path.join(os.path.dirname(__file__), "schema.sql")
         
         with self.get_connection() as conn:
+            apply_migrations(conn)
             if os.path.exists(schema_file):
                 with open(schema_file, 'r') as f:
                     schema = f.read()
@@ -42,8 +104,11 @@ class DatabaseConnection:
                 cursor = conn.cursor()
                 cursor.execute(...)
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = sqlite3.connect(self.db_path, uri=True)
         conn.row_factory = sqlite3.Row
+        session = current_session()
+        if session is not None:
+            conn.set_trace_callback(session.record_sql)
         try:
             yield conn
             conn.commit()
@@ -54,6 +119,211 @@ class DatabaseConnection:
         finally:
             conn.close()
     
+    def partition_path(self, season: int) -> str:
+        """File holding a season's partition"""
+        return os.path.join(self.partition_dir, f"season_{int(season)}.db")
+    
+    def partition_seasons(self) -> list:
+        """Seasons that have a partition file, oldest first (empty when unpartitioned)"""
+        if not self.partition_dir:
+            return []
+        seasons = []
+        for name in os.listdir(self.partition_dir):
+            stem = name[len('season_'):-len('.db')]
+            if name.startswith('season_') and name.endswith('.db') and stem.isdigit():
+                seasons.append(int(stem))
+        return sorted(seasons)
+    
+    def _create_partition(self, season: int):
+        """Create a season's partition file and tables if missing (once per file per process)"""
+        path = self.partition_path(season)
+        key = os.path.abspath(path)
+        with self._init_lock:
+            if key in self._initialized_paths and os.path.exists(key):
+                return
+            schema_file = os.path.join(os.path.dirname(__file__), "partition_schema.sql")
+            conn = sqlite3.connect(path)
+            try:
+                with open(schema_file, 'r') as f:
+                    conn.executescript(f.read())
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized_paths.add(key)
+            logger.info(f"Created season partition {path}")
+    
+    def _attach_seasons(self, conn, seasons: list, write: bool = False) -> dict:
+        """
+        Attach season partitions to a connection
+        
+        Args:
+            conn: Open connection to the main file
+            seasons: Seasons the statement touches (at most one when writing)
+            write: Attach read-write, creating the partition if needed
+            
+        Returns:
+            Table name substitutions for PARTITIONED_TABLES placeholders
+            
+        Raises:
+            ValueError: When writing to a closed season
+        """
+        if not self.partition_dir:
+            return _UNPARTITIONED
+        
+        if write:
+            season = int(seasons[0])
+            closed = conn.execute("SELECT closed_at FROM season_partitions WHERE season = ?", (season,)).fetchone()
+            if closed and closed[0]:
+                raise ValueError(f"Season {season} is closed and read-only")
+            self._create_partition(season)
+            conn.execute("ATTACH DATABASE ? AS ?", (self.partition_path(season), f"season_{season}"))
+            conn.execute("INSERT OR IGNORE INTO season_partitions (season) VALUES (?)", (season,))
+            return {table: f"season_{season}.{table}" for table in PARTITIONED_TABLES}
+        
+        # Reads attach read-only, and seasons without a file read as empty
+        attached = []
+        for season in seasons:
+            path = self.partition_path(season)
+            if os.path.exists(path):
+                uri = 'file:' + quote(os.path.abspath(path)) + '?mode=ro'
+                conn.execute("ATTACH DATABASE ? AS ?", (uri, f"season_{int(season)}"))
+                attached.append(int(season))
+        
+        tables = {}
+        for table in PARTITIONED_TABLES:
+            if not attached:
+                tables[table] = f"(SELECT * FROM main.{table} WHERE 0)"
+            elif len(attached) == 1:
+                tables[table] = f"season_{attached[0]}.{table}"
+            else:
+                union = " UNION ALL ".join(f"SELECT * FROM season_{season}.{table}" for season in attached)
+                conn.execute(f"CREATE TEMP VIEW {table}_all AS {union}")
+                tables[table] = f"{table}_all"
+        return tables
+    
+    def _season_query(self, query: str, params: tuple, seasons) -> list:
+        """
+        Run a SELECT over the partitioned tables of the given seasons
+        
+        Wide ranges are read in batches of _MAX_ATTACHED seasons and concatenated
+        oldest first, so cross-season queries must be row-wise and order by season
+        before anything else
+        """
+        if not self.partition_dir:
+            return self.execute_query(query.format(**_UNPARTITIONED), params)
+        
+        seasons = [season for season in sorted({int(s) for s in seasons})
+                   if os.path.exists(self.partition_path(season))]
+        batches = [seasons[i:i + _MAX_ATTACHED] for i in range(0, len(seasons), _MAX_ATTACHED)] or [[]]
+        results = []
+        for batch in batches:
+            with self.get_connection() as conn:
+                tables = self._attach_seasons(conn, batch)
+                results.extend(dict(row) for row in conn.execute(query.format(**tables), params))
+        return results
+    
+    def _season_write(self, query, rows: list, season_index: int = 1, keys=None) -> int:
+        """
+        executemany a write against the partitioned tables, one transaction per season
+        
+        Args:
+            query: Statement with PARTITIONED_TABLES placeholders, or a tuple of
+                statements run in order over the same rows
+            rows: Parameter tuples
+            season_index: Position of the season in each tuple
+            keys: Optional callable(conn, tables, rows) -> cache keys to invalidate;
+                called before each season's rows are written (so it can compare
+                them with what is stored) and published in the same transaction
+        """
+        queries = (query,) if isinstance(query, str) else query
+        by_season = {}
+        if self.partition_dir:
+            for row in rows:
+                by_season.setdefault(int(row[season_index]), []).append(row)
+        else:
+            by_season[None] = rows
+        
+        for season, season_rows in by_season.items():
+            with self.get_connection() as conn:
+                tables = self._attach_seasons(conn, [season], write=True)
+                touched = keys(conn, tables, season_rows) if keys is not None else None
+                for statement in queries:
+                    conn.executemany(statement.format(**tables), season_rows)
+                if touched:
+                    invalidation.publish(conn, touched)
+        return len(rows)
+    
+    @timed_db_method
+    def close_season(self, season: int) -> dict:
+        """
+        Mark a finished season read-only and compact its partition
+        The partition is rebuilt with VACUUM INTO (dense pages, fresh statistics)
+        and swapped in atomically, then its file mode is made read-only
+        
+        Returns:
+            Dict with season, bytes_before and bytes_after
+            
+        Raises:
+            ValueError: If partitioning is off or the season has no partition
+        """
+        if not self.partition_dir or not os.path.exists(self.partition_path(season)):
+            raise ValueError(f"Season {season} has no partition")
+        path = self.partition_path(season)
+        
+        # Mark closed first so writers are refused while compacting
+        with self.get_connection() as conn:
+            conn.execute("""
+            INSERT INTO season_partitions (season, closed_at) VALUES (?, CURRENT_TIMESTAMP)
+            ON CONFLICT(season) DO UPDATE SET closed_at = CURRENT_TIMESTAMP
+            """, (int(season),))
+        
+        bytes_before = os.path.getsize(path)
+        compacted = f"{path}.compact"
+        if os.path.exists(compacted):
+            os.remove(compacted)
+        conn = sqlite3.connect(path, isolation_level=None)
+        try:
+            conn.execute("ANALYZE")
+            conn.execute("VACUUM INTO ?", (compacted,))
+        finally:
+            conn.close()
+        os.replace(compacted, path)
+        os.chmod(path, 0o444)
+        
+        bytes_after = os.path.getsize(path)
+        logger.info(f"Closed season {season}: {bytes_before} -> {bytes_after} bytes")
+        return {'season': int(season), 'bytes_before': bytes_before, 'bytes_after': bytes_after}
+    
+    @timed_db_method
+    def migrate_to_partitions(self) -> dict:
+        """
+        Move rows of every partitioned table from the main file into season partitions
+        Each season moves in one transaction spanning both files
+        
+        Returns:
+            Rows moved per season
+        """
+        if not self.partition_dir:
+            raise ValueError("Partitioning is not enabled")
+        with self.get_connection() as conn:
+            seasons = [row[0] for row in conn.execute(
+                " UNION ".join(f"SELECT season FROM {table}" for table in PARTITIONED_TABLES) + " ORDER BY season"
+            )]
+        
+        moved = {}
+        for season in seasons:
+            with self.get_connection() as conn:
+                tables = self._attach_seasons(conn, [season], write=True)
+                moved[season] = 0
+                for table in PARTITIONED_TABLES:
+                    moved[season] += conn.execute(
+                        f"INSERT OR REPLACE INTO {tables[table]} SELECT * FROM main.{table} WHERE season = ?",
+                        (season,)).rowcount
+                    conn.execute(f"DELETE FROM main.{table} WHERE season = ?", (season,))
+            logger.info(f"Moved {moved[season]} rows into the {season} partition")
+        return moved
+    
+    @timed_db_method
     def execute_query(self, query: str, params: tuple = None) -> list:
         """
         Execute a SELECT query
@@ -73,6 +343,7 @@ class DatabaseConnection:
                 cursor.execute(query)
             return [dict(row) for row in cursor.fetchall()]
     
+    @timed_db_method
     def execute_modify(self, query: str, params: tuple = None) -> int:
         """
         Execute INSERT, UPDATE, or DELETE query
@@ -93,12 +364,14 @@ class DatabaseConnection:
             conn.commit()
             return cursor.rowcount
     
+    @timed_db_method
     def get_player_by_id(self, player_id: str) -> dict:
         """Get player by player_id"""
         query = "SELECT * FROM players WHERE player_id = ?"
         results = self.execute_query(query, (player_id,))
         return results[0] if results else None
     
+    @timed_db_method
     def insert_player(self, player_id: str, name: str, position: str, team: str = None, sleeper_id: str = None) -> bool:
         """Insert or update a player"""
         query = """
@@ -106,54 +379,604 @@ class DatabaseConnection:
         VALUES (?, ?, ?, ?, ?)
         """
         try:
-            self.execute_modify(query, (player_id, name, position, team, sleeper_id))
+            with self.get_connection() as conn:
+                conn.execute(query, (player_id, name, position, team, sleeper_id))
+                invalidation.publish(conn, (PLAYERS, cache_key(PLAYER, player_id)))
             return True
         except Exception as e:
             logger.error(f"Error inserting player: {e}")
             return False
     
-    def insert_weekly_stat(self, player_id: str, season: int, week: int, actual_points: float, projected_points: float = None, stats_json: str = None) -> bool:
-        """Insert or update weekly stats"""
+    @timed_db_method
+    def get_player_records(self) -> dict:
+        """
+        Get the stored tracked fields and content hash of every player
+        
+        Returns:
+            Dict of player records keyed by player_id
+        """
         query = """
-        INSERT OR REPLACE INTO weekly_stats (player_id, season, week, actual_points, projected_points, stats_json)
-        VALUES (?, ?, ?, ?, ?, ?)
+        SELECT player_id, name, position, team, injury_status, status, content_hash
+        FROM players
         """
+        return {row['player_id']: row for row in self.execute_query(query)}
+    
+    @timed_db_method
+    def upsert_players(self, records: list) -> int:
+        """
+        Insert or update many players in a single transaction
+        Existing rows are updated in place, so created_at is preserved and
+        updated_at only moves for players that were actually written
+        
+        Args:
+            records: Player dicts with player_id, name, position, team,
+                injury_status, status and content_hash
+            
+        Returns:
+            Number of rows written
+        """
+        query = """
+        INSERT INTO players (player_id, name, position, team, sleeper_id, injury_status, status, content_hash)
+        VALUES (:player_id, :name, :position, :team, :player_id, :injury_status, :status, :content_hash)
+        ON CONFLICT(player_id) DO UPDATE SET
+            name = excluded.name,
+            position = excluded.position,
+            team = excluded.team,
+            injury_status = excluded.injury_status,
+            status = excluded.status,
+            content_hash = excluded.content_hash,
+            updated_at = CURRENT_TIMESTAMP
+        """
+        with self.get_connection() as conn:
+            conn.executemany(query, records)
+            if records:
+                invalidation.publish(conn, [PLAYERS] + [cache_key(PLAYER, r['player_id']) for r in records])
+        return len(records)
+    
+    @timed_db_method
+    def insert_weekly_stat(self, player_id: str, season: int, week: int, actual_points: float, projected_points: float = None, stats_json: str = None) -> bool:
+        """Insert or update weekly stats"""
         try:
-            self.execute_modify(query, (player_id, season, week, actual_points, projected_points, stats_json))
+            self.insert_weekly_stats([(player_id, season, week, actual_points, projected_points, stats_json)])
             return True
         except Exception as e:
             logger.error(f"Error inserting weekly stat: {e}")
             return False
     
+    @timed_db_method
+    def insert_weekly_stats(self, rows: list) -> int:
+        """
+        Insert or update many weekly stats, one transaction per season
+        
+        Args:
+            rows: (player_id, season, week, actual_points, projected_points, stats_json) tuples
+            
+        Returns:
+            Number of rows written
+        """
+        query = """
+        INSERT OR REPLACE INTO {weekly_stats} (player_id, season, week, actual_points, projected_points, stats_json)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """
+        return self._season_write(query, rows,
+                                  keys=_changed_week_keys(STATS, 'weekly_stats', ('actual_points', 'projected_points')))
+    
+    @timed_db_method
     def get_player_stats(self, player_id: str, season: int = 2024) -> list:
-        """Get all weekly stats for a player in a season"""
+        """
+        Get all weekly stats for a player in a season
+        projected_points is the market-open snapshot where one exists, otherwise
+        the projection stored with the stats
+        """
         query = """
-        SELECT week, actual_points, projected_points, stats_json, timestamp
-        FROM weekly_stats
-        WHERE player_id = ? AND season = ?
+        SELECT ws.week, ws.actual_points,
+               COALESCE(pr.projected_points, ws.projected_points) AS projected_points
+        FROM {weekly_stats} ws
+        LEFT JOIN {projections} pr
+            ON pr.player_id = ws.player_id AND pr.season = ws.season AND pr.week = ws.week
+        WHERE ws.player_id = ? AND ws.season = ?
+        ORDER BY ws.week
+        """
+        return self._season_query(query, (player_id, season), [season])
+    
+    @timed_db_method
+    def get_latest_prices(self, season: int = 2024) -> dict:
+        """
+        Get each player's price: the point total of their latest played week in a season
+
+        Returns:
+            {player_id: actual_points}
+        """
+        query = """
+        SELECT ws.player_id, ws.actual_points
+        FROM {weekly_stats} ws
+        WHERE ws.season = ? AND ws.week = (
+            SELECT MAX(latest.week) FROM {weekly_stats} latest
+            WHERE latest.player_id = ws.player_id AND latest.season = ws.season
+        )
+        """
+        rows = self._season_query(query, (season,), [season])
+        return {row['player_id']: row['actual_points'] for row in rows}
+    
+    @timed_db_method
+    def get_player_series(self, player_id: str, start_season: int, end_season: int) -> list:
+        """
+        Get a player's weekly points across a range of seasons, oldest first
+        Projections prefer the market-open snapshot, as in get_player_stats
+        """
+        query = """
+        SELECT ws.season, ws.week, ws.actual_points,
+               COALESCE((SELECT pr.projected_points FROM {projections} pr
+                         WHERE pr.player_id = ws.player_id AND pr.season = ws.season
+                           AND pr.week = ws.week), ws.projected_points) AS projected_points
+        FROM {weekly_stats} ws
+        WHERE ws.player_id = ? AND ws.season BETWEEN ? AND ?
+        ORDER BY ws.season, ws.week
+        """
+        seasons = [season for season in self.partition_seasons() if start_season <= season <= end_season]
+        return self._season_query(query, (player_id, start_season, end_season), seasons)
+    
+    @timed_db_method
+    def get_weekly_points_since(self, season: int, after_id: int = 0) -> list:
+        """
+        Get weekly points rows written after a weekly_stats id (incremental loads)
+        INSERT OR REPLACE gives corrected rows a new id, so corrections are included.
+        Projections prefer the market-open snapshot, as in get_player_stats
+        """
+        query = """
+        SELECT ws.id, ws.player_id, ws.week, ws.actual_points,
+               COALESCE(pr.projected_points, ws.projected_points) AS projected_points, p.position, p.team
+        FROM {weekly_stats} ws
+        LEFT JOIN {projections} pr
+            ON pr.player_id = ws.player_id AND pr.season = ws.season AND pr.week = ws.week
+        LEFT JOIN players p ON p.player_id = ws.player_id
+        WHERE ws.season = ? AND ws.id > ?
+        ORDER BY ws.id
+        """
+        return self._season_query(query, (season, after_id), [season])
+    
+    @timed_db_method
+    def get_week_points(self, season: int, week: int) -> list:
+        """
+        Get one week's weekly points rows, in the same shape as get_weekly_points_since
+        Used to reload a week whose projections changed without its stats being rewritten
+        """
+        query = """
+        SELECT ws.id, ws.player_id, ws.week, ws.actual_points,
+               COALESCE(pr.projected_points, ws.projected_points) AS projected_points, p.position, p.team
+        FROM {weekly_stats} ws
+        LEFT JOIN {projections} pr
+            ON pr.player_id = ws.player_id AND pr.season = ws.season AND pr.week = ws.week
+        LEFT JOIN players p ON p.player_id = ws.player_id
+        WHERE ws.season = ? AND ws.week = ?
+        """
+        return self._season_query(query, (season, week), [season])
+    
+    @timed_db_method
+    def get_player_fingerprints(self, season: int) -> dict:
+        """
+        Cheap change marker per player for a season, from row counts and newest row ids
+        INSERT OR REPLACE gives a rewritten row a new id, so any stat correction,
+        projection snapshot or recomputed band changes the marker
+        
+        Returns:
+            Dict of {player_id: fingerprint string}
+        """
+        stats = self._season_query("""
+        SELECT player_id, COUNT(*) AS rows_count, MAX(id) AS max_id
+        FROM {weekly_stats}
+        WHERE season = ?
+        GROUP BY player_id
+        """, (season,), [season])
+        projections = {row['player_id']: row for row in self._season_query("""
+        SELECT player_id, COUNT(*) AS rows_count, MAX(id) AS max_id
+        FROM {projections}
+        WHERE season = ?
+        GROUP BY player_id
+        """, (season,), [season])}
+        bands = {row['player_id']: row for row in self.execute_query("""
+        SELECT player_id, COUNT(*) AS rows_count, MAX(rowid) AS max_id
+        FROM volatility_bands
+        WHERE season = ?
+        GROUP BY player_id
+        """, (season,))}
+        
+        def marker(row):
+            return f"{row['rows_count']}:{row['max_id']}" if row else '-'
+        
+        return {
+            row['player_id']: ':'.join((marker(row), marker(projections.get(row['player_id'])),
+                                        marker(bands.get(row['player_id']))))
+            for row in stats
+        }
+    
+    @timed_db_method
+    def get_projection_weeks(self, season: int) -> list:
+        """Get the weeks of a season that have any projections, in order"""
+        query = """
+        SELECT week FROM {projections} WHERE season = ?
+        UNION
+        SELECT week FROM {weekly_stats} WHERE season = ? AND projected_points IS NOT NULL
         ORDER BY week
         """
-        return self.execute_query(query, (player_id, season))
+        return [row['week'] for row in self._season_query(query, (season, season), [season])]
     
+    @timed_db_method
     def insert_projection(self, player_id: str, season: int, week: int, projected_points: float, data_source: str = "sleeper") -> bool:
         """Insert or update projections"""
-        query = """
-        INSERT OR REPLACE INTO projections (player_id, season, week, projected_points, data_source)
-        VALUES (?, ?, ?, ?, ?)
-        """
         try:
-            self.execute_modify(query, (player_id, season, week, projected_points, data_source))
+            self.insert_projections([(player_id, season, week, projected_points, data_source)])
             return True
         except Exception as e:
             logger.error(f"Error inserting projection: {e}")
             return False
     
+    @timed_db_method
+    def insert_projections(self, rows: list, recorded_at: float = None) -> int:
+        """
+        Insert or update many projections in a single transaction
+        Projections that differ from the stored one are also appended to
+        projection_history in the same transaction
+        
+        Args:
+            rows: (player_id, season, week, projected_points, data_source) tuples
+            recorded_at: Snapshot time in epoch seconds for the history (default now)
+            
+        Returns:
+            Number of rows written
+        """
+        recorded_ms = int((time.time() if recorded_at is None else recorded_at) * 1000)
+        history = """
+        INSERT OR REPLACE INTO {projection_history} (player_id, season, week, recorded_at, projected_points)
+        SELECT ?1, ?2, ?3, ?6, ?4
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {projections}
+            WHERE player_id = ?1 AND season = ?2 AND week = ?3 AND projected_points = ?4
+        )
+        """
+        query = """
+        INSERT OR REPLACE INTO {projections} (player_id, season, week, projected_points, snapshot_time, data_source)
+        VALUES (?1, ?2, ?3, ?4, datetime(?6 / 1000, 'unixepoch'), ?5)
+        """
+        return self._season_write((history, query), [tuple(row) + (recorded_ms,) for row in rows],
+                                  keys=_changed_week_keys(PROJECTIONS, 'projections', ('projected_points',)))
+    
+    @timed_db_method
+    def append_projection_history(self, rows: list, recorded_at: float = None) -> int:
+        """
+        Append intraweek projections to projection_history, leaving projections alone
+        projections keeps the market-open snapshot that prices are measured against;
+        this only records the path in between. A row is appended when it differs
+        from the player-week's newest uncompacted snapshot
+        
+        Args:
+            rows: (player_id, season, week, projected_points) tuples
+            recorded_at: Snapshot time in epoch seconds (default now)
+            
+        Returns:
+            Number of rows considered
+        """
+        recorded_ms = int((time.time() if recorded_at is None else recorded_at) * 1000)
+        query = """
+        INSERT OR REPLACE INTO {projection_history} (player_id, season, week, recorded_at, projected_points)
+        SELECT ?1, ?2, ?3, ?5, ?4
+        WHERE NOT EXISTS (
+            SELECT 1 FROM (
+                SELECT projected_points FROM {projection_history}
+                WHERE player_id = ?1 AND season = ?2 AND week = ?3
+                ORDER BY recorded_at DESC LIMIT 1
+            ) WHERE projected_points = ?4
+        )
+        """
+        return self._season_write(query, [tuple(row) + (recorded_ms,) for row in rows])
+    
+    @timed_db_method
     def get_projection(self, player_id: str, season: int, week: int) -> dict:
         """Get projection for a player in a specific week"""
         query = """
-        SELECT * FROM projections
+        SELECT player_id, season, week, projected_points
+        FROM {projections}
+        WHERE player_id = ? AND season = ? AND week = ?
+        """
+        results = self._season_query(query, (player_id, season, week), [season])
+        return results[0] if results else None
+    
+    @timed_db_method
+    def get_week_projections(self, season: int, week: int) -> list:
+        """
+        Get every player's projection for a week with their position
+        Market-open snapshots win; weekly_stats projections fill in players without one
+        """
+        query = """
+        SELECT pr.player_id, p.position, pr.projected_points
+        FROM {projections} pr
+        LEFT JOIN players p ON p.player_id = pr.player_id
+        WHERE pr.season = ? AND pr.week = ?
+        UNION ALL
+        SELECT ws.player_id, p.position, ws.projected_points
+        FROM {weekly_stats} ws
+        LEFT JOIN players p ON p.player_id = ws.player_id
+        WHERE ws.season = ? AND ws.week = ? AND ws.projected_points IS NOT NULL
+          AND ws.player_id NOT IN (SELECT player_id FROM {projections} WHERE season = ? AND week = ?)
+        """
+        return self._season_query(query, (season, week, season, week, season, week), [season])
+    
+    @timed_db_method
+    def get_projection_block(self, player_id: str, season: int, week: int) -> dict:
+        """Get a player-week's compacted history block (None if never compacted)"""
+        query = """
+        SELECT first_at, last_at, points, data
+        FROM {projection_blocks}
         WHERE player_id = ? AND season = ? AND week = ?
         """
-        results = self.execute_query(query, (player_id, season, week))
+        results = self._season_query(query, (player_id, season, week), [season])
+        return results[0] if results else None
+    
+    @timed_db_method
+    def get_projection_snapshots(self, player_id: str, season: int, week: int, until: int = None) -> list:
+        """
+        Get a player-week's uncompacted history in time order
+        
+        Args:
+            until: Only snapshots recorded at or before this epoch-millisecond time
+        """
+        query = """
+        SELECT recorded_at, projected_points
+        FROM {projection_history}
+        WHERE player_id = ? AND season = ? AND week = ? AND recorded_at <= ?
+        ORDER BY recorded_at
+        """
+        params = (player_id, season, week, until if until is not None else 2 ** 63 - 1)
+        return self._season_query(query, params, [season])
+    
+    @timed_db_method
+    def get_projection_as_of(self, player_id: str, season: int, week: int, at: int) -> dict:
+        """Get the newest uncompacted snapshot recorded at or before an epoch-millisecond time"""
+        query = """
+        SELECT recorded_at, projected_points
+        FROM {projection_history}
+        WHERE player_id = ? AND season = ? AND week = ? AND recorded_at <= ?
+        ORDER BY recorded_at DESC
+        LIMIT 1
+        """
+        results = self._season_query(query, (player_id, season, week, at), [season])
         return results[0] if results else None
+    
+    @timed_db_method
+    def fold_projection_history(self, season: int, before: int, fold) -> int:
+        """
+        Replace snapshots recorded before an epoch-millisecond time with rebuilt
+        blocks, reading and writing in one transaction
+        BEGIN IMMEDIATE takes the write lock before anything is read, so concurrent
+        compactions (one per worker) run one after another and each sees what the
+        previous one wrote instead of overwriting its blocks
+        
+        Args:
+            season: Season to compact
+            before: Epoch-millisecond cutoff
+            fold: Called as fold(rows) with the uncompacted snapshots (player_id, week,
+                recorded_at, projected_points) joined to their player-week's block
+                (last_at, data; None without one), ordered by player-week and time.
+                Returns (blocks, compacted): (player_id, week, first_at, last_at,
+                points, data) tuples to store and (player_id, week, recorded_at) keys
+                of the snapshots to delete
+            
+        Returns:
+            Number of blocks written
+        """
+        with self.get_connection() as conn:
+            tables = self._attach_seasons(conn, [season], write=True)
+            conn.commit()  # attaching may have opened a deferred transaction
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(f"""
+            SELECT h.player_id, h.week, h.recorded_at, h.projected_points, b.last_at, b.data
+            FROM {tables['projection_history']} h
+            LEFT JOIN {tables['projection_blocks']} b
+                ON b.player_id = h.player_id AND b.season = h.season AND b.week = h.week
+            WHERE h.season = ? AND h.recorded_at < ?
+            ORDER BY h.player_id, h.week, h.recorded_at
+            """, (int(season), before)).fetchall()
+            if not rows:
+                return 0
+            blocks, compacted = fold(rows)
+            conn.executemany(f"""
+            INSERT OR REPLACE INTO {tables['projection_blocks']}
+                (player_id, season, week, first_at, last_at, points, data)
+            VALUES (?1, {int(season)}, ?2, ?3, ?4, ?5, ?6)
+            """, blocks)
+            conn.executemany(f"""
+            DELETE FROM {tables['projection_history']}
+            WHERE player_id = ?1 AND season = {int(season)} AND week = ?2 AND recorded_at = ?3
+            """, compacted)
+        return len(blocks)
+    
+    @timed_db_method
+    def get_projection_residuals(self, season: int, week: int) -> list:
+        """
+        Get (actual - projected) for every player-week before a season/week
+        Projections prefer the market-open snapshot, as in get_player_stats
+        """
+        query = """
+        SELECT player_id, position, actual_points - projected_points AS residual
+        FROM (
+            SELECT ws.player_id, p.position, ws.actual_points,
+                   COALESCE((SELECT pr.projected_points FROM {projections} pr
+                             WHERE pr.player_id = ws.player_id AND pr.season = ws.season
+                               AND pr.week = ws.week), ws.projected_points) AS projected_points
+            FROM {weekly_stats} ws
+            LEFT JOIN players p ON p.player_id = ws.player_id
+            WHERE ws.season <= ? AND (ws.season < ? OR ws.week < ?)
+        )
+        WHERE projected_points IS NOT NULL
+        """
+        seasons = [s for s in self.partition_seasons() if s <= season]
+        return self._season_query(query, (season, season, week), seasons)
+    
+    @timed_db_method
+    def upsert_volatility_bands(self, rows: list) -> int:
+        """
+        Insert or replace simulated bands in one transaction
+        
+        Args:
+            rows: (player_id, season, week, projection, p10, p50, p90, volatility, simulations) tuples
+            
+        Returns:
+            Number of rows written
+        """
+        query = """
+        INSERT OR REPLACE INTO volatility_bands
+            (player_id, season, week, projection, p10, p50, p90, volatility, simulations, computed_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+        """
+        with self.get_connection() as conn:
+            conn.executemany(query, rows)
+            invalidation.publish(conn, [cache_key(PLAYER, row[0]) for row in rows])
+        return len(rows)
+    
+    @timed_db_method
+    def get_volatility_bands(self, player_id: str, season: int) -> list:
+        """Get a player's simulated bands for a season"""
+        query = """
+        SELECT week, projection, p10, p50, p90, volatility
+        FROM volatility_bands
+        WHERE player_id = ? AND season = ?
+        ORDER BY week
+        """
+        return self.execute_query(query, (player_id, season))
+    
+    @timed_db_method
+    def get_portfolio_positions(self, user_id: str = None) -> list:
+        """
+        Get portfolio rows, optionally for a single user
+
+        Args:
+            user_id: Only return this user's rows (all users if None)
+
+        Returns:
+            List of position dicts ordered by id
+        """
+        query = """
+        SELECT id, user_id, player_id, action, entry_price, exit_price, quantity, week
+        FROM user_portfolio
+        """
+        if user_id is not None:
+            return self.execute_query(query + " WHERE user_id = ? ORDER BY id", (user_id,))
+        return self.execute_query(query + " ORDER BY id")
+
+    @timed_db_method
+    def insert_portfolio_rows(self, rows: list) -> int:
+        """
+        Insert open portfolio rows in one transaction
+        
+        Args:
+            rows: (user_id, player_id, action, entry_price, quantity, entry_timestamp, week) tuples
+            
+        Returns:
+            Number of rows written
+        """
+        query = """
+        INSERT INTO user_portfolio (user_id, player_id, action, entry_price, quantity, entry_timestamp, week)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """
+        with self.get_connection() as conn:
+            conn.executemany(query, rows)
+        return len(rows)
+
+    @timed_db_method
+    def insert_price_alert(self, user_id: str, player_id: str, threshold: float, direction: str) -> int:
+        """
+        Insert an active price alert
+
+        Returns:
+            The new alert's id
+        """
+        query = "INSERT INTO price_alerts (user_id, player_id, threshold, direction) VALUES (?, ?, ?, ?)"
+        with self.get_connection() as conn:
+            return conn.execute(query, (user_id, player_id, threshold, direction)).lastrowid
 
+    @timed_db_method
+    def get_active_price_alerts(self) -> list:
+        """Get every untriggered alert as (id, user_id, player_id, threshold, direction) tuples"""
+        query = """
+        SELECT id, user_id, player_id, threshold, direction
+        FROM price_alerts
+        WHERE NOT EXISTS (SELECT 1 FROM price_alert_triggers t WHERE t.alert_id = price_alerts.id)
+        """
+        with self.get_connection() as conn:
+            conn.row_factory = None  # plain tuples: this can be millions of rows
+            return conn.execute(query).fetchall()
+
+    @timed_db_method
+    def get_price_alerts(self, user_id: str, limit: int = 100) -> list:
+        """
+        Get a user's alerts, active and triggered
+
+        Args:
+            user_id: Owner
+            limit: Most alerts to return
+
+        Returns:
+            List of alert dicts, newest first
+        """
+        query = """
+        SELECT a.id, a.player_id, a.threshold, a.direction, a.created_at, t.triggered_at, t.triggered_price
+        FROM price_alerts a
+        LEFT JOIN price_alert_triggers t ON t.alert_id = a.id
+        WHERE a.user_id = ?
+        ORDER BY a.id DESC
+        LIMIT ?
+        """
+        return self.execute_query(query, (user_id, limit))
+
+    @timed_db_method
+    def mark_price_alerts_triggered(self, rows: list) -> int:
+        """
+        Mark alerts triggered in one transaction (an alert already marked keeps its first trigger)
+
+        Args:
+            rows: (alert_id, triggered_price, triggered_at) tuples
+
+        Returns:
+            Number of rows written
+        """
+        query = """
+        INSERT OR IGNORE INTO price_alert_triggers (alert_id, triggered_price, triggered_at)
+        VALUES (?, ?, ?)
+        """
+        with self.get_connection() as conn:
+            conn.executemany(query, rows)
+        return len(rows)
+
+    @timed_db_method
+    def delete_price_alert(self, alert_id: int, user_id: str) -> bool:
+        """Delete one of a user's untriggered alerts; returns False if there was none"""
+        query = """
+        DELETE FROM price_alerts
+        WHERE id = ? AND user_id = ?
+          AND NOT EXISTS (SELECT 1 FROM price_alert_triggers t WHERE t.alert_id = price_alerts.id)
+        """
+        return self.execute_modify(query, (alert_id, user_id)) > 0
+
+    @timed_db_method
+    def replace_player_id_map(self, rows: list) -> int:
+        """
+        Replace the Sleeper <-> ESPN crosswalk in one transaction
+        
+        Args:
+            rows: (sleeper_id, espn_id, match_method) tuples
+            
+        Returns:
+            Number of rows written
+        """
+        with self.get_connection() as conn:
+            conn.execute("DELETE FROM player_id_map")
+            conn.executemany(
+                "INSERT INTO player_id_map (sleeper_id, espn_id, match_method) VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+    
+    @timed_db_method
+    def get_player_id_map(self) -> dict:
+        """Get the crosswalk as {sleeper_id: espn_id}"""
+        rows = self.execute_query("SELECT sleeper_id, espn_id FROM player_id_map")
+        return {row['sleeper_id']: row['espn_id'] for row in rows}
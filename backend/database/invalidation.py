@@ -0,0 +1,180 @@
+"""
+Cross-process cache invalidation through the database
+DatabaseConnection writers append the cache keys they touched to
+cache_invalidations in the same transaction as the write, so a key is visible
+exactly when the data is. Every process runs an InvalidationBus that polls the
+table: PRAGMA data_version on one long-lived connection says whether any other
+connection has committed since the last poll, so an idle poll costs no query.
+New keys are grouped by kind and handed to subscribers, which drop exactly the
+affected cache entries; caches can then keep long TTLs without serving data
+another worker or a script has since rewritten
+
+Keys are 'kind' or 'kind:value', e.g. 'players', 'player:4046', 'stats:2024:5'
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+PLAYERS = 'players'          # the player universe as a whole
+PLAYER = 'player'            # one player's stats, projections or bands: player:<player_id>
+STATS = 'stats'              # a week of weekly_stats: stats:<season>:<week>
+PROJECTIONS = 'projections'  # a week of projections: projections:<season>:<week>
+RESET = '*'                  # sent to subscribers when keys may have been missed
+
+
+def cache_key(kind: str, *parts) -> str:
+    """Build a key such as cache_key(STATS, 2024, 5) -> 'stats:2024:5'"""
+    return ':'.join((kind,) + tuple(str(part) for part in parts))
+
+
+def publish(conn, keys) -> int:
+    """
+    Record invalidation keys inside the caller's transaction
+
+    Args:
+        conn: Open connection to the main database file
+        keys: Iterable of cache keys (duplicates are written once)
+
+    Returns:
+        Number of keys written
+    """
+    now = time.time()
+    rows = [(key, now) for key in dict.fromkeys(keys)]
+    conn.executemany("INSERT INTO main.cache_invalidations (cache_key, created_at) VALUES (?, ?)", rows)
+    return len(rows)
+
+
+class InvalidationBus:
+    """
+    Polls cache_invalidations and dispatches new keys to subscribers
+    One per process; poll() may also be called directly (tests, scripts)
+    """
+
+    def __init__(self, db_path: str, interval: float = 0.5, retention: float = 3600):
+        """
+        Args:
+            db_path: Main database file
+            interval: Seconds between polls (the longest a cache can lag a write)
+            retention: Seconds keys are kept before prune() deletes them; a
+                process that hasn't polled for half this long gets a RESET
+        """
+        self.db_path = db_path
+        self.interval = interval
+        self.retention = retention
+        self.dispatched = 0
+        self._subscribers = {}  # kind -> [callback]
+        self._conn = None
+        self._data_version = None
+        self._watermark = 0
+        self._last_poll = None
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, kind: str, callback):
+        """
+        Register a callback for one kind of key
+
+        Args:
+            kind: Key kind (PLAYER, STATS, ...) or RESET
+            callback: Called as callback(values) once per poll with the distinct
+                values after 'kind:' in the new keys ('' for a bare kind, nothing for RESET)
+        """
+        self._subscribers.setdefault(kind, []).append(callback)
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            # Start from now: this process's caches don't hold anything older yet
+            self._watermark = self._conn.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM cache_invalidations").fetchone()[0]
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            self._last_poll = time.monotonic()
+        return self._conn
+
+    def poll(self) -> int:
+        """
+        Dispatch keys written since the last poll
+
+        Returns:
+            Number of distinct keys dispatched
+        """
+        with self._lock:
+            conn = self._connect()
+            now = time.monotonic()
+            if now - self._last_poll > self.retention / 2:
+                # Keys older than the retention may already be pruned: drop everything
+                logger.warning("Invalidation poll fell behind; resetting caches")
+                self._dispatch(RESET, [])
+            self._last_poll = now
+
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return 0
+            self._data_version = version
+            rows = conn.execute(
+                "SELECT id, cache_key FROM cache_invalidations WHERE id > ? ORDER BY id", (self._watermark,)
+            ).fetchall()
+            if not rows:
+                return 0
+            self._watermark = rows[-1][0]
+
+            by_kind = {}
+            for _, key in rows:
+                kind, _, value = key.partition(':')
+                by_kind.setdefault(kind, {})[value] = None
+            for kind, values in by_kind.items():
+                self._dispatch(kind, list(values))
+            count = sum(len(values) for values in by_kind.values())
+            self.dispatched += count
+            return count
+
+    def _dispatch(self, kind: str, values: list):
+        for callback in self._subscribers.get(kind, ()):
+            try:
+                if kind == RESET:
+                    callback()
+                else:
+                    callback(values)
+            except Exception as e:
+                logger.error(f"Invalidation subscriber for {kind} failed: {e}")
+
+    def prune(self) -> int:
+        """Delete keys older than the retention; returns rows deleted"""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                deleted = conn.execute("DELETE FROM cache_invalidations WHERE created_at < ?",
+                                       (time.time() - self.retention,)).rowcount
+        if deleted:
+            logger.info(f"Pruned {deleted} cache invalidations")
+        return deleted
+
+    def start(self):
+        """Poll in a daemon thread until stop()"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='invalidation-bus', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                if time.monotonic() - self._last_prune > self.retention / 4:
+                    self._last_prune = time.monotonic()
+                    self.prune()
+            except Exception as e:
+                logger.error(f"Invalidation poll failed: {e}")
+            self._stop.wait(self.interval)
@@ -0,0 +1,80 @@
+"""
+Schema migrations for existing databases
+schema.sql always describes the latest layout. Migrations run before it and only
+alter tables that already exist, so schema.sql can then create any missing tables
+and indexes. Progress is tracked with PRAGMA user_version
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _column_names(conn, table: str) -> set:
+    """Return the set of column names for a table (empty if it doesn't exist)"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_portfolio_user(conn):
+    """Version 1: track which user owns each portfolio row"""
+    columns = _column_names(conn, 'user_portfolio')
+    if columns and 'user_id' not in columns:
+        conn.execute("ALTER TABLE user_portfolio ADD COLUMN user_id TEXT NOT NULL DEFAULT 'default'")
+
+
+def _add_player_change_tracking(conn):
+    """Version 2: injury/roster status and a content hash for change detection"""
+    columns = _column_names(conn, 'players')
+    for column in ('injury_status', 'status', 'content_hash'):
+        if columns and column not in columns:
+            conn.execute(f"ALTER TABLE players ADD COLUMN {column} TEXT")
+
+
+def _replace_stats_indexes(conn):
+    """Version 3: drop indexes superseded by the covering indexes in schema.sql"""
+    conn.execute("DROP INDEX IF EXISTS idx_weekly_stats_player_season")
+    conn.execute("DROP INDEX IF EXISTS idx_projections_player_week")
+
+
+def _add_portfolio_quantity(conn):
+    """Version 4: a portfolio row can hold several shares (order book fills)"""
+    columns = _column_names(conn, 'user_portfolio')
+    if columns and 'quantity' not in columns:
+        conn.execute("ALTER TABLE user_portfolio ADD COLUMN quantity INTEGER NOT NULL DEFAULT 1")
+
+
+def _replace_incremental_index(conn):
+    """Version 5: drop the incremental-load index superseded by one that also covers projected_points"""
+    conn.execute("DROP INDEX IF EXISTS idx_weekly_stats_season_id")
+
+
+# (version, migration) pairs, applied in order
+MIGRATIONS = [
+    (1, _add_portfolio_user),
+    (2, _add_player_change_tracking),
+    (3, _replace_stats_indexes),
+    (4, _add_portfolio_quantity),
+    (5, _replace_incremental_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def apply_migrations(conn) -> int:
+    """
+    Apply any migrations newer than the database's user_version
+
+    Args:
+        conn: Open sqlite3 connection
+
+    Returns:
+        Schema version after migrating
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, migration in MIGRATIONS:
+        if version < target:
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            version = target
+            logger.info(f"Applied schema migration {target}")
+    return version
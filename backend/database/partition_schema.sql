@@ -0,0 +1,56 @@
+-- Per-season partition schema (one SQLite file per season, see DatabaseConnection)
+-- Same columns and column order as the main-file tables, so partitions can be
+-- UNIONed with each other and rows copied across with SELECT *. Foreign keys to
+-- players are left out because SQLite can't enforce them across attached files
+
+CREATE TABLE IF NOT EXISTS weekly_stats (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    actual_points REAL NOT NULL,
+    projected_points REAL,
+    stats_json TEXT,
+    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(player_id, season, week)
+);
+
+CREATE TABLE IF NOT EXISTS projections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    projected_points REAL NOT NULL,
+    snapshot_time TIMESTAMP NOT NULL,
+    data_source TEXT DEFAULT 'sleeper',
+    UNIQUE(player_id, season, week)
+);
+
+CREATE TABLE IF NOT EXISTS projection_history (
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    recorded_at INTEGER NOT NULL,
+    projected_points REAL NOT NULL,
+    PRIMARY KEY (player_id, season, week, recorded_at)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS projection_blocks (
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    first_at INTEGER NOT NULL,
+    last_at INTEGER NOT NULL,
+    points INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (player_id, season, week)
+);
+
+-- Same indexes as schema.sql (migrations 3 and 5 dropped the older ones there)
+DROP INDEX IF EXISTS idx_weekly_stats_player_season;
+DROP INDEX IF EXISTS idx_projections_player_week;
+DROP INDEX IF EXISTS idx_weekly_stats_season_id;
+CREATE INDEX IF NOT EXISTS idx_weekly_stats_player_points ON weekly_stats(player_id, season, week, actual_points, projected_points); -- player stats, series
+CREATE INDEX IF NOT EXISTS idx_weekly_stats_season_id_points ON weekly_stats(season, id, player_id, week, actual_points, projected_points); -- incremental loads since an id
+CREATE INDEX IF NOT EXISTS idx_weekly_stats_season_week ON weekly_stats(season, week, player_id, projected_points, actual_points); -- week projections, residuals, fingerprints
+CREATE INDEX IF NOT EXISTS idx_projections_season_week ON projections(season, week, player_id, projected_points); -- week projections, fingerprints
@@ -8,6 +8,9 @@ CREATE TABLE IF NOT EXISTS players (
     position TEXT NOT NULL,
     team TEXT,
     sleeper_id TEXT UNIQUE,
+    injury_status TEXT,
+    status TEXT,
+    content_hash TEXT, -- Hash of the tracked fields, used to diff upstream pulls
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
@@ -42,18 +45,109 @@ CREATE TABLE IF NOT EXISTS projections (
 -- User portfolio (buy/sell tracking)
 CREATE TABLE IF NOT EXISTS user_portfolio (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL DEFAULT 'default',
     player_id TEXT NOT NULL,
     action TEXT NOT NULL CHECK(action IN ('buy', 'sell')),
     entry_price REAL NOT NULL,
     exit_price REAL,
+    quantity INTEGER NOT NULL DEFAULT 1,
     entry_timestamp TIMESTAMP NOT NULL,
     exit_timestamp TIMESTAMP,
     week INTEGER NOT NULL,
     FOREIGN KEY (player_id) REFERENCES players(player_id)
 );
 
--- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_weekly_stats_player_season ON weekly_stats(player_id, season);
-CREATE INDEX IF NOT EXISTS idx_projections_player_week ON projections(player_id, week);
+-- Price alerts (data/price_alerts.py): an alert is active until it has a trigger row.
+-- Triggers go in their own small table so a burst of them appends rows instead of
+-- rewriting pages scattered across price_alerts
+CREATE TABLE IF NOT EXISTS price_alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    player_id TEXT NOT NULL,
+    threshold REAL NOT NULL,
+    direction TEXT NOT NULL CHECK(direction IN ('above', 'below')),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS price_alert_triggers (
+    alert_id INTEGER PRIMARY KEY,
+    triggered_price REAL NOT NULL,
+    triggered_at TIMESTAMP NOT NULL,
+    FOREIGN KEY (alert_id) REFERENCES price_alerts(id)
+);
+
+-- Cache invalidation feed (database/invalidation.py): writers append the keys they
+-- touched in the same transaction, and every process polls for rows past its watermark
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cache_key TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+
+-- Intraweek projection history (data/projection_history.py). insert_projections appends
+-- a row only when a player-week's projection changes; compaction folds older rows into
+-- one delta-encoded block per player-week. Times are epoch milliseconds
+CREATE TABLE IF NOT EXISTS projection_history (
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    recorded_at INTEGER NOT NULL,
+    projected_points REAL NOT NULL,
+    PRIMARY KEY (player_id, season, week, recorded_at)
+) WITHOUT ROWID; -- clustered on the key, so as-of lookups read one b-tree range
+
+CREATE TABLE IF NOT EXISTS projection_blocks (
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    first_at INTEGER NOT NULL,
+    last_at INTEGER NOT NULL,
+    points INTEGER NOT NULL, -- Snapshots in the block
+    data BLOB NOT NULL,
+    PRIMARY KEY (player_id, season, week)
+);
+
+-- Monte Carlo next-week outcome bands (data/volatility.py)
+CREATE TABLE IF NOT EXISTS volatility_bands (
+    player_id TEXT NOT NULL,
+    season INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    projection REAL NOT NULL,
+    p10 REAL NOT NULL,
+    p50 REAL NOT NULL,
+    p90 REAL NOT NULL,
+    volatility REAL NOT NULL, -- Simulated std / projection
+    simulations INTEGER NOT NULL,
+    computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (player_id, season, week)
+);
+
+-- Sleeper <-> ESPN player ID crosswalk
+CREATE TABLE IF NOT EXISTS player_id_map (
+    sleeper_id TEXT PRIMARY KEY,
+    espn_id TEXT NOT NULL UNIQUE,
+    match_method TEXT, -- How the IDs were matched (sleeper_espn_id, name_team_position, ...)
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Season partitions (one file per season when DATABASE_PARTITION_DIR is set);
+-- closed seasons are compacted and read-only
+CREATE TABLE IF NOT EXISTS season_partitions (
+    season INTEGER PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    closed_at TIMESTAMP
+);
+
+-- Indexes matched to the access patterns in db_connection.py. Multi-row reads use
+-- covering indexes (every column the query reads is in the index) so they never
+-- touch the table; single-row lookups by (player_id, season, week) use the UNIQUE
+-- constraints' indexes. tests/test_query_plans.py keeps them from regressing to scans
+CREATE INDEX IF NOT EXISTS idx_weekly_stats_player_points ON weekly_stats(player_id, season, week, actual_points, projected_points); -- player stats, series
+CREATE INDEX IF NOT EXISTS idx_weekly_stats_season_id_points ON weekly_stats(season, id, player_id, week, actual_points, projected_points); -- incremental loads since an id
+CREATE INDEX IF NOT EXISTS idx_weekly_stats_season_week ON weekly_stats(season, week, player_id, projected_points, actual_points); -- week projections, residuals, fingerprints
+CREATE INDEX IF NOT EXISTS idx_projections_season_week ON projections(season, week, player_id, projected_points); -- week projections, fingerprints
+CREATE INDEX IF NOT EXISTS idx_volatility_bands_season ON volatility_bands(season, player_id); -- fingerprints
 CREATE INDEX IF NOT EXISTS idx_portfolio_player_week ON user_portfolio(player_id, week);
+CREATE INDEX IF NOT EXISTS idx_portfolio_user ON user_portfolio(user_id);
+CREATE INDEX IF NOT EXISTS idx_price_alerts_user ON price_alerts(user_id, id); -- a user's alerts, newest first
 
@@ -0,0 +1,362 @@
+"""
+In-process metrics collection exposed in Prometheus text format
+Collection is a perf_counter read plus a locked list increment, so it is cheap
+enough to leave on in every request handler, DB call and upstream request
+
+Under the production server every process counts its own requests, so the
+registry is shared through a directory: each process writes its counters and
+histograms to its own file every few seconds, and /metrics adds the other
+processes' files to its live values. Gauges stay per process
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from profiling import record_call
+
+# Latency buckets in seconds, from sub-millisecond SQLite reads to slow upstream calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra: str = None) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """Base class for a named metric with a fixed set of label names"""
+
+    type_name = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _samples(self, others=()):
+        raise NotImplementedError
+
+    def export(self):
+        """JSON-ready series for another process to add to its own (None: not shared)"""
+        return None
+
+    def reset(self):
+        """Drop every series"""
+
+    def render(self, others=()) -> str:
+        """Render with the export() output of other processes added in"""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for suffix, labels, value in self._samples(others):
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count per label set"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount: float = 1):
+        """Increment the series for the given label values"""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues) -> float:
+        """Current value for the given label values"""
+        return self._values.get(labelvalues, 0)
+
+    def export(self) -> list:
+        with self._lock:
+            return [[list(labelvalues), value] for labelvalues, value in self._values.items()]
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def _samples(self, others=()):
+        with self._lock:
+            values = dict(self._values)
+        for exported in others:
+            for labelvalues, value in exported:
+                labelvalues = tuple(labelvalues)
+                values[labelvalues] = values.get(labelvalues, 0) + value
+        for labelvalues, value in sorted(values.items()):
+            yield '', _format_labels(self.labelnames, labelvalues), value
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, optionally computed at scrape time"""
+
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+        self._functions = {}
+
+    def set(self, value: float, *labelvalues):
+        """Set the series for the given label values"""
+        self._values[labelvalues] = value
+
+    def set_function(self, function, *labelvalues):
+        """Compute the series by calling function() on every scrape"""
+        self._functions[labelvalues] = function
+
+    def get(self, *labelvalues) -> float:
+        """Current value for the given label values"""
+        function = self._functions.get(labelvalues)
+        return function() if function else self._values.get(labelvalues, 0)
+
+    def _samples(self, others=()):
+        values = dict(self._values)
+        for labelvalues, function in list(self._functions.items()):
+            values[labelvalues] = function()
+        for labelvalues, value in sorted(values.items()):
+            yield '', _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram(_Metric):
+    """Bucketed distribution of observed values per label set"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # labelvalues -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, *labelvalues):
+        """Record one observation for the given label values"""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labelvalues) -> int:
+        """Number of observations for the given label values"""
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def export(self) -> list:
+        with self._lock:
+            return [[list(labelvalues), list(series)] for labelvalues, series in self._series.items()]
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def _samples(self, others=()):
+        with self._lock:
+            merged = {labelvalues: list(series) for labelvalues, series in self._series.items()}
+        for exported in others:
+            for labelvalues, series in exported:
+                total = merged.setdefault(tuple(labelvalues), [0] * len(series))
+                for i, value in enumerate(series):
+                    total[i] += value
+        for labelvalues, series in sorted(merged.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), series[:-1]):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                yield '_bucket', _format_labels(self.labelnames, labelvalues, le), cumulative
+            yield '_sum', _format_labels(self.labelnames, labelvalues), series[-1]
+            yield '_count', _format_labels(self.labelnames, labelvalues), cumulative
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together at the metrics endpoint"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.directory = None  # set by share(): per-process files summed at render
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def share(self, directory: str):
+        """
+        Sum counters and histograms across the processes forked from this one
+        Call before forking: earlier files in directory are removed, and forked
+        children start from zero so what this process counted so far is only in its own file
+
+        Args:
+            directory: Created if missing; every process writes <directory>/<pid>.json
+        """
+        os.makedirs(directory, exist_ok=True)
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+        if self.directory is None:
+            os.register_at_fork(after_in_child=self._forked)
+        self.directory = directory
+        self.flush()
+
+    def _forked(self):
+        if self.directory is None:
+            return
+        self._lock = threading.Lock()
+        for metric in list(self._metrics.values()):
+            metric._lock = threading.Lock()  # may have been held by another thread at fork
+            metric.reset()
+
+    def flush(self):
+        """Write this process's counters and histograms to its file (no-op unless shared)"""
+        if self.directory is None:
+            return
+        with self._lock:
+            metrics = list(self._metrics.values())
+        exported = {metric.name: metric.export() for metric in metrics}
+        path = os.path.join(self.directory, f"{os.getpid()}.json")
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump({name: series for name, series in exported.items() if series is not None}, f)
+        os.replace(f"{path}.tmp", path)
+
+    def _other_processes(self) -> dict:
+        """{metric name: [export() output of each other process]} from the shared directory"""
+        others = {}
+        if self.directory is None:
+            return others
+        own = f"{os.getpid()}.json"
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json') or name == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    exported = json.load(f)
+            except (OSError, ValueError):
+                continue  # replaced or removed while listing
+            for metric_name, series in exported.items():
+                others.setdefault(metric_name, []).append(series)
+        return others
+
+    def render(self) -> str:
+        """Render every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        others = self._other_processes()
+        return '\n'.join(metric.render(others.get(metric.name, ())) for metric in metrics) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Flask request latency by route', ('method', 'route', 'status'))
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    'db_query_duration_seconds', 'SQLite call latency by DatabaseConnection method', ('method',))
+SLEEPER_REQUESTS = REGISTRY.counter(
+    'sleeper_requests_total', 'Sleeper API calls by endpoint group and outcome', ('endpoint', 'outcome'))
+SLEEPER_REQUEST_SECONDS = REGISTRY.histogram(
+    'sleeper_request_duration_seconds', 'Sleeper API call latency by endpoint group', ('endpoint',))
+CACHE_REQUESTS = REGISTRY.counter(
+    'cache_requests_total', 'Cache lookups by cache name and result (hit/miss/stale/coalesced/bypass)',
+    ('cache', 'result'))
+RESPONSE_BYTES = REGISTRY.counter(
+    'http_response_bytes_total', 'Response body bytes sent by content encoding', ('encoding',))
+PROJECTION_FETCHES = REGISTRY.counter(
+    'projection_fetches_total', 'Hedged projection fetches by source and result', ('source', 'result'))
+SLEEPER_RATE_LIMIT_REMAINING = REGISTRY.gauge(
+    'sleeper_rate_limit_remaining', 'Sleeper calls left in the current rate-limit minute')
+RATE_BUDGET_WAIT_SECONDS = REGISTRY.histogram(
+    'rate_budget_wait_seconds', 'Time spent waiting for an upstream rate-budget token by priority', ('priority',))
+JOB_RUNS = REGISTRY.counter(
+    'scheduler_job_runs_total', 'Scheduled job runs by result (ok/error/skipped/missed)', ('job', 'result'))
+JOB_RUN_SECONDS = REGISTRY.histogram(
+    'scheduler_job_duration_seconds', 'Scheduled job run time', ('job',),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+
+
+def endpoint_group(endpoint: str) -> str:
+    """Collapse a Sleeper endpoint to its first path segment to bound label cardinality"""
+    return endpoint.split('/', 1)[0]
+
+
+_db_call = threading.local()
+
+
+def timed_db_method(func):
+    """
+    Decorator recording call count and latency of a DatabaseConnection method (and profiled requests' calls)
+    Only the outermost decorated call on a thread is recorded, so a public method
+    built on execute_query or another public method counts as one DB call
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if getattr(_db_call, 'active', False):
+            return func(*args, **kwargs)
+        _db_call.active = True
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _db_call.active = False
+            duration = time.perf_counter() - start
+            DB_QUERY_SECONDS.observe(duration, name)
+            record_call('db', name, start, duration)
+    return wrapper
+
+
+def instrument_app(app):
+    """
+    Record per-route latency for every request handled by a Flask app
+
+    Args:
+        app: Flask application
+    """
+    from flask import g, request
+
+    @app.before_request
+    def _start_timer():
+        g._metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _record_latency(response):
+        start = g.pop('_metrics_start', None)
+        if start is not None:
+            route = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - start, request.method, route, str(response.status_code))
+        return response
+
+    return app
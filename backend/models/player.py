@@ -1,36 +1,130 @@
 """
 Data models for players and their stats
+Models use __slots__, and a player's season is a fixed-size float array indexed
+by week, so holding every player in memory for live pricing stays compact
 """
 
+import math
+from array import array
+
+# Regular season length; weeks are 1-based
+MAX_WEEKS = 18
+
+_NAN = float('nan')
+
+
 class Player:
-    """Represents a fantasy football player"""
-    
+    """
+    Represents a fantasy football player
+    Actual and projected points share one array: actual for week w lives at
+    index w - 1 and projected at MAX_WEEKS + w - 1 (NaN marks a missing value).
+    Count, sum and sum of squares are maintained on every write, so the season
+    average and variance are O(1)
+    """
+
+    __slots__ = ('player_id', 'name', 'position', 'team', '_points', '_count', '_sum', '_sum_sq')
+
     def __init__(self, player_id, name, position, team=None):
         self.player_id = player_id
         self.name = name
         self.position = position
         self.team = team
-        self.weekly_stats = []
-        self.season_average = 0.0
-        
+        self._points = array('d', [_NAN]) * (2 * MAX_WEEKS)
+        self._count = 0
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
     def add_weekly_stat(self, week, actual_points, projected_points=None):
-        """Add a week's statistics"""
-        stat = {
-            'week': week,
-            'actual': actual_points,
-            'projected': projected_points,
-            'diff': actual_points - projected_points if projected_points else 0
-        }
-        self.weekly_stats.append(stat)
-        
-    def calculate_season_average(self):
-        """Calculate the player's season average points"""
-        if not self.weekly_stats:
+        """
+        Add a week's statistics
+        Writing a week that already has stats replaces it (e.g. stat corrections)
+
+        Raises:
+            ValueError: If week is outside 1..MAX_WEEKS
+        """
+        if not 1 <= week <= MAX_WEEKS:
+            raise ValueError(f"week must be between 1 and {MAX_WEEKS}, got {week}")
+        index = week - 1
+        points = self._points
+
+        previous = points[index]
+        if previous == previous:  # not NaN: undo the old value
+            self._count -= 1
+            self._sum -= previous
+            self._sum_sq -= previous * previous
+
+        actual = float(actual_points)
+        points[index] = actual
+        points[MAX_WEEKS + index] = _NAN if projected_points is None else float(projected_points)
+        self._count += 1
+        self._sum += actual
+        self._sum_sq += actual * actual
+
+    def get_week(self, week):
+        """
+        Get one week's (actual, projected) points
+
+        Returns:
+            Tuple of floats (projected may be None), or None if the week has no stats
+
+        Raises:
+            ValueError: If week is outside 1..MAX_WEEKS
+        """
+        if not 1 <= week <= MAX_WEEKS:
+            raise ValueError(f"week must be between 1 and {MAX_WEEKS}, got {week}")
+        actual = self._points[week - 1]
+        if actual != actual:
+            return None
+        projected = self._points[MAX_WEEKS + week - 1]
+        return actual, (None if projected != projected else projected)
+
+    @property
+    def weeks_played(self):
+        """Number of weeks with stats"""
+        return self._count
+
+    @property
+    def season_average(self):
+        """Mean actual points over weeks with stats (0.0 with no stats)"""
+        return self._sum / self._count if self._count else 0.0
+
+    @property
+    def season_variance(self):
+        """Population variance of actual points over weeks with stats"""
+        if not self._count:
             return 0.0
-        total = sum(stat['actual'] for stat in self.weekly_stats)
-        self.season_average = total / len(self.weekly_stats)
+        mean = self._sum / self._count
+        return max(self._sum_sq / self._count - mean * mean, 0.0)
+
+    @property
+    def season_std(self):
+        """Standard deviation of actual points over weeks with stats"""
+        return math.sqrt(self.season_variance)
+
+    @property
+    def weekly_stats(self):
+        """Weekly stats as a list of dicts, ordered by week"""
+        stats = []
+        points = self._points
+        for index in range(MAX_WEEKS):
+            actual = points[index]
+            if actual != actual:
+                continue
+            projected = points[MAX_WEEKS + index]
+            if projected != projected:
+                projected = None
+            stats.append({
+                'week': index + 1,
+                'actual': actual,
+                'projected': projected,
+                'diff': actual - projected if projected else 0
+            })
+        return stats
+
+    def calculate_season_average(self):
+        """Calculate the player's season average points (O(1))"""
         return self.season_average
-        
+
     def to_dict(self):
         """Convert player to dictionary for JSON serialization"""
         return {
@@ -41,15 +135,18 @@ class Player:
             'weekly_stats': self.weekly_stats,
             'season_average': self.season_average
         }
-        
+
+
 class WeeklyProjection:
     """Represents a projected points value for a player"""
-    
+
+    __slots__ = ('player_id', 'week', 'projected_points')
+
     def __init__(self, player_id, week, projected_points):
         self.player_id = player_id
         self.week = week
         self.projected_points = projected_points
-        
+
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -57,16 +154,19 @@ class WeeklyProjection:
             'week': self.week,
             'projected_points': self.projected_points
         }
-        
+
+
 class MarketStatus:
     """Represents current market status"""
-    
+
+    __slots__ = ('current_week', 'is_market_open', 'locked_players', 'time_until_close')
+
     def __init__(self, current_week, is_market_open, locked_players, time_until_close=None):
         self.current_week = current_week
         self.is_market_open = is_market_open
         self.locked_players = locked_players
         self.time_until_close = time_until_close
-        
+
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -75,5 +175,3 @@ class MarketStatus:
             'locked_players': self.locked_players,
             'time_until_close': self.time_until_close
         }
-
-
@@ -0,0 +1,353 @@
+"""
+On-demand request profiling with flamegraph output
+A request is profiled when it carries the configured token in X-Profile, or is
+picked by the global sample rate. While it runs, a sampler thread records the
+handling thread's stack every few milliseconds, and DatabaseConnection and
+SleeperClient add their calls (plus every SQL statement) to the request's
+session. Each profile is written as collapsed stacks (flamegraph.pl/speedscope
+input), an SVG flamegraph and a JSON summary, with the oldest files pruned past
+a count/size limit. With profiling off nothing is installed, and the hooks in
+the DB and Sleeper paths cost one thread-local lookup
+"""
+
+import hmac
+import html
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zlib
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+EXTENSIONS = ('.collapsed', '.svg', '.json')
+
+_local = threading.local()
+
+
+def current_session():
+    """Profile session of the calling thread (None when not profiling)"""
+    return getattr(_local, 'session', None)
+
+
+def record_call(kind: str, name: str, start: float = None, duration: float = None, **details):
+    """Add a call to the calling thread's session, if any (start is a perf_counter value)"""
+    session = getattr(_local, 'session', None)
+    if session is not None:
+        session.record(kind, name, start, duration, **details)
+
+
+class ProfileSession:
+    """Samples and events collected for one request"""
+
+    MAX_EVENTS = 5000
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.method = method
+        self.path = path
+        self.reason = reason  # 'header' or 'sampled'
+        self.started_at = datetime.now()
+        self.start = time.perf_counter()
+        self.duration = None
+        self.status = None
+        self.route = None
+        self.stacks = {}  # collapsed stack -> samples
+        self.samples = 0
+        self.events = []
+        self.dropped_events = 0
+
+    def add_stack(self, stack: str):
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.samples += 1
+
+    def record(self, kind: str, name: str, start: float = None, duration: float = None, **details):
+        if len(self.events) >= self.MAX_EVENTS:
+            self.dropped_events += 1
+            return
+        event = {'kind': kind, 'name': name,
+                 'at_ms': round(((start or time.perf_counter()) - self.start) * 1000, 3)}
+        if duration is not None:
+            event['duration_ms'] = round(duration * 1000, 3)
+        event.update(details)
+        self.events.append(event)
+
+    def record_sql(self, statement: str):
+        """sqlite3 trace callback"""
+        self.record('sql', ' '.join(statement.split()))
+
+    def summary(self) -> dict:
+        """JSON-serializable description of the request and its calls"""
+        # Totals count outermost calls only (get_player_by_id -> execute_query is one call)
+        totals, ends = {}, {}
+        timed = [event for event in self.events if 'duration_ms' in event]
+        for event in sorted(timed, key=lambda event: (event['at_ms'], -event['duration_ms'])):
+            if event['at_ms'] < ends.get(event['kind'], float('-inf')):
+                continue
+            ends[event['kind']] = event['at_ms'] + event['duration_ms']
+            total = totals.setdefault(event['kind'], {'calls': 0, 'duration_ms': 0.0})
+            total['calls'] += 1
+            total['duration_ms'] = round(total['duration_ms'] + event['duration_ms'], 3)
+        return {
+            'method': self.method,
+            'path': self.path,
+            'route': self.route,
+            'status': self.status,
+            'reason': self.reason,
+            'started_at': self.started_at.isoformat(),
+            'duration_ms': round(self.duration * 1000, 3) if self.duration is not None else None,
+            'samples': self.samples,
+            'sql_statements': sum(1 for event in self.events if event['kind'] == 'sql'),
+            'totals': totals,
+            'events': self.events,
+            'dropped_events': self.dropped_events,
+        }
+
+
+def collapse_stacks(stacks: dict) -> str:
+    """Collapsed-stack text: one 'root;...;leaf count' line per distinct stack"""
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()))
+
+
+def render_flamegraph(stacks: dict, title: str = '', width: int = 1200, row_height: int = 16) -> str:
+    """
+    Render collapsed stacks as a self-contained SVG flamegraph (root at the bottom)
+
+    Args:
+        stacks: collapsed stack -> sample count
+        title: Heading drawn above the graph
+        width: SVG width in pixels
+        row_height: Height of one frame row
+
+    Returns:
+        SVG document
+    """
+    root = {'children': {}, 'count': 0}
+    for stack, count in stacks.items():
+        root['count'] += count
+        node = root
+        for frame in stack.split(';'):
+            node = node['children'].setdefault(frame, {'children': {}, 'count': 0})
+            node['count'] += count
+
+    def depth_of(node):
+        return 1 + max((depth_of(child) for child in node['children'].values()), default=0)
+
+    depth = depth_of(root) - 1
+    top = 24
+    height = top + depth * row_height + 4
+    total = max(root['count'], 1)
+    rects = []
+
+    def draw(node, x, level):
+        for name, child in sorted(node['children'].items()):
+            w = child['count'] / total * width
+            if w >= 0.5:
+                y = height - 4 - (level + 1) * row_height
+                hue = 20 + zlib.crc32(name.encode()) % 40
+                label = html.escape(name)
+                pct = child['count'] / total * 100
+                text = label[:int(w / 7)] if w > 21 else ''
+                rects.append(
+                    f'<g><title>{label} ({child["count"]} samples, {pct:.1f}%)</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{row_height - 1}" '
+                    f'fill="hsl({hue},90%,60%)"/>'
+                    f'<text x="{x + 3:.1f}" y="{y + row_height - 4}">{text}</text></g>'
+                )
+                draw(child, x, level + 1)
+            x += w
+
+    draw(root, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="monospace" font-size="11">'
+        f'<text x="4" y="16" font-size="13">{html.escape(title)} ({root["count"]} samples)</text>'
+        + ''.join(rects) + '</svg>\n'
+    )
+
+
+class RequestProfiler:
+    """
+    Chooses requests to profile, samples their stacks and writes the results
+
+    One sampler thread per process serves every profiled request; it only runs
+    while at least one request is being profiled
+    """
+
+    def __init__(self, out_dir: str, token: str = None, sample_rate: float = 0.0, interval: float = 0.005,
+                 max_files: int = 200, max_bytes: int = 50 * 1024 * 1024):
+        self.out_dir = out_dir
+        self.token = token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.max_files = max_files  # profiles kept (each is up to three files)
+        self.max_bytes = max_bytes
+        self._active = {}  # thread id -> ProfileSession
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._sampler = None
+        self._labels = {}  # code object -> frame label
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token) or self.sample_rate > 0
+
+    def should_profile(self, header_value: str = None) -> str:
+        """Reason to profile a request ('header' or 'sampled'), or None"""
+        if header_value and self.token and hmac.compare_digest(header_value.encode(), self.token.encode()):
+            return 'header'
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return 'sampled'
+        return None
+
+    def start(self, method: str, path: str, reason: str) -> ProfileSession:
+        """Begin profiling the calling thread"""
+        session = ProfileSession(method, path, reason)
+        _local.session = session
+        with self._lock:
+            self._active[threading.get_ident()] = session
+            if self._sampler is None or not self._sampler.is_alive():
+                self._sampler = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+                self._sampler.start()
+        self._wakeup.set()
+        return session
+
+    def stop(self) -> ProfileSession:
+        """Stop profiling the calling thread and return its session"""
+        session = getattr(_local, 'session', None)
+        _local.session = None
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+        if session is not None:
+            session.duration = time.perf_counter() - session.start
+        return session
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = os.path.basename(code.co_filename)
+            label = self._labels[code] = f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(';', ':')
+        return label
+
+    def _sample_loop(self):
+        me = threading.get_ident()
+        while True:
+            with self._lock:
+                active = dict(self._active)
+            if not active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            for thread_id, session in active.items():
+                frame = frames.get(thread_id)
+                if frame is None or thread_id == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(self._label(frame.f_code))
+                    frame = frame.f_back
+                session.add_stack(';'.join(reversed(labels)))
+            del frames
+            time.sleep(self.interval)
+
+    def write(self, session: ProfileSession) -> str:
+        """
+        Write a session's collapsed stacks, flamegraph and summary, then prune old profiles
+
+        Returns:
+            File stem shared by the three files
+        """
+        os.makedirs(self.out_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', session.route or session.path).strip('_')[:60] or 'root'
+        stem = (f"{session.started_at.strftime('%Y%m%d-%H%M%S-%f')}-{session.method.lower()}-{slug}-"
+                f"{os.getpid()}-{threading.get_ident() % 100000}")
+        title = f"{session.method} {session.path} {session.summary()['duration_ms']} ms"
+        with open(os.path.join(self.out_dir, stem + '.collapsed'), 'w') as f:
+            f.write(collapse_stacks(session.stacks))
+        with open(os.path.join(self.out_dir, stem + '.svg'), 'w') as f:
+            f.write(render_flamegraph(session.stacks, title))
+        with open(os.path.join(self.out_dir, stem + '.json'), 'w') as f:
+            json.dump(session.summary(), f, indent=1)
+        self.prune()
+        return stem
+
+    def prune(self) -> int:
+        """Delete the oldest profiles beyond max_files or max_bytes; returns files deleted"""
+        profiles = {}
+        for name in os.listdir(self.out_dir):
+            stem, ext = os.path.splitext(name)
+            if ext in EXTENSIONS:
+                try:
+                    size = os.path.getsize(os.path.join(self.out_dir, name))
+                except FileNotFoundError:
+                    continue
+                files, total = profiles.get(stem, ([], 0))
+                profiles[stem] = (files + [name], total + size)
+
+        kept_bytes, deleted = 0, 0
+        # Stems start with a timestamp, so reverse name order is newest first
+        for i, stem in enumerate(sorted(profiles, reverse=True)):
+            files, size = profiles[stem]
+            kept_bytes += size
+            if i < self.max_files and kept_bytes <= self.max_bytes:
+                continue
+            for name in files:
+                try:
+                    os.remove(os.path.join(self.out_dir, name))
+                    deleted += 1
+                except FileNotFoundError:
+                    pass
+        return deleted
+
+
+def install_profiling(app, out_dir: str, token: str = None, sample_rate: float = 0.0, interval: float = 0.005,
+                      max_files: int = 200, max_bytes: int = 50 * 1024 * 1024) -> RequestProfiler:
+    """
+    Profile requests of a Flask app that carry the token in X-Profile or are sampled
+
+    Nothing is registered unless a token or a positive sample rate is configured
+
+    Returns:
+        The RequestProfiler, or None when profiling is off
+    """
+    profiler = RequestProfiler(out_dir, token, sample_rate, interval, max_files, max_bytes)
+    if not profiler.enabled:
+        return None
+
+    from flask import g, request
+
+    @app.before_request
+    def _start_profile():
+        reason = profiler.should_profile(request.headers.get(PROFILE_HEADER))
+        if reason:
+            g._profile = profiler.start(request.method, request.path, reason)
+
+    @app.after_request
+    def _finish_profile(response):
+        if g.pop('_profile', None) is None:
+            return response
+        session = profiler.stop()
+        session.status = response.status_code
+        session.route = request.url_rule.rule if request.url_rule else None
+        try:
+            response.headers[PROFILE_ID_HEADER] = profiler.write(session)
+        except OSError as e:
+            logger.error(f"Could not write request profile: {e}")
+        return response
+
+    @app.teardown_request
+    def _abandon_profile(exc):
+        # after_request doesn't run for unhandled exceptions; don't leave the thread sampled
+        if g.pop('_profile', None) is not None:
+            profiler.stop()
+
+    logger.info(f"Request profiling enabled (sample rate {sample_rate}, header {'on' if token else 'off'}) "
+                f"writing to {out_dir}")
+    return profiler
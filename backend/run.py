@@ -1,6 +1,12 @@
 """
 Simple run script for the backend Flask app
+
+Usage:
+    python run.py                   # Flask development server
+    python run.py --production      # Pre-forked production server (see server.py)
+    python run.py --production --workers 8
 """
+import argparse
 import sys
 import os
 
@@ -10,10 +16,27 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 # Change to backend directory
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
-from app import app
+from config import Config
 
-if __name__ == '__main__':
+def main():
+    parser = argparse.ArgumentParser(description="Fantasy Football Stock Visualization API")
+    parser.add_argument('--production', action='store_true', help="Serve with preloaded, pre-forked workers")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (production only)")
+    parser.add_argument('--port', type=int, default=Config.SERVER_PORT)
+    args = parser.parse_args()
+    
+    if args.production:
+        from server import serve
+        serve(workers=args.workers, port=args.port)
+        return
+    
+    from app import app, start_background_services
+    # With the debug reloader only the serving child process runs background threads
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
     print("Starting Fantasy Football Stock Visualization API...")
-    print("Server will be available at http://localhost:5000")
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    print(f"Server will be available at http://localhost:{args.port}")
+    app.run(debug=Config.DEBUG, host='0.0.0.0', port=args.port)
 
+if __name__ == '__main__':
+    main()
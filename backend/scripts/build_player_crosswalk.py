@@ -0,0 +1,52 @@
+"""
+Build the Sleeper <-> ESPN player ID crosswalk used for ESPN projection fallback
+Run after the player universe is loaded, and again when rosters change (weekly is plenty)
+
+Usage:
+    python backend/scripts/build_player_crosswalk.py [--season YYYY]
+"""
+
+import argparse
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.sleeper_client import SleeperClient, host_rate_budget
+from data.espn_client import ESPNClient
+from data.player_crosswalk import PlayerCrosswalk
+from database import DatabaseConnection
+from config import Config
+
+def main():
+    """
+    Match every Sleeper player to an ESPN ID and persist the map
+    """
+    parser = argparse.ArgumentParser(description="Build the Sleeper/ESPN player ID crosswalk")
+    parser.add_argument('--season', type=int, default=2024)
+    args = parser.parse_args()
+    
+    print("Building player ID crosswalk...")
+    
+    # Sleeper's payload carries espn_id for many players, which beats name matching
+    sleeper_players = [
+        {
+            'player_id': player_id,
+            'name': data.get('full_name'),
+            'team': data.get('team'),
+            'position': data.get('position'),
+            'espn_id': data.get('espn_id'),
+        }
+        for player_id, data in SleeperClient(rate_budget=host_rate_budget()).get_all_players(use_cache=False).items()
+        if data.get('full_name')
+    ]
+    espn_players = ESPNClient().get_players(args.season)
+    
+    crosswalk, methods = PlayerCrosswalk.build(sleeper_players, espn_players)
+    crosswalk.save(DatabaseConnection(Config.DATABASE_PATH, Config.DATABASE_PARTITION_DIR), methods)
+    
+    print(f"Crosswalk complete! Mapped {len(crosswalk)} of {len(sleeper_players)} Sleeper players")
+
+if __name__ == '__main__':
+    main()
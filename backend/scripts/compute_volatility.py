@@ -0,0 +1,46 @@
+"""
+Weekly job to simulate next-week volatility bands for every projected player
+Run after the market-open projection snapshot
+
+Usage:
+    python backend/scripts/compute_volatility.py [--week N] [--season YYYY] [--simulations N]
+
+Should be scheduled after snapshot_projections.py via cron:
+    30 9 * * MON /path/to/venv/bin/python /path/to/backend/scripts/compute_volatility.py
+"""
+
+import argparse
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.market_manager import get_current_nfl_week
+from data.volatility import compute_volatility_bands
+from database import DatabaseConnection
+from config import Config
+
+def main():
+    """
+    Simulate and store p10/p50/p90 bands for the target week
+    """
+    parser = argparse.ArgumentParser(description="Compute Monte Carlo volatility bands")
+    parser.add_argument('--season', type=int, default=2024)
+    parser.add_argument('--week', type=int, default=None)
+    parser.add_argument('--simulations', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    
+    week = args.week or get_current_nfl_week(args.season)
+    if not week:
+        print("Season hasn't started, nothing to simulate")
+        return
+    
+    db = DatabaseConnection(Config.DATABASE_PATH, Config.DATABASE_PARTITION_DIR)
+    count = compute_volatility_bands(db, args.season, week, args.simulations, args.seed)
+    
+    print(f"Volatility bands complete! Stored {count} players for week {week}")
+
+if __name__ == '__main__':
+    main()
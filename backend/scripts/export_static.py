@@ -0,0 +1,48 @@
+"""
+Export read-mostly API responses as static, content-hashed JSON for a CDN or nginx
+Only players whose stats or volatility bands changed since the last export are
+re-rendered, so it is cheap to run after every stat correction
+
+Usage:
+    python backend/scripts/export_static.py OUT_DIR [--season YYYY ...] [--workers N] [--full] [--prune]
+
+Should be scheduled after Tuesday's stat corrections via cron:
+    0 12 * * TUE /path/to/venv/bin/python /path/to/backend/scripts/export_static.py /var/www/static-api
+"""
+
+import argparse
+import logging
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.static_export import export_static
+from database import DatabaseConnection
+from config import Config
+
+def main():
+    """
+    Export changed players, then rewrite the index files and manifest
+    """
+    parser = argparse.ArgumentParser(description="Export static JSON bundles")
+    parser.add_argument('out_dir')
+    parser.add_argument('--season', type=int, action='append', dest='seasons',
+                        help="Season to export (repeatable, default 2024)")
+    parser.add_argument('--workers', type=int, default=None, help="Render processes (default: CPU count)")
+    parser.add_argument('--no-compress', action='store_true', help="Skip .gz/.br copies")
+    parser.add_argument('--full', action='store_true', help="Re-render every player")
+    parser.add_argument('--prune', action='store_true', help="Delete files no longer in the manifest")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    
+    db = DatabaseConnection(Config.DATABASE_PATH, Config.DATABASE_PARTITION_DIR)
+    result = export_static(db, args.out_dir, args.seasons or [2024], workers=args.workers,
+                           compress=not args.no_compress, full=args.full, prune=args.prune)
+    
+    print(f"Static export complete! {result['rendered']} rendered, {result['unchanged']} unchanged, "
+          f"{result['removed']} pruned in {result['seconds']:.1f}s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Manage per-season weekly_stats/projections partitions
+
+Usage:
+    python backend/scripts/manage_partitions.py split
+    python backend/scripts/manage_partitions.py close SEASON
+    python backend/scripts/manage_partitions.py list
+
+split moves rows still in DATABASE_PATH into DATABASE_PARTITION_DIR (run once when
+enabling partitioning). close folds the season's remaining projection history into
+blocks, compacts the file and makes it read-only; run it after the season's last
+stat corrections are in
+"""
+
+import argparse
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.projection_history import compact_projection_history
+from database import DatabaseConnection
+from config import Config
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage season partitions")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('split', help="Move main-file stats and projections into partitions")
+    close = commands.add_parser('close', help="Compact a season and make it read-only")
+    close.add_argument('season', type=int)
+    commands.add_parser('list', help="Show partitions and their state")
+    args = parser.parse_args()
+    
+    if not Config.DATABASE_PARTITION_DIR:
+        print("DATABASE_PARTITION_DIR is not set")
+        sys.exit(1)
+    db = DatabaseConnection(Config.DATABASE_PATH, Config.DATABASE_PARTITION_DIR)
+    
+    if args.command == 'split':
+        moved = db.migrate_to_partitions()
+        for season, rows in moved.items():
+            print(f"{season}: moved {rows} rows")
+        print(f"Split complete! {sum(moved.values())} rows in {len(moved)} seasons")
+    elif args.command == 'close':
+        compact_projection_history(db, args.season, older_than=0)
+        result = db.close_season(args.season)
+        print(f"Closed {result['season']}: {result['bytes_before']} -> {result['bytes_after']} bytes")
+    else:
+        closed = {row['season']: row['closed_at'] for row in
+                  db.execute_query("SELECT season, closed_at FROM season_partitions")}
+        for season in db.partition_seasons():
+            size = os.path.getsize(db.partition_path(season))
+            state = f"closed {closed[season]}" if closed.get(season) else "open"
+            print(f"{season}: {size} bytes, {state}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Record Sleeper API responses and replay them from a local server
+
+Usage:
+    python backend/scripts/sleeper_replay.py record cassettes/2024 [--season YYYY] [--weeks 1-18]
+    python backend/scripts/sleeper_replay.py serve cassettes/2024 [--port 8765] [--latency 0.05]
+        [--jitter 0.02] [--error-rate 0.01] [--throttle-rate 0.01] [--rpm 1000]
+        [--live-week 1 --week-seconds 60]
+
+Then run the app offline with SLEEPER_API_BASE_URL=http://127.0.0.1:8765
+"""
+
+import argparse
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.sleeper_client import SleeperClient
+from data.sleeper_replay import Cassette, LiveWeekClock, ReplayServer
+
+def parse_weeks(value: str) -> list:
+    """'1-18' or '3,5,7' -> list of weeks"""
+    if '-' in value:
+        first, last = value.split('-')
+        return list(range(int(first), int(last) + 1))
+    return [int(week) for week in value.split(',')]
+
+def record(args):
+    """
+    Fetch the endpoints the backend uses and store them in the cassette
+    """
+    cassette = Cassette(args.cassette)
+    client = SleeperClient(recorder=cassette)
+    
+    endpoints = ['players/nfl', 'state/nfl']
+    for week in parse_weeks(args.weeks):
+        endpoints += [f"stats/nfl/{args.season}/{week}", f"projections/nfl/{args.season}/{week}",
+                      f"schedule/nfl/{args.season}/{week}"]
+    
+    failed = 0
+    for endpoint in endpoints:
+        try:
+            client._make_request(endpoint, use_cache=False)
+            print(f"  recorded {endpoint}")
+        except Exception as e:
+            failed += 1
+            print(f"  failed {endpoint}: {e}")
+    
+    print(f"Recorded {len(endpoints) - failed} of {len(endpoints)} endpoints into {args.cassette}")
+    return 1 if failed == len(endpoints) else 0
+
+def serve(args):
+    """
+    Serve a cassette until interrupted
+    """
+    clock = None
+    if args.live_week:
+        clock = LiveWeekClock(args.season, start_week=args.live_week, seconds_per_week=args.week_seconds)
+    
+    server = ReplayServer(
+        Cassette(args.cassette),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        requests_per_minute=args.rpm,
+        clock=clock,
+        seed=args.seed,
+        host=args.host,
+        port=args.port
+    )
+    with server:
+        print(f"Replaying {args.cassette} at {server.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+    print(f"Served: {server.counts}")
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay the Sleeper API")
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    record_parser = commands.add_parser('record', help="Capture live responses into a cassette")
+    record_parser.add_argument('cassette', help="Cassette directory")
+    record_parser.add_argument('--season', type=int, default=2024)
+    record_parser.add_argument('--weeks', default='1-18', help="Range (1-18) or list (3,5,7)")
+    
+    serve_parser = commands.add_parser('serve', help="Serve a cassette locally")
+    serve_parser.add_argument('cassette', help="Cassette directory")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8765)
+    serve_parser.add_argument('--latency', type=float, default=0.0, help="Seconds added to every response")
+    serve_parser.add_argument('--jitter', type=float, default=0.0, help="+/- seconds of random latency")
+    serve_parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered 500")
+    serve_parser.add_argument('--throttle-rate', type=float, default=0.0, help="Fraction of requests answered 429")
+    serve_parser.add_argument('--rpm', type=int, default=None, help="Answer 429 beyond this many requests/minute")
+    serve_parser.add_argument('--season', type=int, default=2024)
+    serve_parser.add_argument('--live-week', type=int, default=None, help="Simulate a live season from this week")
+    serve_parser.add_argument('--week-seconds', type=float, default=60.0, help="Real seconds per simulated week")
+    serve_parser.add_argument('--seed', type=int, default=None)
+    
+    args = parser.parse_args()
+    return record(args) if args.command == 'record' else serve(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
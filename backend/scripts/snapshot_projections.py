@@ -3,35 +3,49 @@ Cron job script to snapshot projections every Monday/Tuesday
 This captures the "market opening" projections for the current week
 
 Usage:
-    python backend/scripts/snapshot_projections.py
+    python backend/scripts/snapshot_projections.py [--week N] [--season YYYY]
 
 Should be scheduled to run Monday mornings via cron:
     0 9 * * MON /path/to/venv/bin/python /path/to/backend/scripts/snapshot_projections.py
 """
 
+import argparse
 import sys
 import os
 
 # Add parent directory to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from data.sleeper_client import SleeperClient
+from data.sleeper_client import SleeperClient, host_rate_budget
+from data.espn_client import ESPNClient
+from data.market_manager import get_current_nfl_week
+from data.player_crosswalk import PlayerCrosswalk
 from data.projection_service import snapshot_projections
+from data.projection_sources import HedgedProjectionSource
+from database import DatabaseConnection
 from config import Config
 
 def main():
     """
     Main function to snapshot current week projections
     """
+    parser = argparse.ArgumentParser(description="Snapshot market-open projections")
+    parser.add_argument('--season', type=int, default=2024)
+    parser.add_argument('--week', type=int, default=None)
+    args = parser.parse_args()
+    
     print("Starting projection snapshot job...")
     
-    # TODO: Get current week from Sleeper API
-    # TODO: Fetch all player projections
-    # TODO: Store in projections table
-    # TODO: Log results
+    week = args.week or get_current_nfl_week(args.season)
+    if not week:
+        print("Season hasn't started, nothing to snapshot")
+        return
+    
+    db = DatabaseConnection(Config.DATABASE_PATH, Config.DATABASE_PARTITION_DIR)
+    source = HedgedProjectionSource(SleeperClient(rate_budget=host_rate_budget()), ESPNClient(), PlayerCrosswalk.load(db))
+    count = snapshot_projections(db, source, week, args.season)
     
-    print("Projection snapshot complete!")
+    print(f"Projection snapshot complete! Stored {count} projections for week {week}")
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,147 @@
+"""
+Production server: preloads the Flask app once, warms caches, then forks workers
+Uses gunicorn's pre-fork model so schema setup and cache warming run a single time
+in the master process and every worker starts with the warmed state (copy-on-write)
+
+Order books, price alerts and the leaderboard must live in exactly one process, so the master
+also forks a trading process serving the app on TRADING_PORT (loopback only);
+workers forward the trading routes to it. Every process writes its metrics to
+METRICS_DIR, so /metrics on any worker reports the whole server
+
+Usage:
+    python run.py --production
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+
+from gunicorn.app.base import BaseApplication
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+def _start_worker_services(server, worker):
+    from app import start_background_services
+    start_background_services()
+
+
+def _stop_worker_services(server, worker):
+    from app import stop_background_services
+    stop_background_services()
+
+
+def _serve_trading(port: int):
+    """Trading process: run the app's background services and serve it to the workers"""
+    from werkzeug.serving import make_server
+    from app import app, start_background_services, stop_background_services
+    httpd = make_server('127.0.0.1', port, app, threaded=True)
+    # shutdown() waits for serve_forever to return, so it can't run on the serving thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=httpd.shutdown).start())
+    start_background_services()
+    logger.info(f"Trading process serving on 127.0.0.1:{port}")
+    try:
+        httpd.serve_forever()
+    finally:
+        stop_background_services()
+
+
+def start_trading_process(port: int) -> int:
+    """Fork the trading process; returns its pid"""
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _serve_trading(port)
+        except BaseException as e:
+            logger.error(f"Trading process failed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def stop_trading_process(pid: int, timeout: float):
+    """SIGTERM the trading process and wait for it, killing it after timeout seconds"""
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if os.waitpid(pid, os.WNOHANG)[0]:
+                return
+        except ChildProcessError:  # already reaped by the gunicorn master
+            return
+        time.sleep(0.1)
+    logger.warning(f"Trading process {pid} did not stop in {timeout}s, killing it")
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+class ProductionServer(BaseApplication):
+    """Gunicorn application that preloads and warms app.py before forking"""
+
+    def __init__(self, options: dict = None):
+        self.options = {
+            'bind': f"{Config.SERVER_HOST}:{Config.SERVER_PORT}",
+            'workers': Config.SERVER_WORKERS,
+            'threads': Config.SERVER_THREADS,
+            'worker_class': 'gthread',
+            'preload_app': True,
+            'graceful_timeout': Config.SERVER_GRACEFUL_TIMEOUT,
+            'timeout': 60,
+            'accesslog': '-',
+        }
+        # None means "not given": keep the configured default
+        self.options.update({key: value for key, value in (options or {}).items() if value is not None})
+        self.trading_pid = None
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings:
+                self.cfg.set(key, value)
+        # Threads don't survive fork, so background services start in each worker
+        self.cfg.set('post_fork', _start_worker_services)
+        self.cfg.set('worker_exit', _stop_worker_services)
+        self.cfg.set('on_exit', self._stop_trading)
+
+    def _stop_trading(self, server):
+        if self.trading_pid is not None:
+            stop_trading_process(self.trading_pid, self.cfg.graceful_timeout)
+
+    def load(self):
+        # Runs once in the master because preload_app is set
+        from app import app, warm_caches
+        from metrics import REGISTRY
+        warm_caches()
+        logger.info("Application preloaded and caches warmed")
+        REGISTRY.share(Config.METRICS_DIR or f"{Config.DATABASE_PATH}.metrics")
+        # Forked before TRADING_URL is set, so the trading process serves those routes itself
+        self.trading_pid = start_trading_process(Config.TRADING_PORT)
+        app.config['TRADING_URL'] = f"http://127.0.0.1:{Config.TRADING_PORT}"
+        return app
+
+
+def serve(workers: int = None, port: int = None):
+    """
+    Run the production server until SIGTERM/SIGINT
+    Gunicorn stops accepting connections and gives in-flight requests
+    SERVER_GRACEFUL_TIMEOUT seconds to finish before workers exit
+
+    Args:
+        workers: Worker process count (default: Config.SERVER_WORKERS)
+        port: Port to bind (default: Config.SERVER_PORT)
+    """
+    options = {'workers': workers}
+    if port:
+        options['bind'] = f"{Config.SERVER_HOST}:{port}"
+    ProductionServer(options).run()
@@ -0,0 +1,88 @@
+"""
+Shared pytest fixtures
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pytest
+
+
+class StubServer:
+    """
+    Local stand-in for an upstream HTTP API
+    Routes map a path to (status, JSON body, delay in seconds)
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+                stub.requests.append(path)
+                status, body, delay = stub.routes.get(path, (404, {'error': 'not found'}, 0))
+                if delay:
+                    time.sleep(delay)
+                payload = json.dumps(body).encode('utf-8')
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def route(self, path: str, body, status: int = 200, delay: float = 0):
+        self.routes[path] = (status, body, delay)
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    """Start a stub HTTP server for the duration of a test"""
+    server = StubServer()
+    yield server
+    server.close()
+
+
+APP_PLAYERS = 50
+
+
+@pytest.fixture(scope='session')
+def app_module(tmp_path_factory):
+    """
+    app.py imported once against a temporary database, with Sleeper pointed at a stub
+    serving APP_PLAYERS players, so module-level startup never touches the network
+    """
+    import sys
+    from config import Config
+
+    server = StubServer()
+    server.route('/players/nfl', {
+        str(1000 + i): {'full_name': f'Player {i}', 'position': 'WR', 'team': 'KC'} for i in range(APP_PLAYERS)
+    })
+    Config.DATABASE_PATH = str(tmp_path_factory.mktemp('app') / 'app.db')
+    Config.SLEEPER_API_BASE_URL = server.url
+    assert 'app' not in sys.modules, "app.py was imported before the app_module fixture"
+    import app
+    yield app
+    server.close()
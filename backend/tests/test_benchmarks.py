@@ -0,0 +1,94 @@
+"""
+Tests for the benchmark harness and synthetic database generator
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.harness import CALIBRATION, DB_CALIBRATION, compare_to_baseline, machine_speed, measure, summarize
+from benchmarks.synthetic_db import generate_database
+from database import DatabaseConnection
+
+
+class TestSyntheticDatabase:
+    """Test cases for the seeded benchmark database"""
+
+    def test_shape_and_determinism(self, tmp_path):
+        """Row counts follow players x seasons x 18 and the seed fixes the content"""
+        first = generate_database(str(tmp_path / "a.db"), players=20, seasons=2, users=5, seed=1)
+        second = generate_database(str(tmp_path / "b.db"), players=20, seasons=2, users=5, seed=1)
+        assert first['weekly_stats'] == 20 * 2 * 18
+        assert first['projections'] == first['weekly_stats']
+
+        db_a = DatabaseConnection(first['path'])
+        db_b = DatabaseConnection(second['path'])
+        assert len(db_a.get_player_records()) == 20
+        assert db_a.get_player_stats('1000', 2023) == db_b.get_player_stats('1000', 2023)
+        assert len(db_a.get_player_stats('1000', 2024)) == 18
+
+
+class TestHarness:
+    """Test cases for timing summaries and regression detection"""
+
+    def test_summarize_percentiles(self):
+        result = summarize([i / 1000 for i in range(1, 101)], elapsed=1.0)
+        assert result['ops'] == 100
+        assert result['ops_per_sec'] == 100.0
+        assert result['p50_ms'] == pytest.approx(50, abs=1)
+        assert result['p99_ms'] == pytest.approx(99, abs=1)
+
+    def test_measure_counts_iterations(self):
+        calls = []
+        result = measure(lambda: calls.append(1), iterations=30, warmup=5)
+        assert len(calls) == 35
+        assert result['ops'] == 30
+
+    def test_compare_to_baseline(self):
+        baseline = {
+            'fast': {'ops_per_sec': 1000, 'p99_ms': 2.0},
+            'size': {'bytes': 100},
+        }
+        ok = {'fast': {'ops_per_sec': 900, 'p99_ms': 2.2}, 'size': {'bytes': 110}, 'new': {'ops_per_sec': 1}}
+        assert compare_to_baseline(ok, baseline, tolerance=0.25) == []
+
+        slow = {'fast': {'ops_per_sec': 500, 'p99_ms': 5.0}, 'size': {'bytes': 200}}
+        assert len(compare_to_baseline(slow, baseline, tolerance=0.25)) == 3
+
+    def test_compare_scaled_by_calibration(self):
+        """A machine half as fast is held to half the baseline throughput and twice its p99"""
+        baseline = {CALIBRATION: {'ops_per_sec': 2000}, 'fast': {'ops_per_sec': 1000, 'p99_ms': 2.0},
+                    'size': {'bytes': 100}}
+        results = {CALIBRATION: {'ops_per_sec': 1000}, 'fast': {'ops_per_sec': 480, 'p99_ms': 4.4},
+                   'size': {'bytes': 100}}
+        speed = machine_speed(results, baseline)
+        assert speed == 0.5
+        assert len(compare_to_baseline(results, baseline, tolerance=0.25)) == 2
+        assert compare_to_baseline(results, baseline, tolerance=0.25, speed=speed) == []
+        assert machine_speed({}, baseline) == 1.0
+
+    def test_db_bound_scaled_by_db_calibration(self):
+        """DB-bound benchmarks follow the SQLite calibration, the rest the CPU one"""
+        baseline = {CALIBRATION: {'ops_per_sec': 1000}, DB_CALIBRATION: {'ops_per_sec': 2000},
+                    'micro.db.get_player_stats': {'ops_per_sec': 1000}, 'micro.ppr': {'ops_per_sec': 1000}}
+        results = {CALIBRATION: {'ops_per_sec': 1000}, DB_CALIBRATION: {'ops_per_sec': 1000},
+                   'micro.db.get_player_stats': {'ops_per_sec': 500}, 'micro.ppr': {'ops_per_sec': 500}}
+        speed, db_speed = machine_speed(results, baseline), machine_speed(results, baseline, DB_CALIBRATION)
+        assert db_speed == 0.5
+        assert compare_to_baseline(results, baseline, speed=speed, db_speed=db_speed) == [
+            'micro.ppr: throughput 500/s < baseline 1000.0/s']
+
+    def test_measure_throughput_from_fastest_slice(self):
+        """A stall in one slice of the loop doesn't lower the throughput"""
+        calls = iter(range(100))
+        result = measure(lambda: time.sleep(0.05) if next(calls) == 10 else None, iterations=50, warmup=0)
+        assert result['ops_per_sec'] > 1000
+        assert result['p99_ms'] >= 50
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
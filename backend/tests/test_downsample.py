@@ -0,0 +1,127 @@
+"""
+Tests for chart series downsampling and the series endpoint cache
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.downsample import SeriesCache, build_player_series, downsample, lttb, minmax
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward per-point LTTB used to check the vectorized version"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    selected, a = [0], 0
+    for i in range(threshold - 2):
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1
+        for j in range(int(i * every) + 1, int((i + 1) * every) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    return selected + [n - 1]
+
+
+class TestDownsample:
+    """Test cases for LTTB and min/max bucketing"""
+
+    def test_lttb_matches_reference(self):
+        rng = np.random.default_rng(3)
+        x = np.arange(1000, dtype=float)
+        y = np.cumsum(rng.normal(size=1000))
+        assert lttb(x, y, 50).tolist() == reference_lttb(x.tolist(), y.tolist(), 50)
+
+    def test_short_series_untouched(self):
+        x = np.arange(10)
+        assert lttb(x, x * 2.0, 50).tolist() == list(range(10))
+        assert minmax(x, x * 2.0, 50).tolist() == list(range(10))
+
+    def test_minmax_keeps_spikes(self):
+        y = np.zeros(1000)
+        y[137], y[842] = 100.0, -100.0
+        keep = minmax(np.arange(1000), y, 20)
+        assert 137 in keep and 842 in keep
+        assert len(keep) <= 22
+
+    def test_nan_points_dropped(self):
+        y = np.array([1.0, np.nan, 3.0, np.nan, 5.0])
+        assert downsample(np.arange(5), y, 10).tolist() == [0, 2, 4]
+        with pytest.raises(ValueError):
+            downsample(np.arange(5), y, 10, method='average')
+
+
+class TestPlayerSeries:
+    """Test cases for building and caching a player's chart series"""
+
+    ROWS = [
+        {'season': season, 'week': week, 'actual_points': float(week), 'projected_points': None if week == 3 else 10.0}
+        for season in (2023, 2024) for week in range(1, 19)
+    ]
+
+    def test_fixed_size_payload(self):
+        series = build_player_series(self.ROWS, 'actual', width=12)
+        assert series['total_points'] == 36
+        assert len(series['points']) == 12
+        assert series['points'][0] == {'season': 2023, 'week': 1, 'value': 1.0}
+        assert series['points'][-1] == {'season': 2024, 'week': 18, 'value': 18.0}
+
+    def test_diff_skips_missing_projection(self):
+        series = build_player_series(self.ROWS[:5], 'diff', width=100)
+        assert [p['week'] for p in series['points']] == [1, 2, 4, 5]
+        assert series['points'][0]['value'] == -9.0
+        assert build_player_series([], 'actual', 100) == {'total_points': 0, 'points': []}
+
+    def test_cache(self):
+        cache = SeriesCache(max_entries=2, ttl=60)
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        assert cache.get_or_compute(('1', 'actual'), compute) == 1
+        assert cache.get_or_compute(('1', 'actual'), compute) == 1
+        cache.get_or_compute(('2', 'actual'), compute)
+        cache.get_or_compute(('3', 'actual'), compute)  # evicts player 1
+        assert len(cache) == 2
+        assert cache.get_or_compute(('1', 'actual'), compute) == 4
+        assert cache.invalidate_player('1') == 1
+
+    def test_invalidation_during_compute(self):
+        """A value computed while its player was invalidated is served once but not stored"""
+        cache = SeriesCache(max_entries=4, ttl=60)
+
+        def compute():
+            cache.invalidate_players(['1'])
+            return 'stale'
+        assert cache.get_or_compute(('1', 'actual'), compute) == 'stale'
+        assert len(cache) == 0
+        assert cache.get_or_compute(('1', 'actual'), lambda: 'fresh') == 'fresh'
+        assert cache.get_or_compute(('1', 'actual'), lambda: 'unused') == 'fresh'
+
+
+class TestSeriesEndpoint:
+    """The series endpoint reads the same projections as the stats endpoint"""
+
+    def test_series_matches_stats_projection(self, app_module):
+        db = app_module.db
+        for week, projected in ((1, 10.0), (2, 11.0)):
+            db.insert_weekly_stat('1040', 2024, week, 14.0, projected)
+        db.insert_projection('1040', 2024, 2, 16.5)  # market-open snapshot differs
+
+        client = app_module.app.test_client()
+        stats = client.get('/api/players/1040/stats?season=2024').get_json()
+        series = client.get('/api/players/1040/series?metric=projected').get_json()
+        assert [(w['week'], w['projected']) for w in stats['weekly_stats']] == [(1, 10.0), (2, 16.5)]
+        assert [(p['week'], p['value']) for p in series['points']] == [(1, 10.0), (2, 16.5)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,123 @@
+"""
+Tests for the cross-process cache invalidation bus
+"""
+
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.downsample import SeriesCache
+from database import DatabaseConnection, InvalidationBus
+from database.invalidation import PLAYER, PLAYERS, PROJECTIONS, RESET, STATS
+
+
+class Recorder:
+    """Subscribes to every kind and keeps the values dispatched per kind"""
+
+    def __init__(self, bus):
+        self.received = {}
+        for kind in (PLAYERS, PLAYER, STATS, PROJECTIONS):
+            bus.subscribe(kind, lambda values, kind=kind: self.received.setdefault(kind, []).extend(values))
+        bus.subscribe(RESET, lambda: self.received.setdefault(RESET, []).append(True))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    DatabaseConnection(path)
+    return path
+
+
+@pytest.fixture
+def bus(db_path):
+    bus = InvalidationBus(db_path)
+    bus.poll()  # connect and take the current watermark
+    return bus
+
+
+class TestInvalidationBus:
+    """Test cases for publishing and polling keys"""
+
+    def test_writes_from_another_connection(self, db_path, bus):
+        """Keys written by a separate DatabaseConnection reach subscribers once"""
+        recorder = Recorder(bus)
+        writer = DatabaseConnection(db_path)
+        writer.insert_player('qb1', 'QB One', 'QB', 'KC')
+        writer.insert_weekly_stats([('qb1', 2024, 3, 21.5, 18.0, None), ('wr1', 2024, 3, 9.0, 11.0, None)])
+
+        assert bus.poll() == 4  # qb1 is touched twice but dispatched once
+        assert recorder.received == {PLAYERS: [''], PLAYER: ['qb1', 'wr1'], STATS: ['2024:3']}
+        assert bus.poll() == 0
+
+    def test_unchanged_rows_publish_nothing(self, db_path, bus):
+        """Re-ingesting identical stats or projections invalidates nothing"""
+        recorder = Recorder(bus)
+        writer = DatabaseConnection(db_path)
+        writer.insert_projections([('qb1', 2024, 5, 20.0, 'sleeper')])
+        writer.insert_weekly_stats([('qb1', 2024, 4, 21.5, 18.0, None)])
+        bus.poll()
+        recorder.received.clear()
+
+        writer.insert_projections([('qb1', 2024, 5, 20.0, 'sleeper')])
+        writer.insert_weekly_stats([('qb1', 2024, 4, 21.5, 18.0, None)])
+        assert bus.poll() == 0
+        assert recorder.received == {}
+
+    def test_projection_changes(self, db_path, bus):
+        """Only players whose projection moved are invalidated"""
+        writer = DatabaseConnection(db_path)
+        writer.insert_projections([('qb1', 2024, 5, 20.0, 'sleeper'), ('rb1', 2024, 5, 14.0, 'sleeper')])
+        bus.poll()
+        recorder = Recorder(bus)
+        writer.insert_projections([('qb1', 2024, 5, 20.0, 'sleeper'), ('rb1', 2024, 5, 15.5, 'sleeper')])
+        bus.poll()
+        assert recorder.received == {PLAYER: ['rb1'], PROJECTIONS: ['2024:5']}
+
+    def test_partitioned_writes(self, tmp_path):
+        """Season partitions publish into the main file's feed"""
+        path = str(tmp_path / "main.db")
+        writer = DatabaseConnection(path, str(tmp_path / "seasons"))
+        bus = InvalidationBus(path)
+        bus.poll()
+        recorder = Recorder(bus)
+        writer.insert_weekly_stats([('qb1', 2023, 1, 10.0, 12.0, None), ('qb1', 2024, 1, 15.0, 12.0, None)])
+        bus.poll()
+        assert recorder.received[STATS] == ['2023:1', '2024:1']
+
+    def test_prune_and_reset(self, db_path, bus):
+        """Old keys are pruned; a poller that fell behind is told to reset"""
+        recorder = Recorder(bus)
+        DatabaseConnection(db_path).insert_player('qb1', 'QB One', 'QB', 'KC')
+        bus.retention = 0
+        assert bus.prune() == 2
+        assert bus.poll() == 0
+        assert recorder.received == {RESET: [True]}
+
+        bus.retention = 3600
+        bus._last_poll = time.monotonic()
+        bus.poll()
+        assert recorder.received == {RESET: [True]}
+
+
+class TestSeriesCacheInvalidation:
+    """Test cases for dropping cached series by player"""
+
+    def test_only_affected_players_dropped(self, db_path, bus):
+        """A stats write for one player leaves other players' series cached"""
+        cache = SeriesCache(ttl=3600)
+        for player_id in ('qb1', 'wr1', 'rb1'):
+            cache.get_or_compute((player_id, 'actual', 2024, 2024, 300, 'lttb'), lambda: {'points': []})
+        bus.subscribe(PLAYER, cache.invalidate_players)
+
+        DatabaseConnection(db_path).insert_weekly_stats([('wr1', 2024, 2, 7.0, 8.0, None)])
+        bus.poll()
+        assert len(cache) == 2
+        assert [key[0] for key in cache._entries] == ['qb1', 'rb1']
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
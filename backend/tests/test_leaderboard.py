@@ -0,0 +1,198 @@
+"""
+Unit tests for the incremental portfolio leaderboard
+"""
+
+import pytest
+import random
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.leaderboard import Leaderboard, RankedSet
+from database import DatabaseConnection
+
+
+class TestRankedSet:
+    """Test cases for the indexable skip list"""
+
+    def test_matches_sorted_list(self):
+        """Inserts, removes, ranks and slices agree with a plain sorted list"""
+        rng = random.Random(7)
+        ranked = RankedSet(seed=1)
+        expected = []
+        for _ in range(2000):
+            key = (rng.randint(0, 500), rng.random())
+            if expected and rng.random() < 0.3:
+                victim = expected.pop(rng.randrange(len(expected)))
+                ranked.remove(victim)
+            else:
+                ranked.insert(key)
+                expected.append(key)
+        expected.sort()
+
+        assert len(ranked) == len(expected)
+        assert ranked.slice(0, len(expected)) == expected
+        assert ranked.slice(10, 25) == expected[10:25]
+        for i in range(0, len(expected), 37):
+            assert ranked.rank(expected[i]) == i
+
+    def test_missing_key(self):
+        """Removing or ranking an unknown key raises KeyError"""
+        ranked = RankedSet()
+        ranked.insert((1, 'a'))
+        with pytest.raises(KeyError):
+            ranked.remove((2, 'b'))
+        with pytest.raises(KeyError):
+            ranked.rank((0, 'z'))
+
+
+class TestLeaderboard:
+    """Test cases for P&L scoring and ranking"""
+
+    def test_price_tick_updates_only_holders(self):
+        """A tick moves holders' scores by their exposure"""
+        board = Leaderboard()
+        board.add_position('alice', 'p1', 'buy', 10.0)
+        board.add_position('bob', 'p1', 'sell', 10.0)
+        board.add_position('carol', 'p2', 'buy', 20.0)
+
+        assert board.update_price('p1', 15.0) == 2
+        assert board.rank_of('alice') == {'rank': 1, 'user_id': 'alice', 'pnl': 5.0, 'total_users': 3}
+        assert board.rank_of('carol')['pnl'] == 0.0
+        assert board.rank_of('bob') == {'rank': 3, 'user_id': 'bob', 'pnl': -5.0, 'total_users': 3}
+
+    def test_close_position_realizes_pnl(self):
+        """Closing freezes P&L at the exit price"""
+        board = Leaderboard()
+        board.add_position('alice', 'p1', 'buy', 10.0)
+        board.update_price('p1', 12.0)
+        board.close_position('alice', 'p1', 'buy', 10.0, 14.0)
+        assert board.rank_of('alice')['pnl'] == 4.0
+
+        board.update_price('p1', 30.0)
+        assert board.rank_of('alice')['pnl'] == 4.0
+
+    def test_close_requires_open_holding(self):
+        """Closing more than is held, or the other side, is rejected and leaves P&L alone"""
+        board = Leaderboard()
+        board.add_position('alice', 'p1', 'buy', 10.0, quantity=2)
+        board.update_price('p1', 12.0)
+        for args in [('bob', 'p1', 'buy'), ('alice', 'p1', 'sell'), ('alice', 'p2', 'buy')]:
+            with pytest.raises(KeyError):
+                board.close_position(*args, 10.0, 14.0)
+        with pytest.raises(KeyError):
+            board.close_position('alice', 'p1', 'buy', 10.0, 14.0, quantity=3)
+        assert board.rank_of('alice')['pnl'] == 4.0
+
+        board.close_position('alice', 'p1', 'buy', 10.0, 14.0, quantity=2)
+        with pytest.raises(KeyError):
+            board.close_position('alice', 'p1', 'buy', 10.0, 14.0)
+        assert board.rank_of('alice')['pnl'] == 8.0
+
+    def test_trade_closes_opposite_holding(self):
+        """A fill against an open holding closes it; only the excess opens the other side"""
+        board = Leaderboard()
+        board.add_trade('alice', 'p1', 'buy', 10.0, quantity=2)
+        assert board.add_trade('alice', 'p1', 'sell', 15.0, quantity=3) == 2
+        assert board.holding('alice', 'p1') == -1
+        assert board.rank_of('alice')['pnl'] == 15.0  # 10 realized, short 1 from 15 marked at 10
+
+        assert board.add_trade('alice', 'p1', 'buy', 12.0) == 1
+        assert board.holding('alice', 'p1') == 0
+        assert board.update_price('p1', 40.0) == 0  # flat: no longer a holder
+        assert board.rank_of('alice')['pnl'] == 13.0
+
+    def test_top_matches_full_recompute(self):
+        """Ranks after many ticks equal a from-scratch P&L computation"""
+        rng = random.Random(3)
+        board = Leaderboard()
+        positions = []
+        for i in range(300):
+            user, player = f"u{i % 60}", f"p{rng.randrange(25)}"
+            action = rng.choice(['buy', 'sell'])
+            entry = round(rng.uniform(5, 25), 1)
+            board.add_position(user, player, action, entry)
+            positions.append((user, player, action, entry))
+
+        prices = {}
+        for _ in range(1000):
+            player, price = f"p{rng.randrange(25)}", round(rng.uniform(0, 40), 1)
+            board.update_price(player, price)
+            prices[player] = price
+        for i in range(25):
+            board.update_price(f"p{i}", prices.setdefault(f"p{i}", 20.0))
+
+        scores = {}
+        for user, player, action, entry in positions:
+            sign = 1 if action == 'buy' else -1
+            scores[user] = scores.get(user, 0.0) + sign * (prices[player] - entry)
+        expected = sorted(scores.values(), reverse=True)
+
+        top = board.top(60)
+        assert [row['pnl'] for row in top] == pytest.approx(expected, abs=0.01)
+        assert board.rank_of(top[7]['user_id'])['rank'] == 8
+        assert board.top(5, offset=10)[0]['rank'] == 11
+
+    def test_load_from_db(self, tmp_path):
+        """Rebuilds from user_portfolio rows"""
+        db = DatabaseConnection(str(tmp_path / "test.db"))
+        rows = [
+            ('alice', 'p1', 'buy', 10.0, None),
+            ('bob', 'p1', 'buy', 10.0, 8.0),
+        ]
+        for user, player, action, entry, exit_price in rows:
+            db.execute_modify(
+                "INSERT INTO user_portfolio (user_id, player_id, action, entry_price, exit_price, entry_timestamp, week) "
+                "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP, 1)",
+                (user, player, action, entry, exit_price)
+            )
+
+        board = Leaderboard()
+        assert board.load_from_db(db, prices={'p1': 11.0}) == 2
+        assert board.top(2) == [
+            {'rank': 1, 'user_id': 'alice', 'pnl': 1.0},
+            {'rank': 2, 'user_id': 'bob', 'pnl': -2.0},
+        ]
+
+    def test_load_seeds_prices_from_latest_points(self, tmp_path):
+        """Without prices, open positions are marked at the player's latest point total"""
+        db = DatabaseConnection(str(tmp_path / "test.db"))
+        db.insert_weekly_stats([('p1', 2024, 1, 9.0, 10.0, None), ('p1', 2024, 2, 13.5, 10.0, None),
+                                ('p1', 2023, 17, 30.0, 10.0, None)])
+        db.execute_modify(
+            "INSERT INTO user_portfolio (user_id, player_id, action, entry_price, exit_price, entry_timestamp, week) "
+            "VALUES ('alice', 'p1', 'buy', 10.0, NULL, CURRENT_TIMESTAMP, 1)"
+        )
+        assert db.get_latest_prices(2024) == {'p1': 13.5}
+
+        board = Leaderboard()
+        board.load_from_db(db)
+        assert board.rank_of('alice')['pnl'] == 3.5
+
+
+class TestLeaderboardFills:
+    """The app's leaderboard follows order book fills"""
+
+    def test_sell_closes_position(self, app_module, monkeypatch):
+        monkeypatch.setattr(app_module.matching_engine, 'market_open', lambda: True)
+        client = app_module.app.test_client()
+        trades = [('maker1', 'flipper', 10.0), ('flipper', 'maker2', 15.0)]  # (seller, buyer, price)
+        for seller, buyer, price in trades:
+            client.post('/api/orders', json={'user_id': seller, 'player_id': '1003', 'side': 'sell',
+                                             'quantity': 2, 'price': price})
+            client.post('/api/orders', json={'user_id': buyer, 'player_id': '1003', 'side': 'buy',
+                                             'quantity': 2, 'price': price})
+
+        leaderboard = app_module.leaderboard
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and leaderboard.holding('maker2', '1003') != 2:
+            time.sleep(0.02)
+        assert leaderboard.holding('flipper', '1003') == 0
+        assert client.get('/api/leaderboard/flipper').get_json()['pnl'] == 10.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,105 @@
+"""
+Unit tests for metrics collection and Prometheus rendering
+"""
+
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from metrics import DB_QUERY_SECONDS, MetricsRegistry
+from database import DatabaseConnection
+
+
+class TestMetrics:
+    """Test cases for metric types and exposition format"""
+
+    def test_histogram_render(self):
+        """Buckets are cumulative and include +Inf, _sum and _count"""
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        histogram.observe(0.05, '/a')
+        histogram.observe(0.5, '/a')
+        histogram.observe(5.0, '/a')
+
+        text = registry.render()
+        assert '# TYPE latency_seconds histogram' in text
+        assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{route="/a",le="1"} 2' in text
+        assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in text
+        assert 'latency_seconds_sum{route="/a"} 5.55' in text
+        assert 'latency_seconds_count{route="/a"} 3' in text
+
+    def test_counter_and_gauge(self):
+        """Counters accumulate per label set; gauge functions run at scrape time"""
+        registry = MetricsRegistry()
+        counter = registry.counter('calls_total', 'Calls', ('outcome',))
+        counter.inc('ok')
+        counter.inc('ok')
+        counter.inc('error')
+        gauge = registry.gauge('budget', 'Budget')
+        gauge.set_function(lambda: 42)
+
+        text = registry.render()
+        assert 'calls_total{outcome="ok"} 2' in text
+        assert 'calls_total{outcome="error"} 1' in text
+        assert 'budget 42' in text
+
+    def test_label_escaping(self):
+        """Quotes in label values are escaped"""
+        registry = MetricsRegistry()
+        registry.counter('x_total', 'X', ('path',)).inc('a"b')
+        assert 'x_total{path="a\\"b"} 1' in registry.render()
+
+    def test_db_methods_are_timed(self, tmp_path):
+        """Each DatabaseConnection call is counted under its method name"""
+        db = DatabaseConnection(str(tmp_path / "test.db"))
+        before = DB_QUERY_SECONDS.count('get_player_by_id')
+        nested = DB_QUERY_SECONDS.count('execute_query')
+        db.get_player_by_id('missing')
+        assert DB_QUERY_SECONDS.count('get_player_by_id') == before + 1
+        assert DB_QUERY_SECONDS.count('execute_query') == nested  # the query it runs isn't counted again
+
+
+class TestSharedMetrics:
+    """Counters and histograms summed across forked server processes"""
+
+    def test_forked_processes_are_summed(self, tmp_path):
+        registry = MetricsRegistry()
+        counter = registry.counter('calls_total', 'Calls', ('outcome',))
+        histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+        gauge = registry.gauge('budget', 'Budget')
+        counter.inc('ok')  # before forking: reported from this process's file only
+        registry.share(str(tmp_path / 'metrics'))
+        counter.inc('ok')
+        histogram.observe(0.05)
+        gauge.set(3)
+
+        pids = []
+        for _ in range(2):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    counter.inc('ok')
+                    counter.inc('error')
+                    histogram.observe(0.5)
+                    gauge.set(7)
+                    registry.flush()
+                finally:
+                    os._exit(0)
+            pids.append(pid)
+        for pid in pids:
+            assert os.waitpid(pid, 0)[1] == 0
+
+        text = registry.render()
+        assert 'calls_total{outcome="ok"} 4' in text
+        assert 'calls_total{outcome="error"} 2' in text
+        assert 'latency_seconds_bucket{le="0.1"} 1' in text
+        assert 'latency_seconds_count 3' in text
+        assert 'budget 3' in text  # gauges stay per process
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,139 @@
+"""
+Tests for the top movers index
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.movers import MoversIndex
+from data.player_diff import PlayerChange, field_changed_kind
+from database import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "test.db"))
+    players = [('qb1', 'QB', 'KC'), ('qb2', 'QB', 'BUF'), ('wr1', 'WR', 'KC'), ('wr2', 'WR', 'MIN')]
+    for player_id, position, team in players:
+        db.insert_player(player_id, player_id.upper(), position, team)
+    # (week 1, week 2) as (actual, projected); wr2 has a bye in week 2
+    weeks = {
+        'qb1': [(20.0, 18.0), (30.0, 20.0)],
+        'qb2': [(25.0, 22.0), (12.5, 24.0)],
+        'wr1': [(10.0, None), (15.0, 14.0)],
+        'wr2': [(8.0, 12.0), None],
+    }
+    for player_id, results in weeks.items():
+        for week, result in enumerate(results, start=1):
+            if result:
+                db.insert_weekly_stat(player_id, 2024, week, result[0], result[1])
+    return db
+
+
+@pytest.fixture
+def index(db):
+    index = MoversIndex(db, 2024)
+    index.refresh()
+    return index
+
+
+def ids(movers):
+    return [mover['player_id'] for mover in movers]
+
+
+class TestMovers:
+    """Test cases for per-week rankings"""
+
+    def test_beat_and_missed_projection(self, index):
+        """diff ranks points over projection; players without a projection are skipped"""
+        assert index.latest_week == 2
+        top = index.movers(2, 'diff', n=2)
+        assert top[0] == {'player_id': 'qb1', 'value': 10.0, 'actual_points': 30.0, 'projected_points': 20.0}
+        assert ids(top) == ['qb1', 'wr1']
+        assert ids(index.movers(2, 'diff', n=1, direction='bottom')) == ['qb2']
+        assert ids(index.movers(1, 'diff', n=10)) == ['qb2', 'qb1', 'wr2']
+
+    def test_pct_change_and_volatility(self, index):
+        """Percent change needs a previous game; volatility needs two"""
+        movers = index.movers(2, 'pct_change', n=10)
+        assert [(m['player_id'], m['value']) for m in movers] == [('qb1', 50.0), ('wr1', 50.0), ('qb2', -50.0)]
+        assert index.movers(1, 'pct_change') == []
+        assert ids(index.movers(2, 'volatility', n=10)) == ['qb2', 'qb1', 'wr1']
+
+    def test_filters(self, index):
+        """Team and position filters, including unknown values"""
+        assert ids(index.movers(2, 'diff', n=10, position='QB')) == ['qb1', 'qb2']
+        assert ids(index.movers(2, 'diff', n=10, team='KC')) == ['qb1', 'wr1']
+        assert ids(index.movers(2, 'diff', n=10, team='KC', position='WR')) == ['wr1']
+        assert index.movers(2, 'diff', team='LV') == []
+        with pytest.raises(ValueError):
+            index.movers(2, 'ratio')
+        with pytest.raises(ValueError):
+            index.movers(19)
+
+    def test_incremental_refresh(self, db, index):
+        """Corrections and new weeks are applied to the affected players only"""
+        db.insert_weekly_stat('qb2', 2024, 2, 40.0, 24.0)
+        db.insert_weekly_stat('wr2', 2024, 3, 9.0, 9.5)
+        assert index.refresh() == 2
+        assert index.refresh() == 0
+        assert ids(index.movers(2, 'diff', n=1)) == ['qb2']
+        assert index.latest_week == 3
+        assert index.movers(3, 'pct_change')[0]['value'] == pytest.approx(12.5)
+
+    def test_reload_week(self, db, index):
+        """A projection snapshot written after the stats reloads its week"""
+        db.insert_projection('qb2', 2024, 2, 0.5)
+        assert index.refresh() == 0
+        assert index.reload_week(2) == 3
+        assert ids(index.movers(2, 'diff', n=1)) == ['qb2']
+        assert index.movers(2, 'diff', n=1)[0]['projected_points'] == 0.5
+
+    def test_team_changes(self, index):
+        """A team_changed event moves the player to the new team's filter"""
+        index.on_changes([PlayerChange('wr2', field_changed_kind('team'), 'team', 'MIN', 'KC')])
+        assert ids(index.movers(1, 'diff', n=10, team='KC')) == ['qb1', 'wr2']
+
+    def test_heatmap(self, index):
+        """Mean metric per team, highest first"""
+        cells = index.heatmap(2, 'diff', group_by='team')
+        assert cells == [{'group': 'KC', 'mean': 5.5, 'players': 2}, {'group': 'BUF', 'mean': -11.5, 'players': 1}]
+        assert index.heatmap(1, 'diff', group_by='position', position='WR') == [
+            {'group': 'WR', 'mean': -4.0, 'players': 1}]
+
+    def test_large_universe_selection(self, tmp_path):
+        """argpartition selection matches a full sort"""
+        db = DatabaseConnection(str(tmp_path / "big.db"))
+        rng = np.random.default_rng(3)
+        actual = rng.normal(12, 6, 2000).round(2)
+        projected = rng.normal(12, 3, 2000).round(2)
+        db.insert_weekly_stats([(f"p{i}", 2024, 1, float(actual[i]), float(projected[i]), None) for i in range(2000)])
+        index = MoversIndex(db, 2024)
+        index.refresh()
+        expected = sorted(range(2000), key=lambda i: -(np.float32(actual[i]) - np.float32(projected[i])))[:25]
+        assert ids(index.movers(1, 'diff', n=25)) == [f"p{i}" for i in expected]
+
+
+class TestProjectionInvalidation:
+    """The app's movers index follows projection writes from any process"""
+
+    def test_snapshot_reloads_movers(self, app_module):
+        db, movers = app_module.db, app_module.movers_index
+        db.insert_weekly_stat('1041', 2024, 3, 25.0, 10.0)
+        movers.refresh()
+        app_module.invalidation_bus.poll()
+
+        db.insert_projection('1041', 2024, 3, 30.0)
+        app_module.invalidation_bus.poll()
+        mover = next(m for m in movers.movers(3, 'diff', n=100) if m['player_id'] == '1041')
+        assert mover['projected_points'] == 30.0
+        assert mover['value'] == -5.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
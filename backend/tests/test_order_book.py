@@ -0,0 +1,236 @@
+"""
+Unit tests for the order book and matching engine
+"""
+
+import sqlite3
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.leaderboard import Leaderboard
+from data.market_manager import GameSchedule, InjuryLockIndex
+from data.order_book import BUY, SELL, FillWriter, MatchingEngine, OrderFailed, OrderRejected
+from database import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseConnection(str(tmp_path / "test.db"))
+
+
+class CaptureWriter:
+    """Stands in for FillWriter, keeping fills in memory"""
+
+    def __init__(self):
+        self.fills = []
+
+    def append(self, fills, week):
+        self.fills.extend(fills)
+
+    def commit(self, fills, week, timeout=None):
+        self.append(fills, week)
+
+
+def make_engine(writer=None, lock_index=None, market_open=True, players=None, schedule=None):
+    return MatchingEngine(writer, lock_index=lock_index, market_open=lambda: market_open,
+                          current_week=lambda: 9, max_quantity=100, players=players, schedule=schedule)
+
+
+class TestMatching:
+    """Test cases for price-time priority matching"""
+
+    def test_limit_orders_rest_and_cross(self):
+        """A crossing order trades at the resting price, best price first"""
+        engine = make_engine()
+        engine.submit('a', 'qb1', SELL, 5, 20.5)
+        engine.submit('b', 'qb1', SELL, 5, 20.0)
+        assert engine.submit('c', 'qb1', BUY, 3, 19.0)['status'] == 'open'
+
+        result = engine.submit('d', 'qb1', BUY, 8, 21.0)
+        assert result['status'] == 'filled'
+        assert result['fills'] == [{'price': 20.0, 'quantity': 5}, {'price': 20.5, 'quantity': 3}]
+
+        book = engine.snapshot('qb1')
+        assert book['asks'] == [{'price': 20.5, 'quantity': 2}]
+        assert book['bids'] == [{'price': 19.0, 'quantity': 3}]
+        assert book['last_price'] == 20.5
+
+    def test_time_priority_within_level(self):
+        """Orders at the same price fill oldest first"""
+        writer = CaptureWriter()
+        engine = make_engine(writer)
+        first = engine.submit('a', 'qb1', BUY, 2, 15.0)['order']['order_id']
+        second = engine.submit('b', 'qb1', BUY, 2, 15.0)['order']['order_id']
+
+        engine.submit('c', 'qb1', SELL, 3, 15.0)
+        assert [(fill.buyer, fill.seller, fill.quantity, fill.buy_order_id) for fill in writer.fills] == [
+            ('a', 'c', 2, first), ('b', 'c', 1, second)]
+        assert engine.snapshot('qb1')['bids'] == [{'price': 15.0, 'quantity': 1}]
+
+    def test_partial_fill_rests_remainder(self):
+        """A limit order larger than the book trades what it can and rests the rest"""
+        engine = make_engine()
+        engine.submit('a', 'qb1', SELL, 2, 10.0)
+        result = engine.submit('b', 'qb1', BUY, 5, 10.0)
+        assert (result['status'], result['filled'], result['order']['remaining']) == ('open', 2, 3)
+        assert engine.snapshot('qb1') == {'player_id': 'qb1', 'bids': [{'price': 10.0, 'quantity': 3}],
+                                          'asks': [], 'last_price': 10.0}
+
+    def test_market_order_remainder_is_cancelled(self):
+        """Market orders sweep levels and never rest"""
+        engine = make_engine()
+        engine.submit('a', 'qb1', SELL, 2, 10.0)
+        engine.submit('a', 'qb1', SELL, 2, 12.0)
+        result = engine.submit('b', 'qb1', BUY, 6)
+        assert (result['status'], result['filled']) == ('cancelled', 4)
+        assert engine.snapshot('qb1')['bids'] == []
+        assert engine.submit('b', 'qb1', SELL, 1)['filled'] == 0
+
+    def test_cancel(self):
+        """Cancelled orders leave the book; only their owner may cancel"""
+        engine = make_engine()
+        first = engine.submit('a', 'qb1', SELL, 2, 10.0)['order']['order_id']
+        second = engine.submit('b', 'qb1', SELL, 2, 10.0)['order']['order_id']
+        engine.submit('c', 'qb1', SELL, 2, 10.0)
+
+        assert engine.cancel('b', first) is None
+        assert engine.cancel('b', second)['remaining'] == 2
+        assert engine.cancel('b', second) is None
+        assert engine.snapshot('qb1')['asks'] == [{'price': 10.0, 'quantity': 4}]
+
+        result = engine.submit('d', 'qb1', BUY, 4, 10.0)
+        assert result['fills'] == [{'price': 10.0, 'quantity': 2}, {'price': 10.0, 'quantity': 2}]
+        assert engine.snapshot('qb1')['asks'] == []
+
+    def test_rejections(self):
+        """Bad input, a closed market and locked players are rejected before matching"""
+        lock_index = InjuryLockIndex()
+        lock_index.load([{'player_id': 'rb1', 'injury_status': 'IR'}])
+        engine = make_engine(lock_index=lock_index)
+        for args in [('qb1', 'hold', 1, 10.0), ('qb1', BUY, 0, 10.0), ('qb1', BUY, 101, 10.0),
+                     ('qb1', BUY, 1.5, 10.0), ('qb1', BUY, 1, -1.0), ('rb1', BUY, 1, 10.0)]:
+            with pytest.raises(OrderRejected):
+                engine.submit('a', *args)
+        with pytest.raises(OrderRejected, match='closed'):
+            make_engine(market_open=False).submit('a', 'qb1', BUY, 1, 10.0)
+        assert engine.snapshot('qb1')['bids'] == []
+
+    def test_schedule_locks(self):
+        """Started games, byes and OUT players in the snapshot reject orders"""
+        players = {
+            'qb1': {'team': 'KC', 'injury_status': None},
+            'wr1': {'team': 'BUF', 'injury_status': None},
+            'rb1': {'team': 'DET', 'injury_status': None},
+            'te1': {'team': 'BUF', 'injury_status': 'Out'},
+        }
+        now_ms = int(time.time() * 1000)
+        schedule = GameSchedule()
+        schedule.load(9, [{'home': 'KC', 'away': 'TB', 'start_time': now_ms - 60_000},
+                          {'home': 'BUF', 'away': 'MIA', 'start_time': now_ms + 86_400_000}])
+        engine = make_engine(players=players.get, schedule=schedule)
+
+        for player_id in ('qb1', 'rb1', 'te1'):  # game started, bye, injured
+            with pytest.raises(OrderRejected, match='locked'):
+                engine.submit('a', player_id, BUY, 1, 10.0)
+        assert engine.submit('a', 'wr1', BUY, 1, 10.0)['status'] == 'open'
+
+        schedule.load(8, [])  # another week's schedule says nothing about week 9
+        assert not engine.is_locked('rb1')
+
+    def test_self_trade_rejected(self):
+        """An order that would cross its own user's resting order is rejected and changes nothing"""
+        engine = make_engine()
+        engine.submit('a', 'qb1', SELL, 2, 10.0)
+        engine.submit('b', 'qb1', SELL, 2, 11.0)
+        with pytest.raises(OrderRejected, match='own'):
+            engine.submit('a', 'qb1', BUY, 3, 11.0)
+        assert engine.snapshot('qb1')['asks'] == [{'price': 10.0, 'quantity': 2}, {'price': 11.0, 'quantity': 2}]
+        assert engine.submit('a', 'qb1', BUY, 1, 9.0)['status'] == 'open'  # no cross
+
+
+class TestFillWriter:
+    """Test cases for group-committed fills"""
+
+    def test_fills_become_portfolio_rows(self, db):
+        """Each fill writes a buy and a sell row and reaches listeners after commit"""
+        writer = FillWriter(db)
+        board = Leaderboard()
+        committed = []
+        writer.add_listener(committed.extend)
+        writer.add_listener(lambda fills: [
+            board.add_position(user, fill.player_id, action, fill.price, quantity=fill.quantity)
+            for fill in fills for user, action in ((fill.buyer, BUY), (fill.seller, SELL))
+        ])
+        engine = make_engine(writer)
+        engine.submit('alice', 'qb1', SELL, 3, 12.5)
+        engine.submit('bob', 'qb1', BUY, 3, 13.0)
+        writer.stop()
+
+        rows = db.get_portfolio_positions()
+        assert [(r['user_id'], r['action'], r['entry_price'], r['quantity'], r['week']) for r in rows] == [
+            ('bob', 'buy', 12.5, 3, 9), ('alice', 'sell', 12.5, 3, 9)]
+        assert len(committed) == 1
+        board.update_price('qb1', 14.5)
+        assert board.rank_of('bob')['pnl'] == 6.0
+        assert board.rank_of('alice')['pnl'] == -6.0
+
+    def test_concurrent_orders_share_commits(self, db):
+        """Orders arriving during a commit are written together"""
+        writer = FillWriter(db)
+        engine = make_engine(writer)
+
+        def trade(user):
+            for i in range(50):
+                engine.submit(user, f"p{i % 5}", SELL if user % 2 else BUY, 1, 10.0)
+
+        threads = [threading.Thread(target=trade, args=(user,)) for user in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.stop()
+
+        assert writer.rows_written == len(db.get_portfolio_positions()) == 400
+        assert writer.batches < 200
+
+    def test_failed_commit_leaves_book(self, db, monkeypatch):
+        """Fills that can't be saved trade nothing: resting orders stay and nothing rests"""
+        writer = FillWriter(db)
+        engine = make_engine(writer)
+        engine.submit('alice', 'qb1', SELL, 3, 12.5)
+
+        def fail(rows):
+            raise sqlite3.OperationalError("disk I/O error")
+
+        monkeypatch.setattr(db, 'insert_portfolio_rows', fail)
+        with pytest.raises(OrderFailed):
+            engine.submit('bob', 'qb1', BUY, 5, 13.0)
+        assert engine.snapshot('qb1') == {'player_id': 'qb1', 'bids': [], 'asks': [{'price': 12.5, 'quantity': 3}],
+                                          'last_price': None}
+
+        monkeypatch.undo()
+        assert engine.submit('bob', 'qb1', BUY, 2, 13.0)['filled'] == 2
+        writer.stop()
+        assert len(db.get_portfolio_positions()) == 2
+
+    def test_timed_out_fills_are_withdrawn(self, db):
+        """A commit that hasn't started by the timeout takes the order's fills back out"""
+        writer = FillWriter(db)
+        engine = make_engine(writer)
+        engine.submit('alice', 'qb1', SELL, 3, 12.5)
+        writer.stop()
+        writer.start = lambda: None  # no thread picks the batch up
+
+        with pytest.raises(OrderFailed, match='in time'):
+            engine.submit('bob', 'qb1', BUY, 1, 13.0, timeout=0.05)
+        assert engine.snapshot('qb1')['asks'] == [{'price': 12.5, 'quantity': 3}]
+        assert writer._batch is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,112 @@
+"""
+Tests for season-partitioned weekly_stats/projections storage
+"""
+
+import os
+import sqlite3
+import pytest
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "main.db"), partition_dir=str(tmp_path / "seasons"))
+    db.insert_player('qb1', 'QB One', 'QB')
+    for season in (2022, 2023, 2024):
+        db.insert_weekly_stats([('qb1', season, week, 10.0 + week, 9.0, None) for week in range(1, 4)])
+    return db
+
+
+def _rows(path: str, table: str) -> int:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+class TestPartitionRouting:
+    """Test cases for per-season files and query routing"""
+
+    def test_one_file_per_season(self, db):
+        assert db.partition_seasons() == [2022, 2023, 2024]
+        assert _rows(db.partition_path(2024), 'weekly_stats') == 3
+        assert _rows(db.db_path, 'weekly_stats') == 0
+
+    def test_single_season_reads(self, db):
+        stats = db.get_player_stats('qb1', 2023)
+        assert [row['week'] for row in stats] == [1, 2, 3]
+        assert db.get_player_stats('qb1', 1999) == []
+        assert [row['week'] for row in db.get_weekly_points_since(2024, 1)] == [2, 3]
+
+    def test_cross_season_union(self, db):
+        series = db.get_player_series('qb1', 2000, 2030)
+        assert [(row['season'], row['week']) for row in series][:4] == [(2022, 1), (2022, 2), (2022, 3), (2023, 1)]
+        assert len(series) == 9
+        assert len(db.get_player_series('qb1', 2023, 2024)) == 6
+        assert len(db.get_projection_residuals(2024, 2)) == 7
+
+    def test_wide_range_batches_attachments(self, db):
+        db.insert_weekly_stats([('qb1', season, 1, 1.0, None, None) for season in range(2000, 2015)])
+        series = db.get_player_series('qb1', 1990, 2030)
+        seasons = [row['season'] for row in series]
+        assert seasons == sorted(seasons)
+        assert len(series) == 15 + 9
+
+    def test_projections_routed(self, db):
+        db.insert_projections([('qb1', 2023, 4, 11.0, 'sleeper'), ('qb1', 2024, 4, 12.0, 'sleeper')])
+        assert db.get_projection('qb1', 2024, 4)['projected_points'] == 12.0
+        assert _rows(db.partition_path(2023), 'projections') == 1
+        assert db.get_week_projections(2024, 4)[0]['projected_points'] == 12.0
+
+
+class TestSeasonLifecycle:
+    """Test cases for migrating into partitions and closing seasons"""
+
+    def test_close_season_is_read_only(self, db):
+        result = db.close_season(2022)
+        assert result['season'] == 2022
+        assert db.insert_weekly_stat('qb1', 2022, 4, 1.0) is False
+        with pytest.raises(ValueError):
+            db.insert_weekly_stats([('qb1', 2022, 4, 1.0, None, None)])
+        assert len(db.get_player_stats('qb1', 2022)) == 3
+        assert db.insert_weekly_stat('qb1', 2024, 4, 1.0) is True
+
+    def test_close_missing_season(self, db):
+        with pytest.raises(ValueError):
+            db.close_season(1999)
+
+    def test_migrate_existing_rows(self, tmp_path):
+        path = str(tmp_path / "legacy.db")
+        legacy = DatabaseConnection(path)
+        legacy.insert_weekly_stat('qb1', 2023, 1, 20.0)
+        legacy.insert_weekly_stat('qb1', 2024, 1, 25.0)
+        legacy.insert_projection('qb1', 2024, 2, 18.0)
+
+        db = DatabaseConnection(path, partition_dir=str(tmp_path / "seasons"))
+        # The projection also wrote a projection_history row, which moves with it
+        assert db.migrate_to_partitions() == {2023: 1, 2024: 3}
+        assert _rows(path, 'weekly_stats') == 0
+        assert _rows(path, 'projection_history') == 0
+        assert db.get_player_stats('qb1', 2024)[0]['actual_points'] == 25.0
+        assert db.get_projection('qb1', 2024, 2)['projected_points'] == 18.0
+
+
+class TestUnpartitioned:
+    """Without a partition_dir everything stays in the main file"""
+
+    def test_single_file(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "main.db"))
+        db.insert_weekly_stats([('qb1', 2024, 1, 10.0, None, None)])
+        assert db.partition_seasons() == []
+        assert len(db.get_player_series('qb1', 2020, 2024)) == 1
+        assert _rows(db.db_path, 'weekly_stats') == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
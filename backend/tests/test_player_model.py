@@ -0,0 +1,87 @@
+"""
+Unit tests for the compact player model
+"""
+
+import pytest
+import statistics
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from models.player import MAX_WEEKS, Player
+
+
+class TestPlayerModel:
+    """Test cases for array-backed weekly stats"""
+
+    def test_weekly_stats_ordered_by_week(self):
+        """Stats come back in week order with diff computed"""
+        player = Player('4046', 'Patrick Mahomes', 'QB', 'KC')
+        player.add_weekly_stat(2, 28.7, 25.0)
+        player.add_weekly_stat(1, 25.3)
+
+        assert player.weekly_stats == [
+            {'week': 1, 'actual': 25.3, 'projected': None, 'diff': 0},
+            {'week': 2, 'actual': 28.7, 'projected': 25.0, 'diff': pytest.approx(3.7)},
+        ]
+        assert player.get_week(2) == (28.7, 25.0)
+        assert player.get_week(3) is None
+
+    def test_week_bounds(self):
+        """Weeks outside 1..MAX_WEEKS are rejected instead of wrapping into the projected slots"""
+        player = Player('1', 'Test', 'WR')
+        player.add_weekly_stat(18, 12.0, 30.0)
+        for week in (0, -1, 19):
+            with pytest.raises(ValueError):
+                player.get_week(week)
+            with pytest.raises(ValueError):
+                player.add_weekly_stat(week, 1.0)
+        assert player.get_week(18) == (12.0, 30.0)
+
+    def test_incremental_aggregates(self):
+        """Average and variance track writes, including replaced weeks"""
+        player = Player('1', 'Test', 'WR')
+        assert player.calculate_season_average() == 0.0
+        assert player.season_variance == 0.0
+
+        for week, points in enumerate([10.0, 20.0, 5.0, 17.5], start=1):
+            player.add_weekly_stat(week, points)
+        player.add_weekly_stat(3, 15.0)  # stat correction
+
+        values = [10.0, 20.0, 15.0, 17.5]
+        assert player.weeks_played == 4
+        assert player.season_average == pytest.approx(statistics.mean(values))
+        assert player.season_variance == pytest.approx(statistics.pvariance(values))
+
+    def test_week_bounds(self):
+        """Weeks outside the season are rejected"""
+        player = Player('1', 'Test', 'WR')
+        with pytest.raises(ValueError):
+            player.add_weekly_stat(0, 1.0)
+        with pytest.raises(ValueError):
+            player.add_weekly_stat(MAX_WEEKS + 1, 1.0)
+
+    def test_to_dict(self):
+        player = Player('1', 'Test', 'RB', 'NYJ')
+        player.add_weekly_stat(1, 12.0, 10.0)
+        assert player.to_dict() == {
+            'player_id': '1',
+            'name': 'Test',
+            'position': 'RB',
+            'team': 'NYJ',
+            'weekly_stats': [{'week': 1, 'actual': 12.0, 'projected': 10.0, 'diff': 2.0}],
+            'season_average': 12.0
+        }
+
+    def test_slotted(self):
+        """No per-instance __dict__"""
+        player = Player('1', 'Test', 'RB')
+        assert not hasattr(player, '__dict__')
+        with pytest.raises(AttributeError):
+            player.nickname = 'x'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,223 @@
+"""
+Unit tests for the shared-memory player registry
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.player_diff import PLAYER_ADDED, sleeper_players_to_records
+from data.player_registry import PlayerRegistry, RegistryView, read_header, write_registry
+from data.player_universe import PlayerUniverse
+from database import DatabaseConnection
+
+
+class FakeSleeperClient:
+    """Stands in for SleeperClient.get_all_players"""
+
+    def __init__(self, players):
+        self.players = players
+        self.calls = 0
+        self.gate = None
+
+    def get_all_players(self, use_cache=True):
+        self.calls += 1
+        if self.gate:
+            self.gate.wait(5)
+        return self.players
+
+
+PLAYERS = {
+    '4046': {'full_name': 'Patrick Mahomes', 'position': 'QB', 'team': 'KC'},
+    '6794': {'full_name': 'Justin Jefferson', 'position': 'WR', 'team': 'MIN', 'injury_status': 'Questionable'},
+}
+
+
+def make_records(count):
+    return [
+        {'player_id': str(1000 + i), 'name': f'Player {i}', 'position': ('QB', 'RB', 'WR', 'TE')[i % 4],
+         'team': None if i % 7 == 0 else 'KC', 'injury_status': None, 'status': 'Active',
+         'content_hash': f'{i:016x}'}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "players.reg")
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseConnection(str(tmp_path / "test.db"))
+
+
+class TestRegistryFile:
+    """Test cases for the file format"""
+
+    def test_round_trip(self, path):
+        """Every record decodes back to what was written, None fields included"""
+        records = make_records(500)
+        assert write_registry(path, records) == 1
+        view = RegistryView(path)
+
+        assert len(view) == 500
+        assert view.records() == records
+        assert view.get('1007') == {'player_id': '1007', 'name': 'Player 7', 'position': 'TE',
+                                    'team': None, 'injury_status': None}
+        assert '1499' in view
+        assert view.get('2000') is None
+        assert view.get('') is None
+
+    def test_player_list_decoded_per_use(self, path):
+        """players is decoded from the mapping each time and not kept on the view"""
+        write_registry(path, make_records(50))
+        view = RegistryView(path)
+        assert view.players == view.players
+        assert view.players is not view.players
+        assert view.players[7] == view.get('1007')
+
+        records = make_records(50)
+        records[7]['name'] = 'Renamed'
+        write_registry(path, records)
+        assert RegistryView(path).players[7]['name'] == 'Renamed'
+
+    def test_strings_are_interned(self, path):
+        """Repeated values are stored once"""
+        write_registry(path, make_records(1000))
+        header = read_header(path)
+        strings = os.path.getsize(path) - header['strings_offset']
+        # 1000 ids, names and hashes plus a handful of shared values
+        assert strings < 1000 * (2 + 4 + 2 + 10 + 2 + 16) + 100
+
+    def test_generation_increments(self, path):
+        """Each publish bumps the generation and records its source"""
+        write_registry(path, make_records(3), source='database')
+        assert write_registry(path, make_records(3)) == 2
+        header = read_header(path)
+        assert header['generation'] == 2
+        assert header['source'] == 'sleeper'
+
+    def test_rejects_other_files(self, path):
+        """A file without the registry header is not mapped"""
+        with open(path, 'wb') as f:
+            f.write(b'not a registry' * 10)
+        assert read_header(path) is None
+        with pytest.raises(ValueError):
+            RegistryView(path)
+
+
+class TestPlayerRegistry:
+    """Test cases for remapping published versions"""
+
+    def test_remaps_new_versions(self, path):
+        """Readers pick up a new file and keep old views usable"""
+        registry = PlayerRegistry(path, check_interval=0)
+        assert registry.view() is None
+
+        old = registry.publish(make_records(2))
+        write_registry(path, make_records(5))
+        new = registry.view()
+
+        assert new.generation == 2
+        assert len(new) == 5
+        assert old.get('1001')['name'] == 'Player 1'
+
+    def test_check_interval_limits_remaps(self, path):
+        """Between checks the current view is returned without a stat"""
+        registry = PlayerRegistry(path, check_interval=3600)
+        registry.publish(make_records(2))
+        write_registry(path, make_records(5))
+        assert len(registry.view()) == 2
+        assert len(registry.remap()) == 5
+
+    def test_corrupt_file_is_ignored(self, path):
+        """An unreadable replacement keeps the previous view"""
+        registry = PlayerRegistry(path, check_interval=0)
+        registry.publish(make_records(2))
+        with open(path + '.tmp', 'wb') as f:
+            f.write(b'garbage')
+        os.replace(path + '.tmp', path)
+        assert len(registry.view()) == 2
+
+
+class TestUniverseWithRegistry:
+    """Test cases for PlayerUniverse backed by a registry"""
+
+    def test_refresh_publishes_to_registry(self, db, path):
+        """The writer downloads, persists and publishes to the shared file"""
+        universe = PlayerUniverse(db, FakeSleeperClient(PLAYERS), registry=PlayerRegistry(path, check_interval=0))
+        assert universe.refresh()
+
+        snapshot = universe.snapshot()
+        assert snapshot.source == 'registry'
+        assert len(snapshot) == 2
+        assert snapshot.get('6794')['injury_status'] == 'Questionable'
+        assert read_header(path)['source'] == 'sleeper'
+        assert len(db.get_player_records()) == 2
+
+    def test_load_from_db_seeds_registry(self, db, path):
+        """With no registry file yet, startup publishes the players table"""
+        db.upsert_players(sleeper_players_to_records(PLAYERS))
+        universe = PlayerUniverse(db, FakeSleeperClient({}), registry=PlayerRegistry(path))
+        assert universe.load_from_db() == 2
+        assert read_header(path)['source'] == 'database'
+
+    def test_follower_skips_download_and_emits_changes(self, db, path):
+        """A second worker reuses a fresh registry and diffs it for its own change feed"""
+        leader_client = FakeSleeperClient(PLAYERS)
+        leader = PlayerUniverse(db, leader_client, refresh_interval=3600,
+                                registry=PlayerRegistry(path, check_interval=0))
+        follower_client = FakeSleeperClient(PLAYERS)
+        follower = PlayerUniverse(db, follower_client, refresh_interval=3600,
+                                  registry=PlayerRegistry(path, check_interval=0))
+        leader.refresh()
+        follower.load_from_db()
+
+        events = []
+        follower.change_feed.subscribe(events.extend)
+        leader_client.players = dict(PLAYERS, **{'8000': {'full_name': 'New Guy', 'position': 'RB', 'team': 'BUF'}})
+        leader.refresh()
+        assert follower.refresh()
+
+        assert follower_client.calls == 0
+        assert [(change.player_id, change.kind) for change in events] == [('8000', PLAYER_ADDED)]
+        assert len(follower.snapshot()) == 3
+
+    def test_losing_worker_follows_after_the_publish(self, db, path):
+        """A worker whose refresh starts mid-download waits for the publish and follows it in the same refresh"""
+        leader_client = FakeSleeperClient(dict(PLAYERS, **{'8000': {'full_name': 'New Guy', 'position': 'RB'}}))
+        leader = PlayerUniverse(db, leader_client, refresh_interval=3600,
+                                registry=PlayerRegistry(path, check_interval=0))
+        follower = PlayerUniverse(db, FakeSleeperClient(PLAYERS), refresh_interval=3600,
+                                  registry=PlayerRegistry(path, check_interval=0))
+        db.upsert_players(sleeper_players_to_records(PLAYERS))
+        leader.load_from_db()
+        follower.load_from_db()
+        events = []
+        follower.change_feed.subscribe(events.extend)
+
+        leader_client.gate = threading.Event()
+        downloading = threading.Thread(target=leader.refresh)
+        downloading.start()
+        while not leader_client.calls:
+            time.sleep(0.001)
+        following = threading.Thread(target=follower.refresh)
+        following.start()
+        time.sleep(0.05)
+        assert not events  # still queued behind the download
+        leader_client.gate.set()
+        downloading.join(5)
+        following.join(5)
+
+        assert follower.sleeper_client.calls == 0
+        assert [(change.player_id, change.kind) for change in events] == [('8000', PLAYER_ADDED)]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,207 @@
+"""
+Unit tests for the background-refreshed player universe
+"""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.market_manager import InjuryLockIndex
+from data.player_diff import diff_players, sleeper_players_to_records
+from data.player_registry import PlayerRegistry
+from data.player_universe import PlayerUniverse
+from database import DatabaseConnection
+
+
+class FakeSleeperClient:
+    """Stands in for SleeperClient.get_all_players"""
+
+    def __init__(self, players):
+        self.players = players
+        self.calls = 0
+        self.fail = False
+        self.gate = None
+
+    def get_all_players(self, use_cache=True):
+        self.calls += 1
+        if self.gate:
+            self.gate.wait(5)
+        if self.fail:
+            raise ConnectionError("upstream down")
+        return self.players
+
+
+PLAYERS = {
+    '4046': {'full_name': 'Patrick Mahomes', 'position': 'QB', 'team': 'KC'},
+    '6794': {'full_name': 'Justin Jefferson', 'position': 'WR', 'team': 'MIN'},
+    '9999': {'full_name': 'No Position', 'position': None, 'team': None},
+}
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseConnection(str(tmp_path / "test.db"))
+
+
+class TestPlayerUniverse:
+    """Test cases for snapshot reads and refreshes"""
+
+    def test_refresh_publishes_snapshot_and_persists(self, db):
+        """A refresh swaps in a new snapshot and writes the players table"""
+        universe = PlayerUniverse(db, FakeSleeperClient(PLAYERS))
+        assert len(universe.snapshot()) == 0
+
+        assert universe.refresh()
+        snapshot = universe.snapshot()
+        assert len(snapshot) == 2
+        assert snapshot.get('4046')['name'] == 'Patrick Mahomes'
+
+        reloaded = PlayerUniverse(db, FakeSleeperClient({}))
+        assert reloaded.load_from_db() == 2
+
+    def test_failed_refresh_keeps_last_good_snapshot(self, db):
+        """Upstream errors leave the previous snapshot in place"""
+        client = FakeSleeperClient(PLAYERS)
+        universe = PlayerUniverse(db, client)
+        universe.refresh()
+        before = universe.snapshot()
+
+        client.fail = True
+        assert not universe.refresh()
+        assert universe.snapshot() is before
+        assert 'upstream down' in universe.last_refresh_error
+
+    def test_reads_do_not_block_during_refresh(self, db):
+        """Snapshot reads return immediately while a refresh is in flight"""
+        client = FakeSleeperClient(PLAYERS)
+        client.gate = threading.Event()
+        universe = PlayerUniverse(db, client)
+
+        worker = threading.Thread(target=universe.refresh)
+        worker.start()
+        while not universe.refreshing:
+            pass
+        assert len(universe.snapshot()) == 0
+        assert not universe.refresh()  # collapsed into the running refresh
+
+        client.gate.set()
+        worker.join()
+        assert len(universe.snapshot()) == 2
+        assert client.calls == 1
+
+    def test_one_worker_downloads_per_interval(self, db):
+        """Workers sharing a database elect one downloader; the others load what it wrote"""
+        leader_client, follower_client = FakeSleeperClient(PLAYERS), FakeSleeperClient(PLAYERS)
+        leader = PlayerUniverse(db, leader_client, refresh_interval=3600)
+        follower = PlayerUniverse(db, follower_client, refresh_interval=3600)
+        assert leader.refresh()
+        assert follower.refresh()
+        assert (leader_client.calls, follower_client.calls) == (1, 0)
+        assert len(follower.snapshot()) == 2
+
+        assert leader.refresh()  # its own stamp doesn't stop the leader
+        assert leader_client.calls == 2
+
+
+class TestPlayerDiff:
+    """Test cases for change-data-capture between pulls"""
+
+    def test_unchanged_pull_writes_nothing(self):
+        """Identical pulls produce no rows and no events"""
+        records = sleeper_players_to_records(PLAYERS)
+        stored = {r['player_id']: r for r in records}
+        assert diff_players(stored, sleeper_players_to_records(PLAYERS)) == ([], [])
+
+    def test_changes_are_field_level(self):
+        """Only changed players are written, with one event per changed field"""
+        stored = {r['player_id']: r for r in sleeper_players_to_records(PLAYERS)}
+        pull = dict(PLAYERS)
+        pull['4046'] = dict(PLAYERS['4046'], team='LV', injury_status='Out')
+        pull['1111'] = {'full_name': 'New Guy', 'position': 'RB', 'team': 'NYJ'}
+        del pull['6794']
+
+        changed, changes = diff_players(stored, sleeper_players_to_records(pull))
+        assert sorted(r['player_id'] for r in changed) == ['1111', '4046']
+        assert sorted((c.player_id, c.kind, c.old, c.new) for c in changes) == [
+            ('1111', 'player_added', None, 'New Guy'),
+            ('4046', 'injury_status_changed', None, 'Out'),
+            ('4046', 'team_changed', 'KC', 'LV'),
+            ('6794', 'player_removed', 'Justin Jefferson', None),
+        ]
+
+    def test_refresh_publishes_changes_to_subscribers(self, db):
+        """A second refresh writes only changed rows and feeds the lock index"""
+        client = FakeSleeperClient(PLAYERS)
+        universe = PlayerUniverse(db, client)
+        universe.refresh()
+        before = db.get_player_records()
+
+        locks = InjuryLockIndex()
+        locks.load(universe.snapshot().players)
+        universe.change_feed.subscribe(locks.on_changes, kinds=['injury_status_changed'])
+        received = []
+        universe.change_feed.subscribe(received.extend)
+
+        client.players = dict(PLAYERS, **{'6794': dict(PLAYERS['6794'], injury_status='IR')})
+        assert universe.refresh()
+        assert [(c.player_id, c.kind) for c in received] == [('6794', 'injury_status_changed')]
+        assert locks.locked_players() == ['6794']
+        assert universe.snapshot().get('6794')['injury_status'] == 'IR'
+
+        after = db.get_player_records()
+        assert after['4046'] == before['4046']
+        assert after['6794']['content_hash'] != before['6794']['content_hash']
+
+    def test_every_downloader_publishes_its_own_changes(self, db):
+        """A worker downloading after another one already wrote the change still reports it"""
+        db.upsert_players(sleeper_players_to_records(PLAYERS))
+        pull = dict(PLAYERS, **{'6794': dict(PLAYERS['6794'], injury_status='Out')})
+        workers = []
+        for _ in range(2):
+            # An interval this short makes every refresh download
+            universe = PlayerUniverse(db, FakeSleeperClient(pull), refresh_interval=1e-6)
+            universe.load_from_db()
+            received = []
+            universe.change_feed.subscribe(received.extend)
+            workers.append((universe, received))
+        for universe, received in workers:
+            universe.refresh()
+            universe.refresh()  # nothing left to report
+            assert [(c.player_id, c.kind, c.new) for c in received] == [('6794', 'injury_status_changed', 'Out')]
+
+    @pytest.mark.parametrize('shared', [False, True], ids=['database', 'registry'])
+    def test_followers_publish_changes(self, db, tmp_path, shared):
+        """A worker told of another's write by PLAYERS publishes the changes on its own feed"""
+        records = sleeper_players_to_records(PLAYERS)
+        db.upsert_players(records)
+        path = str(tmp_path / "players.reg")
+        if shared:
+            PlayerRegistry(path).publish(records)
+        pull = dict(PLAYERS, **{'6794': dict(PLAYERS['6794'], injury_status='Out')})
+        leader, follower = [PlayerUniverse(db, FakeSleeperClient(pull), registry=PlayerRegistry(path) if shared else None)
+                            for _ in range(2)]
+        for universe in (leader, follower):
+            universe.load_from_db()
+        received = []
+        follower.change_feed.subscribe(received.extend)
+
+        leader.refresh()
+        assert follower.follow() == 1
+        assert follower.follow() == 0
+        assert leader.follow() == 0  # its own write
+        assert follower.snapshot().get('6794')['injury_status'] == 'Out'
+
+        # A reload catches up through the change feed rather than skipping past it
+        leader.sleeper_client.players = dict(pull, **{'4046': dict(PLAYERS['4046'], team='LV')})
+        leader.refresh()
+        assert follower.load_from_db() == 2
+        assert follower.follow() == 0
+        assert [(c.player_id, c.kind, c.new) for c in received] == [('6794', 'injury_status_changed', 'Out'),
+                                                                    ('4046', 'team_changed', 'LV')]
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
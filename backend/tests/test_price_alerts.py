@@ -0,0 +1,188 @@
+"""
+Unit tests for price alerts
+"""
+
+import itertools
+import random
+import threading
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.price_alerts import ABOVE, BELOW, AlertDispatcher, AlertRejected, PriceAlertEngine
+from data.realtime_service import RealtimeService
+from database import DatabaseConnection
+
+
+def fired(triggered):
+    return sorted(item.alert.alert_id for item in triggered)
+
+
+class TestPriceAlertEngine:
+    """Test cases for crossing detection"""
+
+    def test_crossing_up_and_down(self):
+        """Alerts fire when the price reaches their threshold from the other side, once"""
+        engine = PriceAlertEngine()
+        engine.on_price('qb1', 20.0)
+        up = engine.add('a', 'qb1', 25)
+        down = engine.add('b', 'qb1', 18)
+        far = engine.add('c', 'qb1', 30)
+        assert (up.direction, down.direction) == (ABOVE, BELOW)
+
+        assert engine.on_price('qb1', 24.9) == []
+        triggered = engine.on_price('qb1', 25.0)
+        assert fired(triggered) == [up.alert_id]
+        assert triggered[0].price == 25.0
+        assert engine.on_price('qb1', 17.0)[0].alert == down
+        assert engine.on_price('qb1', 26.0) == []  # up already fired
+        assert fired(engine.on_price('qb1', 31.0)) == [far.alert_id]
+        assert len(engine) == 0
+
+    def test_one_tick_crosses_many(self):
+        """A jump triggers every threshold it passed and nothing beyond"""
+        engine = PriceAlertEngine()
+        engine.on_price('qb1', 10.0)
+        alerts = [engine.add(f"u{i}", 'qb1', threshold) for i, threshold in enumerate((11, 12, 12, 15, 20))]
+        engine.add('other', 'wr1', 12, ABOVE)
+        assert fired(engine.on_price('qb1', 15.0)) == [alert.alert_id for alert in alerts[:4]]
+        assert len(engine) == 2
+
+    def test_first_tick_only_records_price(self):
+        """Without a previous price nothing is crossed"""
+        engine = PriceAlertEngine()
+        engine.add('a', 'qb1', 25, ABOVE)
+        assert engine.on_price('qb1', 30.0) == []
+        assert engine.price('qb1') == 30.0
+
+    def test_matches_brute_force(self):
+        """Random walks trigger exactly what checking every alert on every tick would"""
+        rng = random.Random(5)
+        engine = PriceAlertEngine(max_per_user=10 ** 6)
+        prices = {f"p{i}": 15.0 for i in range(5)}
+        for player_id, price in prices.items():
+            engine.on_price(player_id, price)
+        active = {}
+        for i in range(2000):
+            player_id = rng.choice(list(prices))
+            alert = engine.add('u', player_id, round(rng.uniform(5, 25), 1), rng.choice((ABOVE, BELOW)))
+            active[alert.alert_id] = alert
+
+        for _ in range(500):
+            player_id = rng.choice(list(prices))
+            old, new = prices[player_id], round(prices[player_id] + rng.gauss(0, 2), 1)
+            prices[player_id] = new
+            expected = sorted(
+                alert.alert_id for alert in active.values() if alert.player_id == player_id and (
+                    (alert.direction == ABOVE and old < alert.threshold <= new)
+                    or (alert.direction == BELOW and new <= alert.threshold < old)))
+            assert fired(engine.on_price(player_id, new)) == expected
+            for alert_id in expected:
+                del active[alert_id]
+        assert len(engine) == len(active)
+
+    def test_cancel_and_limits(self):
+        """Only the owner cancels; bad input and per-user limits are rejected"""
+        engine = PriceAlertEngine(max_per_user=2)
+        first = engine.add('a', 'qb1', 25, ABOVE)
+        engine.add('a', 'qb1', 25, ABOVE)
+        with pytest.raises(AlertRejected):
+            engine.add('a', 'qb1', 26, ABOVE)
+        for args in [('qb1', -1, ABOVE), ('qb1', '25', ABOVE), ('qb1', float('nan'), ABOVE),
+                     ('qb1', 25, 'sideways'), ('qb1', 25, None)]:
+            with pytest.raises(AlertRejected):
+                engine.add('b', *args)
+
+        assert engine.cancel('b', first.alert_id) is None
+        assert engine.cancel('a', first.alert_id) == first
+        assert engine.cancel('a', first.alert_id) is None
+        engine.on_price('qb1', 20.0)
+        assert len(engine.on_price('qb1', 30.0)) == 1
+
+    def test_concurrent_adds_respect_limit(self):
+        """Adds racing through a slow insert can't take more than max_per_user slots"""
+        class SlowDB:
+            ids = itertools.count(1)
+
+            def insert_price_alert(self, *args):
+                time.sleep(0.02)
+                return next(self.ids)
+
+        engine = PriceAlertEngine(SlowDB(), max_per_user=2)
+        results = []
+
+        def add(threshold):
+            try:
+                results.append(engine.add('a', 'qb1', threshold, ABOVE))
+            except AlertRejected:
+                pass
+
+        threads = [threading.Thread(target=add, args=(20 + i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == len(engine) == 2
+
+
+class TestAlertPersistence:
+    """Test cases for stored alerts and batched dispatch"""
+
+    def test_triggered_alerts_are_recorded(self, tmp_path):
+        """Alerts fired from RealtimeService ticks are marked triggered and reach listeners"""
+        db = DatabaseConnection(str(tmp_path / "test.db"))
+        dispatcher = AlertDispatcher(db)
+        received = []
+        dispatcher.add_listener(received.extend)
+        engine = PriceAlertEngine(db, dispatcher)
+        service = RealtimeService()
+        service.add_price_listener(engine.on_price)
+
+        alert = engine.add('a', 'qb1', 25, ABOVE)
+        engine.add('a', 'qb1', 40, ABOVE)
+        service.publish_price('qb1', 20.0)
+        service.publish_price('qb1', 26.5)
+        dispatcher.stop()
+
+        assert [item.alert for item in received] == [alert]
+        rows = db.get_price_alerts('a')
+        assert [(row['threshold'], row['triggered_price']) for row in rows] == [(40.0, None), (25.0, 26.5)]
+
+        reloaded = PriceAlertEngine(db)
+        assert reloaded.load_from_db() == 1
+        assert reloaded.cancel('a', rows[0]['id']) is not None
+        assert [row['id'] for row in db.get_price_alerts('a')] == [alert.alert_id]
+
+
+
+class TestTradeTicks:
+    """Order book fills are the app's live price ticks"""
+
+    def test_fills_trigger_alerts(self, app_module, monkeypatch):
+        monkeypatch.setattr(app_module.matching_engine, 'market_open', lambda: True)
+        client = app_module.app.test_client()
+        response = client.post('/api/alerts', json={'user_id': 'watcher', 'player_id': '1001',
+                                                    'threshold': 12, 'direction': 'above'})
+        alert_id = response.get_json()['alert']['alert_id']
+        for price in (10.0, 12.5):
+            client.post('/api/orders', json={'user_id': 'seller', 'player_id': '1001', 'side': 'sell',
+                                             'quantity': 1, 'price': price})
+            client.post('/api/orders', json={'user_id': 'buyer', 'player_id': '1001', 'side': 'buy',
+                                             'quantity': 1, 'price': price})
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            alerts = {row['id']: row for row in app_module.db.get_price_alerts('watcher')}
+            if alerts[alert_id]['triggered_price'] is not None:
+                break
+            time.sleep(0.02)
+        assert alerts[alert_id]['triggered_price'] == 12.5
+        assert app_module.price_alerts.price('1001') == 12.5
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
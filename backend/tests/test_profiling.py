@@ -0,0 +1,108 @@
+"""
+Unit tests for on-demand request profiling
+"""
+
+import json
+import pytest
+import sys
+import os
+import time
+
+from flask import Flask, jsonify
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseConnection
+from profiling import (PROFILE_HEADER, PROFILE_ID_HEADER, RequestProfiler, collapse_stacks, current_session,
+                       install_profiling, render_flamegraph)
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture
+def db(tmp_path):
+    return DatabaseConnection(str(tmp_path / "test.db"))
+
+
+def make_app(db, out_dir, **options):
+    app = Flask(__name__)
+    profiler = install_profiling(app, str(out_dir), **options)
+
+    @app.route('/slow/<player_id>')
+    def slow(player_id):
+        db.get_player_by_id(player_id)
+        busy(0.05)
+        return jsonify({'ok': True, 'profiling': current_session() is not None})
+
+    return app, profiler
+
+
+class TestRequestProfiling:
+    """Test cases for profile selection and output"""
+
+    def test_off_installs_nothing(self, db, tmp_path):
+        """Without a token or sample rate no hooks are registered"""
+        app, profiler = make_app(db, tmp_path / "profiles")
+        assert profiler is None
+        assert not app.before_request_funcs
+        response = app.test_client().get('/slow/qb1', headers={PROFILE_HEADER: 'anything'})
+        assert PROFILE_ID_HEADER not in response.headers
+        assert not (tmp_path / "profiles").exists()
+
+    def test_token_header(self, db, tmp_path):
+        """Only the right token profiles a request"""
+        out_dir = tmp_path / "profiles"
+        app, _ = make_app(db, out_dir, token='secret', interval=0.001)
+        client = app.test_client()
+
+        assert client.get('/slow/qb1', headers={PROFILE_HEADER: 'wrong'}).json['profiling'] is False
+        response = client.get('/slow/qb1', headers={PROFILE_HEADER: 'secret'})
+        assert response.json['profiling'] is True
+        stem = response.headers[PROFILE_ID_HEADER]
+        assert sorted(os.listdir(out_dir)) == [stem + ext for ext in ('.collapsed', '.json', '.svg')]
+
+        summary = json.loads((out_dir / (stem + '.json')).read_text())
+        assert summary['route'] == '/slow/<player_id>'
+        assert summary['status'] == 200
+        assert summary['reason'] == 'header'
+        assert summary['samples'] > 5
+        assert summary['totals']['db']['calls'] == 1
+        assert any(event['kind'] == 'sql' and 'FROM players' in event['name'] for event in summary['events'])
+
+        collapsed = (out_dir / (stem + '.collapsed')).read_text()
+        assert 'busy (test_profiling.py' in collapsed
+        assert (out_dir / (stem + '.svg')).read_text().startswith('<svg')
+        assert current_session() is None
+
+    def test_sample_rate(self, db, tmp_path):
+        """A sample rate of 1 profiles every request"""
+        app, _ = make_app(db, tmp_path / "profiles", sample_rate=1.0)
+        response = app.test_client().get('/slow/qb1')
+        assert response.headers[PROFILE_ID_HEADER]
+
+    def test_retention(self, tmp_path):
+        """Only the newest max_files profiles are kept"""
+        profiler = RequestProfiler(str(tmp_path), max_files=2)
+        for i in range(4):
+            for ext in ('.collapsed', '.json', '.svg'):
+                (tmp_path / f"20241001-0000{i}-get-x{ext}").write_text('x')
+        assert profiler.prune() == 6
+        assert sorted({name.split('.')[0] for name in os.listdir(tmp_path)}) == [
+            '20241001-00002-get-x', '20241001-00003-get-x']
+
+    def test_collapsed_and_flamegraph(self):
+        """Collapsed stacks are 'frames count' lines; the SVG has one box per frame"""
+        stacks = {'main;handler;query': 3, 'main;handler': 1}
+        assert collapse_stacks(stacks) == 'main;handler 1\nmain;handler;query 3\n'
+        svg = render_flamegraph(stacks, 'GET /x')
+        assert svg.count('<rect') == 3
+        assert 'query (3 samples, 75.0%)' in svg
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
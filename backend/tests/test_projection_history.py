@@ -0,0 +1,155 @@
+"""
+Unit tests for intraweek projection history
+"""
+
+import threading
+import time
+import pytest
+import sys
+import os
+from datetime import datetime
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.projection_history import (
+    compact_projection_history, decode_snapshots, encode_snapshots, projection_as_of, projection_path
+)
+from data.projection_service import record_projection_history
+from database import DatabaseConnection
+
+MONDAY = 1_730_700_000  # epoch seconds
+
+
+def record(db, points, at, player_id='qb1', week=9):
+    db.insert_projections([(player_id, 2024, week, points, 'sleeper')], recorded_at=at)
+
+
+@pytest.fixture(params=[False, True], ids=['single-file', 'partitioned'])
+def db(request, tmp_path):
+    partition_dir = str(tmp_path / "seasons") if request.param else None
+    return DatabaseConnection(str(tmp_path / "test.db"), partition_dir)
+
+
+class TestEncoding:
+    """Test cases for the delta block format"""
+
+    def test_round_trip(self):
+        """Times and values survive encoding, including decreases"""
+        times = [MONDAY * 1000, MONDAY * 1000 + 1, MONDAY * 1000 + 3_600_000, MONDAY * 1000 + 90_000_000]
+        values = [18.4, 18.25, 0.0, 21.375]
+        assert decode_snapshots(encode_snapshots(times, values)) == (times, values)
+
+    def test_small_changes_are_small(self):
+        """Nearby snapshots cost a few bytes each"""
+        times = [MONDAY * 1000 + i * 600_000 for i in range(100)]
+        values = [15.0 + (i % 5) * 0.1 for i in range(100)]
+        data = encode_snapshots(times, values)
+        assert len(data) <= 12 + 99 * 5  # 3-byte time delta + 2-byte value delta
+        assert decode_snapshots(data) == (times, values)
+
+
+class TestHistory:
+    """Test cases for recording, as-of lookups and compaction"""
+
+    def test_only_changes_are_recorded(self, db):
+        """Re-inserting the same projection adds no history"""
+        record(db, 18.0, MONDAY)
+        record(db, 18.0, MONDAY + 600)
+        record(db, 17.5, MONDAY + 1200)
+        record(db, 17.5, MONDAY + 1800)
+
+        assert projection_path(db, 'qb1', 2024, 9) == [(MONDAY * 1000, 18.0), ((MONDAY + 1200) * 1000, 17.5)]
+        assert db.get_projection('qb1', 2024, 9)['projected_points'] == 17.5
+
+    def test_intraweek_pulls_leave_market_open(self, db):
+        """Intraweek pulls add to the history but keep the market-open projection"""
+        record(db, 18.0, MONDAY)
+        db.append_projection_history([('qb1', 2024, 9, 17.0)], recorded_at=MONDAY + 600)
+        db.append_projection_history([('qb1', 2024, 9, 17.0)], recorded_at=MONDAY + 1200)
+
+        class Client:
+            def get_historical_projections(self, week, season):
+                return {'qb1': {'pts_ppr': 19.5}, 'k1': {}}
+
+        assert record_projection_history(db, Client(), 9, 2024) == 1
+        path = projection_path(db, 'qb1', 2024, 9)
+        assert [points for _, points in path] == [18.0, 17.0, 19.5]
+        assert db.get_projection('qb1', 2024, 9)['projected_points'] == 18.0
+
+    def test_as_of(self, db):
+        """The value in effect at a time, before and after compaction"""
+        for i, points in enumerate((18.0, 17.5, 19.25)):
+            record(db, points, MONDAY + i * 3600)
+
+        expected = {MONDAY - 1: None, MONDAY: 18.0, MONDAY + 3599: 18.0, MONDAY + 3600: 17.5, MONDAY + 86400: 19.25}
+        for at, points in expected.items():
+            assert projection_as_of(db, 'qb1', 2024, 9, at) == points
+
+        assert compact_projection_history(db, 2024, older_than=3600, now=MONDAY + 7200) == 1
+        for at, points in expected.items():
+            assert projection_as_of(db, 'qb1', 2024, 9, at) == points
+        assert projection_as_of(db, 'qb1', 2024, 9, datetime.fromtimestamp(MONDAY + 3600)) == 17.5
+
+    def test_compaction_keeps_path(self, db):
+        """Repeated compactions merge into one block and leave newer rows alone"""
+        values = [18.0, 17.5, 19.25, 19.0, 12.125]
+        for i, points in enumerate(values):
+            record(db, points, MONDAY + i * 3600)
+        record(db, 16.0, MONDAY, player_id='wr1')
+        full = projection_path(db, 'qb1', 2024, 9)
+
+        assert compact_projection_history(db, 2024, older_than=0, now=MONDAY + 2 * 3600) == 2
+        assert compact_projection_history(db, 2024, older_than=0, now=MONDAY + 3 * 3600 + 1) == 1
+        assert compact_projection_history(db, 2024, older_than=0, now=MONDAY + 3 * 3600 + 1) == 0
+
+        block = db.get_projection_block('qb1', 2024, 9)
+        assert block['points'] == 4
+        assert len(db.get_projection_snapshots('qb1', 2024, 9)) == 1
+        assert projection_path(db, 'qb1', 2024, 9) == full
+        assert projection_path(db, 'wr1', 2024, 9) == [(MONDAY * 1000, 16.0)]
+
+    def test_concurrent_compactions(self, db):
+        """A compaction that starts while another is folding waits for it and keeps every value"""
+        values = [18.0, 17.5, 19.25, 19.0]
+        for i, points in enumerate(values):
+            record(db, points, MONDAY + i * 3600)
+        other = DatabaseConnection(db.db_path, db.partition_dir)
+        folding = threading.Event()
+        fold_projection_history = other.fold_projection_history
+
+        def slow_fold(season, before, fold):
+            def slowly(rows):
+                folding.set()
+                time.sleep(0.2)
+                return fold(rows)
+            return fold_projection_history(season, before, slowly)
+
+        other.fold_projection_history = slow_fold
+        compacted = []
+        first = threading.Thread(target=lambda: compacted.append(
+            compact_projection_history(other, 2024, older_than=0, now=MONDAY + 3600 + 1)))
+        first.start()
+        folding.wait(5)
+        compacted.append(compact_projection_history(db, 2024, older_than=0, now=MONDAY + 3 * 3600 + 1))
+        first.join()
+
+        assert compacted == [1, 1]
+
+        assert db.get_projection_block('qb1', 2024, 9)['points'] == 4
+        assert [points for _, points in projection_path(db, 'qb1', 2024, 9)] == values
+
+    def test_path_window(self, db):
+        """A windowed path starts with the value in effect at start"""
+        for i, points in enumerate((18.0, 17.5, 19.25, 19.0)):
+            record(db, points, MONDAY + i * 3600)
+        compact_projection_history(db, 2024, older_than=0, now=MONDAY + 3600 + 1)
+
+        path = projection_path(db, 'qb1', 2024, 9, start=MONDAY + 1800, end=MONDAY + 2 * 3600)
+        assert path == [((MONDAY + 1800) * 1000, 18.0), ((MONDAY + 3600) * 1000, 17.5),
+                        ((MONDAY + 7200) * 1000, 19.25)]
+        assert projection_path(db, 'qb1', 2024, 9, start=MONDAY - 60, end=MONDAY - 1) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
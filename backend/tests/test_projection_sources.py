@@ -0,0 +1,135 @@
+"""
+Tests for hedged Sleeper/ESPN projection fetching and the player ID crosswalk
+Both upstreams are replaced by local stub servers
+"""
+
+import pytest
+import time
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.espn_client import ESPNClient
+from data.player_crosswalk import PlayerCrosswalk, normalize_name
+from data.projection_sources import HedgedProjectionSource
+from data.sleeper_client import SleeperClient
+from database import DatabaseConnection
+
+SLEEPER_PATH = '/projections/nfl/2024/5'
+ESPN_PATH = '/seasons/2024/segments/0/leaguedefaults/3'
+
+ESPN_WEEK_5 = {
+    'players': [
+        {'id': 3139477, 'player': {'id': 3139477, 'fullName': 'Patrick Mahomes', 'stats': [
+            {'scoringPeriodId': 5, 'statSourceId': 0, 'appliedTotal': 30.0},
+            {'scoringPeriodId': 5, 'statSourceId': 1, 'appliedTotal': 22.4},
+        ]}},
+        {'id': 42, 'player': {'id': 42, 'fullName': 'Unmapped Player', 'stats': [
+            {'scoringPeriodId': 5, 'statSourceId': 1, 'appliedTotal': 3.0},
+        ]}},
+    ]
+}
+
+
+@pytest.fixture
+def espn(stub_server):
+    stub_server.route(ESPN_PATH, ESPN_WEEK_5)
+    return stub_server
+
+
+def make_source(sleeper_url, espn_url, hedge_after=0.2, deadline=3.0):
+    crosswalk = PlayerCrosswalk({'4046': '3139477'})
+    return HedgedProjectionSource(
+        SleeperClient(base_url=sleeper_url, timeout=5),
+        ESPNClient(base_url=espn_url, timeout=5),
+        crosswalk,
+        hedge_after=hedge_after,
+        deadline=deadline
+    )
+
+
+class TestHedgedProjectionSource:
+    """Test cases for hedged fetching"""
+
+    def test_fast_sleeper_never_hedges(self, stub_server, espn):
+        """A Sleeper answer inside the budget is used without calling ESPN"""
+        stub_server.route(SLEEPER_PATH, {'4046': {'pts_ppr': 24.5}})
+        source = make_source(stub_server.url, espn.url)
+
+        projections, name = source.get_projections(5, 2024)
+        assert name == 'sleeper'
+        assert projections == {'4046': {'pts_ppr': 24.5}}
+        assert ESPN_PATH not in stub_server.requests
+
+    def test_slow_sleeper_hedges_to_espn(self, stub_server, espn):
+        """ESPN wins when Sleeper is slower than the hedge budget"""
+        stub_server.route(SLEEPER_PATH, {'4046': {'pts_ppr': 24.5}}, delay=2.0)
+        source = make_source(stub_server.url, espn.url)
+
+        start = time.monotonic()
+        projections, name = source.get_projections(5, 2024)
+        assert time.monotonic() - start < 1.5
+        assert name == 'espn'
+        assert projections == {'4046': {'pts_ppr': 22.4}}
+
+    def test_sleeper_error_hedges_immediately(self, stub_server, espn):
+        """A failed Sleeper call falls back without waiting for the budget"""
+        stub_server.route(SLEEPER_PATH, {'error': 'boom'}, status=500)
+        source = make_source(stub_server.url, espn.url, hedge_after=2.0)
+
+        start = time.monotonic()
+        projections, name = source.get_projections(5, 2024)
+        assert time.monotonic() - start < 1.5
+        assert name == 'espn'
+
+    def test_all_sources_fail(self, stub_server):
+        """No usable answer gives an empty result"""
+        source = make_source(stub_server.url, stub_server.url, hedge_after=0.1, deadline=1.0)
+        assert source.get_projections(5, 2024) == ({}, None)
+
+
+class TestPlayerCrosswalk:
+    """Test cases for Sleeper/ESPN ID matching"""
+
+    def test_normalize_name(self):
+        assert normalize_name("Amon-Ra St. Brown") == "amonra st brown"
+        assert normalize_name("Kenneth Walker III") == "kenneth walker"
+        assert normalize_name("Odell Beckham Jr.") == "odell beckham"
+        assert normalize_name("José Ramírez") == "jose ramirez"
+
+    def test_build_matching_order(self):
+        """Sleeper's espn_id hint wins, then name+team+position, then unique names"""
+        espn_players = [
+            {'espn_id': '1', 'name': 'Mike Williams', 'team': 'NYJ', 'position': 'WR'},
+            {'espn_id': '2', 'name': 'Mike Williams', 'team': 'LAC', 'position': 'WR'},
+            {'espn_id': '3', 'name': 'Kenneth Walker', 'team': 'SEA', 'position': 'RB'},
+            {'espn_id': '4', 'name': 'Josh Allen', 'team': 'BUF', 'position': 'QB'},
+            {'espn_id': '5', 'name': 'Josh Allen', 'team': 'JAX', 'position': 'LB'},
+        ]
+        sleeper_players = [
+            {'player_id': 's1', 'name': 'Mike Williams', 'team': 'NYJ', 'position': 'WR'},
+            {'player_id': 's2', 'name': 'Mike Williams', 'team': 'FA', 'position': 'WR', 'espn_id': 2},
+            {'player_id': 's3', 'name': 'Kenneth Walker III', 'team': None, 'position': 'RB'},
+            {'player_id': 's4', 'name': 'Josh Allen', 'team': 'FA', 'position': 'QB'},
+            {'player_id': 's5', 'name': 'Nobody Here', 'team': 'KC', 'position': 'TE'},
+        ]
+        crosswalk, methods = PlayerCrosswalk.build(sleeper_players, espn_players)
+        assert crosswalk.to_espn('s1') == '1'
+        assert crosswalk.to_espn('s2') == '2'
+        assert crosswalk.to_espn('s3') == '3'
+        assert crosswalk.to_espn('s4') == '4'
+        assert crosswalk.to_espn('s5') is None
+        assert crosswalk.to_sleeper(3) == 's3'
+        assert methods == {'s1': 'name_team_position', 's2': 'sleeper_espn_id',
+                           's3': 'name_position', 's4': 'name_position'}
+
+    def test_persisted_round_trip(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "test.db"))
+        PlayerCrosswalk({'4046': '3139477'}).save(db, {'4046': 'name'})
+        assert PlayerCrosswalk.load(db).to_sleeper('3139477') == '4046'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
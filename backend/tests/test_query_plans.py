@@ -0,0 +1,175 @@
+"""
+Query plan regression checks for DatabaseConnection
+Every SELECT a method runs is captured with a trace callback and checked with
+EXPLAIN QUERY PLAN, so a query or index change that falls back to a table scan
+fails here instead of showing up as a slow endpoint
+"""
+
+import os
+import sqlite3
+import pytest
+import sys
+from contextlib import contextmanager
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from database import DatabaseConnection
+from database.migrations import SCHEMA_VERSION
+
+
+def _populate(db):
+    db.insert_player('qb1', 'QB One', 'QB')
+    db.insert_player('wr1', 'WR One', 'WR')
+    for season in (2023, 2024):
+        db.insert_weekly_stats([(player_id, season, week, 10.0 + week, 9.0, '{}')
+                                for player_id in ('qb1', 'wr1') for week in range(1, 5)])
+        db.insert_projections([('qb1', season, week, 11.0, 'sleeper') for week in range(1, 6)])
+    db.upsert_volatility_bands([('qb1', 2024, 5, 11.0, 5.0, 11.0, 17.0, 0.4, 100)])
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "test.db"))
+    _populate(db)
+    return db
+
+
+def query_plans(db, func) -> list:
+    """
+    Run func and return (sql, plan lines) for every SELECT it executed on db
+    Plans are taken on the same connection before it closes, so attached season
+    partitions and temporary views are still there
+    """
+    plans = []
+    get_connection = db.get_connection
+
+    @contextmanager
+    def traced():
+        statements = []
+        with get_connection() as conn:
+            conn.set_trace_callback(statements.append)
+            yield conn
+            conn.set_trace_callback(None)
+            for sql in statements:
+                if sql.lstrip().upper().startswith('SELECT'):
+                    plans.append((sql, [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]))
+
+    db.get_connection = traced
+    try:
+        func()
+    finally:
+        del db.get_connection
+    assert plans, "no SELECT statements captured"
+    return plans
+
+
+def assert_no_scans(plans):
+    for sql, lines in plans:
+        scans = [line for line in lines if line.startswith('SCAN')]
+        assert not scans, f"table scan {scans} in: {sql.strip()}"
+
+
+def assert_covering(plans, *aliases):
+    """Each alias (table name or query alias) must be read from a covering index"""
+    for alias in aliases:
+        lines = [line for _, plan in plans for line in plan if line.startswith(f"SEARCH {alias} ")]
+        assert lines, f"{alias} not searched"
+        assert all('COVERING INDEX' in line for line in lines), lines
+
+
+READ_METHODS = {
+    'get_player_by_id': lambda db: db.get_player_by_id('qb1'),
+    'get_player_stats': lambda db: db.get_player_stats('qb1', 2024),
+    'get_player_series': lambda db: db.get_player_series('qb1', 2023, 2024),
+    'get_weekly_points_since': lambda db: db.get_weekly_points_since(2024, 0),
+    'get_week_points': lambda db: db.get_week_points(2024, 5),
+    'get_projection': lambda db: db.get_projection('qb1', 2024, 5),
+    'get_week_projections': lambda db: db.get_week_projections(2024, 5),
+    'get_projection_residuals': lambda db: db.get_projection_residuals(2024, 3),
+    'get_player_fingerprints': lambda db: db.get_player_fingerprints(2024),
+    'get_projection_weeks': lambda db: db.get_projection_weeks(2024),
+    'get_volatility_bands': lambda db: db.get_volatility_bands('qb1', 2024),
+    'get_projection_block': lambda db: db.get_projection_block('qb1', 2024, 5),
+    'get_projection_snapshots': lambda db: db.get_projection_snapshots('qb1', 2024, 5),
+    'get_projection_as_of': lambda db: db.get_projection_as_of('qb1', 2024, 5, 2 ** 62),
+    'get_latest_prices': lambda db: db.get_latest_prices(2024),
+    'get_portfolio_positions': lambda db: db.get_portfolio_positions('user1'),
+    'get_price_alerts': lambda db: db.get_price_alerts('user1'),
+}
+
+
+class TestQueryPlans:
+    """No read path may scan a table"""
+
+    @pytest.mark.parametrize('method', sorted(READ_METHODS))
+    def test_no_table_scans(self, db, method):
+        assert_no_scans(query_plans(db, lambda: READ_METHODS[method](db)))
+
+    def test_stats_join_uses_indexes(self, db):
+        plans = query_plans(db, lambda: db.get_player_stats('qb1', 2024))
+        assert_covering(plans, 'ws')
+        lines = plans[0][1]
+        assert any(line.startswith('SEARCH pr ') and 'player_id=? AND season=? AND week=?' in line for line in lines)
+        assert not any('TEMP B-TREE' in line for line in lines)  # ORDER BY week comes from the index
+
+    def test_bulk_reads_are_covered(self, db):
+        assert_covering(query_plans(db, lambda: db.get_player_series('qb1', 2023, 2024)), 'ws')
+        assert_covering(query_plans(db, lambda: db.get_weekly_points_since(2024, 0)), 'ws')
+        assert_covering(query_plans(db, lambda: db.get_week_projections(2024, 5)), 'pr', 'ws')
+        assert_covering(query_plans(db, lambda: db.get_projection_residuals(2024, 3)), 'ws')
+
+    def test_partitioned_reads(self, tmp_path):
+        db = DatabaseConnection(str(tmp_path / "main.db"), partition_dir=str(tmp_path / "seasons"))
+        _populate(db)
+        for method in ('get_player_stats', 'get_player_series', 'get_week_projections'):
+            assert_no_scans(query_plans(db, lambda: READ_METHODS[method](db)))
+
+
+class TestStatsJoin:
+    """get_player_stats and get_weekly_points_since prefer market-open snapshot projections"""
+
+    def test_snapshot_overrides_stored_projection(self, db):
+        db.insert_weekly_stat('wr1', 2024, 5, 20.0, 12.0)
+        db.insert_projection('wr1', 2024, 5, 15.0)
+        stats = {row['week']: row for row in db.get_player_stats('wr1', 2024)}
+        assert stats[5]['projected_points'] == 15.0
+        assert stats[1]['projected_points'] == 9.0  # no snapshot: stored projection
+
+        since = {row['week']: row for row in db.get_weekly_points_since(2024) if row['player_id'] == 'wr1'}
+        assert since[5]['projected_points'] == 15.0
+        assert since[1]['projected_points'] == 9.0
+
+
+class TestIndexMigration:
+    """Migration 3 replaces the old stats indexes"""
+
+    def test_old_indexes_dropped(self, tmp_path):
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+        CREATE TABLE weekly_stats (id INTEGER PRIMARY KEY AUTOINCREMENT, player_id TEXT NOT NULL,
+            season INTEGER NOT NULL, week INTEGER NOT NULL, actual_points REAL NOT NULL,
+            projected_points REAL, stats_json TEXT, timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(player_id, season, week));
+        CREATE TABLE projections (id INTEGER PRIMARY KEY AUTOINCREMENT, player_id TEXT NOT NULL,
+            season INTEGER NOT NULL, week INTEGER NOT NULL, projected_points REAL NOT NULL,
+            snapshot_time TIMESTAMP NOT NULL, data_source TEXT DEFAULT 'sleeper', UNIQUE(player_id, season, week));
+        CREATE INDEX idx_weekly_stats_player_season ON weekly_stats(player_id, season);
+        CREATE INDEX idx_projections_player_week ON projections(player_id, week);
+        PRAGMA user_version = 2;
+        """)
+        conn.close()
+
+        DatabaseConnection(path)
+        conn = sqlite3.connect(path)
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
+        assert 'idx_weekly_stats_player_season' not in indexes
+        assert 'idx_projections_player_week' not in indexes
+        assert {'idx_weekly_stats_player_points', 'idx_projections_season_week'} <= indexes
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,87 @@
+"""
+Tests for JSON serialization and response compression
+"""
+
+import gzip
+import json
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, jsonify
+
+from api.compression import install_compression, parse_accept_encoding
+from api.serialization import install_json_provider
+from metrics import CACHE_REQUESTS
+
+PLAYERS = [{'player_id': str(i), 'name': f'Player {i}', 'position': 'WR', 'team': 'KC'} for i in range(500)]
+
+
+def make_app(serializer='auto'):
+    app = Flask(__name__)
+    install_json_provider(app, serializer)
+    install_compression(app, min_size=1024)
+
+    @app.route('/players')
+    def players():
+        return jsonify({'players': PLAYERS})
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    return app
+
+
+class TestCompression:
+    """Test cases for negotiated compression"""
+
+    def test_parse_accept_encoding(self):
+        assert parse_accept_encoding('gzip;q=0.5, br, identity;q=0') == {'gzip': 0.5, 'br': 1.0, 'identity': 0.0}
+        assert parse_accept_encoding(None) == {}
+
+    def test_gzip_large_body(self):
+        """Large bodies are gzipped when the client accepts gzip"""
+        client = make_app().test_client()
+        response = client.get('/players', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response.headers['Vary']
+        raw = gzip.decompress(response.data)
+        assert json.loads(raw)['players'] == PLAYERS
+        assert int(response.headers['Content-Length']) < len(raw) / 4
+
+    def test_identity_when_not_accepted_or_small(self):
+        """Small bodies and clients without gzip get identity responses"""
+        client = make_app().test_client()
+        assert 'Content-Encoding' not in client.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+        assert 'Content-Encoding' not in client.get('/players').headers
+        refused = client.get('/players', headers={'Accept-Encoding': 'gzip;q=0'})
+        assert 'Content-Encoding' not in refused.headers
+
+    def test_compressed_body_is_reused(self):
+        """Identical bodies hit the compressed-body cache"""
+        client = make_app().test_client()
+        first = client.get('/players', headers={'Accept-Encoding': 'gzip'}).data
+        hits = CACHE_REQUESTS.get('compression', 'hit')
+        second = client.get('/players', headers={'Accept-Encoding': 'gzip'}).data
+        assert CACHE_REQUESTS.get('compression', 'hit') == hits + 1
+        assert first == second
+
+
+class TestSerialization:
+    """Test cases for the pluggable JSON provider"""
+
+    @pytest.mark.parametrize('serializer', ['auto', 'stdlib'])
+    def test_providers_round_trip(self, serializer):
+        client = make_app(serializer).test_client()
+        response = client.get('/players')
+        assert response.mimetype == 'application/json'
+        assert response.get_json()['players'] == PLAYERS
+        assert b', ' not in response.data  # compact output
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,223 @@
+"""
+Tests for the shared rate budget and the job scheduler
+"""
+
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.scheduler import (PRIORITY_BACKFILL, PRIORITY_BACKGROUND, PRIORITY_LIVE, RateBudget,
+                            Scheduler)
+from data.host_lock import claim_run
+from data.sleeper_client import SleeperClient
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRateBudget:
+    """Test cases for the shared token bucket"""
+
+    def test_reserve_is_live_only(self):
+        """Non-live callers stop at the reserve; live callers can spend it"""
+        fake = FakeTime()
+        budget = RateBudget(per_minute=10, reserve=0.2, time_func=fake)
+        assert all(budget.acquire(PRIORITY_BACKGROUND, timeout=0) for _ in range(8))
+        assert not budget.acquire(PRIORITY_BACKGROUND, timeout=0)
+        assert budget.acquire(PRIORITY_LIVE, timeout=0)
+        assert budget.available() == 1
+
+        fake.now += 6  # one token per 6 seconds
+        assert budget.available() == 2
+
+    def test_waiters_served_in_priority_order(self):
+        """With the bucket empty, a live waiter gets the next token before an earlier backfill waiter"""
+        budget = RateBudget(per_minute=600, reserve=0.0)  # 10 tokens/second
+        while budget.acquire(PRIORITY_LIVE, timeout=0):
+            pass
+        order = []
+
+        def take(priority, name):
+            budget.acquire(priority)
+            order.append(name)
+
+        backfill = threading.Thread(target=take, args=(PRIORITY_BACKFILL, 'backfill'))
+        backfill.start()
+        time.sleep(0.02)
+        live = threading.Thread(target=take, args=(PRIORITY_LIVE, 'live'))
+        live.start()
+        backfill.join(2)
+        live.join(2)
+        assert order == ['live', 'backfill']
+
+    def test_shared_bucket_across_processes(self, tmp_path):
+        """Budgets on one state file spend a single bucket, including from a forked process"""
+        fake = FakeTime()
+        path = str(tmp_path / "budget")
+        first = RateBudget(per_minute=10, reserve=0.0, time_func=fake, path=path)
+        second = RateBudget(per_minute=10, reserve=0.0, time_func=fake, path=path)
+        assert all(first.acquire(timeout=0) for _ in range(4))
+
+        pid = os.fork()
+        if pid == 0:  # child: spend three more from its own copy
+            os._exit(0 if all(first.acquire(timeout=0) for _ in range(3)) else 1)
+        assert os.waitpid(pid, 0)[1] == 0
+        assert second.available() == 3
+        assert all(second.acquire(timeout=0) for _ in range(3))
+        assert not first.acquire(timeout=0)
+
+        fake.now += 12  # two tokens refill for everyone
+        assert first.available() == second.available() == 2
+
+    def test_thread_priority_context(self):
+        budget = RateBudget()
+        with budget.priority(PRIORITY_LIVE):
+            assert budget.current_priority() == PRIORITY_LIVE
+        assert budget.current_priority() != PRIORITY_LIVE
+
+    def test_client_draws_from_shared_budget(self, stub_server):
+        """SleeperClient spends budget tokens and reports them as remaining calls"""
+        stub_server.route('/state/nfl', {'week': 5})
+        budget = RateBudget(per_minute=100, reserve=0.0, time_func=FakeTime())
+        client = SleeperClient(base_url=stub_server.url, rate_budget=budget)
+        client._make_request('state/nfl')
+        client._make_request('state/nfl')  # cached, no token
+        assert budget.available() == 99
+        assert client.remaining_calls() == 99
+
+
+class TestScheduler:
+    """Test cases for recurring jobs (driven with a fake clock, no threads)"""
+
+    def make(self):
+        fake = FakeTime()
+        return fake, Scheduler(time_func=fake, seed=1)
+
+    def test_runs_on_interval(self):
+        fake, scheduler = self.make()
+        calls = []
+        scheduler.add_job('tick', lambda: calls.append(fake.now), interval=10)
+
+        scheduler.run_pending()
+        assert scheduler.run_queued() == 0
+        fake.now += 10
+        scheduler.run_pending()
+        scheduler.run_queued()
+        assert calls == [1010.0]
+        assert scheduler.stats()['tick']['runs'] == 1
+        assert scheduler.stats()['tick']['next_run_in'] == 10
+
+    def test_priority_order(self):
+        """Due jobs run most urgent first"""
+        fake, scheduler = self.make()
+        order = []
+        scheduler.add_job('backfill', lambda: order.append('backfill'), 10, priority=PRIORITY_BACKFILL,
+                          run_immediately=True)
+        scheduler.add_job('live', lambda: order.append('live'), 10, priority=PRIORITY_LIVE, run_immediately=True)
+        scheduler.run_pending()
+        scheduler.run_queued()
+        assert order == ['live', 'backfill']
+
+    def test_overlap_is_skipped(self):
+        """A job still queued when its next slot arrives doesn't queue twice"""
+        fake, scheduler = self.make()
+        calls = []
+        scheduler.add_job('slow', lambda: calls.append(1), interval=10, run_immediately=True)
+        scheduler.run_pending()
+        fake.now += 10
+        scheduler.run_pending()
+        assert scheduler.run_queued() == 1
+        assert calls == [1]
+        assert scheduler.stats()['slow']['skipped'] == 1
+
+    def test_missed_runs_catch_up(self):
+        """Missed slots run up to max_catch_up times; the rest are dropped"""
+        fake, scheduler = self.make()
+        calls = []
+        scheduler.add_job('coalesced', lambda: calls.append('c'), interval=10)
+        scheduler.add_job('catch_up', lambda: calls.append('u'), interval=10, max_catch_up=3)
+        fake.now += 55  # five slots due
+        scheduler.run_pending()
+        scheduler.run_queued()
+        assert calls.count('c') == 1
+        assert calls.count('u') == 3
+        stats = scheduler.stats()
+        assert stats['coalesced']['missed'] == 4
+        assert stats['catch_up']['missed'] == 2
+        assert stats['coalesced']['next_run_in'] == 5  # stays on the original grid
+
+    def test_failure_retries_sooner(self):
+        fake, scheduler = self.make()
+        scheduler.add_job('flaky', lambda: False, interval=3600, retry_interval=60, run_immediately=True)
+        scheduler.run_pending()
+        scheduler.run_queued()
+        stats = scheduler.stats()['flaky']
+        assert stats['failures'] == 1
+        assert stats['last_error'] == 'returned False'
+        assert stats['next_run_in'] == 60
+
+    def test_exceptions_are_contained(self):
+        fake, scheduler = self.make()
+
+        def boom():
+            raise RuntimeError('upstream down')
+
+        scheduler.add_job('boom', boom, interval=10, run_immediately=True)
+        scheduler.run_pending()
+        scheduler.run_queued()
+        assert scheduler.stats()['boom']['last_error'] == 'upstream down'
+
+    def test_jitter_delays_within_bound(self):
+        fake, scheduler = self.make()
+        scheduler.add_job('jittery', lambda: None, interval=100, jitter=5)
+        assert 100 <= scheduler.stats()['jittery']['next_run_in'] <= 105
+
+    def test_jobs_run_at_their_priority(self):
+        """Upstream calls made inside a job use the job's budget priority"""
+        budget = RateBudget()
+        seen = []
+        fake = FakeTime()
+        scheduler = Scheduler(budget, time_func=fake)
+        scheduler.add_job('live', lambda: seen.append(budget.current_priority()), 10, priority=PRIORITY_LIVE,
+                          run_immediately=True)
+        scheduler.run_pending()
+        scheduler.run_queued()
+        assert seen == [PRIORITY_LIVE]
+
+    def test_threads_start_and_stop(self):
+        scheduler = Scheduler(workers=2)
+        ran = threading.Event()
+        scheduler.add_job('once', ran.set, interval=60, run_immediately=True)
+        scheduler.start()
+        try:
+            assert ran.wait(2)
+        finally:
+            scheduler.stop()
+
+    def test_duplicate_names_rejected(self):
+        fake, scheduler = self.make()
+        scheduler.add_job('a', lambda: None, 10)
+        with pytest.raises(ValueError):
+            scheduler.add_job('a', lambda: None, 10)
+
+
+    def test_one_claim_per_interval(self, tmp_path):
+        """Of the workers sharing a claim file, one runs each interval"""
+        path = str(tmp_path / "job.lock")
+        assert claim_run(path, 3600)
+        assert not claim_run(path, 3600)
+        assert claim_run(path, 0)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
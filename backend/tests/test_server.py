@@ -0,0 +1,165 @@
+"""
+Tests for production server setup: gunicorn options, cache warming and schema init
+"""
+
+import socket
+import time
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from conftest import APP_PLAYERS
+from database import DatabaseConnection
+from metrics import REGISTRY
+import server
+
+
+class TestServerOptions:
+    """Test cases for the gunicorn configuration built by ProductionServer"""
+
+    def test_defaults_from_config(self):
+        cfg = server.ProductionServer().cfg
+        assert cfg.workers == Config.SERVER_WORKERS
+        assert cfg.threads == Config.SERVER_THREADS
+        assert cfg.worker_class_str == 'gthread'
+        assert cfg.preload_app is True
+        assert cfg.graceful_timeout == Config.SERVER_GRACEFUL_TIMEOUT
+        assert cfg.post_fork is server._start_worker_services
+        assert cfg.worker_exit is server._stop_worker_services
+
+    def test_overrides_skip_none(self):
+        """Explicit options win; None keeps the configured default"""
+        cfg = server.ProductionServer({'workers': None, 'threads': 2, 'bind': '127.0.0.1:9000'}).cfg
+        assert cfg.workers == Config.SERVER_WORKERS
+        assert cfg.threads == 2
+        assert cfg.bind == ['127.0.0.1:9000']
+
+    def test_serve_binds_port(self, monkeypatch):
+        started = []
+        monkeypatch.setattr(server.ProductionServer, 'run', lambda self: started.append(self.cfg))
+        server.serve(workers=3, port=8123)
+        assert started[0].workers == 3
+        assert started[0].bind == [f"{Config.SERVER_HOST}:8123"]
+
+
+class TestSchemaInit:
+    """Schema setup runs once per database file per process"""
+
+    def test_once_per_file(self, tmp_path, monkeypatch):
+        calls = []
+        original = DatabaseConnection._create_schema
+        monkeypatch.setattr(DatabaseConnection, '_create_schema', lambda self: (calls.append(1), original(self)))
+        path = str(tmp_path / "test.db")
+        DatabaseConnection(path)
+        DatabaseConnection(path)
+        assert len(calls) == 1
+
+        os.remove(path)  # a recreated file gets its schema again
+        DatabaseConnection(path).get_player_records()
+        assert len(calls) == 2
+
+
+class TestWarmCaches:
+    """warm_caches fills what the startup routes read"""
+
+    def test_players_and_route_bodies_warmed(self, app_module):
+        compressor = app_module.compressor
+        compressor.cache.clear()
+        warmed = app_module.warm_caches()
+        assert warmed[0] == '/api/players'
+        assert len(warmed) == len(app_module.WARM_PATHS)
+        assert len(app_module.player_universe.snapshot()) == APP_PLAYERS
+
+        # The players body is now served from the compressed-body cache
+        before = len(compressor.cache._entries)
+        assert before >= len(compressor.encodings)
+        client = app_module.app.test_client()
+        response = client.get('/api/players', headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert len(compressor.cache._entries) == before
+
+
+
+class TestTradingServer:
+    """The production server forks the trading process and points its workers at it"""
+
+    def test_load_starts_trading_process(self, app_module, monkeypatch):
+        app = app_module.app
+        monkeypatch.setattr(app_module, 'warm_caches', lambda: [])
+        monkeypatch.setattr(server, 'start_trading_process', lambda port: 4242)
+        shared = []
+        monkeypatch.setattr(REGISTRY, 'share', shared.append)
+        try:
+            production = server.ProductionServer({'workers': 3})
+            production.load()
+            assert production.trading_pid == 4242
+            assert shared == [f"{Config.DATABASE_PATH}.metrics"]
+            assert app.config['TRADING_URL'] == f"http://127.0.0.1:{Config.TRADING_PORT}"
+        finally:
+            app.config['TRADING_URL'] = None
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class TestTradingProcess:
+    """Workers forward order book, alert and leaderboard routes to the one trading process"""
+
+    def test_unreachable_trading_process(self, app_module):
+        app = app_module.app
+        app.config['TRADING_URL'] = f"http://127.0.0.1:{free_port()}"
+        try:
+            response = app.test_client().get('/api/orders/book/1000')
+        finally:
+            app.config['TRADING_URL'] = None
+        assert response.status_code == 503
+        assert response.get_json() == {'error': 'Trading service unavailable'}
+
+    def test_orders_from_every_worker_share_one_book(self, app_module, monkeypatch):
+        """Orders and alerts forwarded from this process are served by the forked trading process"""
+        app = app_module.app
+        monkeypatch.setattr(app_module.matching_engine, 'market_open', lambda: True)  # inherited by the fork
+        port = free_port()
+        pid = server.start_trading_process(port)
+        app.config['TRADING_URL'] = f"http://127.0.0.1:{port}"
+        try:
+            client = app.test_client()
+            deadline = time.monotonic() + 10
+            while client.get('/api/orders/book/1002').status_code != 200:
+                assert time.monotonic() < deadline, "trading process did not start"
+                time.sleep(0.05)
+            sell = client.post('/api/orders', json={'user_id': 'seller', 'player_id': '1002', 'side': 'sell',
+                                                    'quantity': 2, 'price': 11.0})
+            assert sell.get_json()['status'] == 'open'
+            assert client.get('/api/orders/book/1002').get_json()['asks'] == [{'price': 11.0, 'quantity': 2}]
+            buy = client.post('/api/orders', json={'user_id': 'buyer', 'player_id': '1002', 'side': 'buy',
+                                                   'quantity': 2, 'price': 11.0})
+            assert buy.get_json()['status'] == 'filled'
+            order_id = sell.get_json()['order']['order_id']
+            assert client.delete(f'/api/orders/{order_id}?user_id=seller').status_code == 404
+            assert app_module.matching_engine.snapshot('1002')['last_price'] is None  # not matched here
+
+            alert = client.post('/api/alerts', json={'user_id': 'watcher', 'player_id': '1002',
+                                                     'threshold': 12, 'direction': 'above'}).get_json()
+            assert alert['current_price'] == 11.0  # the trading process saw the fill
+            for user_id, side in (('seller', 'sell'), ('buyer', 'buy')):
+                client.post('/api/orders', json={'user_id': user_id, 'player_id': '1002', 'side': side,
+                                                 'quantity': 1, 'price': 12.0})
+            while not [row for row in app_module.db.get_price_alerts('watcher') if row['triggered_price']]:
+                assert time.monotonic() < deadline + 10, "alert did not trigger"
+                time.sleep(0.05)
+            assert len(app_module.price_alerts) == 0  # nothing indexed in this process
+        finally:
+            app.config['TRADING_URL'] = None
+            server.stop_trading_process(pid, 10)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
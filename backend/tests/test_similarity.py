@@ -0,0 +1,106 @@
+"""
+Tests for the player similarity index
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.similarity import SimilarityIndex
+from database import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "test.db"))
+    players = [('qb1', 'QB'), ('qb2', 'QB'), ('wr1', 'WR'), ('wr2', 'WR')]
+    for player_id, position in players:
+        db.insert_player(player_id, player_id.upper(), position)
+    # qb2 is qb1 scaled (cosine 1), wr1 moves opposite to qb1, wr2 is qb1 shifted up (correlation 1)
+    base = [10.0, 20.0, 15.0, 30.0, 5.0]
+    for week, points in enumerate(base, start=1):
+        db.insert_weekly_stat('qb1', 2024, week, points)
+        db.insert_weekly_stat('qb2', 2024, week, points * 2)
+        db.insert_weekly_stat('wr1', 2024, week, 40.0 - points)
+        db.insert_weekly_stat('wr2', 2024, week, points + 50.0)
+    return db
+
+
+class TestSimilarityIndex:
+    """Test cases for cosine/correlation neighbours"""
+
+    def test_cosine_neighbours(self, db):
+        index = SimilarityIndex(db, 2024)
+        assert index.refresh() == 20
+        neighbours = index.neighbors('qb1', k=3)
+        assert neighbours[0] == ('qb2', 1.0)
+        assert [player_id for player_id, _ in neighbours] == ['qb2', 'wr2', 'wr1']
+
+    def test_correlation_ignores_level(self, db):
+        index = SimilarityIndex(db, 2024)
+        index.refresh()
+        scores = dict(index.neighbors('qb1', k=3, method='correlation'))
+        assert scores['wr2'] == pytest.approx(1.0)
+        assert scores['wr1'] == pytest.approx(-1.0)
+
+    def test_position_filter_and_k(self, db):
+        index = SimilarityIndex(db, 2024)
+        index.refresh()
+        assert [p for p, _ in index.neighbors('qb1', k=10, position='WR')] == ['wr2', 'wr1']
+        assert len(index.neighbors('qb1', k=1)) == 1
+        assert index.neighbors('qb1', position='TE') == []
+        with pytest.raises(KeyError):
+            index.neighbors('nobody')
+        with pytest.raises(ValueError):
+            index.neighbors('qb1', method='euclid')
+
+    def test_incremental_refresh(self, db):
+        """Only rows past the watermark are read; corrections and new players apply"""
+        index = SimilarityIndex(db, 2024)
+        index.refresh()
+        assert index.refresh() == 0
+
+        db.insert_player('rb1', 'RB1', 'RB')
+        for week, points in enumerate([10.0, 20.0, 15.0, 30.0, 5.0], start=1):
+            db.insert_weekly_stat('rb1', 2024, week, points * 3)
+        db.insert_weekly_stat('qb2', 2024, 1, 100.0)  # stat correction
+        assert index.refresh() == 6
+        assert len(index) == 5
+
+        scores = dict(index.neighbors('qb1', k=4))
+        assert scores['rb1'] == pytest.approx(1.0)
+        assert scores['qb2'] < 0.99
+
+    def test_matches_bruteforce(self, tmp_path):
+        """Scores agree with a direct pairwise cosine computation"""
+        db = DatabaseConnection(str(tmp_path / "random.db"))
+        rng = np.random.default_rng(0)
+        vectors = {}
+        for i in range(30):
+            player_id = f"p{i}"
+            db.insert_player(player_id, player_id, 'WR')
+            vectors[player_id] = np.zeros(18)
+            for week in range(1, 19):
+                if rng.random() < 0.9:
+                    points = float(rng.uniform(0, 30))
+                    vectors[player_id][week - 1] = points
+                    db.insert_weekly_stat(player_id, 2024, week, points)
+
+        index = SimilarityIndex(db, 2024)
+        index.refresh()
+        query = vectors['p0']
+        expected = sorted(
+            ((pid, float(v @ query / (np.linalg.norm(v) * np.linalg.norm(query)))) for pid, v in vectors.items()
+             if pid != 'p0'),
+            key=lambda item: -item[1])[:5]
+        result = index.neighbors('p0', k=5)
+        assert [pid for pid, _ in result] == [pid for pid, _ in expected]
+        assert [score for _, score in result] == pytest.approx([score for _, score in expected], abs=1e-4)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
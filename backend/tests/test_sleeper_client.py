@@ -0,0 +1,146 @@
+"""
+Tests for SleeperClient request coalescing and stale-while-revalidate caching
+"""
+
+import pytest
+import requests
+import threading
+import time
+from datetime import datetime, timedelta
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.sleeper_client import SleeperClient
+from metrics import CACHE_REQUESTS
+
+
+def fetch_concurrently(client, endpoint, callers=8):
+    results, errors = [], []
+    barrier = threading.Barrier(callers)
+
+    def call():
+        barrier.wait()
+        try:
+            results.append(client._make_request(endpoint))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return results, errors
+
+
+class TestSingleFlight:
+    """Test cases for coalescing concurrent identical requests"""
+
+    def test_concurrent_misses_share_one_request(self, stub_server):
+        stub_server.route('/stats/nfl/2024/5', {'4046': {'pts_ppr': 24.5}}, delay=0.3)
+        client = SleeperClient(base_url=stub_server.url)
+        coalesced = CACHE_REQUESTS.get('sleeper', 'coalesced')
+
+        results, errors = fetch_concurrently(client, 'stats/nfl/2024/5')
+        assert not errors
+        assert results == [{'4046': {'pts_ppr': 24.5}}] * 8
+        assert stub_server.requests.count('/stats/nfl/2024/5') == 1
+        assert CACHE_REQUESTS.get('sleeper', 'coalesced') == coalesced + 7
+        assert not client._inflight
+
+    def test_response_stored_after_miss_is_reused(self, stub_server):
+        """A caller that missed just before the leader finished takes its cached response"""
+        stub_server.route('/stats/nfl/2024/5', {'4046': {'pts_ppr': 24.5}})
+        client = SleeperClient(base_url=stub_server.url)
+        client.cache['stats/nfl/2024/5'] = ({'4046': {'pts_ppr': 20.0}}, datetime.now())
+        assert client._fetch_shared('stats/nfl/2024/5', use_cache=True) == {'4046': {'pts_ppr': 20.0}}
+        assert stub_server.requests.count('/stats/nfl/2024/5') == 0
+        assert client._fetch_shared('stats/nfl/2024/5', use_cache=False) == {'4046': {'pts_ppr': 24.5}}
+
+    def test_failure_is_shared_then_retried(self, stub_server):
+        """Waiters get the leader's error; the next call makes a fresh request"""
+        stub_server.route('/players/nfl', {'error': 'boom'}, status=503, delay=0.2)
+        client = SleeperClient(base_url=stub_server.url)
+
+        results, errors = fetch_concurrently(client, 'players/nfl', callers=4)
+        assert not results
+        assert len(errors) == 4 and all(isinstance(e, requests.HTTPError) for e in errors)
+        assert stub_server.requests.count('/players/nfl') == 1
+
+        stub_server.route('/players/nfl', {'4046': {}})
+        assert client._make_request('players/nfl') == {'4046': {}}
+
+
+class TestStaleWhileRevalidate:
+    """Test cases for serving expired entries during a background refresh"""
+
+    def test_stale_entry_served_and_refreshed_once(self, stub_server):
+        stub_server.route('/state/nfl', {'week': 6}, delay=0.2)
+        client = SleeperClient(base_url=stub_server.url)
+        expired = datetime.now() - timedelta(seconds=client.cache_ttl + 1)
+        client.cache['state/nfl'] = ({'week': 5}, expired)
+
+        start = time.monotonic()
+        assert client._make_request('state/nfl') == {'week': 5}
+        assert client._make_request('state/nfl') == {'week': 5}
+        assert time.monotonic() - start < 0.15  # never waited on the upstream
+
+        deadline = time.monotonic() + 3
+        while client.cache['state/nfl'][0] != {'week': 6} and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert client._make_request('state/nfl') == {'week': 6}
+        assert stub_server.requests.count('/state/nfl') == 1
+
+    def test_concurrent_stale_hits_start_one_refresh(self, stub_server, monkeypatch):
+        """A burst of stale hits starts one background thread and one upstream call"""
+        stub_server.route('/state/nfl', {'week': 6}, delay=0.2)
+        client = SleeperClient(base_url=stub_server.url)
+        expired = datetime.now() - timedelta(seconds=client.cache_ttl + 1)
+        client.cache['state/nfl'] = ({'week': 5}, expired)
+        started = []
+        original_start = threading.Thread.start
+
+        def counting_start(thread):
+            if thread.name == 'sleeper-revalidate':
+                started.append(thread)
+            original_start(thread)
+
+        monkeypatch.setattr(threading.Thread, 'start', counting_start)
+        results, errors = fetch_concurrently(client, 'state/nfl', callers=16)
+        assert not errors
+        assert results == [{'week': 5}] * 16
+        assert len(started) == 1
+        started[0].join(3)
+        assert stub_server.requests.count('/state/nfl') == 1
+        assert not client._inflight
+
+    def test_uncached_request_is_a_bypass(self, stub_server):
+        stub_server.route('/players/nfl', {'4046': {'full_name': 'Patrick Mahomes'}})
+        client = SleeperClient(base_url=stub_server.url)
+        misses, bypasses = CACHE_REQUESTS.get('sleeper', 'miss'), CACHE_REQUESTS.get('sleeper', 'bypass')
+        client._make_request('players/nfl', use_cache=False)
+        assert CACHE_REQUESTS.get('sleeper', 'bypass') == bypasses + 1
+        assert CACHE_REQUESTS.get('sleeper', 'miss') == misses
+        assert 'players/nfl' not in client.cache
+
+    def test_too_old_entry_is_a_miss(self, stub_server):
+        stub_server.route('/state/nfl', {'week': 6})
+        client = SleeperClient(base_url=stub_server.url)
+        expired = datetime.now() - timedelta(seconds=client.cache_ttl + client.stale_ttl + 1)
+        client.cache['state/nfl'] = ({'week': 5}, expired)
+        assert client._make_request('state/nfl') == {'week': 6}
+
+    def test_failed_refresh_keeps_stale_entry(self, stub_server):
+        client = SleeperClient(base_url=stub_server.url)  # every path 404s
+        expired = datetime.now() - timedelta(seconds=client.cache_ttl + 1)
+        client.cache['state/nfl'] = ({'week': 5}, expired)
+        assert client._make_request('state/nfl') == {'week': 5}
+        time.sleep(0.2)
+        assert client._make_request('state/nfl') == {'week': 5}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,116 @@
+"""
+Tests for Sleeper response recording and the replay server
+"""
+
+import json
+import pytest
+import requests
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.sleeper_client import SleeperClient
+from data.sleeper_replay import Cassette, LiveWeekClock, ReplayServer
+
+STATS_WEEK_3 = {'4046': {'pass_yd': 300, 'pass_td': 2, 'pts_ppr': 24.5}}
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    cassette = Cassette(str(tmp_path / "cassette"))
+    cassette.record('stats/nfl/2024/3', STATS_WEEK_3)
+    cassette.record('stats/nfl/2024/2', STATS_WEEK_3)
+    cassette.record('projections/nfl/2024/3', {'4046': {'pts_ppr': 22.0}})
+    return cassette
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRecordReplay:
+    """Test cases for recording through SleeperClient and replaying"""
+
+    def test_client_records_responses(self, stub_server, tmp_path):
+        """Every successful response is written to the recorder"""
+        stub_server.route('/players/nfl', {'4046': {'full_name': 'Patrick Mahomes'}})
+        cassette = Cassette(str(tmp_path / "recorded"))
+        SleeperClient(base_url=stub_server.url, recorder=cassette).get_all_players()
+
+        assert cassette.endpoints() == ['players/nfl']
+        assert cassette.load('players/nfl') == {'4046': {'full_name': 'Patrick Mahomes'}}
+
+    def test_replay_serves_recording(self, cassette):
+        """A client pointed at the replay server gets the recorded body; unknown endpoints 404"""
+        with ReplayServer(cassette) as server:
+            client = SleeperClient(base_url=server.url)
+            assert client.get_player_stats(3, 2024) == STATS_WEEK_3
+            with pytest.raises(requests.HTTPError):
+                client.get_league_info('123')
+        assert server.counts['served'] == 1
+        assert server.counts['missing'] == 1
+
+    def test_injected_faults(self, cassette):
+        """error_rate and throttle_rate answer 500 and 429 (with Retry-After)"""
+        with ReplayServer(cassette, error_rate=1.0, seed=1) as server:
+            assert requests.get(f"{server.url}/stats/nfl/2024/3").status_code == 500
+
+        with ReplayServer(cassette, throttle_rate=1.0, seed=1) as server:
+            response = requests.get(f"{server.url}/stats/nfl/2024/3")
+            assert response.status_code == 429
+            assert response.headers['Retry-After'] == '1'
+
+    def test_requests_per_minute_limit(self, cassette):
+        """Requests over the per-minute budget are throttled"""
+        server = ReplayServer(cassette, requests_per_minute=2)
+        statuses = [server.handle('/stats/nfl/2024/3')[0] for _ in range(3)]
+        assert statuses == [200, 200, 429]
+
+    def test_latency_and_jitter_are_seeded(self, cassette):
+        first = ReplayServer(cassette, latency=0.05, jitter=0.04, seed=7)
+        second = ReplayServer(cassette, latency=0.05, jitter=0.04, seed=7)
+        delays = [first._delay() for _ in range(5)]
+        assert delays == [second._delay() for _ in range(5)]
+        assert all(0.01 <= delay <= 0.09 for delay in delays)
+
+
+class TestLiveWeek:
+    """Test cases for the simulated live season"""
+
+    def test_clock_advances_and_stops(self):
+        fake = FakeTime()
+        clock = LiveWeekClock(2024, start_week=17, seconds_per_week=10, time_func=fake)
+        assert clock.position() == (17, 0.0)
+        fake.now = 15
+        assert clock.position() == (18, 0.5)
+        fake.now = 100
+        assert clock.position() == (18, 1.0)
+        assert clock.state()['week'] == 18
+
+    def test_live_week_gates_stats(self, cassette):
+        """Future weeks are empty, the current week is partial, past weeks are complete"""
+        fake = FakeTime()
+        clock = LiveWeekClock(2024, start_week=2, seconds_per_week=10, time_func=fake)
+        server = ReplayServer(cassette, clock=clock)
+
+        status, body, _ = server.handle('/stats/nfl/2024/3')
+        assert (status, body) == (200, b'{}')
+        assert server.handle('/projections/nfl/2024/3')[0] == 200  # projections exist ahead of games
+
+        fake.now = 15  # halfway through week 3
+        _, body, _ = server.handle('/state/nfl')
+        assert b'"week": 3' in body
+        assert json.loads(server.handle('/stats/nfl/2024/3')[1]) == {
+            '4046': {'pass_yd': 150, 'pass_td': 1, 'pts_ppr': 12.25}
+        }
+        assert json.loads(server.handle('/stats/nfl/2024/2')[1]) == STATS_WEEK_3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
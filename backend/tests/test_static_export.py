@@ -0,0 +1,105 @@
+"""
+Tests for the incremental static JSON export
+"""
+
+import gzip
+import json
+import os
+import pytest
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from api.payloads import player_stats_payload
+from api.static_export import export_static, load_manifest, write_static
+from database import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "test.db"))
+    for player_id, position in [('qb1', 'QB'), ('wr1', 'WR'), ('rb1', 'RB')]:
+        db.insert_player(player_id, player_id.upper(), position)
+        for week in range(1, 4):
+            db.insert_weekly_stat(player_id, 2024, week, 10.0 + week, 9.0)
+    db.insert_weekly_stat('qb1', 2023, 1, 30.0, 25.0)
+    db.insert_projection('wr1', 2024, 4, 14.0)
+    return db
+
+
+def _read(out_dir, relpath):
+    with open(os.path.join(out_dir, relpath), 'rb') as f:
+        return json.loads(f.read())
+
+
+class TestWriteStatic:
+    """Test cases for content-hashed files"""
+
+    def test_same_body_same_file(self, tmp_path):
+        first = write_static(str(tmp_path), 'players/x/stats', b'{"a":1}')
+        assert first == write_static(str(tmp_path), 'players/x/stats', b'{"a":1}')
+        assert first != write_static(str(tmp_path), 'players/x/stats', b'{"a":2}')
+        with open(tmp_path / (first + '.gz'), 'rb') as f:
+            assert gzip.decompress(f.read()) == b'{"a":1}'
+
+    def test_no_compress(self, tmp_path):
+        relpath = write_static(str(tmp_path), 'players', b'[]', compress=False)
+        assert not os.path.exists(tmp_path / (relpath + '.gz'))
+
+
+class TestExportStatic:
+    """Test cases for manifest-driven incremental exports"""
+
+    def test_full_export_matches_api_payloads(self, db, tmp_path):
+        out = str(tmp_path / "out")
+        result = export_static(db, out, [2024], workers=1)
+        assert result['rendered'] == 3
+        files = load_manifest(out)['files']
+        assert _read(out, files['/api/players/qb1/stats?season=2024']) == player_stats_payload(db, 'qb1', 2024)
+        assert len(_read(out, files['/api/players'])['players']) == 3
+        week4 = _read(out, files['/api/week-projections/4?season=2024'])
+        assert week4['projections'] == [{'player_id': 'wr1', 'position': 'WR', 'projected_points': 14.0}]
+
+    def test_only_changed_players_rerendered(self, db, tmp_path):
+        out = str(tmp_path / "out")
+        export_static(db, out, [2024], workers=1)
+        assert export_static(db, out, [2024], workers=1)['rendered'] == 0
+
+        old = load_manifest(out)['files']['/api/players/wr1/stats?season=2024']
+        db.insert_weekly_stat('wr1', 2024, 2, 40.0, 9.0)  # stat correction
+        result = export_static(db, out, [2024], workers=1)
+        assert (result['rendered'], result['unchanged']) == (1, 2)
+        new = load_manifest(out)['files']['/api/players/wr1/stats?season=2024']
+        assert new != old
+        assert _read(out, new)['weekly_stats'][1]['actual'] == 40.0
+        assert os.path.exists(os.path.join(out, old))  # old file stays for cached manifests
+
+        export_static(db, out, [2024], workers=1, prune=True)
+        assert not os.path.exists(os.path.join(out, old))
+        assert not os.path.exists(os.path.join(out, old + '.gz'))
+
+    def test_volatility_bands_mark_player_changed(self, db, tmp_path):
+        out = str(tmp_path / "out")
+        export_static(db, out, [2024], workers=1)
+        db.upsert_volatility_bands([('rb1', 2024, 4, 12.0, 6.0, 12.0, 18.0, 0.4, 100)])
+        assert export_static(db, out, [2024], workers=1)['rendered'] == 1
+
+    def test_other_seasons_carried_over(self, db, tmp_path):
+        out = str(tmp_path / "out")
+        export_static(db, out, [2023], workers=1)
+        export_static(db, out, [2024], workers=1)
+        files = load_manifest(out)['files']
+        assert '/api/players/qb1/stats?season=2023' in files
+        assert '/api/players/qb1/stats?season=2024' in files
+
+    def test_process_pool(self, db, tmp_path):
+        out = str(tmp_path / "out")
+        result = export_static(db, out, [2024], workers=2, batch_size=1)
+        assert result['rendered'] == 3
+        files = load_manifest(out)['files']
+        assert _read(out, files['/api/players/rb1/stats?season=2024'])['player_id'] == 'rb1'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,115 @@
+"""
+Tests for Monte Carlo volatility bands
+"""
+
+import numpy as np
+import pytest
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from data.volatility import build_residual_pools, compute_volatility_bands, simulate_bands
+from database import DatabaseConnection
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseConnection(str(tmp_path / "test.db"))
+    for player_id, position in [('steady', 'QB'), ('boom', 'WR'), ('rookie', 'WR'), ('unknown', 'K')]:
+        db.insert_player(player_id, player_id.title(), position)
+    # steady always hits projection; boom swings +/-10
+    for week in range(1, 9):
+        db.insert_weekly_stat('steady', 2024, week, 20.0, 20.0)
+        db.insert_weekly_stat('boom', 2024, week, 25.0 if week % 2 else 5.0, 15.0)
+    db.insert_weekly_stat('rookie', 2024, 8, 12.0, 10.0)
+    for player_id, projected in [('steady', 21.0), ('boom', 15.0), ('rookie', 10.0)]:
+        db.insert_projection(player_id, 2024, 9, projected)
+    return db
+
+
+class TestResidualPools:
+    """Test cases for pool assignment"""
+
+    def test_fallback_order(self):
+        rows = [{'player_id': 'a', 'position': 'WR', 'residual': r} for r in (1.0, 2.0, 3.0, 4.0)]
+        rows.append({'player_id': 'b', 'position': 'WR', 'residual': 9.0})
+        groups, residuals, offsets, counts = build_residual_pools(
+            ['a', 'b', 'c'], {'a': 'WR', 'b': 'WR', 'c': 'TE'}, rows, min_history=4)
+        pool_a = residuals[offsets[groups[0]]:offsets[groups[0]] + counts[groups[0]]]
+        assert list(pool_a) == [1.0, 2.0, 3.0, 4.0]
+        assert counts[groups[1]] == 5  # b borrows the WR pool
+        assert counts[groups[2]] == 5  # c has no TE history, so the global pool
+
+    def test_no_history(self):
+        groups, residuals, _, counts = build_residual_pools(['a'], {'a': 'QB'}, [])
+        assert list(groups) == [-1]
+        assert len(residuals) == 0 and len(counts) == 0
+
+
+class TestSimulateBands:
+    """Test cases for the batched bootstrap"""
+
+    def test_percentiles_follow_residuals(self):
+        groups, residuals, offsets, counts = build_residual_pools(
+            ['a', 'b'], {}, [{'player_id': 'a', 'position': None, 'residual': 0.0}] * 4 +
+            [{'player_id': 'b', 'position': None, 'residual': r} for r in (-10.0, 10.0)] * 2)
+        bands = simulate_bands(np.array([20.0, 15.0]), groups, residuals, offsets, counts, simulations=4000)
+        assert list(bands[0]) == [20.0, 20.0, 20.0, 0.0]
+        assert bands[1, 0] == 5.0 and bands[1, 2] == 25.0
+        assert bands[1, 3] == pytest.approx(10.0, abs=0.5)
+
+    def test_seeded_and_chunk_independent_shape(self):
+        rows = [{'player_id': str(i % 50), 'position': 'RB', 'residual': float(i % 7)} for i in range(500)]
+        ids = [str(i) for i in range(50)]
+        pools = build_residual_pools(ids, {}, rows)
+        projections = np.linspace(5, 25, 50)
+        first = simulate_bands(projections, *pools, simulations=300, seed=7, chunk=16)
+        second = simulate_bands(projections, *pools, simulations=300, seed=7, chunk=16)
+        assert np.array_equal(first, second)
+        assert first.shape == (50, 4)
+        assert np.all(first[:, 0] <= first[:, 1]) and np.all(first[:, 1] <= first[:, 2])
+
+
+class TestComputeVolatilityBands:
+    """Test cases for the stored weekly bands"""
+
+    def test_stores_bands(self, db):
+        assert compute_volatility_bands(db, 2024, 9, simulations=1000) == 3
+        steady = db.get_volatility_bands('steady', 2024)
+        assert len(steady) == 1
+        assert steady[0]['week'] == 9
+        assert steady[0]['p10'] == steady[0]['p90'] == 21.0
+        assert steady[0]['volatility'] == 0.0
+
+        boom = db.get_volatility_bands('boom', 2024)[0]
+        assert boom['p10'] == 5.0 and boom['p90'] == 25.0
+        assert boom['volatility'] == pytest.approx(10.0 / 15.0, abs=0.05)
+
+        # rookie has one game, so it resamples the WR pool (boom's swings plus its own)
+        rookie = db.get_volatility_bands('rookie', 2024)[0]
+        assert rookie['p10'] == 0.0 and rookie['p90'] == 20.0
+
+    def test_rerun_is_reproducible(self, db):
+        compute_volatility_bands(db, 2024, 9, simulations=500, seed=3)
+        first = db.get_volatility_bands('boom', 2024)[0]['p50']
+        compute_volatility_bands(db, 2024, 9, simulations=500, seed=3)
+        assert db.get_volatility_bands('boom', 2024)[0]['p50'] == first
+
+    def test_only_earlier_weeks_used(self, db):
+        # A week 9 result must not leak into week 9's own residual history
+        db.insert_weekly_stat('steady', 2024, 9, 60.0, 21.0)
+        compute_volatility_bands(db, 2024, 9, simulations=500)
+        assert db.get_volatility_bands('steady', 2024)[0]['p90'] == 21.0
+
+    def test_weekly_stats_projection_fallback(self, db):
+        db.insert_weekly_stat('unknown', 2024, 10, 0.0, 8.0)
+        assert compute_volatility_bands(db, 2024, 10, simulations=200) == 1
+
+    def test_no_projections(self, db):
+        assert compute_volatility_bands(db, 2024, 12) == 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])